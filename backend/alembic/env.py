@@ -11,6 +11,8 @@ from backend.core.config import settings
 # Import all models here to ensure they're registered with Base.metadata
 from backend.models.organization import Organization  # noqa
 from backend.models.user import User  # noqa
+from backend.models.session_result import SessionResult  # noqa
+from backend.models.chat_message import ChatMessage  # noqa
 
 # Alembic Config object
 config = context.config
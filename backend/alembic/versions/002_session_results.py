@@ -0,0 +1,44 @@
+"""Session results table for answers submitted over WebSocket
+
+Revision ID: 002
+Revises: 001
+Create Date: 2026-10-17 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = '002'
+down_revision = '001'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('session_results',
+        sa.Column('id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('organization_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('session_id', sa.String(length=100), nullable=False),
+        sa.Column('user_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('question_id', sa.String(length=64), nullable=False),
+        sa.Column('answer_given', sa.String(length=255), nullable=False),
+        sa.Column('is_correct', sa.Boolean(), nullable=False),
+        sa.Column('response_time_ms', sa.Integer(), nullable=False),
+        sa.Column('points', sa.Integer(), nullable=False),
+        sa.Column('answered_at', sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(['organization_id'], ['organizations.id'], ),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_session_results_organization_id'), 'session_results', ['organization_id'], unique=False)
+    op.create_index(op.f('ix_session_results_user_id'), 'session_results', ['user_id'], unique=False)
+    op.create_index('ix_session_results_session_question', 'session_results', ['session_id', 'question_id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_session_results_session_question', table_name='session_results')
+    op.drop_index(op.f('ix_session_results_user_id'), table_name='session_results')
+    op.drop_index(op.f('ix_session_results_organization_id'), table_name='session_results')
+    op.drop_table('session_results')
@@ -0,0 +1,40 @@
+"""Chat messages table for session chat history
+
+Revision ID: 003
+Revises: 002
+Create Date: 2026-10-17 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = '003'
+down_revision = '002'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('chat_messages',
+        sa.Column('id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('organization_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('session_id', sa.String(length=100), nullable=False),
+        sa.Column('user_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('text', sa.String(length=1000), nullable=False),
+        sa.Column('sent_at', sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(['organization_id'], ['organizations.id'], ),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_chat_messages_organization_id'), 'chat_messages', ['organization_id'], unique=False)
+    op.create_index(op.f('ix_chat_messages_user_id'), 'chat_messages', ['user_id'], unique=False)
+    op.create_index('ix_chat_messages_session_sent_at', 'chat_messages', ['session_id', 'sent_at'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_chat_messages_session_sent_at', table_name='chat_messages')
+    op.drop_index(op.f('ix_chat_messages_user_id'), table_name='chat_messages')
+    op.drop_index(op.f('ix_chat_messages_organization_id'), table_name='chat_messages')
+    op.drop_table('chat_messages')
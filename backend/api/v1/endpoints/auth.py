@@ -96,7 +96,9 @@ async def login(
         data={
             "sub": str(user.id),
             "org_id": str(user.organization_id),
-            "roles": [user.role.value]
+            "roles": [user.role.value],
+            # Selects the organization's realtime connection quota
+            "plan": user.organization.plan.value
         }
     )
     
@@ -0,0 +1,6 @@
+"""
+Performance benchmarks for the realtime layer
+
+Each module can be run on its own, e.g.:
+    python -m backend.benchmarks.bench_fanout
+"""
@@ -0,0 +1,84 @@
+"""
+Micro-benchmark: JSON vs MessagePack vs CBOR on representative events
+
+Reports encoded size and per-message encode/decode time for the
+``connection``, ``user_joined`` and ``score_update`` payloads, i.e. what a
+client on a weak network pays per frame with each negotiated subprotocol.
+
+Run with:
+    python -m backend.benchmarks.bench_codecs
+"""
+
+import time
+from typing import Dict, List, Sequence
+
+from backend.benchmarks.bench_encode import SCORE_UPDATE
+from backend.benchmarks.common import format_table
+from backend.websocket.codecs import CODECS
+
+PAYLOADS: Dict[str, dict] = {
+    "connection": {
+        "type": "connection",
+        "message": "Connected to session",
+        "session_id": "bench-session",
+        "user_id": "3f2b8c1e-5d4a-4b7e-9c2f-1a6d8e0b7c45",
+    },
+    "user_joined": {
+        "type": "user_joined",
+        "user_id": "3f2b8c1e-5d4a-4b7e-9c2f-1a6d8e0b7c45",
+        "session_id": "bench-session",
+        "participant_count": 42,
+    },
+    "score_update": SCORE_UPDATE,
+}
+
+
+def _time_per_call(func, arg, rounds: int) -> float:
+    """Mean seconds per call"""
+    start = time.perf_counter()
+    for _ in range(rounds):
+        func(arg)
+    return (time.perf_counter() - start) / rounds
+
+
+def run_benchmark(
+    codecs: Sequence[str] = ("json", "msgpack", "cbor"), rounds: int = 2000
+) -> List[Dict[str, object]]:
+    """
+    Measure size and speed of each codec on each payload
+
+    Args:
+        codecs: Codec names to compare (JSON is the baseline)
+        rounds: Encode/decode calls timed per payload and codec
+
+    Returns:
+        One result row per payload and codec
+    """
+    rows = []
+    for payload_name, message in PAYLOADS.items():
+        baseline = None
+        for name in codecs:
+            codec = CODECS[name]
+            data = codec.encode(message)
+            size = len(data if isinstance(data, bytes) else data.encode("utf-8"))
+            if baseline is None:
+                baseline = size
+            rows.append(
+                {
+                    "payload": payload_name,
+                    "codec": name,
+                    "bytes": size,
+                    "size_vs_json": size / baseline,
+                    "encode_us": _time_per_call(codec.encode, message, rounds) * 1e6,
+                    "decode_us": _time_per_call(codec.decode, data, rounds) * 1e6,
+                }
+            )
+    return rows
+
+
+def main():
+    print(format_table(run_benchmark()))
+
+
+if __name__ == "__main__":
+    main()
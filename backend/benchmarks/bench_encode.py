@@ -0,0 +1,92 @@
+"""
+Micro-benchmark: per-connection send_json vs encode-once broadcast frames
+
+Measures CPU time per broadcast for a representative score update when the
+message is serialized once per connection (the old ``send_json`` path)
+versus once per broadcast.
+
+Run with:
+    python -m backend.benchmarks.bench_encode
+"""
+
+import asyncio
+import time
+from typing import Dict, List, Sequence
+
+from backend.benchmarks.common import FakeWebSocket, format_table
+from backend.websocket.manager import ConnectionManager
+
+SCORE_UPDATE = {
+    "type": "score_update",
+    "session_id": "bench-session",
+    "data": {
+        "question_id": "q-12",
+        "standings": [
+            {
+                "team_id": f"team-{i}",
+                "name": f"Team {i}",
+                "score": 1000 - i * 10,
+                "rank": i + 1,
+            }
+            for i in range(50)
+        ],
+    },
+}
+
+
+async def _per_connection_send_json(sockets: List[FakeWebSocket], message: dict):
+    """Old fan-out: every socket serializes the message itself"""
+    await asyncio.gather(*(ws.send_json(message) for ws in sockets))
+
+
+async def run_benchmark(
+    sizes: Sequence[int] = (10, 100, 1000), rounds: int = 20
+) -> List[Dict[str, object]]:
+    """
+    Measure CPU time per broadcast for both encoding strategies
+
+    Args:
+        sizes: Number of fake sockets per session
+        rounds: Broadcasts measured per size and strategy
+
+    Returns:
+        One result row per session size
+    """
+    rows = []
+    for size in sizes:
+        manager = ConnectionManager(
+            send_timeout=5.0, outbound_queue_size=0, coalesce_ticks_ms={}
+        )
+        sockets = [FakeWebSocket() for _ in range(size)]
+        for ws in sockets:
+            await manager.connect(ws, "bench-session")
+
+        start = time.process_time()
+        for _ in range(rounds):
+            await _per_connection_send_json(sockets, SCORE_UPDATE)
+        per_connection = (time.process_time() - start) / rounds
+
+        start = time.process_time()
+        for _ in range(rounds):
+            await manager.broadcast_to_session("bench-session", SCORE_UPDATE)
+        encode_once = (time.process_time() - start) / rounds
+
+        rows.append(
+            {
+                "sockets": size,
+                "send_json_ms": per_connection * 1000,
+                "encode_once_ms": encode_once * 1000,
+                "cpu_saved_ms": (per_connection - encode_once) * 1000,
+                "speedup": per_connection / encode_once if encode_once else 0.0,
+            }
+        )
+    return rows
+
+
+def main():
+    rows = asyncio.run(run_benchmark())
+    print(format_table(rows))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""
+Benchmark: sequential vs concurrent broadcast fan-out
+
+Simulates a session of fake sockets with a small per-send latency and a
+fraction of stalled peers, then measures how long one broadcast takes with
+each fan-out mode.
+
+Run with:
+    python -m backend.benchmarks.bench_fanout
+"""
+
+import asyncio
+import logging
+import time
+from typing import Dict, List, Sequence
+
+from backend.benchmarks.common import FakeWebSocket, format_table
+from backend.websocket.manager import ConnectionManager
+
+MESSAGE = {
+    "type": "score_update",
+    "session_id": "bench-session",
+    "data": {"team": "Team A", "score": 150, "question_id": "q-1"},
+}
+
+
+async def _broadcast_once(
+    size: int,
+    concurrent: bool,
+    latency: float,
+    slow_fraction: float,
+    send_timeout: float,
+) -> Dict[str, float]:
+    manager = ConnectionManager(
+        send_timeout=send_timeout,
+        concurrent_broadcast=concurrent,
+        outbound_queue_size=0,
+        coalesce_ticks_ms={},
+    )
+    slow_count = int(size * slow_fraction)
+    for i in range(size):
+        await manager.connect(
+            FakeWebSocket(latency=latency, stalled=i < slow_count), "bench-session"
+        )
+
+    start = time.perf_counter()
+    await manager.broadcast_to_session("bench-session", MESSAGE)
+    elapsed = time.perf_counter() - start
+
+    # Let background close tasks for evicted sockets finish
+    await asyncio.sleep(0)
+    return {"elapsed": elapsed, "evictions": manager.evictions}
+
+
+async def run_benchmark(
+    sizes: Sequence[int] = (10, 100, 1000),
+    rounds: int = 3,
+    latency: float = 0.001,
+    slow_fractions: Sequence[float] = (0.0, 0.01),
+    send_timeout: float = 0.25,
+) -> List[Dict[str, object]]:
+    """
+    Run the fan-out benchmark for each session size and mode
+
+    Args:
+        sizes: Number of fake sockets per session
+        rounds: Broadcasts measured per size and mode
+        latency: Simulated per-send latency in seconds
+        slow_fractions: Fractions of sockets that never complete a send
+        send_timeout: Per-send deadline given to the manager
+
+    Returns:
+        One result row per (size, stalled fraction, mode)
+    """
+    rows = []
+    for size in sizes:
+        stalled_counts = set()
+        for slow_fraction in slow_fractions:
+            # Small sessions may round several fractions to the same count
+            if int(size * slow_fraction) in stalled_counts:
+                continue
+            stalled_counts.add(int(size * slow_fraction))
+            for concurrent in (False, True):
+                timings = []
+                evictions = 0
+                for _ in range(rounds):
+                    result = await _broadcast_once(
+                        size, concurrent, latency, slow_fraction, send_timeout
+                    )
+                    timings.append(result["elapsed"])
+                    evictions = result["evictions"]
+                rows.append(
+                    {
+                        "sockets": size,
+                        "stalled": int(size * slow_fraction),
+                        "mode": "concurrent" if concurrent else "sequential",
+                        "mean_ms": sum(timings) / len(timings) * 1000,
+                        "max_ms": max(timings) * 1000,
+                        "evicted": evictions,
+                    }
+                )
+    return rows
+
+
+def main():
+    # Eviction warnings are expected here and would drown out the results
+    logging.getLogger("backend.websocket").setLevel(logging.ERROR)
+    rows = asyncio.run(run_benchmark())
+    print(format_table(rows))
+
+
+if __name__ == "__main__":
+    main()
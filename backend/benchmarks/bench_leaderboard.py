@@ -0,0 +1,106 @@
+"""
+Benchmark: leaderboard deltas vs full-state pushes
+
+Simulates a live event where a few participants score on every update and
+every participant is connected. Compares the bytes written to sockets when
+the full standings are pushed on every update with the versioned delta
+protocol, where each client acknowledges the version it applied.
+
+Run with:
+    python -m backend.benchmarks.bench_leaderboard
+"""
+
+import asyncio
+import random
+from typing import Dict, List, Sequence
+
+from backend.benchmarks.common import FakeWebSocket, format_table
+from backend.websocket.leaderboard import Leaderboard
+from backend.websocket.manager import ConnectionManager
+
+SESSION_ID = "bench-session"
+
+
+async def _run_mode(
+    participants: int, updates: int, scorers: int, use_deltas: bool
+) -> Dict[str, int]:
+    """Push ``updates`` score changes to one socket per participant"""
+    manager = ConnectionManager(
+        send_timeout=5.0, outbound_queue_size=0, coalesce_ticks_ms={}
+    )
+    sockets = [FakeWebSocket() for _ in range(participants)]
+    for ws in sockets:
+        await manager.connect(ws, SESSION_ID)
+
+    rng = random.Random(42)
+    scores = {f"p-{i}": rng.randrange(0, 10_000) for i in range(participants)}
+    full_state = Leaderboard(history=1)
+    leaderboards = manager.leaderboards
+
+    if use_deltas:
+        await leaderboards.update(SESSION_ID, scores)
+    else:
+        full_state.apply(scores)
+    for ws in sockets:
+        ws.bytes_sent = 0
+
+    for _ in range(updates):
+        changes = {}
+        for entry_id in rng.sample(sorted(scores), scorers):
+            scores[entry_id] += rng.randrange(1, 100)
+            changes[entry_id] = scores[entry_id]
+
+        if use_deltas:
+            # Clients ack the version they applied before the next update
+            version = leaderboards.get(SESSION_ID).version
+            for ws in sockets:
+                leaderboards.acknowledge(ws, SESSION_ID, version)
+            await leaderboards.update(SESSION_ID, changes)
+        else:
+            full_state.apply(changes)
+            await manager.broadcast_to_session(
+                SESSION_ID, full_state.snapshot(SESSION_ID)
+            )
+
+    return {
+        "bytes": sum(ws.bytes_sent for ws in sockets),
+        "frames": sum(ws.sent for ws in sockets),
+    }
+
+
+async def run_benchmark(
+    sizes: Sequence[int] = (100, 1000, 5000), updates: int = 20, scorers: int = 5
+) -> List[Dict[str, object]]:
+    """
+    Measure bytes sent per update with full pushes and with deltas
+
+    Args:
+        sizes: Number of participants (each with one connection)
+        updates: Score updates measured per size
+        scorers: Participants whose score changes on each update
+
+    Returns:
+        One result row per participant count
+    """
+    rows = []
+    for size in sizes:
+        full = await _run_mode(size, updates, scorers, use_deltas=False)
+        delta = await _run_mode(size, updates, scorers, use_deltas=True)
+        rows.append(
+            {
+                "participants": size,
+                "full_kb_per_update": full["bytes"] / updates / 1024,
+                "delta_kb_per_update": delta["bytes"] / updates / 1024,
+                "reduction": full["bytes"] / delta["bytes"] if delta["bytes"] else 0.0,
+            }
+        )
+    return rows
+
+
+def main():
+    rows = asyncio.run(run_benchmark())
+    print(format_table(rows))
+
+
+if __name__ == "__main__":
+    main()
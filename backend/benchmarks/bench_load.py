@@ -0,0 +1,405 @@
+"""
+Load test: thousands of simulated participants against the real endpoint
+
+Drives ``backend.main:app`` in-process over ASGI (no sockets, no threads), so
+every simulated client goes through token auth, the dispatcher and the
+connection manager exactly like a browser would. Scenarios:
+
+- join storm: every participant connects at once; connect time is measured
+  from the handshake to the first frame (the welcome message)
+- broadcast: the session is sent probe messages; fan-out latency is measured
+  from the broadcast call to each client's receipt
+- answer burst: the facilitator opens a question and every participant
+  answers it at the same instant; the latency from the burst to each
+  participant's ``answer_result`` and missing results are measured (answers
+  are queued for write-behind; the writer is not started here, so no
+  database is needed)
+- slow consumers: a fraction of the clients read slowly; healthy clients
+  must keep their latency and lose nothing
+
+The manager is configured from the environment like the server, so settings
+can be compared by exporting them, e.g.
+``WS_COALESCE_TICKS_MS='{"score_update": 100}'`` to announce every join
+on its own.
+
+Run with:
+    python -m backend.benchmarks.bench_load [--clients 5000] [--check]
+"""
+
+import argparse
+import asyncio
+import gc
+import logging
+import os
+import sys
+import time
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from backend.benchmarks.common import AsgiWebSocketClient, format_table, percentile
+from backend.core.security import create_access_token
+from backend.main import app
+from backend.websocket.handlers import dispatcher
+from backend.websocket.manager import manager
+
+ORG_ID = "load-org"
+
+# The participant count the realtime layer must sustain
+TARGET_CLIENTS = 5000
+
+# Results at TARGET_CLIENTS on the reference box (default settings); --check
+# fails when a metric is worse than its baseline by more than the tolerance.
+# Joins are announced in one batch per coalescing tick rather than one frame
+# per join per socket; lower the baselines as things improve
+BASELINE: Dict[str, Dict[str, float]] = {
+    "join_storm": {"p99_ms": 3_100.0, "kib_per_conn": 18.0, "dropped": 0},
+    "broadcast": {"p99_ms": 370.0, "dropped": 0},
+    "answer_burst": {"p99_ms": 440.0, "dropped": 0},
+    "slow_consumers/healthy": {"p99_ms": 480.0, "dropped": 0},
+}
+TOLERANCE = 1.5
+
+
+def _rss_bytes() -> int:
+    """Resident set size of this process (0 where /proc is unavailable)"""
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return 0
+
+
+def _client(
+    session_id: str, user_id: str, roles: Sequence[str], read_delay: float = 0.0
+) -> AsgiWebSocketClient:
+    """Build an authenticated client for the session (not yet connected)"""
+    # One organization holds every client: give it a plan without a quota
+    token = create_access_token(
+        data={
+            "sub": user_id,
+            "org_id": ORG_ID,
+            "roles": list(roles),
+            "plan": "enterprise",
+        }
+    )
+    return AsgiWebSocketClient(
+        app, f"/ws/{session_id}", f"token={token}", read_delay=read_delay
+    )
+
+
+async def _connect(
+    clients: Sequence[AsgiWebSocketClient], timeout: float
+) -> List[float]:
+    """Open all connections at once; return each one's connect time"""
+    started = time.perf_counter()
+    for client in clients:
+        client.start()
+    await asyncio.wait(
+        [asyncio.ensure_future(client.ready.wait()) for client in clients],
+        timeout=timeout,
+    )
+    return [client.frames[0][0] - started for client in clients if client.frames]
+
+
+async def _close(clients: Sequence[AsgiWebSocketClient]):
+    await asyncio.gather(*(client.close() for client in clients))
+
+
+def _row(
+    scenario: str,
+    clients: int,
+    duration: float,
+    latencies: Sequence[float],
+    delivered: int,
+    dropped: int,
+    evicted: int = 0,
+    kib_per_conn: float = 0.0,
+) -> Dict[str, object]:
+    return {
+        "scenario": scenario,
+        "clients": clients,
+        "duration_s": duration,
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p95_ms": percentile(latencies, 95) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+        "delivered": delivered,
+        "dropped": dropped,
+        "evicted": evicted,
+        "kib_per_conn": kib_per_conn,
+    }
+
+
+def _probe_latencies(
+    clients: Sequence[AsgiWebSocketClient], sent_at: Dict[int, float]
+) -> Tuple[List[float], int]:
+    """Receipt latencies of probe broadcasts and the number never received"""
+    latencies = []
+    missing = 0
+    for client in clients:
+        seen = set()
+        for arrived, message in client.messages():
+            data = message.get("data")
+            if message.get("type") == "session_update" and isinstance(data, dict):
+                probe = data.get("probe")
+                if probe in sent_at and probe not in seen:
+                    seen.add(probe)
+                    latencies.append(arrived - sent_at[probe])
+        missing += len(sent_at) - len(seen)
+    return latencies, missing
+
+
+async def _send_probes(
+    session_id: str, probes: int, interval: float, first: int = 0
+) -> Dict[int, float]:
+    """Broadcast numbered probes to a session; return when each was sent"""
+    sent_at = {}
+    for probe in range(first, first + probes):
+        sent_at[probe] = time.perf_counter()
+        await manager.broadcast_to_session(
+            session_id, {"type": "session_update", "data": {"probe": probe}}
+        )
+        await asyncio.sleep(interval)
+    return sent_at
+
+
+async def _settle(
+    clients: Sequence[AsgiWebSocketClient], expected: int, timeout: float
+):
+    """Wait until every client has at least ``expected`` frames, or timeout"""
+    deadline = time.perf_counter() + timeout
+    while time.perf_counter() < deadline:
+        if all(len(client.frames) >= expected for client in clients):
+            return
+        await asyncio.sleep(0.01)
+
+
+async def _drain(timeout: float):
+    """Wait until every outbound queue is empty"""
+    deadline = time.perf_counter() + timeout
+    while time.perf_counter() < deadline:
+        await asyncio.sleep(0.05)
+        if manager.get_queue_stats()["total_depth"] == 0:
+            return
+
+
+async def _dispatched(count: int, timeout: float):
+    """Wait until the dispatcher has handled ``count`` messages in total"""
+    deadline = time.perf_counter() + timeout
+    while dispatcher.dispatched < count and time.perf_counter() < deadline:
+        await asyncio.sleep(0.01)
+
+
+async def run_benchmark(
+    clients: int = TARGET_CLIENTS,
+    probes: int = 20,
+    probe_interval: float = 0.05,
+    slow_fraction: float = 0.05,
+    slow_read_delay: float = 0.05,
+    timeout: float = 300.0,
+) -> List[Dict[str, object]]:
+    """
+    Run every load scenario against the in-process application
+
+    Args:
+        clients: Simulated participants per scenario
+        probes: Broadcasts measured in the broadcast and slow scenarios
+        probe_interval: Seconds between probe broadcasts
+        slow_fraction: Fraction of slow clients in the slow scenario
+        slow_read_delay: Seconds a slow client takes to read one frame
+        timeout: Upper bound for connecting and for settling each scenario
+
+    Returns:
+        One result row per scenario (two for slow consumers: healthy, slow)
+    """
+    rows = []
+    await manager.start()
+    try:
+        # Join storm: one facilitator, then every participant at once
+        session_id = "load-session"
+        facilitator = _client(session_id, "load-facilitator", ["facilitator"])
+        await _connect([facilitator], timeout)
+        participants = [
+            _client(session_id, f"load-user-{i}", ["participant"])
+            for i in range(clients)
+        ]
+        gc.collect()
+        rss_before = _rss_bytes()
+        evictions = manager.evictions
+        started = time.perf_counter()
+        connect_times = await _connect(participants, timeout)
+        duration = time.perf_counter() - started
+        # Let the join announcements drain before measuring memory
+        await _drain(timeout)
+        gc.collect()
+        kib_per_conn = max(_rss_bytes() - rss_before, 0) / clients / 1024
+        rows.append(
+            _row(
+                "join_storm",
+                clients,
+                duration,
+                connect_times,
+                len(connect_times),
+                clients - len(connect_times),
+                manager.evictions - evictions,
+                kib_per_conn,
+            )
+        )
+
+        # Broadcast fan-out to everyone who joined
+        everyone = [facilitator, *participants]
+        for client in everyone:
+            client.frames.clear()
+        evictions = manager.evictions
+        started = time.perf_counter()
+        sent_at = await _send_probes(session_id, probes, probe_interval)
+        await _settle(everyone, probes, timeout)
+        latencies, missing = _probe_latencies(everyone, sent_at)
+        rows.append(
+            _row(
+                "broadcast",
+                len(everyone),
+                time.perf_counter() - started,
+                latencies,
+                len(latencies),
+                missing,
+                manager.evictions - evictions,
+            )
+        )
+
+        # Answer burst: every participant answers the open question at once
+        dispatched = dispatcher.dispatched
+        facilitator.send_json(
+            {
+                "type": "open_question",
+                "data": {"question_id": "load-q1", "answers": ["a"]},
+            }
+        )
+        await _dispatched(dispatched + 1, timeout)
+        await _drain(timeout)
+        for client in everyone:
+            client.frames.clear()
+        dispatched = dispatcher.dispatched
+        evictions = manager.evictions
+        started = time.perf_counter()
+        for i, participant in enumerate(participants):
+            participant.send_json(
+                {
+                    "type": "answer",
+                    "data": {"question_id": "load-q1", "answer": "ab"[i % 2]},
+                }
+            )
+        await _dispatched(dispatched + clients, timeout)
+        await _drain(timeout)
+        latencies = [
+            arrived - started
+            for participant in participants
+            for arrived, message in participant.messages()
+            if message.get("type") == "answer_result"
+        ]
+        rows.append(
+            _row(
+                "answer_burst",
+                clients,
+                time.perf_counter() - started,
+                latencies,
+                len(latencies),
+                clients - len(latencies),
+                manager.evictions - evictions,
+            )
+        )
+        await _close(everyone)
+
+        # Slow consumers mixed into an otherwise healthy session
+        session_id = "load-session-slow"
+        slow_count = int(clients * slow_fraction)
+        slow = [
+            _client(session_id, f"load-slow-{i}", ["participant"], slow_read_delay)
+            for i in range(slow_count)
+        ]
+        healthy = [
+            _client(session_id, f"load-healthy-{i}", ["participant"])
+            for i in range(clients - slow_count)
+        ]
+        await _connect(healthy + slow, timeout)
+        await _drain(timeout)
+        for client in healthy + slow:
+            client.frames.clear()
+        evictions = manager.evictions
+        started = time.perf_counter()
+        sent_at = await _send_probes(session_id, probes, probe_interval)
+        await _settle(healthy, probes, timeout)
+        duration = time.perf_counter() - started
+        evicted = manager.evictions - evictions
+        for group, members in (("healthy", healthy), ("slow", slow)):
+            latencies, missing = _probe_latencies(members, sent_at)
+            rows.append(
+                _row(
+                    f"slow_consumers/{group}",
+                    len(members),
+                    duration,
+                    latencies,
+                    len(latencies),
+                    missing,
+                    evicted if group == "slow" else 0,
+                )
+            )
+        await _close(healthy + slow)
+    finally:
+        await manager.stop()
+    return rows
+
+
+def check_regressions(
+    rows: Sequence[Dict[str, object]],
+    baseline: Optional[Dict[str, Dict[str, float]]] = None,
+    tolerance: float = TOLERANCE,
+) -> List[str]:
+    """
+    Compare results with the recorded baseline
+
+    Args:
+        rows: Output of ``run_benchmark``
+        baseline: Scenario -> metric -> baseline value (defaults to BASELINE)
+        tolerance: Allowed factor over a non-zero baseline; zero baselines
+            (e.g. dropped messages) must stay zero
+
+    Returns:
+        One description per metric that regressed (empty if none)
+    """
+    baseline = BASELINE if baseline is None else baseline
+    failures = []
+    for row in rows:
+        for metric, expected in baseline.get(row["scenario"], {}).items():
+            actual = row[metric]
+            limit = expected * tolerance
+            if actual > limit:
+                failures.append(
+                    f"{row['scenario']} {metric}: {actual:.1f} > {limit:.1f}"
+                )
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--clients", type=int, default=TARGET_CLIENTS)
+    parser.add_argument("--probes", type=int, default=20)
+    parser.add_argument(
+        "--check",
+        action="store_true",
+        help="exit non-zero if a metric regressed against the baseline",
+    )
+    args = parser.parse_args()
+
+    # Eviction and overflow warnings are expected under load
+    logging.getLogger("backend").setLevel(logging.ERROR)
+    rows = asyncio.run(run_benchmark(clients=args.clients, probes=args.probes))
+    print(format_table(rows))
+
+    if args.check:
+        failures = check_regressions(rows)
+        for failure in failures:
+            print(f"REGRESSION {failure}")
+        sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
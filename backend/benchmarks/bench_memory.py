@@ -0,0 +1,146 @@
+"""
+Benchmark: memory held per idle connection
+
+Connects thousands of idle sockets to a ``ConnectionManager`` and measures,
+with ``tracemalloc``, the bytes the manager allocates per connection: its
+``Connection`` record, registry and index entries, presence, heartbeat
+tracking and (with outbound queues) the queue and writer task. The sockets,
+user IDs and session IDs are created before measuring, since they stand for
+objects the server holds anyway.
+
+Run with:
+    python -m backend.benchmarks.bench_memory [--connections 10000] [--check]
+"""
+
+import argparse
+import asyncio
+import gc
+import logging
+import sys
+import tracemalloc
+from typing import Dict, List, Optional, Sequence
+
+from backend.benchmarks.common import FakeWebSocket, format_table
+from backend.websocket.manager import ConnectionManager
+
+# The idle connection count the measurement is recorded at
+TARGET_CONNECTIONS = 10_000
+
+# Results at TARGET_CONNECTIONS on the reference box (CPython 3.11); --check
+# fails when a scenario needs more memory than its baseline by more than the
+# tolerance. Lower the baselines as things improve
+BASELINE: Dict[str, Dict[str, float]] = {
+    "idle/queued": {"bytes_per_conn": 3_300.0},
+    "idle/direct": {"bytes_per_conn": 1_250.0},
+}
+TOLERANCE = 1.2
+
+
+async def _measure(
+    connections: int, outbound_queue_size: int, session_size: int
+) -> Dict[str, object]:
+    """Connect idle sockets and report the traced memory per connection"""
+    manager = ConnectionManager(outbound_queue_size=outbound_queue_size)
+    sockets = [FakeWebSocket() for _ in range(connections)]
+    users = [f"user-{i}" for i in range(connections)]
+    sessions = [f"session-{i // session_size}" for i in range(connections)]
+    orgs = [f"org-{i % 50}" for i in range(connections)]
+
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    for ws, user_id, session_id, org_id in zip(sockets, users, sessions, orgs):
+        await manager.connect(ws, session_id, user_id=user_id, org_id=org_id)
+    # Let writer tasks start and park on their empty queues
+    await asyncio.sleep(0)
+    gc.collect()
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+
+    allocated = sum(stat.size_diff for stat in after.compare_to(before, "filename"))
+    for ws, session_id in zip(sockets, sessions):
+        manager.disconnect(ws, session_id)
+    await asyncio.sleep(0)
+
+    return {
+        "scenario": "idle/queued" if outbound_queue_size else "idle/direct",
+        "connections": connections,
+        "bytes_per_conn": allocated / connections,
+        "mib_total": allocated / 2**20,
+    }
+
+
+async def run_benchmark(
+    connections: int = TARGET_CONNECTIONS,
+    outbound_queue_size: int = 256,
+    session_size: int = 100,
+) -> List[Dict[str, object]]:
+    """
+    Measure per-connection memory with and without outbound queues
+
+    Args:
+        connections: Idle connections to hold at once
+        outbound_queue_size: Queue size of the queued scenario
+        session_size: Connections per session
+
+    Returns:
+        One row per scenario
+    """
+    return [
+        await _measure(connections, size, session_size)
+        for size in (outbound_queue_size, 0)
+    ]
+
+
+def check_regressions(
+    rows: Sequence[Dict[str, object]],
+    baseline: Optional[Dict[str, Dict[str, float]]] = None,
+    tolerance: float = TOLERANCE,
+) -> List[str]:
+    """
+    Compare results with the recorded baseline
+
+    Args:
+        rows: Output of ``run_benchmark``
+        baseline: Scenario -> metric -> baseline value (defaults to BASELINE)
+        tolerance: Allowed factor over the baseline
+
+    Returns:
+        One description per metric that regressed (empty if none)
+    """
+    baseline = BASELINE if baseline is None else baseline
+    failures = []
+    for row in rows:
+        for metric, expected in baseline.get(row["scenario"], {}).items():
+            actual = row[metric]
+            limit = expected * tolerance
+            if actual > limit:
+                failures.append(
+                    f"{row['scenario']} {metric}: {actual:.1f} > {limit:.1f}"
+                )
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--connections", type=int, default=TARGET_CONNECTIONS)
+    parser.add_argument(
+        "--check",
+        action="store_true",
+        help="exit non-zero if memory per connection regressed",
+    )
+    args = parser.parse_args()
+
+    logging.getLogger("backend").setLevel(logging.WARNING)
+    rows = asyncio.run(run_benchmark(connections=args.connections))
+    print(format_table(rows))
+
+    if args.check:
+        failures = check_regressions(rows)
+        for failure in failures:
+            print(f"REGRESSION {failure}")
+        sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,155 @@
+"""
+Benchmark: organization-wide announcements on a multi-tenant node
+
+Connects ``orgs`` organizations to one node, each with sockets spread over
+a few sessions (some sockets joined to two of them), and sends
+announcements to random organizations. Compares scanning every session
+on the node for the tenant's sockets and sending each one its own copy
+with ``broadcast_to_organization``, which reads the organization ->
+sockets index and encodes the frame once: server time per announcement,
+sockets visited, encodes, and frames and bytes written.
+
+Run with:
+    python -m backend.benchmarks.bench_org_broadcast
+"""
+
+import asyncio
+import logging
+import random
+import time
+from typing import Dict, List, Tuple
+
+from backend.benchmarks.common import FakeWebSocket, format_table
+from backend.websocket.admission import AdmissionController
+from backend.websocket.manager import ConnectionManager
+
+ANNOUNCEMENT = {
+    "type": "announcement",
+    "message": "Scheduled maintenance tonight at 02:00 UTC",
+}
+
+
+async def _node(
+    orgs: int, sockets_per_org: int, sessions_per_org: int
+) -> Tuple[ConnectionManager, Dict[str, List[FakeWebSocket]]]:
+    """Connect every organization's sockets to a new manager"""
+    manager = ConnectionManager(
+        send_timeout=5.0,
+        outbound_queue_size=0,
+        admission=AdmissionController(max_connections=0, max_per_user=0),
+    )
+    tenants: Dict[str, List[FakeWebSocket]] = {}
+    for o in range(orgs):
+        org_id = f"org-{o}"
+        sockets = tenants[org_id] = []
+        for i in range(sockets_per_org):
+            ws = FakeWebSocket()
+            session_id = f"{org_id}-s{i % sessions_per_org}"
+            await manager.connect(
+                ws, session_id, user_id=f"{org_id}-u{i}", org_id=org_id
+            )
+            if i % 10 == 0 and sessions_per_org > 1:
+                # Hosts watch a second session of their tenant
+                other = f"{org_id}-s{(i + 1) % sessions_per_org}"
+                await manager.connect(
+                    ws, other, user_id=f"{org_id}-u{i}", org_id=org_id
+                )
+            sockets.append(ws)
+    return manager, tenants
+
+
+async def _scan(manager: ConnectionManager, org_id: str) -> int:
+    """The alternative: find the tenant's sockets session by session"""
+    visited = 0
+    recipients = {}
+    for connections in manager.active_connections.values():
+        for ws in connections:
+            visited += 1
+            if manager._connections[ws].org_id == org_id:
+                recipients[ws] = None
+    for ws in recipients:
+        await manager.send_personal_message(ANNOUNCEMENT, ws)
+    return visited
+
+
+async def _run_mode(
+    orgs: int,
+    sockets_per_org: int,
+    sessions_per_org: int,
+    announcements: int,
+    indexed: bool,
+) -> Dict[str, float]:
+    """Send ``announcements`` to random organizations of one node"""
+    manager, tenants = await _node(orgs, sockets_per_org, sessions_per_org)
+    targets = random.Random(7).choices(sorted(tenants), k=announcements)
+
+    visited = 0
+    encodes = 0
+    started = time.perf_counter()
+    for org_id in targets:
+        if indexed:
+            await manager.broadcast_to_organization(org_id, ANNOUNCEMENT)
+            visited += len(tenants[org_id])
+            encodes += 1
+        else:
+            visited += await _scan(manager, org_id)
+            encodes += len(tenants[org_id])
+    elapsed = time.perf_counter() - started
+    await manager.stop()
+
+    sockets = [ws for members in tenants.values() for ws in members]
+    return {
+        "visited": visited,
+        "encodes": encodes,
+        "frames": sum(ws.sent for ws in sockets),
+        "bytes": sum(ws.bytes_sent for ws in sockets),
+        "seconds": elapsed,
+    }
+
+
+async def run_benchmark(
+    orgs: int = 500,
+    sockets_per_org: int = 20,
+    sessions_per_org: int = 4,
+    announcements: int = 200,
+) -> List[Dict[str, object]]:
+    """
+    Measure organization announcements with both strategies
+
+    Args:
+        orgs: Organizations connected to the node
+        sockets_per_org: Sockets of each organization
+        sessions_per_org: Sessions each organization's sockets are spread over
+        announcements: Announcements sent, each to a random organization
+
+    Returns:
+        One result row per strategy
+    """
+    rows = []
+    for mode in ("scan sessions", "org index"):
+        result = await _run_mode(
+            orgs, sockets_per_org, sessions_per_org, announcements, mode == "org index"
+        )
+        rows.append(
+            {
+                "mode": mode,
+                "sockets": orgs * sockets_per_org,
+                "visited_per_announcement": result["visited"] / announcements,
+                "encodes_per_announcement": result["encodes"] / announcements,
+                "frames": result["frames"],
+                "kb": result["bytes"] / 1024,
+                "us_per_announcement": result["seconds"] / announcements * 1e6,
+            }
+        )
+    return rows
+
+
+def main():
+    # Per-connection log lines would dominate the measurement
+    logging.getLogger("backend.websocket").setLevel(logging.WARNING)
+    rows = asyncio.run(run_benchmark())
+    print(format_table(rows))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+"""
+Benchmark: connection registry churn
+
+Compares the dict-based registry in ``ConnectionManager`` against the
+previous list-based registry for a mass disconnect at the end of a session
+and for connect/disconnect churn.
+
+Run with:
+    python -m backend.benchmarks.bench_registry
+"""
+
+import asyncio
+import logging
+import random
+import time
+from typing import Dict, List
+
+from backend.benchmarks.common import FakeWebSocket, format_table
+from backend.websocket.manager import ConnectionManager
+
+
+class ListRegistry:
+    """The previous registry: one list of sockets per session"""
+
+    def __init__(self):
+        self.active_connections: Dict[str, List[FakeWebSocket]] = {}
+
+    async def connect(self, websocket, session_id: str, user_id=None):
+        await websocket.accept()
+        self.active_connections.setdefault(session_id, []).append(websocket)
+
+    def disconnect(self, websocket, session_id: str):
+        connections = self.active_connections.get(session_id)
+        if connections is not None and websocket in connections:
+            connections.remove(websocket)
+            if not connections:
+                del self.active_connections[session_id]
+
+
+async def _mass_disconnect(registry, size: int, seed: int) -> float:
+    """Connect ``size`` sockets, then time disconnecting all in random order"""
+    sockets = [FakeWebSocket() for _ in range(size)]
+    for i, ws in enumerate(sockets):
+        await registry.connect(ws, "bench-session", user_id=f"user-{i}")
+    random.Random(seed).shuffle(sockets)
+
+    start = time.perf_counter()
+    for ws in sockets:
+        registry.disconnect(ws, "bench-session")
+    return time.perf_counter() - start
+
+
+async def _churn(registry, size: int, cycles: int, seed: int) -> float:
+    """Keep ``size`` sockets connected and time ``cycles`` leave/join pairs"""
+    rng = random.Random(seed)
+    sockets = [FakeWebSocket() for _ in range(size)]
+    for i, ws in enumerate(sockets):
+        await registry.connect(ws, "bench-session", user_id=f"user-{i}")
+
+    start = time.perf_counter()
+    for cycle in range(cycles):
+        index = rng.randrange(size)
+        registry.disconnect(sockets[index], "bench-session")
+        sockets[index] = FakeWebSocket()
+        await registry.connect(sockets[index], "bench-session", user_id=f"c-{cycle}")
+    return time.perf_counter() - start
+
+
+async def run_benchmark(
+    size: int = 5000, cycles: int = 5000, seed: int = 1
+) -> List[Dict[str, object]]:
+    """
+    Run mass-disconnect and churn scenarios for both registries
+
+    Args:
+        size: Connections in the session
+        cycles: Connect/disconnect cycles in the churn scenario
+        seed: Random seed so both registries see the same order
+
+    Returns:
+        One result row per (scenario, registry)
+    """
+    registries = {
+        "list": ListRegistry,
+        "dict+index": lambda: ConnectionManager(outbound_queue_size=0),
+    }
+    rows = []
+    for name, factory in registries.items():
+        elapsed = await _mass_disconnect(factory(), size, seed)
+        rows.append(
+            {
+                "scenario": f"disconnect {size}",
+                "registry": name,
+                "total_ms": elapsed * 1000,
+                "per_op_us": elapsed / size * 1e6,
+            }
+        )
+    for name, factory in registries.items():
+        elapsed = await _churn(factory(), size, cycles, seed)
+        rows.append(
+            {
+                "scenario": f"churn {cycles} cycles",
+                "registry": name,
+                "total_ms": elapsed * 1000,
+                "per_op_us": elapsed / cycles * 1e6,
+            }
+        )
+    return rows
+
+
+def main():
+    # Per-connection log lines would dominate the measurement
+    logging.getLogger("backend.websocket").setLevel(logging.WARNING)
+    rows = asyncio.run(run_benchmark())
+    print(format_table(rows))
+
+
+if __name__ == "__main__":
+    main()
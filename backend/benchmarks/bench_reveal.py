@@ -0,0 +1,120 @@
+"""
+Benchmark: staged question reveal vs sending the question at reveal time
+
+Every participant needs the question the moment it opens. Compares the
+burst written to sockets at that moment when the full question is
+broadcast then (``question_opened`` with its payload) with the staged
+pipeline, where the encrypted payload went out earlier and only the key
+frame is broadcast. Each fake client's link is bandwidth limited, so the
+time until the last participant has the question grows with the frame size.
+
+Run with:
+    python -m backend.benchmarks.bench_reveal
+"""
+
+import asyncio
+import time
+from typing import Dict, List, Sequence
+
+from backend.benchmarks.common import FakeWebSocket, format_table
+from backend.websocket.manager import ConnectionManager
+
+SESSION_ID = "bench-session"
+
+# A representative question: text, four options, an explanation and media
+QUESTION = {
+    "text": "Which element has the highest melting point of all metals? " * 3,
+    "options": [
+        {"id": option, "text": f"Option {option}: " + "lorem ipsum " * 20}
+        for option in "ABCD"
+    ],
+    "explanation": "Tungsten melts at 3422 degrees Celsius. " * 30,
+    "media": {"image": "https://cdn.example.com/questions/q-12/tungsten.png"},
+}
+
+
+class _Link(FakeWebSocket):
+    """Fake client whose sends take as long as the bytes need on its link"""
+
+    def __init__(self, bandwidth: float):
+        super().__init__()
+        self.bandwidth = bandwidth
+
+    async def send_text(self, data: str):
+        await asyncio.sleep(len(data) / self.bandwidth)
+        await super().send_text(data)
+
+
+async def _run_mode(
+    participants: int, bandwidth: float, staged: bool
+) -> Dict[str, float]:
+    """Open one question for ``participants`` sockets and time the reveal"""
+    manager = ConnectionManager(
+        send_timeout=30.0,
+        concurrent_broadcast=True,
+        outbound_queue_size=0,
+        coalesce_ticks_ms={},
+    )
+    sockets = [_Link(bandwidth) for _ in range(participants)]
+    for ws in sockets:
+        await manager.connect(ws, SESSION_ID)
+
+    prestaged = 0
+    if staged:
+        await manager.reveals.stage(SESSION_ID, "q-12", QUESTION)
+        prestaged = sum(ws.bytes_sent for ws in sockets)
+    for ws in sockets:
+        ws.bytes_sent = 0
+
+    started = time.perf_counter()
+    if staged:
+        await manager.reveals.reveal(SESSION_ID, "q-12")
+    else:
+        await manager.broadcast_to_session(
+            SESSION_ID,
+            {
+                "type": "question_opened",
+                "question_id": "q-12",
+                "question": QUESTION,
+                "points": 100,
+                "time_limit_ms": 20_000,
+                "session_id": SESSION_ID,
+            },
+        )
+    elapsed = time.perf_counter() - started
+
+    return {
+        "prestaged_kb": prestaged / 1024,
+        "reveal_kb": sum(ws.bytes_sent for ws in sockets) / 1024,
+        "last_client_ms": elapsed * 1000,
+    }
+
+
+async def run_benchmark(
+    sizes: Sequence[int] = (100, 1000, 5000), bandwidth: float = 1_000_000.0
+) -> List[Dict[str, object]]:
+    """
+    Measure the burst at reveal with and without staging
+
+    Args:
+        sizes: Number of participants (each with one connection)
+        bandwidth: Bytes per second of each client's link
+
+    Returns:
+        One result row per participant count and mode
+    """
+    rows = []
+    for size in sizes:
+        for mode, staged in (("full at reveal", False), ("staged", True)):
+            result = await _run_mode(size, bandwidth, staged)
+            rows.append({"participants": size, "mode": mode, **result})
+    return rows
+
+
+def main():
+    rows = asyncio.run(run_benchmark())
+    print(format_table(rows))
+
+
+if __name__ == "__main__":
+    main()
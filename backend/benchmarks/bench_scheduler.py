@@ -0,0 +1,149 @@
+"""
+Benchmark: session timers on a timing wheel vs one sleeping task per timer
+
+Schedules ``timers`` concurrent deadlines spread over ``window`` seconds,
+reschedules a share of them (e.g. a facilitator extending the time limit)
+and waits for all to fire. Compares one ``asyncio.sleep`` task per timer
+with the shared ``SessionScheduler``: cost per schedule and reschedule,
+how late timers fire, and how many times the event loop had to wake a
+task to fire them.
+
+Run with:
+    python -m backend.benchmarks.bench_scheduler
+"""
+
+import asyncio
+import random
+import time
+from typing import Dict, List
+
+from backend.benchmarks.common import format_table, percentile
+from backend.services.scheduler import SessionScheduler
+
+
+async def _run_tasks(
+    deadlines: List[float], moved: Dict[int, float]
+) -> Dict[str, float]:
+    """One task sleeping until each deadline; rescheduling replaces the task"""
+    lateness: List[float] = []
+    wakeups = 0
+
+    async def sleeper(deadline: float):
+        nonlocal wakeups
+        await asyncio.sleep(deadline - time.monotonic())
+        wakeups += 1
+        lateness.append(time.monotonic() - deadline)
+
+    started = time.perf_counter()
+    tasks = [asyncio.create_task(sleeper(deadline)) for deadline in deadlines]
+    schedule_s = time.perf_counter() - started
+
+    started = time.perf_counter()
+    for index, deadline in moved.items():
+        tasks[index].cancel()
+        tasks[index] = asyncio.create_task(sleeper(deadline))
+    reschedule_s = time.perf_counter() - started
+
+    await asyncio.gather(*tasks, return_exceptions=True)
+    return {
+        "schedule_s": schedule_s,
+        "reschedule_s": reschedule_s,
+        "lateness": lateness,
+        "wakeups": wakeups,
+    }
+
+
+async def _run_wheel(
+    deadlines: List[float], moved: Dict[int, float], tick_ms: int
+) -> Dict[str, float]:
+    """Every deadline on one scheduler; rescheduling moves the timer"""
+    scheduler = SessionScheduler(tick_ms=tick_ms)
+    lateness: List[float] = []
+    done = asyncio.Event()
+    total = len(deadlines)
+
+    async def handler(timers):
+        now = time.monotonic()
+        lateness.extend(now - timer.data for timer in timers)
+        if len(lateness) == total:
+            done.set()
+
+    scheduler.register("close", handler)
+
+    started = time.perf_counter()
+    for index, deadline in enumerate(deadlines):
+        scheduler.schedule(
+            "close", f"s{index}", (deadline - time.monotonic()) * 1000, data=deadline
+        )
+    schedule_s = time.perf_counter() - started
+
+    started = time.perf_counter()
+    for index, deadline in moved.items():
+        scheduler.schedule(
+            "close", f"s{index}", (deadline - time.monotonic()) * 1000, data=deadline
+        )
+    reschedule_s = time.perf_counter() - started
+
+    await done.wait()
+    await scheduler.stop()
+    return {
+        "schedule_s": schedule_s,
+        "reschedule_s": reschedule_s,
+        "lateness": lateness,
+        "wakeups": scheduler.batches,
+    }
+
+
+async def run_benchmark(
+    timers: int = 10_000,
+    window: float = 3.0,
+    rescheduled: float = 0.2,
+    tick_ms: int = 10,
+) -> List[Dict[str, object]]:
+    """
+    Fire ``timers`` concurrent deadlines both ways
+
+    Args:
+        timers: Concurrently active timers
+        window: Seconds over which deadlines are spread (starting 0.5 s out)
+        rescheduled: Fraction of timers moved to a new deadline
+        tick_ms: Timing wheel resolution
+
+    Returns:
+        One result row per strategy
+    """
+    rng = random.Random(42)
+    rows = []
+    for mode in ("sleep task per timer", "timing wheel"):
+        base = time.monotonic() + 0.5
+        deadlines = [base + rng.random() * window for _ in range(timers)]
+        moved = {
+            index: base + rng.random() * window
+            for index in rng.sample(range(timers), int(timers * rescheduled))
+        }
+        if mode == "timing wheel":
+            result = await _run_wheel(deadlines, moved, tick_ms)
+        else:
+            result = await _run_tasks(deadlines, moved)
+        lateness = sorted(result["lateness"])
+        rows.append(
+            {
+                "mode": mode,
+                "timers": timers,
+                "schedule_us": result["schedule_s"] / timers * 1e6,
+                "reschedule_us": result["reschedule_s"] / max(len(moved), 1) * 1e6,
+                "p50_late_ms": percentile(lateness, 50) * 1000,
+                "p99_late_ms": percentile(lateness, 99) * 1000,
+                "wakeups": result["wakeups"],
+            }
+        )
+    return rows
+
+
+def main():
+    rows = asyncio.run(run_benchmark())
+    print(format_table(rows))
+
+
+if __name__ == "__main__":
+    main()
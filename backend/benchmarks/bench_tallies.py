@@ -0,0 +1,134 @@
+"""
+Benchmark: live tallies vs a facilitator frame per answer or reaction
+
+Simulates a busy question: participants answer once each and keep sending
+reactions at ``rate`` events per second for ``seconds``, watched by a few
+facilitator and big-screen sockets. Compares forwarding every event to the
+facilitators with counting it into ``LiveTallies`` and sending one
+histogram frame per interval: frames and bytes the facilitator sockets
+receive, and server time spent per event.
+
+Run with:
+    python -m backend.benchmarks.bench_tallies
+"""
+
+import asyncio
+import random
+import time
+from typing import Dict, List, Sequence, Tuple
+
+from backend.benchmarks.common import FakeWebSocket, format_table
+from backend.websocket.manager import ConnectionManager
+
+SESSION_ID = "bench-session"
+OPTIONS = ("a", "b", "c", "d")
+REACTIONS = ("applause", "laugh", "wow")
+
+
+def _events(participants: int, count: int) -> List[Tuple[str, str, str]]:
+    """(kind, user, value) events: every participant's answer among reactions"""
+    rng = random.Random(42)
+    events = [("answer", f"p-{i}", rng.choice(OPTIONS)) for i in range(participants)]
+    events += [
+        ("reaction", f"p-{rng.randrange(participants)}", rng.choice(REACTIONS))
+        for _ in range(max(count - participants, 0))
+    ]
+    rng.shuffle(events)
+    return events
+
+
+async def _run_mode(
+    events: List[Tuple[str, str, str]],
+    facilitators: int,
+    per_interval: int,
+    use_tallies: bool,
+) -> Dict[str, float]:
+    """Deliver ``events`` to the facilitators of one session"""
+    manager = ConnectionManager(
+        send_timeout=5.0, outbound_queue_size=0, coalesce_ticks_ms={}
+    )
+    sockets = [FakeWebSocket() for _ in range(facilitators)]
+    for ws in sockets:
+        await manager.connect(ws, SESSION_ID, facilitator=True)
+    tallies = manager.tallies
+
+    started = time.perf_counter()
+    for start in range(0, len(events), per_interval):
+        for kind, user_id, value in events[start : start + per_interval]:
+            if use_tallies:
+                if kind == "answer":
+                    tallies.count_answer(SESSION_ID, "q1", value)
+                else:
+                    tallies.count_reaction(SESSION_ID, value)
+            else:
+                await manager.broadcast_to_facilitators(
+                    SESSION_ID,
+                    {
+                        "type": kind,
+                        "user_id": user_id,
+                        "data": {kind: value, "question_id": "q1"},
+                        "session_id": SESSION_ID,
+                    },
+                )
+        # The interval ends: the flush timer fires
+        if use_tallies:
+            await manager.scheduler.run_due(time.monotonic() + 3600)
+    elapsed = time.perf_counter() - started
+    await manager.stop()
+
+    return {
+        "frames": sum(ws.sent for ws in sockets),
+        "bytes": sum(ws.bytes_sent for ws in sockets),
+        "seconds": elapsed,
+    }
+
+
+async def run_benchmark(
+    participants: Sequence[int] = (100, 1000, 5000),
+    seconds: float = 10.0,
+    rate: int = 2000,
+    interval_ms: int = 500,
+    facilitators: int = 3,
+) -> List[Dict[str, object]]:
+    """
+    Measure facilitator traffic for one question with both strategies
+
+    Args:
+        participants: Session sizes to measure
+        seconds: Length of the question
+        rate: Answers plus reactions per second
+        interval_ms: Tally flush interval
+        facilitators: Facilitator and big-screen sockets
+
+    Returns:
+        One result row per session size and strategy
+    """
+    count = int(seconds * rate)
+    per_interval = max(int(rate * interval_ms / 1000), 1)
+    rows = []
+    for size in participants:
+        events = _events(size, count)
+        for mode in ("frame per event", "interval tallies"):
+            result = await _run_mode(
+                events, facilitators, per_interval, mode == "interval tallies"
+            )
+            rows.append(
+                {
+                    "participants": size,
+                    "mode": mode,
+                    "events": len(events),
+                    "frames": result["frames"],
+                    "kb": result["bytes"] / 1024,
+                    "us_per_event": result["seconds"] / len(events) * 1e6,
+                }
+            )
+    return rows
+
+
+def main():
+    rows = asyncio.run(run_benchmark())
+    print(format_table(rows))
+
+
+if __name__ == "__main__":
+    main()
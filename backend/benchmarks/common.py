@@ -0,0 +1,212 @@
+"""
+Shared helpers for realtime benchmarks
+Provides in-memory fake WebSockets, an in-process ASGI client and result
+table formatting
+"""
+
+import asyncio
+import json
+import math
+import time
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+
+class FakeWebSocket:
+    """
+    Minimal stand-in for a Starlette WebSocket
+
+    Serializes messages the same way ``WebSocket.send_json`` does and can
+    simulate network latency or a stalled peer.
+
+    Args:
+        latency: Seconds each send takes (0 means no await point)
+        stalled: If True, sends never complete
+    """
+
+    def __init__(self, latency: float = 0.0, stalled: bool = False):
+        self.scope = {"type": "websocket", "subprotocols": []}
+        self.latency = latency
+        self.stalled = stalled
+        self.sent = 0
+        self.bytes_sent = 0
+        self.closed = False
+
+    async def accept(self, subprotocol: Optional[str] = None):
+        pass
+
+    async def _wait(self):
+        if self.stalled:
+            await asyncio.Event().wait()
+        elif self.latency:
+            await asyncio.sleep(self.latency)
+
+    async def send_json(self, data: Any):
+        # Same encoding as starlette.websockets.WebSocket.send_json
+        json.dumps(data, separators=(",", ":"), ensure_ascii=False)
+        await self._wait()
+        self.sent += 1
+
+    async def send_text(self, data: str):
+        await self._wait()
+        self.sent += 1
+        self.bytes_sent += len(data.encode("utf-8"))
+
+    async def send_bytes(self, data: bytes):
+        await self._wait()
+        self.sent += 1
+        self.bytes_sent += len(data)
+
+    async def close(self, code: int = 1000, reason: Optional[str] = None):
+        self.closed = True
+
+
+class AsgiWebSocketClient:
+    """
+    WebSocket client speaking ASGI directly to an application
+
+    The app's WebSocket handler runs as a task in the current event loop,
+    with no sockets or threads, so thousands of clients fit in one process
+    and exercise the real endpoint (auth, dispatcher, manager, codecs).
+    Received frames are stored with their arrival time and decoded later,
+    keeping client-side parsing off the measured path.
+
+    Args:
+        app: ASGI application (e.g. ``backend.main.app``)
+        path: Request path, e.g. ``/ws/session-1``
+        query_string: Query string without the leading ``?``
+        read_delay: Seconds the client takes to read each frame; a non-zero
+            delay simulates a slow consumer
+        subprotocols: Subprotocols offered in the handshake
+    """
+
+    __slots__ = (
+        "app",
+        "scope",
+        "read_delay",
+        "frames",
+        "close_code",
+        "ready",
+        "_inbox",
+        "_task",
+    )
+
+    def __init__(
+        self,
+        app: Callable,
+        path: str,
+        query_string: str = "",
+        read_delay: float = 0.0,
+        subprotocols: Sequence[str] = (),
+    ):
+        self.app = app
+        self.scope = {
+            "type": "websocket",
+            "asgi": {"version": "3.0"},
+            "http_version": "1.1",
+            "scheme": "ws",
+            "path": path,
+            "raw_path": path.encode(),
+            "root_path": "",
+            "query_string": query_string.encode(),
+            "headers": [(b"host", b"testserver")],
+            "client": ("127.0.0.1", 0),
+            "server": ("testserver", 80),
+            "subprotocols": list(subprotocols),
+        }
+        self.read_delay = read_delay
+        # (arrival time, text or bytes) for every frame the server sent
+        self.frames: List[Tuple[float, Any]] = []
+        self.close_code: Optional[int] = None
+        # Set on the first frame or when the server closes the connection
+        self.ready = asyncio.Event()
+        self._inbox: asyncio.Queue = asyncio.Queue()
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self):
+        """Open the connection; the handshake runs in the background"""
+        self._inbox.put_nowait({"type": "websocket.connect"})
+        self._task = asyncio.ensure_future(
+            self.app(self.scope, self._inbox.get, self._send)
+        )
+
+    async def _send(self, event: Dict[str, Any]):
+        kind = event["type"]
+        if kind == "websocket.send":
+            if self.read_delay:
+                await asyncio.sleep(self.read_delay)
+            data = event.get("text")
+            self.frames.append(
+                (time.perf_counter(), event.get("bytes") if data is None else data)
+            )
+            self.ready.set()
+        elif kind == "websocket.close":
+            self.close_code = event.get("code", 1000)
+            self.ready.set()
+
+    def send_json(self, message: Any):
+        """Send a JSON text frame to the server"""
+        self._inbox.put_nowait(
+            {"type": "websocket.receive", "text": json.dumps(message)}
+        )
+
+    def messages(self) -> List[Tuple[float, Any]]:
+        """Received JSON text frames as (arrival time, decoded message)"""
+        return [
+            (t, json.loads(data)) for t, data in self.frames if isinstance(data, str)
+        ]
+
+    async def close(self, timeout: float = 5.0):
+        """Disconnect and wait for the server's handler to finish"""
+        if self._task is None:
+            return
+        self._inbox.put_nowait({"type": "websocket.disconnect", "code": 1000})
+        try:
+            await asyncio.wait_for(self._task, timeout)
+        except Exception:
+            # The handler may already have failed or been evicted
+            pass
+        self._task = None
+
+
+def percentile(values: Sequence[float], pct: float) -> float:
+    """
+    Nearest-rank percentile of a sample
+
+    Args:
+        values: Sample values (any order)
+        pct: Percentile between 0 and 100
+
+    Returns:
+        The percentile, or 0.0 for an empty sample
+    """
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(math.ceil(pct / 100 * len(ordered)), 1)
+    return ordered[rank - 1]
+
+
+def format_table(rows: List[Dict[str, Any]]) -> str:
+    """
+    Render benchmark result rows as an aligned plain-text table
+
+    Args:
+        rows: Result dictionaries sharing the same keys
+
+    Returns:
+        The formatted table
+    """
+    if not rows:
+        return ""
+    headers = list(rows[0].keys())
+    cells = [
+        [f"{row[h]:.3f}" if isinstance(row[h], float) else str(row[h]) for h in headers]
+        for row in rows
+    ]
+    widths = [
+        max(len(h), *(len(line[i]) for line in cells)) for i, h in enumerate(headers)
+    ]
+    lines = ["  ".join(h.rjust(w) for h, w in zip(headers, widths))]
+    lines.append("  ".join("-" * w for w in widths))
+    lines.extend("  ".join(c.rjust(w) for c, w in zip(line, widths)) for line in cells)
+    return "\n".join(lines)
@@ -34,6 +34,129 @@ class Settings(BaseSettings):
     # CORS
     CORS_ORIGINS: list[str] = ["http://localhost:5173", "http://localhost:3000"]
     
+    # WebSocket
+    # Fan out broadcasts to all sockets concurrently instead of one after another
+    WS_CONCURRENT_BROADCAST: bool = True
+    # Deadline for a single send; sockets that miss it are evicted
+    WS_SEND_TIMEOUT_SECONDS: float = 1.0
+    # Frames buffered per connection before the overflow policy applies
+    # (0 disables outbound queues and writes to sockets directly)
+    WS_OUTBOUND_QUEUE_SIZE: int = 256
+    # Overflow policy: drop_oldest, coalesce or disconnect
+    WS_OVERFLOW_POLICY: str = "drop_oldest"
+    # Cross-process broadcast backplane: none, memory or redis (uses REDIS_URL)
+    WS_BACKPLANE: str = "none"
+    WS_BACKPLANE_CHANNEL_PREFIX: str = "trivia:ws"
+    # Coalescing window per message type in ms; listed types are batched per
+    # session into one "batch" envelope per tick (omit a type to send as-is).
+    # Presence is batched so a join storm is not one frame per join per socket
+    WS_COALESCE_TICKS_MS: dict[str, int] = {
+        "score_update": 100,
+        "user_joined": 100,
+        "user_left": 100,
+    }
+    # Keyed message types keep only the latest event per key (dotted path)
+    WS_COALESCE_KEYS: dict[str, str] = {
+        "score_update": "data.team",
+        "user_joined": "user_id",
+        "user_left": "user_id",
+    }
+    # Fields lifted into the batch "state", keeping only the latest value
+    WS_COALESCE_STATE_FIELDS: list[str] = ["participant_count"]
+    # Leaderboard versions kept for deltas; clients further behind get a snapshot
+    WS_LEADERBOARD_HISTORY: int = 32
+    # Codecs clients may negotiate via Sec-WebSocket-Protocol (json, msgpack,
+    # cbor); clients offering none of them use JSON
+    WS_SUBPROTOCOLS: list[str] = ["msgpack", "cbor", "json"]
+    # Idle connections are pinged every interval (0 disables heartbeats) and
+    # reaped after missing WS_HEARTBEAT_MAX_MISSED heartbeats in a row
+    WS_HEARTBEAT_INTERVAL_SECONDS: float = 20.0
+    WS_HEARTBEAT_MAX_MISSED: int = 3
+    # Session events kept for replay to reconnecting clients (last_seq); older
+    # gaps get a snapshot holding the latest data of the state types
+    WS_EVENT_LOG_SIZE: int = 512
+    WS_EVENT_LOG_STATE_TYPES: list[str] = ["session_update"]
+    # Seconds a session's log outlives its last connection
+    WS_EVENT_LOG_RETENTION_SECONDS: float = 300.0
+    # Expose Prometheus metrics at /metrics (off by default: enable it only
+    # behind an internal bind or with a scrape token). Scrapers send
+    # "Authorization: Bearer <WS_METRICS_TOKEN>" when the token is set. The
+    # largest sessions get their own per-session series (bounded to keep
+    # label cardinality in check), labelled by keyed hash, not by ID
+    WS_METRICS_ENABLED: bool = False
+    WS_METRICS_TOKEN: str = ""
+    WS_METRICS_TOP_SESSIONS: int = 50
+    # Graceful drain on shutdown: clients get a reconnect hint with a random
+    # delay within the window, then are closed in paced batches finishing
+    # within the timeout (keep it below the orchestrator's grace period)
+    WS_DRAIN_ON_SIGTERM: bool = True
+    WS_DRAIN_BATCH_SIZE: int = 100
+    WS_DRAIN_BATCH_INTERVAL_SECONDS: float = 0.5
+    WS_DRAIN_RECONNECT_WINDOW_SECONDS: float = 10.0
+    WS_DRAIN_TIMEOUT_SECONDS: float = 20.0
+    # Server-Sent Events spectator streams: events buffered per spectator
+    # before a slow one is dropped (it resumes via Last-Event-ID), seconds
+    # between keepalive comments, and the browser's reconnect delay
+    WS_SSE_QUEUE_SIZE: int = 256
+    WS_SSE_KEEPALIVE_SECONDS: float = 15.0
+    WS_SSE_RETRY_MS: int = 3000
+    # Admission control, per worker (0 disables a limit): total sockets,
+    # sockets per organization by plan, and sockets per user. Refused
+    # clients are closed with 1013 and told to retry within the delay
+    WS_MAX_CONNECTIONS: int = 10000
+    WS_MAX_CONNECTIONS_PER_PLAN: dict[str, int] = {
+        "free": 250,
+        "premium": 2500,
+        "enterprise": 0,
+    }
+    WS_MAX_CONNECTIONS_PER_USER: int = 10
+    WS_ADMISSION_RETRY_AFTER_SECONDS: float = 10.0
+    
+    # Answer submission
+    # Open questions, scores and leaderboards are kept in one process, so
+    # answer scoring over WebSocket refuses to start with a WS_BACKPLANE;
+    # disable it when a session spans several workers
+    WS_ANSWER_SCORING: bool = True
+    # Scored answers are written to session_results in batches: every
+    # interval, or as soon as ANSWER_FLUSH_ROWS are waiting. A crash loses at
+    # most the rows not yet flushed; while the database is down up to
+    # ANSWER_MAX_PENDING_ROWS are kept for retry
+    ANSWER_FLUSH_INTERVAL_MS: int = 200
+    ANSWER_FLUSH_ROWS: int = 500
+    ANSWER_MAX_PENDING_ROWS: int = 100000
+    # In-memory answer keys and scores of sessions idle this long are dropped
+    ANSWER_SESSION_IDLE_TTL_SECONDS: float = 14400.0
+    
+    # Session timers (question close, scheduled reveal) share one timing
+    # wheel: deadlines are rounded up to the tick, and SCHEDULER_WHEEL_SLOTS
+    # (a power of two) ** SCHEDULER_WHEEL_LEVELS ticks are covered before
+    # timers are parked in the top level (at least two levels are required)
+    SCHEDULER_TICK_MS: int = 10
+    SCHEDULER_WHEEL_SLOTS: int = 64
+    SCHEDULER_WHEEL_LEVELS: int = 4
+    
+    # Live tallies: answer distributions and reactions reach facilitators as
+    # at most one histogram frame per session per interval. Past
+    # WS_TALLY_MAX_OPTIONS distinct answers a question's extras are lumped
+    # together; reactions outside WS_REACTIONS are rejected
+    WS_TALLY_INTERVAL_MS: int = 500
+    WS_TALLY_MAX_OPTIONS: int = 32
+    WS_REACTIONS: list[str] = ["applause", "laugh", "wow", "confused", "fire"]
+    
+    # Session chat
+    # The last CHAT_BUFFER_SIZE messages of each session are kept in memory
+    # for late joiners and history pages; older pages are read from the
+    # chat_messages table. Messages are written there in batches: every
+    # interval, or as soon as CHAT_FLUSH_ROWS are waiting; while the database
+    # is down up to CHAT_MAX_PENDING_ROWS are kept for retry
+    CHAT_BUFFER_SIZE: int = 200
+    CHAT_HISTORY_PAGE_SIZE: int = 50
+    CHAT_FLUSH_INTERVAL_MS: int = 1000
+    CHAT_FLUSH_ROWS: int = 200
+    CHAT_MAX_PENDING_ROWS: int = 50000
+    # Chat buffers of sessions without messages for this long are dropped
+    CHAT_SESSION_IDLE_TTL_SECONDS: float = 14400.0
+    
     model_config = SettingsConfigDict(
         env_file=".env",
         case_sensitive=True
@@ -0,0 +1,53 @@
+"""
+CRUD operations for ChatMessage model
+"""
+from datetime import datetime
+from typing import Iterable, Optional
+from uuid import UUID
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+from backend.models.chat_message import ChatMessage
+
+
+def create_chat_messages(db: Session, rows: Iterable[dict]) -> int:
+    """
+    Insert chat messages in one statement and commit
+
+    Args:
+        db: Database session
+        rows: Column values per message; string message/organization/user IDs are accepted
+
+    Returns:
+        Number of rows inserted
+    """
+    values = [
+        {
+            **row,
+            "id": UUID(str(row["id"])),
+            "organization_id": UUID(str(row["organization_id"])),
+            "user_id": UUID(str(row["user_id"])),
+        }
+        for row in rows
+    ]
+    if not values:
+        return 0
+    db.execute(insert(ChatMessage), values)
+    db.commit()
+    return len(values)
+
+
+def get_chat_messages(
+    db: Session,
+    session_id: str,
+    organization_id: UUID,
+    before: Optional[datetime] = None,
+    limit: int = 50
+) -> list[ChatMessage]:
+    """Get a session's chat within an organization, newest first, optionally only messages sent before a time"""
+    query = db.query(ChatMessage).filter(
+        ChatMessage.session_id == session_id,
+        ChatMessage.organization_id == organization_id
+    )
+    if before is not None:
+        query = query.filter(ChatMessage.sent_at < before)
+    return query.order_by(ChatMessage.sent_at.desc()).limit(limit).all()
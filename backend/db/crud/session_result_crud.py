@@ -0,0 +1,42 @@
+"""
+CRUD operations for SessionResult model
+"""
+from typing import Iterable
+from uuid import UUID
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+from backend.models.session_result import SessionResult
+
+
+def create_session_results(db: Session, rows: Iterable[dict]) -> int:
+    """
+    Insert scored answers in one statement and commit
+
+    Args:
+        db: Database session
+        rows: Column values per result; string organization/user IDs are accepted
+
+    Returns:
+        Number of rows inserted
+    """
+    values = [
+        {
+            **row,
+            "organization_id": UUID(str(row["organization_id"])),
+            "user_id": UUID(str(row["user_id"])),
+        }
+        for row in rows
+    ]
+    if not values:
+        return 0
+    db.execute(insert(SessionResult), values)
+    db.commit()
+    return len(values)
+
+
+def get_session_results(db: Session, session_id: str, organization_id: UUID) -> list[SessionResult]:
+    """Get a session's results within an organization, oldest first"""
+    return db.query(SessionResult).filter(
+        SessionResult.session_id == session_id,
+        SessionResult.organization_id == organization_id
+    ).order_by(SessionResult.answered_at).all()
@@ -2,20 +2,71 @@
 Main FastAPI application entry point
 """
 
-from fastapi import FastAPI, WebSocket, WebSocketDisconnect, Query, status
+from contextlib import asynccontextmanager
+import hmac
+import random
+from fastapi import (
+    FastAPI,
+    Header,
+    HTTPException,
+    WebSocket,
+    WebSocketDisconnect,
+    Query,
+    Response,
+    status,
+)
+from fastapi.responses import StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
 from backend.core.config import settings
 from backend.api.v1 import api_router
+from backend.websocket.admission import AdmissionRefused
+from backend.websocket.dispatcher import ClientContext
+from backend.services.chat_history import chat_history
+from backend.services.result_writer import result_writer
+from backend.websocket.handlers import dispatcher, history_message
 from backend.websocket.manager import manager
+from backend.websocket.metrics import CONTENT_TYPE, render_metrics
+from backend.websocket.shutdown import drain_before_signals
+from backend.websocket.sse import MEDIA_TYPE as SSE_MEDIA_TYPE, encode_retry
 from backend.core.security import decode_token
+from typing import Optional
 import logging
 
 logger = logging.getLogger(__name__)
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Start the WebSocket manager; on shutdown drain its connections and stop it
+
+    With WS_DRAIN_ON_SIGTERM the drain starts as soon as SIGTERM arrives,
+    before the server closes the sockets itself. Queued answer results are
+    flushed once no more answers can arrive (best effort: rows a failing
+    database rejects are logged as lost).
+    """
+    await manager.start()
+    await result_writer.start()
+    await chat_history.writer.start()
+    restore_signals = (
+        drain_before_signals(manager.drain) if settings.WS_DRAIN_ON_SIGTERM else None
+    )
+    try:
+        yield
+    finally:
+        if restore_signals is not None:
+            restore_signals()
+        await manager.drain()
+        await result_writer.stop()
+        await chat_history.writer.stop()
+        await manager.stop()
+
+
 app = FastAPI(
     title=settings.APP_NAME,
     debug=settings.DEBUG,
     openapi_url=f"{settings.API_V1_PREFIX}/openapi.json",
+    lifespan=lifespan,
 )
 
 # CORS middleware
@@ -43,9 +94,58 @@ async def root():
     return {"message": "Trivia App API", "docs": f"{settings.API_V1_PREFIX}/docs"}
 
 
+@app.get("/capacity")
+async def capacity(response: Response):
+    """
+    Realtime capacity of this worker, for load balancer health checks
+
+    Answers 503 while the worker is full or draining, so traffic can be
+    steered to workers with room.
+    """
+    stats = manager.get_capacity()
+    if not stats["accepting"]:
+        response.status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    return stats
+
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics(authorization: Optional[str] = Header(None)):
+    """
+    Realtime layer metrics in Prometheus text format
+
+    Not found unless WS_METRICS_ENABLED; with WS_METRICS_TOKEN set, scrapers
+    must send it as a bearer token.
+    """
+    if not settings.WS_METRICS_ENABLED:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND)
+    token = settings.WS_METRICS_TOKEN
+    if token and not hmac.compare_digest(
+        (authorization or "").encode("utf-8"), f"Bearer {token}".encode("utf-8")
+    ):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid scrape token",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    return Response(
+        render_metrics(
+            manager,
+            dispatcher,
+            settings.WS_METRICS_TOP_SESSIONS,
+            results=result_writer,
+            chat=chat_history,
+        ),
+        media_type=CONTENT_TYPE,
+    )
+
+
 @app.websocket("/ws/{session_id}")
 async def websocket_endpoint(
-    websocket: WebSocket, session_id: str, token: str = Query(...)
+    websocket: WebSocket,
+    session_id: str,
+    token: str = Query(...),
+    last_seq: Optional[int] = Query(None),
+    epoch: Optional[str] = Query(None),
 ):
     """
     WebSocket endpoint for real-time features
@@ -60,10 +160,23 @@ async def websocket_endpoint(
     - Requires valid JWT token passed as query parameter
     - Token must contain valid user_id and org_id
 
+    Encoding:
+    - JSON text frames by default
+    - Clients offering the ``msgpack`` or ``cbor`` subprotocol get binary
+      frames in both directions
+
+    Resuming:
+    - Session events carry a ``seq``; the welcome message reports the
+      session's current ``epoch`` and ``seq``
+    - Reconnecting with ``last_seq`` (and ``epoch``) replays the missed
+      events, or sends a ``session_snapshot`` if they are no longer retained
+
     Args:
         websocket: The WebSocket connection
         session_id: The session/room ID to join
         token: JWT authentication token (query parameter)
+        last_seq: Last event sequence number processed before reconnecting
+        epoch: Epoch the client's sequence numbers belong to
 
     Example:
         ws://localhost:8000/ws/my-session-id?token=your-jwt-token
@@ -85,64 +198,102 @@ async def websocket_endpoint(
         await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
         return
 
-    # Accept connection and add to session
-    await manager.connect(websocket, session_id)
+    # A draining node sends clients elsewhere instead of taking new ones
+    if manager.draining:
+        await websocket.close(code=status.WS_1012_SERVICE_RESTART)
+        return
+
+    context = ClientContext(
+        websocket, session_id, user_id, org_id, roles=payload.get("roles") or ()
+    )
+
+    # Accept connection and add to session, within the connection limits
+    try:
+        first_connection = await manager.connect(
+            websocket,
+            session_id,
+            user_id=user_id,
+            facilitator=context.is_facilitator,
+            org_id=org_id,
+            plan=payload.get("plan"),
+        )
+    except AdmissionRefused as refusal:
+        logger.warning(
+            f"WebSocket connection of user {user_id} refused: {refusal.reason}"
+        )
+        return
 
     # Send welcome message
+    current_epoch, current_seq = manager.event_log.position(session_id)
     await manager.send_personal_message(
         {
             "type": "connection",
             "message": "Connected to session",
             "session_id": session_id,
             "user_id": user_id,
+            "epoch": current_epoch,
+            "seq": current_seq,
         },
         websocket,
     )
 
-    # Notify other participants
-    await manager.broadcast_to_session(
-        session_id,
-        {
-            "type": "user_joined",
-            "user_id": user_id,
-            "session_id": session_id,
-            "participant_count": manager.get_session_connection_count(session_id),
-        },
+    # Replay what a reconnecting client missed (or send a snapshot)
+    replayed = last_seq is not None and await manager.resume(
+        websocket, session_id, last_seq, epoch
     )
 
+    # A replay already included the staged question and recent chat; anyone
+    # else needs them
+    if not replayed:
+        await manager.reveals.send_current(websocket, session_id)
+        messages, has_more = chat_history.recent(session_id, context.org_id)
+        if messages:
+            await manager.send_personal_message(
+                history_message(session_id, messages, has_more), websocket
+            )
+
+    # Bring the new participant up to date with the current standings
+    await manager.leaderboards.send_snapshot(websocket, session_id)
+
+    # Facilitators (and big screens) see the answer distribution so far
+    if context.is_facilitator:
+        await manager.tallies.send_snapshot(websocket, session_id)
+
+    # Notify other participants (another tab of a present user is not news)
+    if first_connection:
+        await manager.broadcast_to_session(
+            session_id,
+            {
+                "type": "user_joined",
+                "user_id": user_id,
+                "session_id": session_id,
+                "participant_count": manager.get_participant_count(session_id),
+            },
+        )
+
     try:
         # Listen for messages from the client
         while True:
-            data = await websocket.receive_json()
+            data = await manager.receive_message(websocket)
 
-            # Process message based on type
-            message_type = data.get("type", "message")
+            # Validate and route by type; unknown types are dropped and only
+            # handlers that opt into rebroadcast fan out
+            await dispatcher.dispatch(context, data)
 
-            # Broadcast the message to all session participants
+    except WebSocketDisconnect:
+        # A reaped or evicted socket was already removed and announced, and
+        # a user leaves only with their last socket
+        if manager.disconnect(websocket, session_id):
+            # Notify other participants
             await manager.broadcast_to_session(
                 session_id,
                 {
-                    "type": message_type,
+                    "type": "user_left",
                     "user_id": user_id,
-                    "data": data.get("data"),
                     "session_id": session_id,
+                    "participant_count": manager.get_participant_count(session_id),
                 },
             )
-
-    except WebSocketDisconnect:
-        # Handle disconnection
-        manager.disconnect(websocket, session_id)
-
-        # Notify other participants
-        await manager.broadcast_to_session(
-            session_id,
-            {
-                "type": "user_left",
-                "user_id": user_id,
-                "session_id": session_id,
-                "participant_count": manager.get_session_connection_count(session_id),
-            },
-        )
         logger.info(f"User {user_id} disconnected from session {session_id}")
     except Exception as e:
         logger.error(f"WebSocket error for user {user_id} in session {session_id}: {e}")
@@ -156,6 +307,78 @@ async def websocket_endpoint(
             )
 
 
+@app.get("/sse/{session_id}")
+async def sse_endpoint(
+    session_id: str,
+    token: str = Query(...),
+    last_event_id: Optional[str] = Header(None),
+):
+    """
+    Read-only Server-Sent Events stream of a session, for spectators
+
+    Observers and big-screen displays get every session broadcast, as the
+    very frames sent to WebSocket clients, without holding a WebSocket or
+    running a receive loop. Each event's ``id`` is ``{epoch}:{seq}``; the
+    browser sends the last one back as ``Last-Event-ID`` when it reconnects
+    and the missed events are replayed (or a ``session_snapshot`` is sent).
+
+    Authentication:
+    - Same JWT as the WebSocket endpoint, as the ``token`` query parameter
+      (``EventSource`` cannot set headers)
+
+    Args:
+        session_id: The session/room ID to watch
+        token: JWT authentication token (query parameter)
+        last_event_id: ID of the last event received before reconnecting
+
+    Example:
+        new EventSource('/sse/my-session-id?token=your-jwt-token')
+    """
+    payload = decode_token(token)
+    user_id = payload.get("sub") if payload else None
+    if not user_id or not payload.get("org_id"):
+        logger.warning("SSE connection rejected: Invalid token")
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Could not validate credentials",
+        )
+
+    headers = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+
+    # A draining node only tells the browser when to come back (elsewhere);
+    # an error status would make EventSource give up for good
+    if manager.draining:
+        delay = random.uniform(0, settings.WS_DRAIN_RECONNECT_WINDOW_SECONDS)
+        return Response(
+            encode_retry(delay * 1000), media_type=SSE_MEDIA_TYPE, headers=headers
+        )
+
+    async def events():
+        stream = manager.add_spectator(
+            session_id,
+            last_event_id,
+            welcome={
+                "type": "connection",
+                "message": "Watching session",
+                "session_id": session_id,
+                "user_id": user_id,
+            },
+        )
+        try:
+            yield encode_retry(settings.WS_SSE_RETRY_MS)
+            while True:
+                chunk = await stream.read(settings.WS_SSE_KEEPALIVE_SECONDS)
+                if chunk is None:
+                    # Dropped for falling behind, or drained: the browser
+                    # reconnects and resumes
+                    return
+                yield chunk
+        finally:
+            manager.remove_spectator(session_id, stream)
+
+    return StreamingResponse(events(), media_type=SSE_MEDIA_TYPE, headers=headers)
+
+
 if __name__ == "__main__":
     import uvicorn
 
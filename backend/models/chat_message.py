@@ -0,0 +1,31 @@
+"""
+Chat message database model
+Session chat, written in batches behind the in-memory history buffer
+"""
+import uuid
+from datetime import datetime
+from sqlalchemy import Column, String, DateTime, ForeignKey, Index
+from sqlalchemy.dialects.postgresql import UUID
+from backend.core.database import Base
+
+
+class ChatMessage(Base):
+    """
+    Chat message sent to a live session
+    The ID is assigned in memory when the message is relayed, so pages read
+    from the buffer and from the database can be merged
+    """
+    __tablename__ = "chat_messages"
+    __table_args__ = (
+        Index("ix_chat_messages_session_sent_at", "session_id", "sent_at"),
+    )
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    organization_id = Column(UUID(as_uuid=True), ForeignKey("organizations.id"), nullable=False, index=True)
+    session_id = Column(String(100), nullable=False)
+    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=False, index=True)
+    text = Column(String(1000), nullable=False)
+    sent_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+    def __repr__(self):
+        return f"<ChatMessage(id={self.id}, session_id='{self.session_id}', user_id={self.user_id})>"
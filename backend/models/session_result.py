@@ -0,0 +1,37 @@
+"""
+Session result database model
+One participant's answer to one question, written in batches by the answer path
+"""
+import uuid
+from datetime import datetime
+from sqlalchemy import Column, String, Boolean, Integer, DateTime, ForeignKey, Index
+from sqlalchemy.dialects.postgresql import UUID
+from backend.core.database import Base
+
+
+class SessionResult(Base):
+    """
+    Scored answer submitted during a live session
+    Session and question IDs are the realtime layer's string IDs
+    """
+    __tablename__ = "session_results"
+    __table_args__ = (
+        Index("ix_session_results_session_question", "session_id", "question_id"),
+    )
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    organization_id = Column(UUID(as_uuid=True), ForeignKey("organizations.id"), nullable=False, index=True)
+    session_id = Column(String(100), nullable=False)
+    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=False, index=True)
+    question_id = Column(String(64), nullable=False)
+    answer_given = Column(String(255), nullable=False)
+    is_correct = Column(Boolean, nullable=False)
+    response_time_ms = Column(Integer, nullable=False)
+    points = Column(Integer, nullable=False, default=0)
+    answered_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+    def __repr__(self):
+        return (
+            f"<SessionResult(id={self.id}, session_id='{self.session_id}', user_id={self.user_id}, "
+            f"question_id='{self.question_id}', is_correct={self.is_correct})>"
+        )
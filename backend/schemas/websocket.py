@@ -0,0 +1,181 @@
+"""
+WebSocket inbound message Pydantic schemas
+One model per client message type, validated through a discriminated union
+"""
+from datetime import datetime
+from typing import Annotated, List, Literal, Optional, Union
+from pydantic import BaseModel, Field, TypeAdapter
+
+
+class ChatData(BaseModel):
+    """Payload of a chat message"""
+    text: str = Field(..., min_length=1, max_length=1000)
+
+
+class ChatIn(BaseModel):
+    """Chat message to everyone in the session"""
+    type: Literal["chat"]
+    data: ChatData
+
+
+class ChatHistoryData(BaseModel):
+    """Which page of chat history to read"""
+    before: Optional[datetime] = None
+    limit: Optional[int] = Field(None, ge=1, le=500)
+
+
+class ChatHistoryIn(BaseModel):
+    """Request for older chat messages of the session"""
+    type: Literal["chat_history"]
+    data: ChatHistoryData = ChatHistoryData()
+
+
+class TeamChatIn(BaseModel):
+    """Chat message to the sender's team only"""
+    type: Literal["team_chat"]
+    data: ChatData
+
+
+class HelpRequestIn(BaseModel):
+    """Question from a participant to the session's facilitators"""
+    type: Literal["help_request"]
+    data: ChatData
+
+
+class JoinTeamData(BaseModel):
+    """Payload of a team join request"""
+    team_id: str = Field(..., min_length=1, max_length=64)
+
+
+class JoinTeamIn(BaseModel):
+    """Join a team within the session (only facilitators may switch later)"""
+    type: Literal["join_team"]
+    data: JoinTeamData
+
+
+class WatchTeamIn(BaseModel):
+    """Facilitator subscription to a team's channel (e.g. its team chat)"""
+    type: Literal["watch_team"]
+    data: JoinTeamData
+
+
+class UnwatchTeamIn(BaseModel):
+    """End a facilitator's subscription to a team's channel"""
+    type: Literal["unwatch_team"]
+    data: JoinTeamData
+
+
+class SessionUpdateIn(BaseModel):
+    """Session state change published by a facilitator"""
+    type: Literal["session_update"]
+    data: dict
+
+
+class LeaderboardAckData(BaseModel):
+    """Payload of a leaderboard acknowledgement"""
+    version: int = Field(..., ge=0)
+
+
+class LeaderboardAckIn(BaseModel):
+    """Leaderboard version the client has applied"""
+    type: Literal["leaderboard_ack"]
+    data: LeaderboardAckData
+
+
+class AnswerData(BaseModel):
+    """Payload of an answer submission"""
+    question_id: str = Field(..., min_length=1, max_length=64)
+    answer: str = Field(..., min_length=1, max_length=255)
+
+
+class AnswerIn(BaseModel):
+    """Participant's answer to the open question"""
+    type: Literal["answer"]
+    data: AnswerData
+
+
+class OpenQuestionData(BaseModel):
+    """Answer key of a question; never sent to participants"""
+    question_id: str = Field(..., min_length=1, max_length=64)
+    answers: List[str] = Field(..., min_length=1, max_length=16)
+    points: int = Field(100, ge=0, le=10000)
+    time_limit_ms: Optional[int] = Field(None, ge=100, le=3_600_000)
+
+
+class OpenQuestionIn(BaseModel):
+    """Facilitator starting to accept answers to a question"""
+    type: Literal["open_question"]
+    data: OpenQuestionData
+
+
+class StageQuestionData(OpenQuestionData):
+    """Answer key plus the payload participants see once it is revealed"""
+    question: dict
+    reveal_in_ms: Optional[int] = Field(None, ge=0, le=3_600_000)
+
+
+class StageQuestionIn(BaseModel):
+    """Facilitator distributing the next question ahead of its reveal"""
+    type: Literal["stage_question"]
+    data: StageQuestionData
+
+
+class CloseQuestionData(BaseModel):
+    """Payload identifying a question"""
+    question_id: str = Field(..., min_length=1, max_length=64)
+
+
+class CloseQuestionIn(BaseModel):
+    """Facilitator ending answers to a question"""
+    type: Literal["close_question"]
+    data: CloseQuestionData
+
+
+class RevealQuestionIn(BaseModel):
+    """Facilitator revealing the staged question and opening it for answers"""
+    type: Literal["reveal_question"]
+    data: CloseQuestionData
+
+
+class ReactionData(BaseModel):
+    """Payload of a reaction"""
+    reaction: str = Field(..., min_length=1, max_length=32)
+
+
+class ReactionIn(BaseModel):
+    """Participant reacting (applause, laugh...); tallied, not relayed"""
+    type: Literal["reaction"]
+    data: ReactionData
+
+
+class PongIn(BaseModel):
+    """Heartbeat reply"""
+    type: Literal["pong"]
+    data: dict | None = None
+
+
+InboundMessage = Annotated[
+    Union[
+        ChatIn,
+        ChatHistoryIn,
+        TeamChatIn,
+        HelpRequestIn,
+        JoinTeamIn,
+        WatchTeamIn,
+        UnwatchTeamIn,
+        SessionUpdateIn,
+        LeaderboardAckIn,
+        AnswerIn,
+        OpenQuestionIn,
+        StageQuestionIn,
+        RevealQuestionIn,
+        CloseQuestionIn,
+        ReactionIn,
+        PongIn,
+    ],
+    Field(discriminator="type"),
+]
+
+# Compiled once at import; validation dispatches on "type" without trying
+# every model in turn
+inbound_message_adapter: TypeAdapter[InboundMessage] = TypeAdapter(InboundMessage)
@@ -0,0 +1,258 @@
+"""
+In-memory answer keys and scores for live sessions
+Answers are checked, timed and scored without touching the database
+"""
+
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, FrozenSet, Iterable, Optional, Set
+
+from backend.core.config import settings
+
+# Rejection reasons, sent back to the client as the error
+NOT_OPEN = "question_not_open"
+ALREADY_ANSWERED = "already_answered"
+
+
+def normalize_answer(answer: str) -> str:
+    """Case- and whitespace-insensitive form used to compare answers"""
+    return " ".join(answer.casefold().split())
+
+
+class AnswerRejected(Exception):
+    """
+    An answer that cannot be accepted
+
+    Args:
+        reason: Machine-readable reason sent to the client
+    """
+
+    def __init__(self, reason: str):
+        super().__init__(reason)
+        self.reason = reason
+
+
+class OpenQuestion:
+    """
+    Answer key of a question currently accepting answers
+
+    Args:
+        accepted: Normalized correct answers
+        points: Points for a correct answer
+        opened_at: Clock reading when the question opened
+        closes_at: Clock reading after which answers are refused, or None
+    """
+
+    __slots__ = ("accepted", "points", "opened_at", "closes_at", "answered")
+
+    def __init__(
+        self,
+        accepted: FrozenSet[str],
+        points: int,
+        opened_at: float,
+        closes_at: Optional[float],
+    ):
+        self.accepted = accepted
+        self.points = points
+        self.opened_at = opened_at
+        self.closes_at = closes_at
+        # Users who already answered (first answer counts)
+        self.answered: Set[str] = set()
+
+
+class ScoredAnswer:
+    """
+    Outcome of an accepted answer
+
+    Args:
+        correct: Whether the answer matched the key
+        points: Points awarded for it
+        score: The user's session score afterwards
+        response_time_ms: Server-side time from question open to the answer
+    """
+
+    __slots__ = ("correct", "points", "score", "response_time_ms")
+
+    def __init__(self, correct: bool, points: int, score: int, response_time_ms: int):
+        self.correct = correct
+        self.points = points
+        self.score = score
+        self.response_time_ms = response_time_ms
+
+
+class _SessionBook:
+    """Open questions and scores of one session"""
+
+    __slots__ = ("questions", "scores", "touched_at")
+
+    def __init__(self, now: float):
+        self.questions: Dict[str, OpenQuestion] = {}
+        self.scores: Dict[str, int] = {}
+        self.touched_at = now
+
+
+class AnswerBook:
+    """
+    Answer keys, submissions and scores of every live session
+
+    A facilitator opens a question with its answer key; participants' answers
+    are then checked against the key, timed from the moment it opened (on
+    the server's monotonic clock, so client clocks do not matter) and added
+    to their session score, all in O(1) with no I/O. Only the first answer
+    of each user to a question counts.
+
+    State is per process: every answer of a session must reach the process
+    that opened its questions, which is why ``create_dispatcher`` refuses to
+    score behind a broadcast backplane. Sessions untouched for ``idle_ttl``
+    seconds are forgotten, lazily, whenever a question is opened.
+
+    Args:
+        idle_ttl: Seconds of inactivity after which a session is dropped
+        clock: Monotonic clock in seconds (injectable for tests)
+    """
+
+    def __init__(
+        self,
+        idle_ttl: Optional[float] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.idle_ttl = (
+            settings.ANSWER_SESSION_IDLE_TTL_SECONDS if idle_ttl is None else idle_ttl
+        )
+        self.clock = clock
+        # Least recently touched first, so expiry only looks at the front
+        self._sessions: "OrderedDict[str, _SessionBook]" = OrderedDict()
+
+        # Counters for observability
+        self.accepted = 0
+        self.rejected = 0
+
+    def __contains__(self, session_id: str) -> bool:
+        return session_id in self._sessions
+
+    def _touch(self, session_id: str, now: float) -> _SessionBook:
+        """Get a session's book, marking it as recently used"""
+        book = self._sessions.get(session_id)
+        if book is None:
+            book = self._sessions[session_id] = _SessionBook(now)
+        else:
+            self._sessions.move_to_end(session_id)
+            book.touched_at = now
+        return book
+
+    def _expire(self, now: float):
+        """Drop sessions idle for longer than ``idle_ttl``"""
+        while self._sessions:
+            session_id, book = next(iter(self._sessions.items()))
+            if now - book.touched_at <= self.idle_ttl:
+                return
+            del self._sessions[session_id]
+
+    def open_question(
+        self,
+        session_id: str,
+        question_id: str,
+        answers: Iterable[str],
+        points: int = 100,
+        time_limit_ms: Optional[int] = None,
+    ):
+        """
+        Start accepting answers to a question
+
+        Re-opening a question resets its clock and who has answered it.
+
+        Args:
+            session_id: The session asking the question
+            question_id: The question
+            answers: Accepted answers (compared case-insensitively)
+            points: Points for a correct answer
+            time_limit_ms: Answers arriving later are refused (None: no limit)
+        """
+        now = self.clock()
+        self._expire(now)
+        closes_at = None if time_limit_ms is None else now + time_limit_ms / 1000
+        self._touch(session_id, now).questions[question_id] = OpenQuestion(
+            frozenset(normalize_answer(answer) for answer in answers),
+            points,
+            now,
+            closes_at,
+        )
+
+    def close_question(self, session_id: str, question_id: str) -> bool:
+        """
+        Stop accepting answers to a question
+
+        Args:
+            session_id: The session asking the question
+            question_id: The question
+
+        Returns:
+            True if the question was open
+        """
+        book = self._sessions.get(session_id)
+        if book is None:
+            return False
+        return book.questions.pop(question_id, None) is not None
+
+    def submit(
+        self, session_id: str, user_id: str, question_id: str, answer: str
+    ) -> ScoredAnswer:
+        """
+        Check, time and score one answer
+
+        Args:
+            session_id: The session answered in
+            user_id: The answering user
+            question_id: The question answered
+            answer: The answer given
+
+        Returns:
+            The scored answer
+
+        Raises:
+            AnswerRejected: If the question is not open (never opened,
+                closed or past its time limit) or the user already answered
+        """
+        now = self.clock()
+        book = self._sessions.get(session_id)
+        question = book.questions.get(question_id) if book is not None else None
+        if question is None or (
+            question.closes_at is not None and now > question.closes_at
+        ):
+            self.rejected += 1
+            raise AnswerRejected(NOT_OPEN)
+        if user_id in question.answered:
+            self.rejected += 1
+            raise AnswerRejected(ALREADY_ANSWERED)
+        question.answered.add(user_id)
+
+        self._touch(session_id, now)
+        correct = normalize_answer(answer) in question.accepted
+        points = question.points if correct else 0
+        score = book.scores.get(user_id, 0) + points
+        book.scores[user_id] = score
+        self.accepted += 1
+        return ScoredAnswer(
+            correct, points, score, int((now - question.opened_at) * 1000)
+        )
+
+    def scores(self, session_id: str) -> Dict[str, int]:
+        """
+        Current scores of a session
+
+        Args:
+            session_id: The session
+
+        Returns:
+            Score per user who answered at least once (a copy)
+        """
+        book = self._sessions.get(session_id)
+        return dict(book.scores) if book is not None else {}
+
+    def discard(self, session_id: str):
+        """Forget a session's questions and scores"""
+        self._sessions.pop(session_id, None)
+
+
+# Global answer book for the WebSocket answer path
+answer_book = AnswerBook()
@@ -0,0 +1,310 @@
+"""
+Session chat history
+Recent messages are served from a per-session ring buffer; all are written behind
+"""
+
+import asyncio
+import time
+import uuid
+from collections import OrderedDict, deque
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Deque, Dict, List, Optional, Tuple
+
+from backend.core.config import settings
+from backend.services.result_writer import ResultWriter, insert_batch
+
+# Buffers are per tenant: (organization_id, session_id)
+ChatKey = Tuple[Optional[str], str]
+
+# Reads up to ``limit`` messages sent before a time (None: the latest), newest
+# first; runs in a worker thread
+Loader = Callable[[str, str, Optional[datetime], int], List[dict]]
+
+
+def insert_chat_messages(rows: List[dict]):
+    """Default sink: insert a batch into chat_messages (see ``insert_batch``)"""
+    from backend.db.crud.chat_message_crud import create_chat_messages
+
+    insert_batch(create_chat_messages, rows, "chat message")
+
+
+def load_chat_messages(
+    session_id: str, organization_id: str, before: Optional[datetime], limit: int
+) -> List[dict]:
+    """Default loader: read a page of a session's chat from chat_messages"""
+    from backend.core.database import SessionLocal
+    from backend.db.crud.chat_message_crud import get_chat_messages
+
+    try:
+        org_uuid = uuid.UUID(str(organization_id))
+    except ValueError:
+        return []
+    db = SessionLocal()
+    try:
+        return [
+            ChatEntry(str(row.id), str(row.user_id), row.text, row.sent_at).as_dict()
+            for row in get_chat_messages(db, session_id, org_uuid, before, limit)
+        ]
+    finally:
+        db.close()
+
+
+class ChatEntry:
+    """
+    One chat message as kept in memory
+
+    Args:
+        id: Message ID, also its primary key once written
+        user_id: Sender
+        text: Message text
+        sent_at: When the server relayed it (naive UTC)
+    """
+
+    __slots__ = ("id", "user_id", "text", "sent_at")
+
+    def __init__(self, id: str, user_id: Optional[str], text: str, sent_at: datetime):
+        self.id = id
+        self.user_id = user_id
+        self.text = text
+        self.sent_at = sent_at
+
+    def as_dict(self) -> dict:
+        """Outbound shape of the message in history pages"""
+        return {
+            "id": self.id,
+            "user_id": self.user_id,
+            "text": self.text,
+            "sent_at": self.sent_at.isoformat(),
+        }
+
+
+class _SessionChat:
+    """Recent messages of one session"""
+
+    __slots__ = ("messages", "truncated", "touched_at")
+
+    def __init__(self, size: int, now: float):
+        self.messages: Deque[ChatEntry] = deque(maxlen=size)
+        # Whether older messages fell out of the buffer
+        self.truncated = False
+        self.touched_at = now
+
+
+class ChatHistory:
+    """
+    Bounded in-memory chat history per session, persisted write-behind
+
+    Chat used to be relayed live and forgotten, so late joiners saw nothing,
+    and writing each message as it is sent would cost one insert per
+    message. Instead ``add`` appends the message to its session's ring
+    buffer (the last ``buffer_size`` messages, O(1)) and queues a row on a
+    ``ResultWriter``, which inserts queued messages into ``chat_messages``
+    in batches on its background task.
+
+    Buffers are keyed by organization and session, like stored rows, so
+    tenants that use the same session ID never see each other's messages.
+    Late joiners get the latest messages from memory (``recent``). Older
+    pages (``page``) come from memory when the buffer covers them and from
+    the database otherwise; both are merged by message ID, so messages not
+    yet flushed still appear. The buffer is per process, like answer keys;
+    messages relayed by other nodes reach history through the database.
+    Sessions without messages for ``idle_ttl`` seconds are forgotten,
+    lazily, whenever a new session starts chatting.
+
+    Args:
+        writer: Write-behind queue for ``chat_messages`` (a new, unstarted
+            one by default)
+        loader: Reads pages from the database
+        buffer_size: Messages kept in memory per session
+        page_size: Default and maximum messages per page
+        idle_ttl: Seconds without messages after which a buffer is dropped
+        clock: Monotonic clock in seconds (injectable for tests)
+    """
+
+    def __init__(
+        self,
+        writer: Optional[ResultWriter] = None,
+        loader: Optional[Loader] = None,
+        buffer_size: Optional[int] = None,
+        page_size: Optional[int] = None,
+        idle_ttl: Optional[float] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.writer = (
+            ResultWriter(
+                sink=insert_chat_messages,
+                flush_interval_ms=settings.CHAT_FLUSH_INTERVAL_MS,
+                flush_rows=settings.CHAT_FLUSH_ROWS,
+                max_pending=settings.CHAT_MAX_PENDING_ROWS,
+                what="chat messages",
+            )
+            if writer is None
+            else writer
+        )
+        self.loader = load_chat_messages if loader is None else loader
+        self.buffer_size = max(
+            settings.CHAT_BUFFER_SIZE if buffer_size is None else buffer_size, 1
+        )
+        self.page_size = max(
+            settings.CHAT_HISTORY_PAGE_SIZE if page_size is None else page_size, 1
+        )
+        self.idle_ttl = (
+            settings.CHAT_SESSION_IDLE_TTL_SECONDS if idle_ttl is None else idle_ttl
+        )
+        self.clock = clock
+        # Least recently touched first, so expiry only looks at the front
+        self._sessions: "OrderedDict[ChatKey, _SessionChat]" = OrderedDict()
+
+        # Counters for observability
+        self.messages = 0
+        self.memory_pages = 0
+        self.database_pages = 0
+
+    def __contains__(self, key: ChatKey) -> bool:
+        return key in self._sessions
+
+    def _expire(self, now: float):
+        """Drop buffers idle for longer than ``idle_ttl``"""
+        while self._sessions:
+            key, chat = next(iter(self._sessions.items()))
+            if now - chat.touched_at <= self.idle_ttl:
+                return
+            del self._sessions[key]
+
+    def add(
+        self,
+        session_id: str,
+        organization_id: Optional[str],
+        user_id: Optional[str],
+        text: str,
+    ) -> ChatEntry:
+        """
+        Record a chat message relayed to a session
+
+        Args:
+            session_id: Session the message was sent to
+            organization_id: Tenant of the session (None: memory only)
+            user_id: Sender
+            text: Message text
+
+        Returns:
+            The recorded message, with its ID and time
+        """
+        now = self.clock()
+        key = (organization_id, session_id)
+        chat = self._sessions.get(key)
+        if chat is None:
+            self._expire(now)
+            chat = self._sessions[key] = _SessionChat(self.buffer_size, now)
+        else:
+            self._sessions.move_to_end(key)
+            chat.touched_at = now
+
+        sent_at = datetime.utcnow()
+        if chat.messages and sent_at <= chat.messages[-1].sent_at:
+            # Strictly increasing per session, so a time is an exact cursor
+            sent_at = chat.messages[-1].sent_at + timedelta(microseconds=1)
+        entry = ChatEntry(str(uuid.uuid4()), user_id, text, sent_at)
+        if len(chat.messages) == self.buffer_size:
+            chat.truncated = True
+        chat.messages.append(entry)
+        self.messages += 1
+        if organization_id is not None and user_id is not None:
+            self.writer.add(
+                {
+                    "id": entry.id,
+                    "organization_id": organization_id,
+                    "session_id": session_id,
+                    "user_id": user_id,
+                    "text": text,
+                    "sent_at": entry.sent_at,
+                }
+            )
+        return entry
+
+    def recent(
+        self,
+        session_id: str,
+        organization_id: Optional[str],
+        limit: Optional[int] = None,
+    ) -> Tuple[List[dict], bool]:
+        """
+        Latest messages of a session, from memory only
+
+        Args:
+            session_id: The session
+            organization_id: Tenant of the session
+            limit: Messages wanted (at most ``page_size``)
+
+        Returns:
+            Messages oldest first, and whether older ones may exist
+        """
+        limit = self._limit(limit)
+        chat = self._sessions.get((organization_id, session_id))
+        if chat is None:
+            return [], False
+        start = max(len(chat.messages) - limit, 0)
+        messages = [
+            chat.messages[i].as_dict() for i in range(start, len(chat.messages))
+        ]
+        return messages, start > 0 or chat.truncated
+
+    async def page(
+        self,
+        session_id: str,
+        organization_id: Optional[str],
+        before: Optional[datetime] = None,
+        limit: Optional[int] = None,
+    ) -> Tuple[List[dict], bool]:
+        """
+        A page of a session's history
+
+        Args:
+            session_id: The session
+            organization_id: Tenant of the session (None: memory only)
+            before: Only messages sent before this time (None: the latest)
+            limit: Messages wanted (at most ``page_size``)
+
+        Returns:
+            Messages oldest first, and whether older ones exist
+        """
+        limit = self._limit(limit)
+        if before is not None and before.tzinfo is not None:
+            before = before.astimezone(timezone.utc).replace(tzinfo=None)
+
+        # One extra message tells whether there is another page
+        newest_first: List[dict] = []
+        chat = self._sessions.get((organization_id, session_id))
+        if chat is not None:
+            for entry in reversed(chat.messages):
+                if before is None or entry.sent_at < before:
+                    newest_first.append(entry.as_dict())
+                    if len(newest_first) > limit:
+                        break
+
+        if len(newest_first) > limit or organization_id is None:
+            self.memory_pages += 1
+        else:
+            self.database_pages += 1
+            stored = await asyncio.to_thread(
+                self.loader, session_id, organization_id, before, limit + 1
+            )
+            merged: Dict[str, dict] = {m["id"]: m for m in stored}
+            merged.update((m["id"], m) for m in newest_first)
+            newest_first = sorted(
+                merged.values(), key=lambda m: m["sent_at"], reverse=True
+            )
+
+        has_more = len(newest_first) > limit
+        return newest_first[:limit][::-1], has_more
+
+    def _limit(self, limit: Optional[int]) -> int:
+        return self.page_size if limit is None else max(min(limit, self.page_size), 1)
+
+    def discard(self, session_id: str, organization_id: Optional[str]):
+        """Forget a session's buffered messages (they stay queued for writing)"""
+        self._sessions.pop((organization_id, session_id), None)
+
+
+# Global chat history for the WebSocket chat path
+chat_history = ChatHistory()
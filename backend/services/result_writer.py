@@ -0,0 +1,233 @@
+"""
+Write-behind persistence of scored answers
+Results are queued in memory and inserted into session_results in batches
+"""
+
+import asyncio
+import logging
+from collections import deque
+from typing import Callable, Deque, List, Optional
+
+from backend.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Inserts one batch of rows; runs in a worker thread
+Sink = Callable[[List[dict]], None]
+
+
+def insert_batch(create: Callable[..., int], rows: List[dict], what: str):
+    """
+    Insert a batch with ``create(db, rows)`` in one transaction
+
+    A batch rejected for its data (e.g. a user deleted since answering) is
+    retried row by row and only the offending rows are dropped, so one bad
+    row cannot block the queue. Other errors (the database being
+    unreachable) propagate and the whole batch is retried later.
+
+    Args:
+        create: CRUD function inserting rows and committing
+        rows: Column values per row
+        what: Name of the rows, for logging
+    """
+    from sqlalchemy.exc import DataError, IntegrityError
+
+    from backend.core.database import SessionLocal
+
+    invalid = (ValueError, DataError, IntegrityError)
+    db = SessionLocal()
+    try:
+        try:
+            create(db, rows)
+            return
+        except invalid:
+            db.rollback()
+        for row in rows:
+            try:
+                create(db, [row])
+            except invalid as e:
+                db.rollback()
+                logger.error(f"Dropping invalid {what} row: {e}")
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+def insert_session_results(rows: List[dict]):
+    """Default sink: insert a batch into session_results (see ``insert_batch``)"""
+    from backend.db.crud.session_result_crud import create_session_results
+
+    insert_batch(create_session_results, rows, "result")
+
+
+class ResultWriter:
+    """
+    Batched write-behind queue for ``session_results``
+
+    ``add`` only appends to an in-memory queue, so answering never waits for
+    the database. A background task flushes the queue every
+    ``flush_interval_ms``, or as soon as ``flush_rows`` rows are waiting, in
+    batches of at most ``flush_rows`` rows. Each batch is one insert and one
+    commit, run in a worker thread so the event loop keeps serving sockets.
+
+    Crash safety is bounded rather than absolute:
+
+    - A graceful shutdown (``stop``) flushes everything queued
+    - A crash loses at most the rows accepted since the last flush: about
+      ``flush_interval_ms`` worth of answers, and never more than
+      ``flush_rows`` plus the batch in flight
+    - A failed batch stays queued and is retried on the next flush; while the
+      database is down the queue is capped at ``max_pending`` rows and the
+      oldest are dropped (and counted) beyond that
+
+    The queue is not specific to results: other write-behind rows (e.g.
+    chat messages) reuse it with their own sink and limits.
+
+    Args:
+        sink: Function inserting one batch (defaults to the database)
+        flush_interval_ms: Maximum time a row waits before a flush
+        flush_rows: Rows that trigger an early flush; also the batch size
+        max_pending: Rows kept while flushes are failing
+        what: Name of the rows, for logging
+    """
+
+    def __init__(
+        self,
+        sink: Optional[Sink] = None,
+        flush_interval_ms: Optional[int] = None,
+        flush_rows: Optional[int] = None,
+        max_pending: Optional[int] = None,
+        what: str = "results",
+    ):
+        self.what = what
+        self.sink = insert_session_results if sink is None else sink
+        self.flush_interval = (
+            settings.ANSWER_FLUSH_INTERVAL_MS
+            if flush_interval_ms is None
+            else flush_interval_ms
+        ) / 1000
+        self.flush_rows = max(
+            settings.ANSWER_FLUSH_ROWS if flush_rows is None else flush_rows, 1
+        )
+        self.max_pending = (
+            settings.ANSWER_MAX_PENDING_ROWS if max_pending is None else max_pending
+        )
+        self._pending: Deque[dict] = deque()
+        self._wake = asyncio.Event()
+        self._lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+        self._stopping = False
+
+        # Counters for observability
+        self.written = 0
+        self.batches = 0
+        self.failures = 0
+        self.dropped = 0
+
+    @property
+    def pending(self) -> int:
+        """Rows queued and not yet written"""
+        return len(self._pending)
+
+    def add(self, row: dict):
+        """
+        Queue one result for writing (never blocks)
+
+        Args:
+            row: Column values of a ``SessionResult``
+        """
+        if len(self._pending) >= self.max_pending:
+            self._pending.popleft()
+            self.dropped += 1
+            if self.dropped == 1 or self.dropped % 1000 == 0:
+                logger.error(
+                    f"Write-behind queue full ({self.max_pending} {self.what}): "
+                    f"{self.dropped} {self.what} dropped so far"
+                )
+        self._pending.append(row)
+        # Only on reaching a full batch: while writes are failing the queue
+        # stays longer, and retries wait for the next interval
+        if len(self._pending) == self.flush_rows:
+            self._wake.set()
+
+    async def start(self):
+        """Start the background flush task"""
+        if self._task is None:
+            # Fresh primitives: the writer may be restarted on another loop
+            self._wake = asyncio.Event()
+            self._lock = asyncio.Lock()
+            self._stopping = False
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """
+        Stop the flush task after a final, best-effort flush
+
+        The final flush stops at the first failed batch like any other (see
+        ``flush``), so if the database is unavailable at shutdown the rows
+        still queued are not written; their number is logged as an error.
+        """
+        if self._task is None:
+            await self.flush()
+        else:
+            self._stopping = True
+            self._wake.set()
+            task, self._task = self._task, None
+            await task
+        if self._pending:
+            logger.error(
+                f"Write-behind queue stopped with {len(self._pending)} "
+                f"{self.what} unwritten"
+            )
+
+    async def flush(self) -> int:
+        """
+        Write every queued row, batch by batch
+
+        Stops at the first failed batch, which is put back at the front of
+        the queue to be retried.
+
+        Returns:
+            Rows written
+        """
+        written = 0
+        async with self._lock:
+            while self._pending:
+                count = min(len(self._pending), self.flush_rows)
+                batch = [self._pending.popleft() for _ in range(count)]
+                try:
+                    await asyncio.to_thread(self.sink, batch)
+                except Exception as e:
+                    self.failures += 1
+                    logger.error(f"Writing {count} {self.what} failed, will retry: {e}")
+                    self._requeue(batch)
+                    break
+                written += count
+                self.written += count
+                self.batches += 1
+        return written
+
+    def _requeue(self, batch: List[dict]):
+        """Put a failed batch back in front, within ``max_pending``"""
+        self._pending.extendleft(reversed(batch))
+        while len(self._pending) > self.max_pending:
+            self._pending.popleft()
+            self.dropped += 1
+
+    async def _run(self):
+        """Flush on every interval tick or as soon as a batch is full"""
+        while not self._stopping:
+            try:
+                async with asyncio.timeout(self.flush_interval):
+                    await self._wake.wait()
+            except TimeoutError:
+                pass
+            self._wake.clear()
+            await self.flush()
+        await self.flush()
+
+
+# Global write-behind queue for the WebSocket answer path
+result_writer = ResultWriter()
@@ -0,0 +1,467 @@
+"""
+Server-authoritative session timers on a hierarchical timing wheel
+One driver task serves every deadline; due timers fire in batches per kind
+"""
+
+import asyncio
+import logging
+import math
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from backend.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Timer identity: (kind, session_id, name)
+TimerKey = Tuple[str, str, str]
+
+
+class Timer:
+    """
+    One pending deadline
+
+    Args:
+        kind: What happens when it fires (selects the batch handler)
+        session_id: Session the transition applies to
+        name: Distinguishes several timers of a kind in one session (e.g.
+            the question ID)
+        data: Anything the handler needs
+    """
+
+    __slots__ = ("kind", "session_id", "name", "data", "deadline", "expires", "_slot")
+
+    def __init__(self, kind: str, session_id: str, name: str = "", data: Any = None):
+        self.kind = kind
+        self.session_id = session_id
+        self.name = name
+        self.data = data
+        # Clock reading it is due at, and the wheel tick it fires on
+        self.deadline = 0.0
+        self.expires = 0
+        # Wheel slot holding it; None when not scheduled
+        self._slot: Optional[Dict["Timer", None]] = None
+
+    @property
+    def key(self) -> TimerKey:
+        return (self.kind, self.session_id, self.name)
+
+    @property
+    def pending(self) -> bool:
+        """Whether the timer is scheduled and has not fired"""
+        return self._slot is not None
+
+
+class TimingWheel:
+    """
+    Hierarchical timing wheel (as in classic kernel timer wheels)
+
+    Time advances in ticks. Level 0 has one slot per tick for the next
+    ``slots`` ticks; each higher level has slots ``slots`` times coarser.
+    A timer is placed in the finest level whose span covers its expiry, and
+    is moved down a level ("cascaded") when the level below wraps around.
+    Slots are insertion-ordered dicts, so adding, cancelling and
+    rescheduling a timer are O(1) whatever the number of timers, and
+    firing costs O(1) per tick plus O(1) per timer per level it descends.
+
+    Deadlines are rounded up to the next tick, so a timer never fires
+    early. Timers beyond the wheel's span wait in the top level and are
+    re-placed each time they are cascaded.
+
+    Args:
+        tick: Tick length in seconds
+        slots: Slots per level (a power of two)
+        levels: Number of levels (at least two, so parked timers cascade)
+        clock: Monotonic clock in seconds (injectable for tests)
+    """
+
+    def __init__(
+        self,
+        tick: float,
+        slots: int = 64,
+        levels: int = 4,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        if tick <= 0:
+            raise ValueError("Timing wheel tick must be positive")
+        if slots < 2 or slots & (slots - 1):
+            raise ValueError("Timing wheel slots must be a power of two")
+        if levels < 2:
+            # With one level nothing cascades, so a parked timer would fire
+            # on its level-0 slot before it is due
+            raise ValueError("Timing wheel needs at least two levels")
+        self.tick = tick
+        self.slots = slots
+        self.levels = levels
+        self.clock = clock
+        self._bits = slots.bit_length() - 1
+        self._mask = slots - 1
+        # Ticks covered before timers are parked in the top level
+        self.span = slots**levels
+        self._origin = clock()
+        # Next tick to process; every earlier tick has been fired
+        self._next = 0
+        self._wheel: List[List[Dict[Timer, None]]] = [
+            [{} for _ in range(slots)] for _ in range(levels)
+        ]
+        # Timers added with a tick already processed; fired on the next advance
+        self._overdue: Dict[Timer, None] = {}
+        self._count = 0
+
+    def __len__(self) -> int:
+        return self._count
+
+    def tick_of(self, when: float) -> int:
+        """First tick at or after a clock reading (ignoring float error)"""
+        return math.ceil((when - self._origin) / self.tick - 1e-9)
+
+    def time_of(self, tick: int) -> float:
+        """Clock reading at which a tick is due"""
+        return self._origin + tick * self.tick
+
+    def add(self, timer: Timer, deadline: float):
+        """
+        Schedule a timer (rescheduling it if it is already pending)
+
+        Args:
+            timer: The timer
+            deadline: Clock reading it is due at
+        """
+        if timer._slot is not None:
+            self.remove(timer)
+        timer.deadline = deadline
+        timer.expires = self.tick_of(deadline)
+        self._place(timer)
+        self._count += 1
+
+    def remove(self, timer: Timer) -> bool:
+        """
+        Cancel a timer
+
+        Args:
+            timer: The timer
+
+        Returns:
+            False if it was not pending
+        """
+        slot = timer._slot
+        if slot is None:
+            return False
+        del slot[timer]
+        timer._slot = None
+        self._count -= 1
+        return True
+
+    def _place(self, timer: Timer):
+        """Put a timer in the slot matching its expiry, relative to now"""
+        expires = timer.expires
+        delta = expires - self._next
+        if delta < 0:
+            self._overdue[timer] = None
+            timer._slot = self._overdue
+            return
+        if delta >= self.span:
+            # Beyond the wheel: park in the farthest top-level slot; it is
+            # re-placed from its real expiry when that slot cascades
+            expires = self._next + self.span - 1
+            delta = self.span - 1
+        level = 0
+        while delta >= self.slots ** (level + 1):
+            level += 1
+        slot = self._wheel[level][(expires >> (self._bits * level)) & self._mask]
+        slot[timer] = None
+        timer._slot = slot
+
+    def _cascade(self, level: int, index: int):
+        """Move a higher-level slot's timers to finer slots"""
+        slot = self._wheel[level][index]
+        if not slot:
+            return
+        self._wheel[level][index] = {}
+        for timer in slot:
+            self._place(timer)
+
+    def advance(self, now: Optional[float] = None) -> List[Timer]:
+        """
+        Process every tick up to a clock reading
+
+        Args:
+            now: Clock reading (defaults to the clock)
+
+        Returns:
+            Timers that came due, in expiry order
+        """
+        # Last tick whose time has come (the epsilon absorbs float error
+        # when woken exactly at a tick)
+        now = self.clock() if now is None else now
+        target = math.floor((now - self._origin) / self.tick + 1e-9)
+        if self._count == 0:
+            self._next = max(self._next, target + 1)
+            return []
+        due: List[Timer] = []
+        if self._overdue:
+            due.extend(self._overdue)
+            for timer in self._overdue:
+                timer._slot = None
+            self._count -= len(self._overdue)
+            self._overdue = {}
+        wheel = self._wheel
+        mask = self._mask
+        while self._next <= target and self._count:
+            index = self._next & mask
+            if index == 0:
+                # Level 0 wrapped: bring the next slot of each level down
+                for level in range(1, self.levels):
+                    upper = (self._next >> (self._bits * level)) & mask
+                    self._cascade(level, upper)
+                    if upper:
+                        break
+            slot = wheel[0][index]
+            if slot:
+                wheel[0][index] = {}
+                for timer in slot:
+                    timer._slot = None
+                due.extend(slot)
+                self._count -= len(slot)
+            self._next += 1
+        self._next = max(self._next, target + 1)
+        return due
+
+    def next_tick(self) -> Optional[int]:
+        """
+        Earliest tick worth waking up for
+
+        The first non-empty level-0 slot, or the next level-0 wrap (where
+        higher levels cascade), whichever comes first.
+
+        Returns:
+            The tick, or None if no timer is pending
+        """
+        if self._count == 0:
+            return None
+        if self._overdue:
+            return self._next - 1
+        level0 = self._wheel[0]
+        mask = self._mask
+        if self._next & mask == 0:
+            # Wake now if a higher-level slot cascades on this tick
+            for level in range(1, self.levels):
+                upper = (self._next >> (self._bits * level)) & mask
+                if self._wheel[level][upper]:
+                    return self._next
+                if upper:
+                    break
+        boundary = (self._next | mask) + 1
+        for tick in range(self._next, boundary):
+            if level0[tick & mask]:
+                return tick
+        return boundary
+
+
+# Handles every timer of one kind that came due on the same tick
+BatchHandler = Callable[[List[Timer]], Awaitable[None]]
+
+
+class SessionScheduler:
+    """
+    Deadlines of every live session on one timing wheel
+
+    Question closes, scheduled reveals and other session transitions are
+    timers keyed by ``(kind, session_id, name)``; scheduling the same key
+    again reschedules it. Adding, cancelling and rescheduling are O(1).
+    Instead of one sleeping task per timer, a single driver task sleeps
+    until the next occupied tick, collects every timer due by then and
+    calls each kind's handler once with the whole batch, so thousands of
+    sessions timing out together cost one wake-up. The driver runs only
+    while timers are pending and is started by the first ``schedule``.
+
+    Deadlines are read from the monotonic clock, never computed by adding
+    up sleeps, so they do not drift; a timer fires at most about one tick
+    (plus event loop latency) after its deadline and never before.
+
+    State is per process, like the answer book: a session's timers fire on
+    the node that scheduled them.
+
+    Args:
+        tick_ms: Wheel resolution in milliseconds
+        slots: Slots per wheel level (a power of two)
+        levels: Wheel levels
+        clock: Monotonic clock in seconds (injectable for tests)
+    """
+
+    def __init__(
+        self,
+        tick_ms: Optional[int] = None,
+        slots: Optional[int] = None,
+        levels: Optional[int] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.clock = clock
+        self.wheel = TimingWheel(
+            (settings.SCHEDULER_TICK_MS if tick_ms is None else tick_ms) / 1000,
+            settings.SCHEDULER_WHEEL_SLOTS if slots is None else slots,
+            settings.SCHEDULER_WHEEL_LEVELS if levels is None else levels,
+            clock,
+        )
+        self._timers: Dict[TimerKey, Timer] = {}
+        self._handlers: Dict[str, BatchHandler] = {}
+        self._task: Optional[asyncio.Task] = None
+        self._wake: Optional[asyncio.Event] = None
+        # Tick the driver is sleeping until (None while not sleeping)
+        self._sleeping_until: Optional[int] = None
+
+        # Counters for observability
+        self.scheduled = 0
+        self.cancelled = 0
+        self.fired = 0
+        self.batches = 0
+        self.failures = 0
+
+    def __len__(self) -> int:
+        return len(self._timers)
+
+    def register(self, kind: str, handler: BatchHandler):
+        """
+        Set the handler called with the due timers of a kind
+
+        Args:
+            kind: Timer kind
+            handler: Coroutine function taking the list of due timers
+        """
+        self._handlers[kind] = handler
+
+    def get(self, kind: str, session_id: str, name: str = "") -> Optional[Timer]:
+        """Pending timer with this key, if any"""
+        return self._timers.get((kind, session_id, name))
+
+    def schedule(
+        self,
+        kind: str,
+        session_id: str,
+        delay_ms: float,
+        name: str = "",
+        data: Any = None,
+    ) -> Timer:
+        """
+        Schedule (or reschedule) a session timer
+
+        Args:
+            kind: What happens when it fires
+            session_id: Session it applies to
+            delay_ms: Milliseconds from now
+            name: Distinguishes several timers of a kind in one session
+            data: Passed to the handler on the timer
+
+        Returns:
+            The pending timer
+        """
+        key = (kind, session_id, name)
+        timer = self._timers.get(key)
+        if timer is None:
+            timer = self._timers[key] = Timer(kind, session_id, name, data)
+        else:
+            timer.data = data
+        self.wheel.add(timer, self.clock() + delay_ms / 1000)
+        self.scheduled += 1
+        self._ensure_driver(timer.expires)
+        return timer
+
+    def cancel(self, kind: str, session_id: str, name: str = "") -> bool:
+        """
+        Cancel a pending timer
+
+        Returns:
+            False if no such timer was pending
+        """
+        timer = self._timers.pop((kind, session_id, name), None)
+        if timer is None:
+            return False
+        self.wheel.remove(timer)
+        self.cancelled += 1
+        return True
+
+    async def run_due(self, now: Optional[float] = None) -> int:
+        """
+        Fire every timer due by a clock reading, one batch per kind
+
+        Timers are removed before their handler runs, so a handler can
+        schedule the same key again. A failing handler is logged and does
+        not stop the other batches.
+
+        Args:
+            now: Clock reading (defaults to the clock)
+
+        Returns:
+            Number of timers fired
+        """
+        due = self.wheel.advance(now)
+        if not due:
+            return 0
+        batches: Dict[str, List[Timer]] = {}
+        for timer in due:
+            if self._timers.get(timer.key) is timer:
+                del self._timers[timer.key]
+            batches.setdefault(timer.kind, []).append(timer)
+        self.fired += len(due)
+        for kind, timers in batches.items():
+            handler = self._handlers.get(kind)
+            if handler is None:
+                logger.warning(f"No handler for {len(timers)} due {kind} timers")
+                continue
+            self.batches += 1
+            try:
+                await handler(timers)
+            except Exception as e:
+                self.failures += 1
+                logger.error(f"Handling {len(timers)} due {kind} timers failed: {e}")
+        return len(due)
+
+    def _ensure_driver(self, expires: int):
+        """Start the driver, or wake it if this timer is due before it wakes"""
+        if self._task is None:
+            try:
+                asyncio.get_running_loop()
+            except RuntimeError:
+                # No loop (e.g. synchronous tests): ``run_due`` drives it
+                return
+            self._wake = asyncio.Event()
+            self._task = asyncio.ensure_future(self._run())
+        elif self._sleeping_until is not None and expires < self._sleeping_until:
+            self._wake.set()
+
+    async def _run(self):
+        """Sleep until the next occupied tick and fire, while timers remain"""
+        wheel = self.wheel
+        try:
+            while True:
+                tick = wheel.next_tick()
+                if tick is None:
+                    break
+                delay = wheel.time_of(tick) - self.clock()
+                if delay > 0:
+                    self._sleeping_until = tick
+                    self._wake.clear()
+                    try:
+                        async with asyncio.timeout(delay):
+                            await self._wake.wait()
+                        # An earlier timer was scheduled: recompute
+                        continue
+                    except TimeoutError:
+                        pass
+                    finally:
+                        self._sleeping_until = None
+                await self.run_due()
+        finally:
+            self._task = None
+
+    async def stop(self):
+        """Stop the driver task; pending timers stay scheduled"""
+        task = self._task
+        if task is None:
+            return
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
@@ -0,0 +1,230 @@
+"""
+Smoke tests for the realtime benchmarks
+Runs each benchmark at a tiny size so the scripts cannot silently rot
+"""
+
+import pytest
+
+from backend.benchmarks import (
+    bench_codecs,
+    bench_encode,
+    bench_fanout,
+    bench_leaderboard,
+    bench_load,
+    bench_memory,
+    bench_org_broadcast,
+    bench_registry,
+    bench_reveal,
+    bench_scheduler,
+    bench_tallies,
+)
+from backend.benchmarks.common import format_table
+
+
+class TestFanOutBenchmark:
+    """Smoke tests for the fan-out benchmark"""
+
+    @pytest.mark.asyncio
+    async def test_reports_both_modes(self):
+        """Test that sequential and concurrent rows are produced"""
+        rows = await bench_fanout.run_benchmark(
+            sizes=(4,),
+            rounds=1,
+            latency=0.0,
+            slow_fractions=(0.0, 0.25),
+            send_timeout=0.01,
+        )
+
+        assert {row["mode"] for row in rows} == {"sequential", "concurrent"}
+        assert [row["evicted"] for row in rows] == [0, 0, 1, 1]
+        assert "mean_ms" in format_table(rows)
+
+
+class TestEncodeBenchmark:
+    """Smoke tests for the encode-once micro-benchmark"""
+
+    @pytest.mark.asyncio
+    async def test_reports_cpu_per_broadcast(self):
+        """Test that both encoding strategies are measured"""
+        rows = await bench_encode.run_benchmark(sizes=(3,), rounds=1)
+
+        assert rows[0]["sockets"] == 3
+        assert rows[0]["send_json_ms"] >= 0
+        assert rows[0]["encode_once_ms"] >= 0
+
+
+class TestRegistryBenchmark:
+    """Smoke tests for the registry churn benchmark"""
+
+    @pytest.mark.asyncio
+    async def test_reports_both_registries(self):
+        """Test that both registries run both scenarios"""
+        rows = await bench_registry.run_benchmark(size=20, cycles=20)
+
+        assert [(row["scenario"], row["registry"]) for row in rows] == [
+            ("disconnect 20", "list"),
+            ("disconnect 20", "dict+index"),
+            ("churn 20 cycles", "list"),
+            ("churn 20 cycles", "dict+index"),
+        ]
+
+
+class TestLeaderboardBenchmark:
+    """Smoke tests for the leaderboard delta benchmark"""
+
+    @pytest.mark.asyncio
+    async def test_deltas_send_fewer_bytes(self):
+        """Test that deltas beat full-state pushes"""
+        rows = await bench_leaderboard.run_benchmark(sizes=(50,), updates=3, scorers=1)
+
+        assert rows[0]["participants"] == 50
+        assert rows[0]["delta_kb_per_update"] < rows[0]["full_kb_per_update"]
+
+
+class TestRevealBenchmark:
+    """Smoke tests for the staged reveal benchmark"""
+
+    @pytest.mark.asyncio
+    async def test_staging_shrinks_the_reveal_burst(self):
+        """Test that the staged reveal sends less than the full question"""
+        rows = await bench_reveal.run_benchmark(sizes=(5,), bandwidth=1e9)
+        full, staged = rows
+
+        assert (full["mode"], staged["mode"]) == ("full at reveal", "staged")
+        assert staged["prestaged_kb"] > 0
+        assert staged["reveal_kb"] * 5 < full["reveal_kb"]
+
+
+class TestSchedulerBenchmark:
+    """Smoke tests for the session timer benchmark"""
+
+    @pytest.mark.asyncio
+    async def test_every_timer_fires_with_fewer_wakeups(self):
+        """Test that both strategies fire every timer, the wheel in batches"""
+        rows = await bench_scheduler.run_benchmark(
+            timers=200, window=0.05, rescheduled=0.5, tick_ms=5
+        )
+        tasks, wheel = rows
+
+        assert (tasks["mode"], wheel["mode"]) == (
+            "sleep task per timer",
+            "timing wheel",
+        )
+        assert tasks["wakeups"] == 200
+        assert 0 < wheel["wakeups"] < 200
+        assert wheel["p99_late_ms"] >= 0
+
+
+class TestTalliesBenchmark:
+    """Smoke tests for the live tally benchmark"""
+
+    @pytest.mark.asyncio
+    async def test_tallies_send_one_frame_per_interval(self):
+        """Test that tallies replace per-event frames with per-interval ones"""
+        rows = await bench_tallies.run_benchmark(
+            participants=(20,), seconds=1.0, rate=100, interval_ms=250
+        )
+        per_event, tallies = rows
+
+        assert (per_event["mode"], tallies["mode"]) == (
+            "frame per event",
+            "interval tallies",
+        )
+        assert per_event["frames"] == 100 * 3
+        assert tallies["frames"] == 4 * 3
+        assert tallies["kb"] < per_event["kb"]
+
+
+class TestOrgBroadcastBenchmark:
+    """Smoke tests for the organization announcement benchmark"""
+
+    @pytest.mark.asyncio
+    async def test_index_visits_only_the_tenant(self):
+        """Test that both strategies deliver the same frames, the index cheaper"""
+        rows = await bench_org_broadcast.run_benchmark(
+            orgs=5, sockets_per_org=4, sessions_per_org=2, announcements=3
+        )
+        scan, index = rows
+
+        assert (scan["mode"], index["mode"]) == ("scan sessions", "org index")
+        assert scan["frames"] == index["frames"] == 3 * 4
+        assert index["visited_per_announcement"] == 4
+        assert scan["visited_per_announcement"] > 5 * 4
+        assert index["encodes_per_announcement"] == 1
+
+
+class TestCodecBenchmark:
+    """Smoke tests for the codec micro-benchmark"""
+
+    def test_reports_every_payload_and_codec(self):
+        """Test that each payload is measured with each codec"""
+        rows = bench_codecs.run_benchmark(rounds=2)
+
+        assert len(rows) == 9
+        assert {row["payload"] for row in rows} == set(bench_codecs.PAYLOADS)
+        assert all(row["size_vs_json"] <= 1.0 for row in rows)
+
+
+class TestLoadBenchmark:
+    """Smoke tests for the in-process load test"""
+
+    @pytest.mark.asyncio
+    async def test_runs_every_scenario_without_losses(self):
+        """Test that a small load run reports each scenario and drops nothing"""
+        rows = await bench_load.run_benchmark(
+            clients=10, probes=2, probe_interval=0.0, slow_fraction=0.2, timeout=5.0
+        )
+        by_scenario = {row["scenario"]: row for row in rows}
+
+        assert list(by_scenario) == [
+            "join_storm",
+            "broadcast",
+            "answer_burst",
+            "slow_consumers/healthy",
+            "slow_consumers/slow",
+        ]
+        assert by_scenario["join_storm"]["delivered"] == 10
+        assert by_scenario["broadcast"]["delivered"] == 11 * 2
+        assert by_scenario["answer_burst"]["delivered"] == 10
+        assert by_scenario["slow_consumers/healthy"]["dropped"] == 0
+        assert bench_load.manager.get_session_connection_count("load-session") == 0
+
+    def test_check_flags_regressions(self):
+        """Test that metrics beyond the tolerated baseline are reported"""
+        rows = [{"scenario": "broadcast", "p99_ms": 20.0, "dropped": 1}]
+
+        failures = bench_load.check_regressions(
+            rows, {"broadcast": {"p99_ms": 10.0, "dropped": 0}}, tolerance=1.5
+        )
+
+        assert failures == [
+            "broadcast p99_ms: 20.0 > 15.0",
+            "broadcast dropped: 1.0 > 0.0",
+        ]
+
+
+class TestMemoryBenchmark:
+    """Smoke tests for the idle connection memory benchmark"""
+
+    @pytest.mark.asyncio
+    async def test_reports_bytes_per_connection(self):
+        """Test that both scenarios are measured and queues cost memory"""
+        rows = await bench_memory.run_benchmark(connections=50, session_size=10)
+        by_scenario = {row["scenario"]: row for row in rows}
+
+        assert list(by_scenario) == ["idle/queued", "idle/direct"]
+        assert by_scenario["idle/direct"]["bytes_per_conn"] > 0
+        assert (
+            by_scenario["idle/queued"]["bytes_per_conn"]
+            > by_scenario["idle/direct"]["bytes_per_conn"]
+        )
+
+    def test_check_flags_regressions(self):
+        """Test that memory beyond the tolerated baseline is reported"""
+        rows = [{"scenario": "idle/direct", "bytes_per_conn": 2000.0}]
+
+        failures = bench_memory.check_regressions(
+            rows, {"idle/direct": {"bytes_per_conn": 1000.0}}, tolerance=1.2
+        )
+
+        assert failures == ["idle/direct bytes_per_conn: 2000.0 > 1200.0"]
@@ -39,6 +39,8 @@ def db() -> Generator[Session, None, None]:
     # Import all models to ensure they're registered with Base
     from backend.models.organization import Organization  # noqa: F401
     from backend.models.user import User  # noqa: F401
+    from backend.models.session_result import SessionResult  # noqa: F401
+    from backend.models.chat_message import ChatMessage  # noqa: F401
     
     # Create all tables before each test
     Base.metadata.drop_all(bind=test_engine)  # Ensure clean state
@@ -69,6 +71,8 @@ def client(db: Session) -> Generator[TestClient, None, None]:
     # Ensure all models are imported and registered
     from backend.models.organization import Organization  # noqa: F401
     from backend.models.user import User  # noqa: F401
+    from backend.models.session_result import SessionResult  # noqa: F401
+    from backend.models.chat_message import ChatMessage  # noqa: F401
     
     def override_get_db():
         try:
@@ -272,6 +272,7 @@ class TestAuthenticationFlow:
         assert payload is not None
         assert payload["org_id"] == str(sample_user.organization_id)
         assert payload["sub"] == str(sample_user.id)
+        assert payload["plan"] == sample_user.organization.plan.value
     
     def test_register_assigns_user_to_organization(
         self,
@@ -3,7 +3,9 @@ Integration tests for WebSocket functionality
 Tests WebSocket endpoint, authentication, and message broadcasting
 """
 
+import msgpack
 import pytest
+from fastapi import WebSocketDisconnect
 from fastapi.testclient import TestClient
 
 from backend.models.user import User
@@ -184,3 +186,369 @@ class TestWebSocketIntegration:
             assert data["type"] == "user_left"
             assert data["user_id"] == str(admin_user.id)
             assert data["participant_count"] == 1
+
+    def test_websocket_msgpack_subprotocol(self, client: TestClient, sample_user: User):
+        """Test that a client offering msgpack gets binary frames both ways"""
+        token = self._create_user_token(sample_user)
+
+        session_id = "test-session-8"
+
+        with client.websocket_connect(
+            f"/ws/{session_id}?token={token}", subprotocols=["msgpack"]
+        ) as websocket:
+            assert websocket.accepted_subprotocol == "msgpack"
+
+            data = msgpack.unpackb(websocket.receive_bytes())
+            assert data["type"] == "connection"
+            data = msgpack.unpackb(websocket.receive_bytes())
+            assert data["type"] == "user_joined"
+
+            websocket.send_bytes(
+                msgpack.packb({"type": "chat", "data": {"text": "Hello"}})
+            )
+
+            data = msgpack.unpackb(websocket.receive_bytes())
+            assert data["type"] == "chat"
+            assert data["data"]["text"] == "Hello"
+
+    def test_websocket_resume_replays_missed_events(
+        self, client: TestClient, sample_user: User
+    ):
+        """Test that reconnecting with last_seq replays the missed events"""
+        token = self._create_user_token(sample_user)
+
+        session_id = "test-session-9"
+
+        with client.websocket_connect(f"/ws/{session_id}?token={token}") as ws1:
+            welcome = ws1.receive_json()
+            joined = ws1.receive_json()
+            assert joined["type"] == "user_joined"
+            assert joined["seq"] == welcome["seq"] + 1
+
+            ws1.send_json({"type": "chat", "data": {"text": "Missed"}})
+            chat = ws1.receive_json()
+            assert chat["seq"] == joined["seq"] + 1
+
+            with client.websocket_connect(
+                f"/ws/{session_id}?token={token}"
+                f"&last_seq={joined['seq']}&epoch={welcome['epoch']}"
+            ) as ws2:
+                data = ws2.receive_json()
+                assert data["type"] == "connection"
+                assert data["seq"] == chat["seq"]
+
+                # The missed chat message is replayed as broadcast
+                assert ws2.receive_json() == chat
+
+    def test_websocket_resume_with_unknown_epoch_gets_snapshot(
+        self, client: TestClient, sample_user: User
+    ):
+        """Test that an unusable last_seq is answered with a session snapshot"""
+        token = self._create_user_token(sample_user)
+
+        session_id = "test-session-10"
+
+        with client.websocket_connect(
+            f"/ws/{session_id}?token={token}&last_seq=5&epoch=stale"
+        ) as websocket:
+            assert websocket.receive_json()["type"] == "connection"
+
+            data = websocket.receive_json()
+            assert data["type"] == "session_snapshot"
+            assert data["session_id"] == session_id
+            assert data["participant_count"] == 1
+
+    def test_metrics_endpoint_reports_connections(
+        self, client: TestClient, sample_user: User, monkeypatch
+    ):
+        """Test that /metrics exposes live connections in Prometheus format"""
+        from backend.core.config import settings
+        from backend.websocket.metrics import label_hash
+
+        monkeypatch.setattr(settings, "WS_METRICS_ENABLED", True)
+        monkeypatch.setattr(settings, "WS_METRICS_TOKEN", "scrape-secret")
+        token = self._create_user_token(sample_user)
+
+        session_id = "test-session-11"
+
+        with client.websocket_connect(f"/ws/{session_id}?token={token}") as websocket:
+            websocket.receive_json()
+            websocket.receive_json()
+
+            unauthorized = client.get("/metrics")
+            response = client.get(
+                "/metrics", headers={"Authorization": "Bearer scrape-secret"}
+            )
+
+        assert unauthorized.status_code == 401
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/plain")
+        assert (
+            f'trivia_ws_session_connections{{session="{label_hash(session_id)}"}} 1'
+            in response.text
+        )
+        org_label = label_hash(str(sample_user.organization_id))
+        assert (
+            f'trivia_ws_organization_connections{{organization="{org_label}"}}'
+            in response.text
+        )
+        assert session_id not in response.text
+
+    def test_metrics_endpoint_is_off_by_default(self, client: TestClient):
+        """Test that /metrics is not served unless enabled"""
+        response = client.get("/metrics")
+
+        assert response.status_code == 404
+
+    def test_draining_node_refuses_new_connections(
+        self, client: TestClient, sample_user: User
+    ):
+        """Test that a draining node closes new connections with 1012"""
+        from backend.websocket.manager import manager
+
+        token = self._create_user_token(sample_user)
+
+        client.portal.call(manager.drain)
+
+        with pytest.raises(WebSocketDisconnect) as exc_info:
+            with client.websocket_connect(f"/ws/test-session-12?token={token}") as ws:
+                ws.receive_json()
+
+        assert exc_info.value.code == 1012
+
+    def test_second_tab_is_not_announced(
+        self, client: TestClient, sample_user: User, admin_user: User
+    ):
+        """Test that a user's extra tab neither joins nor leaves the user"""
+        token = self._create_user_token(sample_user)
+        other_token = self._create_user_token(admin_user)
+
+        session_id = "test-session-13"
+
+        with client.websocket_connect(f"/ws/{session_id}?token={other_token}") as ws:
+            ws.receive_json()
+            ws.receive_json()
+
+            with client.websocket_connect(f"/ws/{session_id}?token={token}") as tab1:
+                tab1.receive_json()
+                joined = ws.receive_json()
+                assert joined["type"] == "user_joined"
+                assert joined["participant_count"] == 2
+
+                with client.websocket_connect(f"/ws/{session_id}?token={token}"):
+                    pass
+
+                # Neither the second tab's arrival nor its departure is news
+                tab1.send_json({"type": "chat", "data": {"text": "still here"}})
+                assert ws.receive_json()["type"] == "chat"
+
+            left = ws.receive_json()
+            assert left["type"] == "user_left"
+            assert left["participant_count"] == 1
+
+    def test_sse_rejects_invalid_token(self, client: TestClient):
+        """Test that the spectator stream requires a valid token"""
+        response = client.get("/sse/test-session-14?token=invalid.token.here")
+
+        assert response.status_code == 401
+
+    def test_sse_draining_node_only_sends_retry(
+        self, client: TestClient, sample_user: User
+    ):
+        """Test that a draining node tells spectators when to come back"""
+        from backend.websocket.manager import manager
+
+        token = self._create_user_token(sample_user)
+
+        client.portal.call(manager.drain)
+
+        response = client.get(f"/sse/test-session-15?token={token}")
+
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/event-stream")
+        assert response.text.startswith("retry: ")
+        assert "data:" not in response.text
+
+    def test_answer_is_scored_and_written_behind(
+        self, client: TestClient, db, sample_user: User, facilitator_user: User
+    ):
+        """Test that an answer is scored over the socket and persisted later"""
+        from backend.models.session_result import SessionResult
+        from backend.services.result_writer import result_writer
+
+        host_token = self._create_user_token(facilitator_user)
+        token = self._create_user_token(sample_user)
+
+        session_id = "test-session-16"
+
+        with client.websocket_connect(f"/ws/{session_id}?token={host_token}") as host:
+            host.receive_json()
+            host.receive_json()
+
+            with client.websocket_connect(f"/ws/{session_id}?token={token}") as player:
+                player.receive_json()
+                player.receive_json()
+                host.receive_json()
+
+                host.send_json(
+                    {
+                        "type": "open_question",
+                        "data": {"question_id": "q1", "answers": ["Paris"]},
+                    }
+                )
+                assert player.receive_json()["type"] == "question_opened"
+
+                player.send_json(
+                    {"type": "answer", "data": {"question_id": "q1", "answer": "paris"}}
+                )
+                result = player.receive_json()
+                assert result["type"] == "answer_result"
+                assert result["correct"] is True
+                assert result["score"] == 100
+
+        client.portal.call(result_writer.flush)
+
+        (row,) = db.query(SessionResult).filter_by(session_id=session_id).all()
+        assert row.user_id == sample_user.id
+        assert row.organization_id == sample_user.organization_id
+        assert row.answer_given == "paris"
+        assert row.is_correct is True
+        assert row.response_time_ms >= 0
+
+    def test_connection_over_user_limit_is_refused(
+        self, client: TestClient, sample_user: User, monkeypatch
+    ):
+        """Test that a socket over a limit gets a retry hint and a 1013 close"""
+        from backend.websocket.admission import AdmissionController
+        from backend.websocket.manager import manager
+
+        monkeypatch.setattr(
+            manager, "admission", AdmissionController(max_per_user=1, retry_after=2.0)
+        )
+        token = self._create_user_token(sample_user)
+
+        with client.websocket_connect(f"/ws/test-session-17?token={token}") as ws:
+            ws.receive_json()
+
+            with pytest.raises(WebSocketDisconnect) as exc_info:
+                with client.websocket_connect(
+                    f"/ws/test-session-17?token={token}"
+                ) as refused:
+                    rejected = refused.receive_json()
+                    refused.receive_json()
+
+            assert exc_info.value.code == 1013
+            assert rejected["type"] == "connection_rejected"
+            assert rejected["reason"] == "user_limit"
+            assert 1000 <= rejected["retry_after_ms"] <= 2000
+            assert manager.get_capacity()["connections"] == 1
+
+    def test_capacity_reports_utilization(
+        self, client: TestClient, sample_user: User, monkeypatch
+    ):
+        """Test that a full worker answers the capacity check with 503"""
+        from backend.websocket.admission import AdmissionController
+        from backend.websocket.manager import manager
+
+        monkeypatch.setattr(
+            manager, "admission", AdmissionController(max_connections=1)
+        )
+        token = self._create_user_token(sample_user)
+
+        response = client.get("/capacity")
+        assert response.status_code == 200
+        assert response.json() == {
+            "connections": 0,
+            "max_connections": 1,
+            "utilization": 0.0,
+            "accepting": True,
+        }
+
+        with client.websocket_connect(f"/ws/test-session-18?token={token}") as ws:
+            ws.receive_json()
+
+            response = client.get("/capacity")
+
+        assert response.status_code == 503
+        assert response.json()["utilization"] == 1.0
+        assert response.json()["accepting"] is False
+
+    def test_late_joiner_gets_staged_question_and_key(
+        self, client: TestClient, sample_user: User, facilitator_user: User
+    ):
+        """Test that a question staged and revealed earlier reaches a new socket"""
+        host_token = self._create_user_token(facilitator_user)
+        token = self._create_user_token(sample_user)
+
+        session_id = "test-session-19"
+
+        with client.websocket_connect(f"/ws/{session_id}?token={host_token}") as host:
+            host.receive_json()
+            host.receive_json()
+
+            host.send_json(
+                {
+                    "type": "stage_question",
+                    "data": {
+                        "question_id": "q1",
+                        "question": {"text": "Capital of France?"},
+                        "answers": ["Paris"],
+                    },
+                }
+            )
+            assert host.receive_json()["type"] == "question_staged"
+            host.send_json({"type": "reveal_question", "data": {"question_id": "q1"}})
+            assert host.receive_json()["type"] == "question_revealed"
+
+            with client.websocket_connect(f"/ws/{session_id}?token={token}") as player:
+                assert player.receive_json()["type"] == "connection"
+                staged = player.receive_json()
+                revealed = player.receive_json()
+                assert staged["type"] == "question_staged"
+                assert "France" not in str(staged)
+                assert revealed["type"] == "question_revealed"
+                assert revealed["question_id"] == "q1"
+                assert player.receive_json()["type"] == "user_joined"
+
+                player.send_json(
+                    {"type": "answer", "data": {"question_id": "q1", "answer": "paris"}}
+                )
+                assert player.receive_json()["correct"] is True
+
+    def test_late_joiner_gets_recent_chat_and_can_page_back(
+        self, client: TestClient, sample_user: User, facilitator_user: User
+    ):
+        """Test that chat sent before joining is delivered and pageable"""
+        host_token = self._create_user_token(facilitator_user)
+        token = self._create_user_token(sample_user)
+
+        session_id = "test-session-20"
+
+        with client.websocket_connect(f"/ws/{session_id}?token={host_token}") as host:
+            host.receive_json()
+            host.receive_json()
+            for text in ("welcome", "first question soon"):
+                host.send_json({"type": "chat", "data": {"text": text}})
+                sent = host.receive_json()
+            assert sent["type"] == "chat"
+            assert sent["id"] and sent["sent_at"]
+
+            with client.websocket_connect(f"/ws/{session_id}?token={token}") as player:
+                assert player.receive_json()["type"] == "connection"
+                history = player.receive_json()
+                assert history["type"] == "chat_history"
+                assert [m["text"] for m in history["messages"]] == [
+                    "welcome",
+                    "first question soon",
+                ]
+                assert history["has_more"] is False
+                assert player.receive_json()["type"] == "user_joined"
+
+                player.send_json(
+                    {
+                        "type": "chat_history",
+                        "data": {"before": sent["sent_at"], "limit": 10},
+                    }
+                )
+                page = player.receive_json()
+                assert [m["text"] for m in page["messages"]] == ["welcome"]
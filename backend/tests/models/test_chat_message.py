@@ -0,0 +1,68 @@
+"""
+Unit tests for ChatMessage model
+Tests batched inserts and paged, organization-scoped queries
+"""
+import uuid
+from datetime import datetime, timedelta
+
+from sqlalchemy.orm import Session
+
+from backend.db.crud.chat_message_crud import create_chat_messages, get_chat_messages
+from backend.models.chat_message import ChatMessage
+from backend.models.organization import Organization
+from backend.models.user import User
+
+START = datetime(2026, 1, 1, 12, 0)
+
+
+def _row(user: User, text: str, seconds: int = 0, **overrides) -> dict:
+    row = {
+        "id": str(uuid.uuid4()),
+        "organization_id": str(user.organization_id),
+        "session_id": "session-1",
+        "user_id": str(user.id),
+        "text": text,
+        "sent_at": START + timedelta(seconds=seconds),
+    }
+    row.update(overrides)
+    return row
+
+
+class TestChatMessageModel:
+    """Test suite for ChatMessage model"""
+
+    def test_create_chat_messages_keeps_the_relayed_ids(self, db: Session, sample_user: User):
+        """Test that a batch with string IDs is inserted under the IDs clients saw"""
+        rows = [_row(sample_user, "hi"), _row(sample_user, "there", 1)]
+
+        assert create_chat_messages(db, rows) == 2
+
+        stored = db.query(ChatMessage).order_by(ChatMessage.sent_at).all()
+        assert [str(m.id) for m in stored] == [row["id"] for row in rows]
+        assert stored[0].user_id == sample_user.id
+
+    def test_create_chat_messages_empty_batch(self, db: Session):
+        """Test that an empty batch writes nothing"""
+        assert create_chat_messages(db, []) == 0
+        assert db.query(ChatMessage).count() == 0
+
+    def test_get_chat_messages_pages_back_newest_first(self, db: Session, sample_user: User, sample_organization: Organization):
+        """Test that pages are read newest first, before a time, up to a limit"""
+        create_chat_messages(db, [_row(sample_user, f"m{n}", n) for n in range(5)])
+
+        latest = get_chat_messages(db, "session-1", sample_organization.id, limit=2)
+        older = get_chat_messages(db, "session-1", sample_organization.id, before=latest[-1].sent_at, limit=10)
+
+        assert [m.text for m in latest] == ["m4", "m3"]
+        assert [m.text for m in older] == ["m2", "m1", "m0"]
+
+    def test_get_chat_messages_is_organization_scoped(
+        self, db: Session, sample_user: User, other_org_user: User, sample_organization: Organization
+    ):
+        """Test that another organization's chat in a same-named session is not returned"""
+        create_chat_messages(db, [_row(sample_user, "ours"), _row(other_org_user, "theirs")])
+
+        messages = get_chat_messages(db, "session-1", sample_organization.id)
+
+        assert [m.text for m in messages] == ["ours"]
+        assert get_chat_messages(db, "session-1", uuid.uuid4()) == []
@@ -0,0 +1,60 @@
+"""
+Unit tests for SessionResult model
+Tests batched inserts and organization-scoped queries
+"""
+import uuid
+from datetime import datetime
+
+from sqlalchemy.orm import Session
+
+from backend.db.crud.session_result_crud import create_session_results, get_session_results
+from backend.models.organization import Organization
+from backend.models.session_result import SessionResult
+from backend.models.user import User
+
+
+def _row(user: User, question_id: str, **overrides) -> dict:
+    row = {
+        "organization_id": str(user.organization_id),
+        "session_id": "session-1",
+        "user_id": str(user.id),
+        "question_id": question_id,
+        "answer_given": "Paris",
+        "is_correct": True,
+        "response_time_ms": 1200,
+        "points": 100,
+        "answered_at": datetime.utcnow(),
+    }
+    row.update(overrides)
+    return row
+
+
+class TestSessionResultModel:
+    """Test suite for SessionResult model"""
+
+    def test_create_session_results_inserts_batch(self, db: Session, sample_user: User):
+        """Test that a batch of rows with string IDs is inserted in one call"""
+        count = create_session_results(db, [_row(sample_user, "q1"), _row(sample_user, "q2", is_correct=False, points=0)])
+
+        results = db.query(SessionResult).order_by(SessionResult.question_id).all()
+        assert count == 2
+        assert [r.question_id for r in results] == ["q1", "q2"]
+        assert results[0].id is not None
+        assert results[0].user_id == sample_user.id
+        assert results[1].is_correct is False
+
+    def test_create_session_results_empty_batch(self, db: Session):
+        """Test that an empty batch writes nothing"""
+        assert create_session_results(db, []) == 0
+        assert db.query(SessionResult).count() == 0
+
+    def test_get_session_results_is_organization_scoped(
+        self, db: Session, sample_user: User, other_org_user: User, sample_organization: Organization
+    ):
+        """Test that results of another organization's session are not returned"""
+        create_session_results(db, [_row(sample_user, "q1"), _row(other_org_user, "q1")])
+
+        results = get_session_results(db, "session-1", sample_organization.id)
+
+        assert [r.user_id for r in results] == [sample_user.id]
+        assert get_session_results(db, "session-1", uuid.uuid4()) == []
@@ -0,0 +1,147 @@
+"""
+Unit tests for the in-memory answer book
+"""
+
+import pytest
+
+from backend.services.answers import (
+    ALREADY_ANSWERED,
+    NOT_OPEN,
+    AnswerBook,
+    AnswerRejected,
+    normalize_answer,
+)
+
+
+class FakeClock:
+    """Monotonic clock advanced by hand"""
+
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def _book(idle_ttl: float = 3600.0):
+    clock = FakeClock()
+    return AnswerBook(idle_ttl=idle_ttl, clock=clock), clock
+
+
+class TestAnswerBook:
+    """Test suite for AnswerBook"""
+
+    def test_correct_answer_scores_with_server_response_time(self):
+        """Test that a correct answer earns the points, timed from opening"""
+        book, clock = _book()
+        book.open_question("s1", "q1", ["Paris"], points=50)
+        clock.now += 1.25
+
+        scored = book.submit("s1", "alice", "q1", "  paris ")
+
+        assert scored.correct
+        assert scored.points == 50
+        assert scored.score == 50
+        assert scored.response_time_ms == 1250
+
+    def test_wrong_answer_scores_nothing(self):
+        """Test that a wrong answer is accepted with zero points"""
+        book, _ = _book()
+        book.open_question("s1", "q1", ["Paris"])
+
+        scored = book.submit("s1", "alice", "q1", "Lyon")
+
+        assert not scored.correct
+        assert scored.points == 0
+        assert book.scores("s1") == {"alice": 0}
+
+    def test_scores_accumulate_per_session(self):
+        """Test that scores add up across questions and stay per session"""
+        book, _ = _book()
+        book.open_question("s1", "q1", ["a"], points=10)
+        book.open_question("s1", "q2", ["b"], points=20)
+        book.open_question("s2", "q1", ["a"], points=10)
+
+        book.submit("s1", "alice", "q1", "a")
+        assert book.submit("s1", "alice", "q2", "b").score == 30
+        book.submit("s2", "alice", "q1", "a")
+
+        assert book.scores("s1") == {"alice": 30}
+        assert book.scores("s2") == {"alice": 10}
+
+    def test_only_the_first_answer_counts(self):
+        """Test that a second answer to the same question is refused"""
+        book, _ = _book()
+        book.open_question("s1", "q1", ["a"])
+        book.submit("s1", "alice", "q1", "b")
+
+        with pytest.raises(AnswerRejected) as exc_info:
+            book.submit("s1", "alice", "q1", "a")
+
+        assert exc_info.value.reason == ALREADY_ANSWERED
+        assert book.scores("s1") == {"alice": 0}
+        assert (book.accepted, book.rejected) == (1, 1)
+
+    def test_answers_outside_the_open_window_are_refused(self):
+        """Test unknown, closed and timed-out questions"""
+        book, clock = _book()
+        book.open_question("s1", "q1", ["a"], time_limit_ms=500)
+        book.open_question("s1", "q2", ["a"])
+        book.close_question("s1", "q2")
+        clock.now += 0.6
+
+        for session_id, question_id in (("s1", "q1"), ("s1", "q2"), ("s2", "q1")):
+            with pytest.raises(AnswerRejected) as exc_info:
+                book.submit(session_id, "alice", question_id, "a")
+            assert exc_info.value.reason == NOT_OPEN
+
+    def test_close_reports_whether_the_question_was_open(self):
+        """Test that closing twice only succeeds once"""
+        book, _ = _book()
+        book.open_question("s1", "q1", ["a"])
+
+        assert book.close_question("s1", "q1")
+        assert not book.close_question("s1", "q1")
+        assert not book.close_question("s2", "q1")
+
+    def test_reopening_resets_who_answered(self):
+        """Test that a re-opened question accepts answers again"""
+        book, _ = _book()
+        book.open_question("s1", "q1", ["a"], points=10)
+        book.submit("s1", "alice", "q1", "a")
+
+        book.open_question("s1", "q1", ["a"], points=10)
+
+        assert book.submit("s1", "alice", "q1", "a").score == 20
+
+    def test_idle_sessions_expire_when_a_question_opens(self):
+        """Test that sessions idle past the TTL are forgotten"""
+        book, clock = _book(idle_ttl=60.0)
+        book.open_question("s1", "q1", ["a"])
+        book.open_question("s2", "q1", ["a"])
+        clock.now += 30
+        book.submit("s2", "alice", "q1", "a")
+        clock.now += 45
+
+        book.open_question("s3", "q1", ["a"])
+
+        assert "s1" not in book
+        assert "s2" in book
+        assert "s3" in book
+
+    def test_discard_forgets_the_session(self):
+        """Test that discard drops questions and scores"""
+        book, _ = _book()
+        book.open_question("s1", "q1", ["a"])
+        book.submit("s1", "alice", "q1", "a")
+
+        book.discard("s1")
+
+        assert book.scores("s1") == {}
+        with pytest.raises(AnswerRejected):
+            book.submit("s1", "bob", "q1", "a")
+
+
+def test_normalize_answer():
+    """Test that case and surrounding or repeated whitespace are ignored"""
+    assert normalize_answer("  New   YORK ") == "new york"
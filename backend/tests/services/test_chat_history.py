@@ -0,0 +1,184 @@
+"""
+Unit tests for session chat history
+"""
+
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from backend.services.chat_history import ChatHistory, insert_chat_messages
+from backend.services.result_writer import ResultWriter
+
+
+class FakeClock:
+    """Monotonic clock advanced by hand"""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class FakeLoader:
+    """Stands in for the database: returns preset rows, records queries"""
+
+    def __init__(self, rows=()):
+        self.rows = list(rows)
+        self.calls = []
+
+    def __call__(self, session_id, organization_id, before, limit):
+        self.calls.append((session_id, organization_id, before, limit))
+        rows = [
+            r for r in self.rows if before is None or r["sent_at"] < before.isoformat()
+        ]
+        return sorted(rows, key=lambda r: r["sent_at"], reverse=True)[:limit]
+
+
+def _history(loader=None, **kwargs):
+    rows = []
+    writer = ResultWriter(sink=rows.extend)
+    history = ChatHistory(writer=writer, loader=loader or FakeLoader(), **kwargs)
+    return history, writer
+
+
+def _texts(messages):
+    return [m["text"] for m in messages]
+
+
+class TestChatHistory:
+    """Test suite for ChatHistory"""
+
+    def test_buffer_keeps_the_latest_messages(self):
+        """Test that the ring buffer drops the oldest beyond its size"""
+        history, _ = _history(buffer_size=3, page_size=10)
+        for n in range(5):
+            history.add("s1", "org", "u1", f"m{n}")
+
+        messages, has_more = history.recent("s1", "org")
+
+        assert _texts(messages) == ["m2", "m3", "m4"]
+        assert has_more is True
+
+    def test_recent_is_limited_to_a_page(self):
+        """Test that late joiners get at most one page, oldest first"""
+        history, _ = _history(page_size=2)
+        for n in range(3):
+            history.add("s1", "org", "u1", f"m{n}")
+
+        messages, has_more = history.recent("s1", "org", limit=50)
+
+        assert _texts(messages) == ["m1", "m2"]
+        assert has_more is True
+        assert history.recent("unknown", "org") == ([], False)
+
+    def test_every_message_is_queued_for_writing(self):
+        """Test that add queues a row with the message's ID and time"""
+        history, writer = _history()
+
+        entry = history.add("s1", "org", "u1", "hello")
+        history.add("s1", None, "u1", "not persisted without a tenant")
+
+        (row,) = writer._pending
+        assert row["id"] == entry.id
+        assert row["organization_id"] == "org"
+        assert row["text"] == "hello"
+        assert row["sent_at"] == entry.sent_at
+
+    @pytest.mark.asyncio
+    async def test_page_in_the_buffer_does_not_touch_the_database(self):
+        """Test that a page the buffer covers is served from memory"""
+        loader = FakeLoader()
+        history, _ = _history(loader, page_size=10)
+        entries = [history.add("s1", "org", "u1", f"m{n}") for n in range(6)]
+
+        messages, has_more = await history.page("s1", "org", entries[4].sent_at, 3)
+
+        assert _texts(messages) == ["m1", "m2", "m3"]
+        assert has_more is True
+        assert loader.calls == []
+        assert history.memory_pages == 1
+
+    @pytest.mark.asyncio
+    async def test_older_pages_merge_database_and_buffer(self):
+        """Test that stored rows fill the page and unflushed ones are kept"""
+        start = datetime(2026, 1, 1)
+        stored = [
+            {
+                "id": f"old-{n}",
+                "user_id": "u1",
+                "text": f"old{n}",
+                "sent_at": (start + timedelta(seconds=n)).isoformat(),
+            }
+            for n in range(3)
+        ]
+        loader = FakeLoader(stored)
+        history, _ = _history(loader, page_size=10)
+        history.add("s1", "org", "u1", "new")
+
+        messages, has_more = await history.page("s1", "org", limit=3)
+
+        assert _texts(messages) == ["old1", "old2", "new"]
+        assert has_more is True
+        assert loader.calls == [("s1", "org", None, 4)]
+        assert history.database_pages == 1
+
+    @pytest.mark.asyncio
+    async def test_aware_cursor_is_compared_as_utc(self):
+        """Test that a client-supplied time zone does not break the cursor"""
+        history, _ = _history(page_size=10)
+        entries = [history.add("s1", None, "u1", f"m{n}") for n in range(3)]
+        cursor = (
+            entries[2]
+            .sent_at.replace(tzinfo=timezone.utc)
+            .astimezone(timezone(timedelta(hours=2)))
+        )
+
+        messages, has_more = await history.page("s1", None, cursor)
+
+        assert _texts(messages) == ["m0", "m1"]
+        assert has_more is False
+
+    def test_idle_sessions_are_forgotten(self):
+        """Test that buffers idle past the TTL are dropped lazily"""
+        clock = FakeClock()
+        history, _ = _history(idle_ttl=60, clock=clock)
+        history.add("s1", "org", "u1", "hi")
+
+        clock.now += 61
+        history.add("s2", "org", "u1", "hi")
+
+        assert ("org", "s1") not in history
+        assert ("org", "s2") in history
+
+    @pytest.mark.asyncio
+    async def test_tenants_sharing_a_session_id_are_kept_apart(self):
+        """Test that one organization never sees another's buffered chat"""
+        loader = FakeLoader()
+        history, _ = _history(loader, page_size=10)
+        history.add("s1", "org-a", "u1", "for a")
+        history.add("s1", "org-b", "u2", "for b")
+
+        recent, _ = history.recent("s1", "org-b")
+        page, _ = await history.page("s1", "org-a")
+
+        assert _texts(recent) == ["for b"]
+        assert _texts(page) == ["for a"]
+        assert history.recent("s1", "org-c") == ([], False)
+
+
+class TestInsertChatMessages:
+    """Test suite for the default database sink"""
+
+    def test_invalid_rows_do_not_block_the_batch(self, db, sample_user):
+        """Test that valid messages are written when another row is rejected"""
+        from backend.models.chat_message import ChatMessage
+
+        history, writer = _history()
+        history.add("s1", str(sample_user.organization_id), "not-a-uuid", "bad")
+        history.add("s1", str(sample_user.organization_id), str(sample_user.id), "ok")
+
+        insert_chat_messages(list(writer._pending))
+
+        (message,) = db.query(ChatMessage).all()
+        assert message.text == "ok"
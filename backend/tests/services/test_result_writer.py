@@ -0,0 +1,170 @@
+"""
+Unit tests for the write-behind result queue
+"""
+
+import asyncio
+from datetime import datetime
+
+import pytest
+
+from backend.services.result_writer import ResultWriter, insert_session_results
+
+
+class RecordingSink:
+    """Collects written batches; can be made to fail"""
+
+    def __init__(self):
+        self.batches = []
+        self.failing = False
+
+    def __call__(self, rows):
+        if self.failing:
+            raise RuntimeError("database unavailable")
+        self.batches.append(list(rows))
+
+
+def _rows(count: int, start: int = 0):
+    return [{"n": n} for n in range(start, start + count)]
+
+
+class TestResultWriter:
+    """Test suite for ResultWriter"""
+
+    @pytest.mark.asyncio
+    async def test_flush_writes_in_batches(self):
+        """Test that queued rows are written in batches of flush_rows"""
+        sink = RecordingSink()
+        writer = ResultWriter(sink, flush_interval_ms=1000, flush_rows=2)
+        for row in _rows(5):
+            writer.add(row)
+
+        assert await writer.flush() == 5
+
+        assert [len(batch) for batch in sink.batches] == [2, 2, 1]
+        assert [row["n"] for batch in sink.batches for row in batch] == [
+            0,
+            1,
+            2,
+            3,
+            4,
+        ]
+        assert writer.pending == 0
+        assert (writer.written, writer.batches) == (5, 3)
+
+    @pytest.mark.asyncio
+    async def test_flushes_on_interval(self):
+        """Test that a partial batch is written after the interval"""
+        sink = RecordingSink()
+        writer = ResultWriter(sink, flush_interval_ms=20, flush_rows=100)
+        await writer.start()
+        try:
+            writer.add({"n": 0})
+            await asyncio.sleep(0.1)
+
+            assert sink.batches == [[{"n": 0}]]
+        finally:
+            await writer.stop()
+
+    @pytest.mark.asyncio
+    async def test_full_batch_flushes_early(self):
+        """Test that reaching flush_rows does not wait for the interval"""
+        sink = RecordingSink()
+        writer = ResultWriter(sink, flush_interval_ms=60_000, flush_rows=3)
+        await writer.start()
+        try:
+            for row in _rows(3):
+                writer.add(row)
+            await asyncio.sleep(0.05)
+
+            assert sink.batches == [_rows(3)]
+        finally:
+            await writer.stop()
+
+    @pytest.mark.asyncio
+    async def test_stop_writes_everything_queued(self):
+        """Test that a graceful stop loses nothing"""
+        sink = RecordingSink()
+        writer = ResultWriter(sink, flush_interval_ms=60_000, flush_rows=100)
+        await writer.start()
+        for row in _rows(7):
+            writer.add(row)
+
+        await writer.stop()
+
+        assert sum(len(batch) for batch in sink.batches) == 7
+        assert writer.pending == 0
+
+    @pytest.mark.asyncio
+    async def test_stop_logs_rows_it_could_not_write(self, caplog):
+        """Test that rows left by a failing final flush are reported"""
+        sink = RecordingSink()
+        writer = ResultWriter(sink, flush_interval_ms=60_000, flush_rows=100)
+        await writer.start()
+        for row in _rows(7):
+            writer.add(row)
+        sink.failing = True
+
+        await writer.stop()
+
+        assert writer.pending == 7
+        assert "stopped with 7 results unwritten" in caplog.text
+
+    @pytest.mark.asyncio
+    async def test_failed_batch_is_retried_in_order(self):
+        """Test that a failed write keeps its rows at the front of the queue"""
+        sink = RecordingSink()
+        writer = ResultWriter(sink, flush_interval_ms=1000, flush_rows=2)
+        for row in _rows(3):
+            writer.add(row)
+        sink.failing = True
+
+        assert await writer.flush() == 0
+        assert writer.failures == 1
+        assert writer.pending == 3
+
+        sink.failing = False
+        writer.add({"n": 3})
+        assert await writer.flush() == 4
+        assert [row["n"] for batch in sink.batches for row in batch] == [0, 1, 2, 3]
+
+    @pytest.mark.asyncio
+    async def test_queue_is_bounded_while_writes_fail(self):
+        """Test that the oldest rows are dropped beyond max_pending"""
+        sink = RecordingSink()
+        sink.failing = True
+        writer = ResultWriter(sink, flush_interval_ms=1000, flush_rows=2, max_pending=3)
+        for row in _rows(5):
+            writer.add(row)
+
+        await writer.flush()
+
+        assert writer.pending == 3
+        assert writer.dropped == 2
+        sink.failing = False
+        await writer.flush()
+        assert [row["n"] for batch in sink.batches for row in batch] == [2, 3, 4]
+
+
+class TestInsertSessionResults:
+    """Test suite for the default database sink"""
+
+    def test_invalid_rows_do_not_block_the_batch(self, db, sample_user):
+        """Test that valid rows are written when another row is rejected"""
+        from backend.models.session_result import SessionResult
+
+        row = {
+            "organization_id": str(sample_user.organization_id),
+            "session_id": "s1",
+            "user_id": str(sample_user.id),
+            "question_id": "q1",
+            "answer_given": "a",
+            "is_correct": True,
+            "response_time_ms": 10,
+            "points": 100,
+            "answered_at": datetime.utcnow(),
+        }
+
+        insert_session_results([{**row, "user_id": "not-a-uuid"}, row])
+
+        (result,) = db.query(SessionResult).all()
+        assert result.user_id == sample_user.id
@@ -0,0 +1,235 @@
+"""
+Unit tests for the timing wheel and session scheduler
+"""
+
+import asyncio
+import random
+
+import pytest
+
+from backend.services.scheduler import SessionScheduler, Timer, TimingWheel
+
+
+class FakeClock:
+    """Monotonic clock advanced by hand"""
+
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def _wheel(slots: int = 4, levels: int = 3):
+    clock = FakeClock()
+    return TimingWheel(0.01, slots, levels, clock), clock
+
+
+class TestTimingWheel:
+    """Test suite for TimingWheel"""
+
+    def test_timer_fires_on_its_tick_never_early(self):
+        """Test that a timer fires once its deadline has passed"""
+        wheel, clock = _wheel()
+        timer = Timer("close", "s1")
+        wheel.add(timer, clock.now + 0.025)
+
+        assert wheel.advance(clock.now + 0.02) == []
+        assert wheel.advance(clock.now + 0.03) == [timer]
+        assert not timer.pending
+        assert len(wheel) == 0
+
+    def test_far_timers_cascade_through_every_level(self):
+        """Test that timers beyond level 0 (and beyond the span) fire on time"""
+        wheel, clock = _wheel(slots=4, levels=2)
+        delays = [1, 3, 4, 5, 15, 16, 17, 40, 63, 64, 100]
+        timers = {}
+        for ticks in delays:
+            timer = Timer("close", f"s{ticks}")
+            wheel.add(timer, clock.now + ticks * 0.01)
+            timers[timer] = ticks
+
+        fired_at = {}
+        for tick in range(1, 120):
+            for timer in wheel.advance(clock.now + tick * 0.01):
+                fired_at[timer] = tick
+
+        assert fired_at == timers
+
+    def test_random_deadlines_match_a_sorted_reference(self):
+        """Test firing order and timing against a brute-force reference"""
+        wheel, clock = _wheel(slots=8, levels=3)
+        rng = random.Random(7)
+        expected = {}
+        for i in range(500):
+            ticks = rng.randrange(0, 2000)
+            timer = Timer("t", f"s{i}")
+            wheel.add(timer, clock.now + ticks * 0.01)
+            expected[timer] = ticks
+
+        fired = []
+        now = clock.now
+        while len(wheel):
+            now += rng.randrange(1, 40) * 0.01
+            for timer in wheel.advance(now):
+                assert expected[timer] * 0.01 <= now - clock.now + 1e-9
+                fired.append(expected[timer])
+
+        assert fired == sorted(expected.values())
+
+    def test_cancel_and_reschedule(self):
+        """Test that removed timers never fire and moved ones fire when moved to"""
+        wheel, clock = _wheel()
+        cancelled, moved = Timer("t", "a"), Timer("t", "b")
+        wheel.add(cancelled, clock.now + 0.05)
+        wheel.add(moved, clock.now + 0.05)
+
+        assert wheel.remove(cancelled)
+        assert not wheel.remove(cancelled)
+        wheel.add(moved, clock.now + 0.5)
+
+        assert wheel.advance(clock.now + 0.1) == []
+        assert wheel.advance(clock.now + 0.5) == [moved]
+
+    def test_past_deadline_fires_on_next_advance(self):
+        """Test that a timer added already due is not lost"""
+        wheel, clock = _wheel()
+        wheel.advance(clock.now + 1.0)
+        timer = Timer("t", "s1")
+
+        wheel.add(timer, clock.now)
+
+        assert wheel.advance(clock.now + 1.0) == [timer]
+
+    def test_next_tick_skips_empty_slots(self):
+        """Test that the driver can sleep until the next occupied tick"""
+        wheel, clock = _wheel(slots=8)
+        assert wheel.next_tick() is None
+
+        wheel.add(Timer("t", "s1"), clock.now + 0.03)
+        assert wheel.next_tick() == 3
+
+        # Level 1 timer: its slot cascades into level 0 on tick 16
+        wheel.add(Timer("t", "s2"), clock.now + 0.2)
+        wheel.advance(clock.now + 0.03)
+        assert wheel.next_tick() == 8
+        wheel.advance(clock.now + 0.08)
+        assert wheel.next_tick() == 16
+        wheel.advance(clock.now + 0.16)
+        assert wheel.next_tick() == 20
+
+    def test_rejects_bad_geometry(self):
+        """Test that slots must be a power of two, the tick positive and levels > 1"""
+        with pytest.raises(ValueError):
+            TimingWheel(0.01, slots=6)
+        with pytest.raises(ValueError):
+            TimingWheel(0.0)
+        with pytest.raises(ValueError):
+            TimingWheel(0.01, levels=0)
+        with pytest.raises(ValueError):
+            TimingWheel(0.01, levels=1)
+
+
+class TestSessionScheduler:
+    """Test suite for SessionScheduler"""
+
+    def _scheduler(self):
+        clock = FakeClock()
+        scheduler = SessionScheduler(tick_ms=10, slots=16, levels=3, clock=clock)
+        fired = []
+
+        async def handler(timers):
+            fired.append([(timer.session_id, timer.name) for timer in timers])
+
+        scheduler.register("close", handler)
+        return scheduler, clock, fired
+
+    def test_same_key_reschedules(self):
+        """Test that scheduling a key again moves the existing timer"""
+        scheduler, clock, _ = self._scheduler()
+
+        first = scheduler.schedule("close", "s1", 100, "q1")
+        second = scheduler.schedule("close", "s1", 500, "q1", data="later")
+
+        assert first is second
+        assert second.data == "later"
+        assert len(scheduler) == 1
+        assert len(scheduler.wheel) == 1
+
+    @pytest.mark.asyncio
+    async def test_due_timers_fire_as_one_batch_per_kind(self):
+        """Test that timers due on the same advance reach the handler together"""
+        scheduler, clock, fired = self._scheduler()
+        other = []
+
+        async def reveal(timers):
+            other.append(len(timers))
+
+        scheduler.register("reveal", reveal)
+        for session in ("s1", "s2", "s3"):
+            scheduler.schedule("close", session, 100, "q1")
+        scheduler.schedule("reveal", "s1", 50)
+        scheduler.schedule("close", "s4", 1000, "q1")
+        await scheduler.stop()
+
+        assert await scheduler.run_due(clock.now + 0.1) == 4
+
+        assert fired == [[("s1", "q1"), ("s2", "q1"), ("s3", "q1")]]
+        assert other == [1]
+        assert scheduler.batches == 2
+        assert scheduler.get("close", "s4", "q1") is not None
+        assert len(scheduler) == 1
+
+    @pytest.mark.asyncio
+    async def test_cancelled_timer_does_not_fire(self):
+        """Test that cancel removes the timer from the wheel"""
+        scheduler, clock, fired = self._scheduler()
+        scheduler.schedule("close", "s1", 100, "q1")
+        await scheduler.stop()
+
+        assert scheduler.cancel("close", "s1", "q1")
+        assert not scheduler.cancel("close", "s1", "q1")
+        assert await scheduler.run_due(clock.now + 1.0) == 0
+        assert fired == []
+
+    @pytest.mark.asyncio
+    async def test_failing_handler_does_not_stop_other_batches(self):
+        """Test that one kind's error is counted and the rest still fire"""
+        scheduler, clock, fired = self._scheduler()
+
+        async def broken(timers):
+            raise RuntimeError("boom")
+
+        scheduler.register("broken", broken)
+        scheduler.schedule("broken", "s1", 10)
+        scheduler.schedule("close", "s1", 10, "q1")
+        await scheduler.stop()
+
+        await scheduler.run_due(clock.now + 0.1)
+
+        assert scheduler.failures == 1
+        assert fired == [[("s1", "q1")]]
+
+    @pytest.mark.asyncio
+    async def test_driver_fires_on_the_real_clock_and_exits_when_idle(self):
+        """Test that the background driver fires timers, then stops itself"""
+        scheduler = SessionScheduler(tick_ms=5)
+        fired = asyncio.Event()
+
+        async def handler(timers):
+            fired.set()
+
+        scheduler.register("close", handler)
+        scheduler.schedule("close", "s1", 500, "q1")
+        # An earlier timer wakes the sleeping driver
+        await asyncio.sleep(0)
+        scheduler.schedule("close", "s2", 10, "q1")
+
+        await asyncio.wait_for(fired.wait(), timeout=0.2)
+        assert scheduler.get("close", "s2", "q1") is None
+        assert scheduler.get("close", "s1", "q1") is not None
+
+        scheduler.cancel("close", "s1", "q1")
+        scheduler.schedule("close", "s3", 0, "q1")
+        await asyncio.sleep(0.05)
+        assert scheduler._task is None
@@ -0,0 +1,71 @@
+"""
+Test doubles for WebSocket connection manager tests
+"""
+
+import asyncio
+import json
+from typing import Any, List, Optional, Sequence
+
+
+class FakeWebSocket:
+    """
+    Records everything sent to it; can simulate a stalled or broken peer
+
+    Args:
+        stalled: If True, sends never complete
+        broken: If True, sends raise RuntimeError
+        subprotocols: Subprotocols offered by the client in the handshake
+        received: Frames the client will send, returned by ``receive_*``
+    """
+
+    def __init__(
+        self,
+        stalled: bool = False,
+        broken: bool = False,
+        subprotocols: Sequence[str] = (),
+        received: Sequence[Any] = (),
+    ):
+        self.stalled = stalled
+        self.broken = broken
+        self.scope = {"type": "websocket", "subprotocols": list(subprotocols)}
+        self.subprotocol: Optional[str] = None
+        self._received = list(received)
+        self.accepted = False
+        self.closed = False
+        self.close_code: Optional[int] = None
+        self.sent: List[Any] = []
+
+    async def accept(self, subprotocol: Optional[str] = None):
+        self.accepted = True
+        self.subprotocol = subprotocol
+
+    async def receive_json(self) -> Any:
+        return json.loads(self._received.pop(0))
+
+    async def receive_bytes(self) -> bytes:
+        return self._received.pop(0)
+
+    async def _send(self, data: Any):
+        if self.broken:
+            raise RuntimeError("connection reset")
+        if self.stalled:
+            await asyncio.Event().wait()
+        self.sent.append(data)
+
+    async def send_json(self, data: Any):
+        await self._send(json.loads(json.dumps(data)))
+
+    async def send_text(self, data: str):
+        await self._send(data)
+
+    async def send_bytes(self, data: bytes):
+        await self._send(data)
+
+    @property
+    def messages(self) -> List[Any]:
+        """Sent payloads with JSON text frames decoded back into objects"""
+        return [json.loads(m) if isinstance(m, str) else m for m in self.sent]
+
+    async def close(self, code: int = 1000, reason: Optional[str] = None):
+        self.closed = True
+        self.close_code = code
@@ -0,0 +1,238 @@
+"""
+Unit tests for connection admission control
+"""
+
+import asyncio
+
+import pytest
+
+from backend.models.organization import PlanType
+from backend.tests.websocket.fakes import FakeWebSocket
+from backend.websocket.admission import (
+    ORGANIZATION_LIMIT,
+    USER_LIMIT,
+    WORKER_FULL,
+    AdmissionController,
+    AdmissionRefused,
+)
+from backend.websocket.manager import ConnectionManager
+from backend.websocket.metrics import render_metrics
+
+PLANS = {"free": 2, "premium": 5, "enterprise": 0}
+
+
+class SlowHandshake(FakeWebSocket):
+    """A socket whose accept yields, like a real handshake"""
+
+    async def accept(self, subprotocol=None):
+        await asyncio.sleep(0)
+        await super().accept(subprotocol)
+
+
+class FailingHandshake(FakeWebSocket):
+    """A socket whose client vanishes during the handshake"""
+
+    async def accept(self, subprotocol=None):
+        raise RuntimeError("handshake failed")
+
+
+def _controller(**overrides) -> AdmissionController:
+    limits = {
+        "max_connections": 10,
+        "max_per_plan": PLANS,
+        "max_per_user": 3,
+        "retry_after": 4.0,
+    }
+    limits.update(overrides)
+    return AdmissionController(**limits)
+
+
+class TestAdmissionController:
+    """Test suite for AdmissionController"""
+
+    def test_admits_below_every_limit(self):
+        """Test that a check below all limits passes"""
+        controller = _controller()
+
+        controller.check(9, 1, 2, "free")
+
+        assert controller.rejected == {
+            WORKER_FULL: 0,
+            ORGANIZATION_LIMIT: 0,
+            USER_LIMIT: 0,
+        }
+
+    @pytest.mark.parametrize(
+        "counts, reason",
+        [
+            ((10, 0, 0), WORKER_FULL),
+            ((10, 2, 3), WORKER_FULL),
+            ((5, 2, 0), ORGANIZATION_LIMIT),
+            ((5, 1, 3), USER_LIMIT),
+        ],
+    )
+    def test_refuses_at_the_first_limit_reached(self, counts, reason):
+        """Test that the worker, organization and user limits apply in order"""
+        controller = _controller()
+
+        with pytest.raises(AdmissionRefused) as exc_info:
+            controller.check(*counts, plan="free")
+
+        assert exc_info.value.reason == reason
+        assert controller.rejected[reason] == 1
+
+    def test_organization_quota_follows_the_plan(self):
+        """Test that plans get their own quota and unknown plans the free one"""
+        controller = _controller()
+
+        controller.check(0, 4, 0, PlanType.PREMIUM)
+        controller.check(0, 1000, 0, PlanType.ENTERPRISE)
+        assert controller.organization_limit(None) == 2
+        assert controller.organization_limit("platinum") == 2
+        with pytest.raises(AdmissionRefused):
+            controller.check(0, 5, 0, "premium")
+
+    def test_zero_disables_a_limit(self):
+        """Test that 0 means unlimited"""
+        controller = _controller(
+            max_connections=0, max_per_plan={"free": 0}, max_per_user=0
+        )
+
+        controller.check(10**6, 10**6, 10**6, "free")
+
+        assert controller.utilization(10**6) == 0.0
+
+    def test_retry_hint_is_jittered_within_the_window(self):
+        """Test that refused clients are told to wait half to all of retry_after"""
+        controller = _controller(max_connections=1)
+
+        hints = set()
+        for _ in range(20):
+            with pytest.raises(AdmissionRefused) as exc_info:
+                controller.check(1, 0, 0)
+            hints.add(exc_info.value.retry_after_ms)
+
+        assert all(2000 <= hint <= 4000 for hint in hints)
+        assert len(hints) > 1
+
+    def test_utilization(self):
+        """Test that utilization is connections over the worker limit"""
+        assert _controller().utilization(4) == 0.4
+
+
+class TestManagerAdmission:
+    """Test suite for admission control in ConnectionManager.connect"""
+
+    @pytest.mark.asyncio
+    async def test_refused_socket_gets_hint_and_1013(self):
+        """Test that a refused socket is told why, closed and not registered"""
+        manager = ConnectionManager(
+            outbound_queue_size=0, admission=_controller(max_per_user=1)
+        )
+        await manager.connect(FakeWebSocket(), "s1", user_id="u1")
+        refused = FakeWebSocket()
+
+        with pytest.raises(AdmissionRefused):
+            await manager.connect(refused, "s1", user_id="u1")
+
+        (message,) = refused.messages
+        assert message["type"] == "connection_rejected"
+        assert message["reason"] == USER_LIMIT
+        assert 2000 <= message["retry_after_ms"] <= 4000
+        assert refused.closed
+        assert refused.close_code == 1013
+        assert manager.get_connection(refused) is None
+        assert manager.get_participant_count("s1") == 1
+
+    @pytest.mark.asyncio
+    async def test_organization_quota_counts_this_worker(self):
+        """Test that an organization is capped by its plan's quota"""
+        manager = ConnectionManager(outbound_queue_size=0, admission=_controller())
+        for user in ("u1", "u2"):
+            await manager.connect(FakeWebSocket(), "s1", user_id=user, org_id="o1")
+
+        with pytest.raises(AdmissionRefused) as exc_info:
+            await manager.connect(FakeWebSocket(), "s2", user_id="u3", org_id="o1")
+        await manager.connect(
+            FakeWebSocket(), "s2", user_id="u3", org_id="o1", plan="premium"
+        )
+        await manager.connect(FakeWebSocket(), "s2", user_id="u4", org_id="o2")
+
+        assert exc_info.value.reason == ORGANIZATION_LIMIT
+        assert manager.get_connection_count() == 4
+
+    @pytest.mark.asyncio
+    async def test_joining_another_session_is_not_a_new_connection(self):
+        """Test that an admitted socket can join more sessions at capacity"""
+        manager = ConnectionManager(
+            outbound_queue_size=0, admission=_controller(max_connections=1)
+        )
+        ws = FakeWebSocket()
+        await manager.connect(ws, "s1")
+
+        await manager.connect(ws, "s2")
+
+        assert manager.get_connection_sessions(ws) == {"s1", "s2"}
+
+    @pytest.mark.asyncio
+    async def test_capacity_and_metrics(self):
+        """Test that utilization and rejections are exposed"""
+        manager = ConnectionManager(
+            outbound_queue_size=0, admission=_controller(max_connections=2)
+        )
+        for _ in range(3):
+            try:
+                await manager.connect(FakeWebSocket(), "s1")
+            except AdmissionRefused:
+                pass
+
+        assert manager.get_capacity() == {
+            "connections": 2,
+            "max_connections": 2,
+            "utilization": 1.0,
+            "accepting": False,
+        }
+        text = render_metrics(manager)
+        assert "trivia_ws_connection_utilization 1.0" in text
+        assert 'trivia_ws_admission_rejections_total{reason="worker_full"} 1' in text
+
+    @pytest.mark.asyncio
+    async def test_concurrent_handshakes_cannot_exceed_the_limits(self):
+        """Test that a join storm is capped while accepts are in flight"""
+        manager = ConnectionManager(
+            outbound_queue_size=0, admission=_controller(max_per_user=0)
+        )
+
+        results = await asyncio.gather(
+            *(
+                manager.connect(SlowHandshake(), "s1", user_id=f"u{i}")
+                for i in range(100)
+            ),
+            *(
+                manager.connect(SlowHandshake(), "s2", user_id="u1", org_id="o1")
+                for _ in range(5)
+            ),
+            return_exceptions=True,
+        )
+
+        refused = [r for r in results if isinstance(r, AdmissionRefused)]
+        assert manager.get_connection_count() == 10
+        assert len(refused) == 95
+        assert len(manager._org_sockets.get("o1", ())) <= 2
+        assert manager._pending_connections == 0
+        assert manager._pending_orgs == {}
+        assert manager._pending_users == {}
+
+    @pytest.mark.asyncio
+    async def test_failed_handshake_releases_its_slot(self):
+        """Test that a socket failing to accept does not keep its reservation"""
+        manager = ConnectionManager(
+            outbound_queue_size=0, admission=_controller(max_connections=1)
+        )
+
+        with pytest.raises(RuntimeError):
+            await manager.connect(FailingHandshake(), "s1", user_id="u1", org_id="o1")
+        await manager.connect(FakeWebSocket(), "s1", user_id="u1", org_id="o1")
+
+        assert manager.get_connection_count() == 1
+        assert manager._pending_connections == 0
@@ -0,0 +1,239 @@
+"""
+Tests for the cross-process WebSocket broadcast backplane
+Uses the in-memory driver and a fake Redis to simulate several nodes
+"""
+
+import asyncio
+
+import fakeredis
+import pytest
+
+from backend.tests.websocket.fakes import FakeWebSocket
+from backend.websocket.backplane import (
+    InMemoryBackplane,
+    InMemoryBroker,
+    RedisBackplane,
+    create_backplane,
+    pack_frame,
+    unpack_frame,
+)
+from backend.websocket.frames import Frame
+from backend.websocket.manager import ConnectionManager
+
+
+async def _node(backplane) -> ConnectionManager:
+    """Create a started manager that writes to sockets directly"""
+    node = ConnectionManager(outbound_queue_size=0, backplane=backplane)
+    await node.start()
+    return node
+
+
+async def _wait_for(predicate, timeout: float = 2.0):
+    """Poll until predicate() is true (Redis delivery is asynchronous)"""
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not predicate():
+        if asyncio.get_running_loop().time() > deadline:
+            raise AssertionError("condition not met before timeout")
+        await asyncio.sleep(0.01)
+
+
+class TestWireFormat:
+    """Test suite for frame packing"""
+
+    def test_text_frame_round_trip(self):
+        """Test that a text frame survives packing unchanged"""
+        origin, frame = unpack_frame(pack_frame("node-a", Frame('{"a":"\\n"}', "chat")))
+
+        assert origin == "node-a"
+        assert frame.data == '{"a":"\\n"}'
+        assert frame.message_type == "chat"
+
+    def test_binary_frame_round_trip(self):
+        """Test that a binary frame without a type survives packing"""
+        _, frame = unpack_frame(pack_frame("node-a", Frame(b"\x00\n\x01")))
+
+        assert frame.data == b"\x00\n\x01"
+        assert frame.message_type is None
+
+
+class TestInMemoryBackplane:
+    """Test suite for fan-out across nodes through the in-memory driver"""
+
+    @pytest.mark.asyncio
+    async def test_broadcast_reaches_other_nodes_once(self):
+        """Test that every participant gets exactly one copy"""
+        broker = InMemoryBroker()
+        node_a = await _node(InMemoryBackplane(broker))
+        node_b = await _node(InMemoryBackplane(broker))
+        ws_a, ws_b = FakeWebSocket(), FakeWebSocket()
+        await node_a.connect(ws_a, "s1")
+        await node_b.connect(ws_b, "s1")
+
+        await node_a.broadcast_to_session("s1", {"type": "session_update"})
+
+        assert ws_a.messages == [{"type": "session_update", "seq": 1}]
+        assert ws_b.messages == [{"type": "session_update", "seq": 1}]
+        assert broker.published == 1
+
+    @pytest.mark.asyncio
+    async def test_publishes_even_without_local_connections(self):
+        """Test that a node with no local sockets still reaches other nodes"""
+        broker = InMemoryBroker()
+        node_a = await _node(InMemoryBackplane(broker))
+        node_b = await _node(InMemoryBackplane(broker))
+        ws_b = FakeWebSocket()
+        await node_b.connect(ws_b, "s1")
+
+        await node_a.broadcast_to_session("s1", {"type": "session_update"})
+
+        assert ws_b.messages == [{"type": "session_update", "seq": 1}]
+
+    @pytest.mark.asyncio
+    async def test_subscribes_only_while_session_has_local_connections(self):
+        """Test subscription follows the first and last local connection"""
+        broker = InMemoryBroker()
+        backplane = InMemoryBackplane(broker)
+        node = await _node(backplane)
+        ws1, ws2 = FakeWebSocket(), FakeWebSocket()
+
+        await node.connect(ws1, "s1")
+        await node.connect(ws2, "s1")
+        assert broker.channels["s1"] == {backplane}
+
+        node.disconnect(ws1, "s1")
+        await asyncio.sleep(0)
+        assert "s1" in broker.channels
+
+        node.disconnect(ws2, "s1")
+        await asyncio.sleep(0)
+        assert "s1" not in broker.channels
+
+    @pytest.mark.asyncio
+    async def test_quick_reconnect_keeps_subscription(self):
+        """Test that a pending unsubscribe does not drop a revived session"""
+        broker = InMemoryBroker()
+        node = await _node(InMemoryBackplane(broker))
+        ws = FakeWebSocket()
+        await node.connect(ws, "s1")
+
+        node.disconnect(ws, "s1")
+        await node.connect(FakeWebSocket(), "s1")
+        await asyncio.sleep(0)
+
+        assert "s1" in broker.channels
+
+    @pytest.mark.asyncio
+    async def test_stop_releases_subscriptions(self):
+        """Test that stopping a node removes it from every channel"""
+        broker = InMemoryBroker()
+        node = await _node(InMemoryBackplane(broker))
+        await node.connect(FakeWebSocket(), "s1")
+
+        await node.stop()
+
+        assert broker.channels["s1"] == set()
+
+    @pytest.mark.asyncio
+    async def test_organization_broadcast_reaches_other_nodes(self):
+        """Test that a tenant announcement reaches its sockets on every node"""
+        broker = InMemoryBroker()
+        node_a = await _node(InMemoryBackplane(broker))
+        node_b = await _node(InMemoryBackplane(broker))
+        ws_a, ws_b, other = FakeWebSocket(), FakeWebSocket(), FakeWebSocket()
+        await node_a.connect(ws_a, "s1", org_id="o1")
+        await node_b.connect(ws_b, "s2", org_id="o1")
+        await node_b.connect(other, "s2", org_id="o2")
+        await asyncio.sleep(0)
+
+        await node_a.broadcast_to_organization("o1", {"type": "announcement"})
+
+        assert ws_a.messages == [{"type": "announcement"}]
+        assert ws_b.messages == [{"type": "announcement"}]
+        assert other.messages == []
+        assert broker.published == 1
+
+    @pytest.mark.asyncio
+    async def test_subscribes_to_organization_while_it_has_sockets(self):
+        """Test that the organization channel follows its first and last socket"""
+        broker = InMemoryBroker()
+        backplane = InMemoryBackplane(broker)
+        node = await _node(backplane)
+        ws = FakeWebSocket()
+
+        await node.connect(ws, "s1", org_id="o1")
+        await asyncio.sleep(0)
+        assert broker.channels["/org/o1"] == {backplane}
+
+        node.disconnect(ws, "s1")
+        await asyncio.sleep(0)
+        assert "/org/o1" not in broker.channels
+
+
+class TestRedisBackplane:
+    """Test suite for the Redis pub/sub driver against a fake Redis"""
+
+    @pytest.mark.asyncio
+    async def test_broadcast_crosses_nodes_via_redis(self):
+        """Test that a broadcast on one node reaches sockets on another"""
+        server = fakeredis.FakeServer()
+        backplane_a = RedisBackplane(client=fakeredis.FakeAsyncRedis(server=server))
+        backplane_b = RedisBackplane(client=fakeredis.FakeAsyncRedis(server=server))
+        node_a = await _node(backplane_a)
+        node_b = await _node(backplane_b)
+        ws_a, ws_b = FakeWebSocket(), FakeWebSocket()
+        await node_a.connect(ws_a, "s1")
+        await node_b.connect(ws_b, "s1")
+
+        try:
+            await node_a.broadcast_to_session("s1", {"type": "session_update"})
+            await _wait_for(lambda: ws_b.sent)
+            await asyncio.sleep(0.05)  # Node A must ignore its own echo
+
+            assert ws_a.messages == [{"type": "session_update", "seq": 1}]
+            assert ws_b.messages == [{"type": "session_update", "seq": 1}]
+        finally:
+            await node_a.stop()
+            await node_b.stop()
+
+    @pytest.mark.asyncio
+    async def test_uses_one_channel_per_session(self):
+        """Test channel naming and unsubscribe after the last connection"""
+        client = fakeredis.FakeAsyncRedis()
+        backplane = RedisBackplane(client=client, channel_prefix="test")
+        node = await _node(backplane)
+        ws = FakeWebSocket()
+
+        try:
+            await node.connect(ws, "s1")
+            assert await client.pubsub_numsub("test:session:s1") == [
+                (b"test:session:s1", 1)
+            ]
+
+            node.disconnect(ws, "s1")
+            await asyncio.sleep(0.01)
+            assert await client.pubsub_numsub("test:session:s1") == [
+                (b"test:session:s1", 0)
+            ]
+        finally:
+            await node.stop()
+
+
+class TestCreateBackplane:
+    """Test suite for backplane selection from settings"""
+
+    def test_none_disables_backplane(self):
+        """Test that 'none' means single-process mode"""
+        assert create_backplane("none") is None
+
+    def test_memory_driver(self):
+        """Test that 'memory' builds the in-memory driver"""
+        assert isinstance(create_backplane("memory"), InMemoryBackplane)
+
+    def test_redis_driver(self):
+        """Test that 'redis' builds the Redis driver from settings"""
+        assert isinstance(create_backplane("redis"), RedisBackplane)
+
+    def test_unknown_driver_raises(self):
+        """Test that an unknown driver name is rejected"""
+        with pytest.raises(ValueError):
+            create_backplane("carrier-pigeon")
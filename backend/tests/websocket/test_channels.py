@@ -0,0 +1,185 @@
+"""
+Unit tests for hierarchical channels within sessions
+"""
+
+import asyncio
+
+import pytest
+
+from backend.tests.websocket.fakes import FakeWebSocket
+from backend.websocket.backplane import InMemoryBackplane, InMemoryBroker
+from backend.websocket.channels import (
+    facilitator_channel,
+    is_session_channel,
+    session_of,
+    team_channel,
+)
+from backend.websocket.manager import ConnectionManager
+from backend.websocket.metrics import render_metrics
+
+
+class TestChannelNames:
+    """Test suite for channel naming helpers"""
+
+    def test_sub_channels_belong_to_their_session(self):
+        """Test that sub-channel names resolve to their session"""
+        assert team_channel("s1", "red") == "s1/team/red"
+        assert facilitator_channel("s1") == "s1/facilitators"
+        assert session_of("s1/team/red") == "s1"
+        assert session_of("s1") == "s1"
+        assert is_session_channel("s1")
+        assert not is_session_channel("s1/facilitators")
+
+
+class TestSubscriptions:
+    """Test suite for subscribing connections to channels"""
+
+    @pytest.mark.asyncio
+    async def test_connection_can_be_in_several_channels(self):
+        """Test that a facilitator can follow teams alongside its own channel"""
+        manager = ConnectionManager(outbound_queue_size=0)
+        host = FakeWebSocket()
+        await manager.connect(host, "s1", facilitator=True)
+
+        assert manager.subscribe(host, team_channel("s1", "red"))
+        assert manager.subscribe(host, team_channel("s1", "blue"))
+
+        assert manager.get_channels(host, "s1") == {
+            "s1/facilitators",
+            "s1/primary",
+            "s1/team/red",
+            "s1/team/blue",
+        }
+        assert manager.get_channel_count() == 4
+
+    @pytest.mark.asyncio
+    async def test_subscribe_requires_session_membership(self):
+        """Test that only members of the session can join its sub-channels"""
+        manager = ConnectionManager(outbound_queue_size=0)
+        ws = FakeWebSocket()
+        await manager.connect(ws, "s2")
+
+        assert not manager.subscribe(ws, team_channel("s1", "red"))
+        assert not manager.subscribe(ws, "s2")
+        assert manager.get_channels(ws, "s2") == {"s2/primary"}
+
+    @pytest.mark.asyncio
+    async def test_unsubscribe_removes_empty_channels(self):
+        """Test that the last member leaving a channel removes it"""
+        manager = ConnectionManager(outbound_queue_size=0)
+        ws = FakeWebSocket()
+        await manager.connect(ws, "s1")
+        manager.subscribe(ws, team_channel("s1", "red"))
+
+        manager.unsubscribe(ws, team_channel("s1", "red"))
+        manager.unsubscribe(ws, team_channel("s1", "red"))
+
+        assert "s1/team/red" not in manager.get_channels(ws, "s1")
+        assert manager.get_channel_connection_count("s1/team/red") == 0
+        assert manager.get_channel_connection_count("s1") == 1
+
+    @pytest.mark.asyncio
+    async def test_leaving_a_session_leaves_only_its_channels(self):
+        """Test that sub-channels of other sessions are kept"""
+        manager = ConnectionManager(outbound_queue_size=0)
+        ws = FakeWebSocket()
+        await manager.connect(ws, "s1")
+        await manager.connect(ws, "s2")
+        manager.set_team(ws, "s1", "red")
+        manager.set_team(ws, "s2", "red")
+
+        manager.disconnect(ws, "s1")
+
+        assert manager.get_channels(ws, "s1") == set()
+        assert manager.get_channels(ws, "s2") == {"s2/primary", "s2/team/red"}
+
+
+class TestChannelBroadcast:
+    """Test suite for delivering to a channel's members only"""
+
+    @pytest.mark.asyncio
+    async def test_broadcast_reaches_only_members(self):
+        """Test that a team broadcast skips the rest of the session"""
+        manager = ConnectionManager(outbound_queue_size=0)
+        red, blue, host = FakeWebSocket(), FakeWebSocket(), FakeWebSocket()
+        for ws in (red, blue):
+            await manager.connect(ws, "s1")
+        await manager.connect(host, "s1", facilitator=True)
+        manager.set_team(red, "s1", "red")
+        manager.set_team(blue, "s1", "blue")
+        manager.subscribe(host, team_channel("s1", "red"))
+
+        await manager.broadcast_to_channel("s1/team/red", {"type": "team_chat"})
+
+        assert red.messages == [{"type": "team_chat"}]
+        assert host.messages == [{"type": "team_chat"}]
+        assert blue.sent == []
+
+    @pytest.mark.asyncio
+    async def test_session_channel_is_a_session_broadcast(self):
+        """Test that the root channel reaches everyone and is numbered"""
+        manager = ConnectionManager(outbound_queue_size=0)
+        ws = FakeWebSocket()
+        await manager.connect(ws, "s1")
+
+        await manager.broadcast_to_channel("s1", {"type": "chat"})
+
+        assert ws.messages == [{"type": "chat", "seq": 1}]
+
+    @pytest.mark.asyncio
+    async def test_metrics_count_channels(self):
+        """Test that sub-channels with members are exported"""
+        manager = ConnectionManager(outbound_queue_size=0)
+        await manager.connect(FakeWebSocket(), "s1", facilitator=True)
+
+        # The facilitators channel and the session's primary sockets
+        assert "trivia_ws_channels 2" in render_metrics(manager)
+
+
+class TestChannelBackplane:
+    """Test suite for sub-channels across nodes"""
+
+    @pytest.mark.asyncio
+    async def test_team_broadcast_reaches_members_on_other_nodes(self):
+        """Test that a sub-channel frame is published once and delivered remotely"""
+        broker = InMemoryBroker()
+        nodes = []
+        for _ in range(2):
+            node = ConnectionManager(
+                outbound_queue_size=0, backplane=InMemoryBackplane(broker)
+            )
+            await node.start()
+            nodes.append(node)
+        red_a, red_b, blue_b = FakeWebSocket(), FakeWebSocket(), FakeWebSocket()
+        await nodes[0].connect(red_a, "s1")
+        for ws in (red_b, blue_b):
+            await nodes[1].connect(ws, "s1")
+        nodes[0].set_team(red_a, "s1", "red")
+        nodes[1].set_team(red_b, "s1", "red")
+        nodes[1].set_team(blue_b, "s1", "blue")
+        await asyncio.sleep(0)
+
+        await nodes[0].broadcast_to_team("s1", "red", {"type": "team_chat"})
+
+        assert red_a.messages == [{"type": "team_chat"}]
+        assert red_b.messages == [{"type": "team_chat"}]
+        assert blue_b.sent == []
+
+    @pytest.mark.asyncio
+    async def test_node_subscribes_only_while_channel_has_members(self):
+        """Test that backplane subscriptions follow local channel members"""
+        broker = InMemoryBroker()
+        backplane = InMemoryBackplane(broker)
+        node = ConnectionManager(outbound_queue_size=0, backplane=backplane)
+        await node.start()
+        ws = FakeWebSocket()
+        await node.connect(ws, "s1")
+
+        node.set_team(ws, "s1", "red")
+        await asyncio.sleep(0)
+        assert broker.channels["s1/team/red"] == {backplane}
+
+        node.leave_team(ws, "s1")
+        await asyncio.sleep(0)
+        assert "s1/team/red" not in broker.channels
+        assert "s1" in broker.channels
@@ -0,0 +1,206 @@
+"""
+Unit tests for time-windowed message coalescing
+"""
+
+import asyncio
+
+import pytest
+
+from backend.tests.websocket.fakes import FakeWebSocket
+from backend.websocket.coalescer import MessageCoalescer
+from backend.websocket.manager import ConnectionManager
+
+
+class _Recorder:
+    """Collects flushed (session_id, message) pairs"""
+
+    def __init__(self):
+        self.flushed = []
+
+    async def __call__(self, session_id, message):
+        self.flushed.append((session_id, message))
+
+
+def _coalescer(recorder, ticks_ms=None):
+    return MessageCoalescer(
+        recorder,
+        ticks_ms if ticks_ms is not None else {"score_update": 20, "chat": 20},
+        keys={"score_update": "data.team"},
+        state_fields=("participant_count",),
+    )
+
+
+class TestMessageCoalescer:
+    """Test suite for MessageCoalescer"""
+
+    def test_accepts_only_configured_types(self):
+        """Test that only types with a positive tick are coalesced"""
+        coalescer = _coalescer(_Recorder(), {"score_update": 50, "chat": 0})
+
+        assert coalescer.accepts({"type": "score_update"})
+        assert not coalescer.accepts({"type": "chat"})
+        assert not coalescer.accepts({"type": "user_joined"})
+
+    @pytest.mark.asyncio
+    async def test_events_within_tick_become_one_batch(self):
+        """Test that several events in one tick produce one envelope"""
+        recorder = _Recorder()
+        coalescer = _coalescer(recorder)
+
+        coalescer.add("s1", {"type": "chat", "data": {"text": "a"}})
+        coalescer.add("s1", {"type": "chat", "data": {"text": "b"}})
+        await asyncio.sleep(0.05)
+
+        assert len(recorder.flushed) == 1
+        session_id, message = recorder.flushed[0]
+        assert session_id == "s1"
+        assert message["type"] == "batch"
+        assert [e["data"]["text"] for e in message["events"]] == ["a", "b"]
+
+    @pytest.mark.asyncio
+    async def test_keyed_events_keep_latest_value(self):
+        """Test that only the latest score per team survives"""
+        recorder = _Recorder()
+        coalescer = _coalescer(recorder)
+
+        coalescer.add("s1", {"type": "score_update", "data": {"team": "A", "score": 1}})
+        coalescer.add("s1", {"type": "score_update", "data": {"team": "B", "score": 5}})
+        coalescer.add("s1", {"type": "score_update", "data": {"team": "A", "score": 3}})
+        await coalescer.flush("s1")
+
+        events = recorder.flushed[0][1]["events"]
+        assert [(e["data"]["team"], e["data"]["score"]) for e in events] == [
+            ("B", 5),
+            ("A", 3),
+        ]
+
+    @pytest.mark.asyncio
+    async def test_state_fields_are_lifted_with_latest_value(self):
+        """Test that participant_count is kept once, at its latest value"""
+        recorder = _Recorder()
+        coalescer = _coalescer(recorder, {"user_joined": 20})
+
+        coalescer.add(
+            "s1", {"type": "user_joined", "user_id": "1", "participant_count": 1}
+        )
+        coalescer.add(
+            "s1", {"type": "user_joined", "user_id": "2", "participant_count": 2}
+        )
+        await coalescer.flush("s1")
+
+        message = recorder.flushed[0][1]
+        assert message["state"] == {"participant_count": 2}
+        assert all("participant_count" not in e for e in message["events"])
+
+    @pytest.mark.asyncio
+    async def test_single_event_is_sent_unwrapped(self):
+        """Test that a lone event is not wrapped in an envelope"""
+        recorder = _Recorder()
+        coalescer = _coalescer(recorder, {"user_joined": 20})
+
+        coalescer.add(
+            "s1", {"type": "user_joined", "user_id": "1", "participant_count": 1}
+        )
+        await coalescer.flush("s1")
+
+        assert recorder.flushed[0][1] == {
+            "type": "user_joined",
+            "user_id": "1",
+            "participant_count": 1,
+        }
+
+    @pytest.mark.asyncio
+    async def test_sessions_are_batched_independently(self):
+        """Test that each session gets its own batch"""
+        recorder = _Recorder()
+        coalescer = _coalescer(recorder)
+
+        coalescer.add("s1", {"type": "chat"})
+        coalescer.add("s2", {"type": "chat"})
+        await coalescer.flush_all()
+
+        assert sorted(session_id for session_id, _ in recorder.flushed) == ["s1", "s2"]
+        assert not coalescer.has_pending("s1")
+
+    @pytest.mark.asyncio
+    async def test_shorter_tick_pulls_flush_forward(self):
+        """Test that the earliest per-type deadline decides the flush time"""
+        recorder = _Recorder()
+        coalescer = _coalescer(recorder, {"slow": 1000, "fast": 10})
+
+        coalescer.add("s1", {"type": "slow"})
+        coalescer.add("s1", {"type": "fast"})
+        await asyncio.sleep(0.05)
+
+        assert len(recorder.flushed) == 1
+        assert coalescer.events_in == 2
+        assert coalescer.batches_out == 1
+
+
+class TestManagerCoalescing:
+    """Test suite for coalescing wired into ConnectionManager"""
+
+    @pytest.mark.asyncio
+    async def test_coalesced_type_is_delivered_as_one_frame(self):
+        """Test that a burst of score updates reaches sockets as one frame"""
+        manager = ConnectionManager(
+            outbound_queue_size=0, coalesce_ticks_ms={"score_update": 20}
+        )
+        ws = FakeWebSocket()
+        await manager.connect(ws, "s1")
+
+        for score in range(5):
+            await manager.broadcast_to_session(
+                "s1", {"type": "score_update", "data": {"team": "A", "score": score}}
+            )
+        assert ws.sent == []
+        await asyncio.sleep(0.05)
+
+        assert ws.messages == [
+            {"type": "score_update", "data": {"team": "A", "score": 4}, "seq": 1}
+        ]
+
+    @pytest.mark.asyncio
+    async def test_immediate_broadcast_flushes_pending_batch_first(self):
+        """Test that ordering is preserved when a non-coalesced event follows"""
+        manager = ConnectionManager(
+            outbound_queue_size=0, coalesce_ticks_ms={"score_update": 1000}
+        )
+        ws = FakeWebSocket()
+        await manager.connect(ws, "s1")
+
+        await manager.broadcast_to_session(
+            "s1", {"type": "score_update", "data": {"team": "A", "score": 1}}
+        )
+        await manager.broadcast_to_session("s1", {"type": "session_update"})
+
+        assert [m["type"] for m in ws.messages] == ["score_update", "session_update"]
+
+    @pytest.mark.asyncio
+    async def test_coalesce_false_bypasses_batching(self):
+        """Test that callers can force immediate delivery"""
+        manager = ConnectionManager(
+            outbound_queue_size=0, coalesce_ticks_ms={"score_update": 1000}
+        )
+        ws = FakeWebSocket()
+        await manager.connect(ws, "s1")
+
+        await manager.broadcast_to_session(
+            "s1", {"type": "score_update"}, coalesce=False
+        )
+
+        assert ws.messages == [{"type": "score_update", "seq": 1}]
+
+    @pytest.mark.asyncio
+    async def test_stop_flushes_pending_batches(self):
+        """Test that shutting down does not lose buffered events"""
+        manager = ConnectionManager(
+            outbound_queue_size=0, coalesce_ticks_ms={"score_update": 1000}
+        )
+        ws = FakeWebSocket()
+        await manager.connect(ws, "s1")
+        await manager.broadcast_to_session("s1", {"type": "score_update"})
+
+        await manager.stop()
+
+        assert ws.messages == [{"type": "score_update", "seq": 1}]
@@ -0,0 +1,180 @@
+"""
+Unit tests for WebSocket codecs and subprotocol negotiation
+"""
+
+import asyncio
+
+import cbor2
+import msgpack
+import pytest
+
+from backend.tests.websocket.fakes import FakeWebSocket
+from backend.websocket.codecs import CODECS, JSON_CODEC, Codec, negotiate
+from backend.websocket.frames import Frame
+from backend.websocket.manager import ConnectionManager
+
+MESSAGE = {"type": "score_update", "data": {"team": "Équipe A", "score": 150}}
+
+
+class TestCodecs:
+    """Test suite for the codec implementations"""
+
+    @pytest.mark.parametrize("name", sorted(CODECS))
+    def test_round_trip(self, name):
+        """Test that every codec decodes what it encodes"""
+        codec = CODECS[name]
+
+        assert codec.decode(codec.encode(MESSAGE)) == MESSAGE
+
+    def test_binary_codecs_produce_bytes(self):
+        """Test that msgpack and cbor are binary and JSON is text"""
+        assert isinstance(CODECS["msgpack"].encode(MESSAGE), bytes)
+        assert isinstance(CODECS["cbor"].encode(MESSAGE), bytes)
+        assert isinstance(JSON_CODEC.encode(MESSAGE), str)
+        assert CODECS["msgpack"].binary and not JSON_CODEC.binary
+
+    def test_codec_without_decode_cannot_be_created(self):
+        """Test that a codec missing an override fails when instantiated"""
+
+        class EncodeOnly(Codec):
+            __slots__ = ()
+
+            def encode(self, message):
+                return b""
+
+        with pytest.raises(TypeError):
+            EncodeOnly("partial", binary=True)
+
+
+class TestNegotiate:
+    """Test suite for subprotocol selection"""
+
+    def test_client_preference_wins(self):
+        """Test that the first offered codec the server enables is chosen"""
+        codec = negotiate(["cbor", "msgpack"], ["msgpack", "cbor", "json"])
+
+        assert codec.name == "cbor"
+
+    def test_disabled_codecs_are_skipped(self):
+        """Test that codecs the server does not enable are not chosen"""
+        assert negotiate(["cbor", "json"], ["json"]).name == "json"
+        assert negotiate(["msgpack"], ["json"]) is None
+
+    def test_nothing_offered_means_default(self):
+        """Test that clients offering no subprotocol get no codec"""
+        assert negotiate([], ["msgpack", "json"]) is None
+
+    def test_unknown_enabled_codec_is_rejected(self):
+        """Test that a misconfigured codec list fails loudly"""
+        with pytest.raises(ValueError):
+            negotiate(["json"], ["json", "protobuf"])
+
+
+class TestFrameForCodec:
+    """Test suite for per-codec frame variants"""
+
+    def test_json_and_missing_codec_return_same_frame(self):
+        """Test that text connections share the original frame"""
+        frame = Frame.from_message(MESSAGE)
+
+        assert frame.for_codec(None) is frame
+        assert frame.for_codec(JSON_CODEC) is frame
+
+    def test_binary_variant_is_cached(self):
+        """Test that a frame is encoded once per binary codec"""
+        frame = Frame.from_message(MESSAGE)
+
+        variant = frame.for_codec(CODECS["msgpack"])
+
+        assert variant is frame.for_codec(CODECS["msgpack"])
+        assert variant.is_binary
+        assert variant.message_type == "score_update"
+        assert msgpack.unpackb(variant.data) == MESSAGE
+
+    def test_pre_encoded_json_text_is_converted(self):
+        """Test that frames without a source message are parsed once"""
+        frame = Frame('{"type":"chat","data":{"text":"hi"}}', "chat")
+
+        variant = frame.for_codec(CODECS["cbor"])
+
+        assert cbor2.loads(variant.data) == {"type": "chat", "data": {"text": "hi"}}
+
+    def test_opaque_bytes_are_sent_as_is(self):
+        """Test that pre-encoded binary frames are not re-encoded"""
+        frame = Frame(b"\x00\x01")
+
+        assert frame.for_codec(CODECS["msgpack"]) is frame
+
+
+class TestManagerNegotiation:
+    """Test suite for codec negotiation in ConnectionManager"""
+
+    @pytest.mark.asyncio
+    async def test_connect_confirms_negotiated_subprotocol(self):
+        """Test that the chosen codec is echoed in the handshake"""
+        manager = ConnectionManager()
+        ws = FakeWebSocket(subprotocols=["msgpack"])
+
+        await manager.connect(ws, "s1")
+
+        assert ws.subprotocol == "msgpack"
+        assert manager.get_codec(ws).name == "msgpack"
+
+    @pytest.mark.asyncio
+    async def test_json_stays_default(self):
+        """Test that clients offering nothing get JSON and no subprotocol"""
+        manager = ConnectionManager()
+        ws = FakeWebSocket()
+
+        await manager.connect(ws, "s1")
+
+        assert ws.subprotocol is None
+        assert manager.get_codec(ws) is JSON_CODEC
+
+    @pytest.mark.parametrize("queue_size", [0, 8])
+    @pytest.mark.asyncio
+    async def test_mixed_session_gets_each_codec(self, queue_size):
+        """Test that one broadcast reaches JSON and binary clients alike"""
+        manager = ConnectionManager(
+            outbound_queue_size=queue_size, coalesce_ticks_ms={}
+        )
+        text_ws = FakeWebSocket()
+        msgpack_ws = FakeWebSocket(subprotocols=["msgpack"])
+        cbor_ws = FakeWebSocket(subprotocols=["cbor"])
+        for ws in (text_ws, msgpack_ws, cbor_ws):
+            await manager.connect(ws, "s1")
+
+        await manager.broadcast_to_session("s1", MESSAGE)
+        await manager.send_personal_message({"type": "connection"}, msgpack_ws)
+        await asyncio.sleep(0.01)
+
+        numbered = {**MESSAGE, "seq": 1}
+        assert text_ws.messages == [numbered]
+        assert msgpack.unpackb(msgpack_ws.sent[0]) == numbered
+        assert msgpack.unpackb(msgpack_ws.sent[1]) == {"type": "connection"}
+        assert cbor2.loads(cbor_ws.sent[0]) == numbered
+
+    @pytest.mark.asyncio
+    async def test_receive_message_decodes_with_codec(self):
+        """Test that inbound frames are decoded with the socket's codec"""
+        manager = ConnectionManager()
+        binary_ws = FakeWebSocket(
+            subprotocols=["msgpack"], received=[msgpack.packb({"type": "chat"})]
+        )
+        text_ws = FakeWebSocket(received=['{"type": "chat"}'])
+        await manager.connect(binary_ws, "s1")
+        await manager.connect(text_ws, "s1")
+
+        assert await manager.receive_message(binary_ws) == {"type": "chat"}
+        assert await manager.receive_message(text_ws) == {"type": "chat"}
+
+    @pytest.mark.asyncio
+    async def test_disconnect_forgets_codec(self):
+        """Test that the codec index is cleaned up with the connection"""
+        manager = ConnectionManager()
+        ws = FakeWebSocket(subprotocols=["cbor"])
+        await manager.connect(ws, "s1")
+
+        manager.disconnect(ws, "s1")
+
+        assert manager.get_codec(ws) is JSON_CODEC
@@ -0,0 +1,719 @@
+"""
+Unit tests for the typed inbound message dispatcher
+"""
+
+import time
+
+import pytest
+
+from backend.schemas.websocket import inbound_message_adapter
+from backend.services.answers import AnswerBook
+from backend.services.chat_history import ChatHistory
+from backend.services.result_writer import ResultWriter
+from backend.tests.websocket.fakes import FakeWebSocket
+from backend.websocket.backplane import InMemoryBackplane, InMemoryBroker
+from backend.websocket.dispatcher import Audience, ClientContext, MessageDispatcher
+from backend.websocket.handlers import create_dispatcher
+from backend.websocket.manager import ConnectionManager
+
+
+async def _session():
+    """Manager with a dispatcher, a facilitator and two participants"""
+    manager = ConnectionManager(outbound_queue_size=0, coalesce_ticks_ms={})
+    host, alice, bob = FakeWebSocket(), FakeWebSocket(), FakeWebSocket()
+    await manager.connect(host, "s1", user_id="host", facilitator=True)
+    await manager.connect(alice, "s1", user_id="alice")
+    await manager.connect(bob, "s1", user_id="bob")
+    contexts = {
+        "host": ClientContext(host, "s1", "host", "org", roles=["facilitator"]),
+        "alice": ClientContext(alice, "s1", "alice", "org", roles=["participant"]),
+        "bob": ClientContext(bob, "s1", "bob", "org", roles=["participant"]),
+    }
+    return manager, create_dispatcher(manager), contexts
+
+
+class TestMessageDispatcher:
+    """Test suite for MessageDispatcher routing"""
+
+    @pytest.mark.asyncio
+    async def test_unknown_type_is_dropped_without_reply(self):
+        """Test that unknown types cost a lookup and nothing else"""
+        manager, dispatcher, contexts = await _session()
+
+        await dispatcher.dispatch(contexts["alice"], {"type": "spam", "data": "x"})
+        await dispatcher.dispatch(contexts["alice"], ["not", "a", "dict"])
+
+        assert dispatcher.dropped_unknown == 2
+        assert all(ctx.websocket.sent == [] for ctx in contexts.values())
+
+    @pytest.mark.asyncio
+    async def test_invalid_payload_is_rejected_to_sender(self):
+        """Test that a known type failing validation only answers the sender"""
+        manager, dispatcher, contexts = await _session()
+
+        await dispatcher.dispatch(contexts["alice"], {"type": "chat", "data": {}})
+
+        assert dispatcher.invalid == 1
+        assert contexts["alice"].websocket.messages == [
+            {"type": "error", "error": "invalid_message", "message_type": "chat"}
+        ]
+        assert contexts["bob"].websocket.sent == []
+
+    @pytest.mark.asyncio
+    async def test_chat_is_rebroadcast_to_session(self):
+        """Test that chat fans out to every session connection"""
+        manager, dispatcher, contexts = await _session()
+
+        await dispatcher.dispatch(
+            contexts["alice"], {"type": "chat", "data": {"text": "hi"}}
+        )
+
+        (relayed,) = contexts["alice"].websocket.messages
+        expected = {
+            "type": "chat",
+            "user_id": "alice",
+            "data": {"text": "hi"},
+            "session_id": "s1",
+            "id": relayed["id"],
+            "sent_at": relayed["sent_at"],
+            "seq": 1,
+        }
+        assert all(ctx.websocket.messages == [expected] for ctx in contexts.values())
+
+    @pytest.mark.asyncio
+    async def test_team_chat_reaches_only_the_team(self):
+        """Test that team messages are delivered to team members only"""
+        manager, dispatcher, contexts = await _session()
+        for name in ("alice", "bob"):
+            await dispatcher.dispatch(
+                contexts[name], {"type": "join_team", "data": {"team_id": "red"}}
+            )
+        manager.set_team(contexts["bob"].websocket, "s1", "blue")
+
+        await dispatcher.dispatch(
+            contexts["alice"], {"type": "team_chat", "data": {"text": "psst"}}
+        )
+
+        assert contexts["alice"].websocket.messages[-1]["type"] == "team_chat"
+        assert [m["type"] for m in contexts["bob"].websocket.messages] == [
+            "team_joined"
+        ]
+        assert contexts["host"].websocket.sent == []
+
+    @pytest.mark.asyncio
+    async def test_participant_cannot_switch_to_another_team(self):
+        """Test that a participant cannot read another team's chat by rejoining"""
+        manager, dispatcher, contexts = await _session()
+        await dispatcher.dispatch(
+            contexts["alice"], {"type": "join_team", "data": {"team_id": "red"}}
+        )
+        await dispatcher.dispatch(
+            contexts["bob"], {"type": "join_team", "data": {"team_id": "blue"}}
+        )
+
+        await dispatcher.dispatch(
+            contexts["alice"], {"type": "join_team", "data": {"team_id": "blue"}}
+        )
+        await dispatcher.dispatch(
+            contexts["bob"], {"type": "team_chat", "data": {"text": "secret"}}
+        )
+
+        assert contexts["alice"].websocket.messages == [
+            {"type": "team_joined", "team_id": "red", "session_id": "s1"},
+            {"type": "error", "error": "team_locked", "message_type": "join_team"},
+        ]
+        assert manager.get_team(contexts["alice"].websocket, "s1") == "red"
+
+    @pytest.mark.asyncio
+    async def test_facilitator_can_switch_teams(self):
+        """Test that facilitators are not held to their first team"""
+        manager, dispatcher, contexts = await _session()
+        for team_id in ("red", "blue"):
+            await dispatcher.dispatch(
+                contexts["host"], {"type": "join_team", "data": {"team_id": team_id}}
+            )
+
+        assert manager.get_team(contexts["host"].websocket, "s1") == "blue"
+
+    @pytest.mark.asyncio
+    async def test_team_chat_without_team_is_rejected(self):
+        """Test that team messages need a team"""
+        manager, dispatcher, contexts = await _session()
+
+        await dispatcher.dispatch(
+            contexts["alice"], {"type": "team_chat", "data": {"text": "psst"}}
+        )
+
+        assert contexts["alice"].websocket.messages == [
+            {"type": "error", "error": "not_in_team", "message_type": "team_chat"}
+        ]
+
+    @pytest.mark.asyncio
+    async def test_help_request_reaches_only_facilitators(self):
+        """Test that facilitator-audience messages skip participants"""
+        manager, dispatcher, contexts = await _session()
+
+        await dispatcher.dispatch(
+            contexts["alice"], {"type": "help_request", "data": {"text": "?"}}
+        )
+
+        assert contexts["host"].websocket.messages[0]["type"] == "help_request"
+        assert contexts["alice"].websocket.sent == []
+        assert contexts["bob"].websocket.sent == []
+
+    @pytest.mark.asyncio
+    async def test_facilitator_can_watch_a_team(self):
+        """Test that a watching facilitator hears team chat until unwatching"""
+        manager, dispatcher, contexts = await _session()
+        await dispatcher.dispatch(
+            contexts["alice"], {"type": "join_team", "data": {"team_id": "red"}}
+        )
+        watch = {"type": "watch_team", "data": {"team_id": "red"}}
+        chat = {"type": "team_chat", "data": {"text": "psst"}}
+
+        await dispatcher.dispatch(contexts["bob"], watch)
+        assert dispatcher.forbidden == 1
+
+        await dispatcher.dispatch(contexts["host"], watch)
+        await dispatcher.dispatch(contexts["alice"], chat)
+        assert [m["type"] for m in contexts["host"].websocket.messages] == [
+            "team_watched",
+            "team_chat",
+        ]
+
+        await dispatcher.dispatch(
+            contexts["host"], {"type": "unwatch_team", "data": {"team_id": "red"}}
+        )
+        await dispatcher.dispatch(contexts["alice"], chat)
+        assert contexts["host"].websocket.messages[-1]["type"] == "team_unwatched"
+
+    @pytest.mark.asyncio
+    async def test_unwatching_own_team_keeps_membership(self):
+        """Test that unwatch_team does not take a facilitator out of its team"""
+        manager, dispatcher, contexts = await _session()
+        host = contexts["host"]
+        await dispatcher.dispatch(
+            host, {"type": "join_team", "data": {"team_id": "red"}}
+        )
+
+        await dispatcher.dispatch(
+            host, {"type": "unwatch_team", "data": {"team_id": "red"}}
+        )
+
+        assert "s1/team/red" in manager.get_channels(host.websocket, "s1")
+
+    @pytest.mark.asyncio
+    async def test_session_update_is_facilitator_only(self):
+        """Test that participants cannot publish session state"""
+        manager, dispatcher, contexts = await _session()
+        message = {"type": "session_update", "data": {"state": "question_active"}}
+
+        await dispatcher.dispatch(contexts["bob"], message)
+        assert dispatcher.forbidden == 1
+        assert contexts["alice"].websocket.sent == []
+
+        await dispatcher.dispatch(contexts["host"], message)
+        assert contexts["alice"].websocket.messages[0]["data"] == message["data"]
+
+    @pytest.mark.asyncio
+    async def test_control_messages_do_not_fan_out(self):
+        """Test that acks and pongs are handled without any delivery"""
+        manager, dispatcher, contexts = await _session()
+        await manager.leaderboards.update("s1", {"a": 1, "b": 2, "c": 3})
+        for ctx in contexts.values():
+            ctx.websocket.sent.clear()
+
+        await dispatcher.dispatch(contexts["alice"], {"type": "pong"})
+        await dispatcher.dispatch(
+            contexts["alice"], {"type": "leaderboard_ack", "data": {"version": 1}}
+        )
+
+        assert dispatcher.dispatched == 2
+        assert all(ctx.websocket.sent == [] for ctx in contexts.values())
+        assert manager.leaderboards._acks["s1"][contexts["alice"].websocket] == 1
+
+
+class TestRouteRegistration:
+    """Test suite for dispatcher route registration"""
+
+    def test_fan_out_requires_rebroadcast_opt_in(self):
+        """Test that broad audiences must opt into rebroadcast"""
+        dispatcher = MessageDispatcher(ConnectionManager(), inbound_message_adapter)
+
+        with pytest.raises(ValueError):
+            dispatcher.route("chat", Audience.SESSION)
+
+    def test_duplicate_route_is_rejected(self):
+        """Test that a type can only have one handler"""
+        dispatcher = MessageDispatcher(ConnectionManager(), inbound_message_adapter)
+
+        @dispatcher.route("pong")
+        async def first(context, message):
+            return None
+
+        with pytest.raises(ValueError):
+            dispatcher.route("pong")
+
+    def test_every_schema_type_has_a_handler(self):
+        """Test that the default dispatcher covers the inbound union"""
+        dispatcher = create_dispatcher(ConnectionManager())
+
+        assert dispatcher.message_types == {
+            "chat",
+            "chat_history",
+            "team_chat",
+            "help_request",
+            "join_team",
+            "watch_team",
+            "unwatch_team",
+            "session_update",
+            "leaderboard_ack",
+            "open_question",
+            "stage_question",
+            "reveal_question",
+            "answer",
+            "close_question",
+            "reaction",
+            "pong",
+        }
+
+    def test_scoring_is_refused_behind_a_backplane(self):
+        """Test that per-process scoring cannot be combined with a backplane"""
+        manager = ConnectionManager(backplane=InMemoryBackplane(InMemoryBroker()))
+
+        with pytest.raises(ValueError):
+            create_dispatcher(manager)
+
+    def test_backplane_without_scoring_skips_question_types(self):
+        """Test that disabling scoring leaves the question types unhandled"""
+        manager = ConnectionManager(backplane=InMemoryBackplane(InMemoryBroker()))
+
+        dispatcher = create_dispatcher(manager, scoring=False)
+
+        assert "answer" not in dispatcher.message_types
+        assert "open_question" not in dispatcher.message_types
+        assert "chat" in dispatcher.message_types
+
+    def test_facilitator_roles(self):
+        """Test that facilitators and admins count as facilitators"""
+        ws = FakeWebSocket()
+
+        assert ClientContext(ws, "s1", "u", roles=["admin"]).is_facilitator
+        assert not ClientContext(ws, "s1", "u", roles=["participant"]).is_facilitator
+
+
+class TestAudienceIndexes:
+    """Test suite for team and facilitator bookkeeping in the manager"""
+
+    @pytest.mark.asyncio
+    async def test_switching_team_moves_connection(self):
+        """Test that a connection belongs to one team per session"""
+        manager = ConnectionManager()
+        ws = FakeWebSocket()
+        await manager.connect(ws, "s1")
+
+        manager.set_team(ws, "s1", "red")
+        manager.set_team(ws, "s1", "blue")
+
+        assert manager.get_team(ws, "s1") == "blue"
+        assert "s1/team/red" not in manager.get_channels(ws, "s1")
+        assert "s1/team/blue" in manager.get_channels(ws, "s1")
+        assert manager.get_channel_connection_count("s1/team/red") == 0
+
+    @pytest.mark.asyncio
+    async def test_disconnect_clears_audiences(self):
+        """Test that leaving a session drops team and facilitator entries"""
+        manager = ConnectionManager()
+        ws = FakeWebSocket()
+        await manager.connect(ws, "s1", facilitator=True)
+        manager.set_team(ws, "s1", "red")
+
+        manager.disconnect(ws, "s1")
+
+        assert manager.get_team(ws, "s1") is None
+        assert manager.get_channels(ws, "s1") == set()
+        assert manager.get_channel_count() == 0
+
+    @pytest.mark.asyncio
+    async def test_set_team_requires_membership(self):
+        """Test that sockets outside the session cannot join its teams"""
+        manager = ConnectionManager()
+
+        manager.set_team(FakeWebSocket(), "s1", "red")
+
+        assert manager.get_channel_count() == 0
+
+
+class TestAnswerRoutes:
+    """Test suite for answering questions over the socket"""
+
+    async def _answering(self):
+        manager, _, contexts = await _session()
+        results = ResultWriter(sink=lambda rows: None)
+        dispatcher = create_dispatcher(manager, AnswerBook(), results)
+        for ws in (ctx.websocket for ctx in contexts.values()):
+            ws.sent.clear()
+        return manager, dispatcher, contexts, results
+
+    @pytest.mark.asyncio
+    async def test_open_question_announces_without_the_key(self):
+        """Test that participants learn a question opened, not its answers"""
+        manager, dispatcher, contexts, _ = await self._answering()
+
+        await dispatcher.dispatch(
+            contexts["host"],
+            {
+                "type": "open_question",
+                "data": {"question_id": "q1", "answers": ["Paris"], "points": 50},
+            },
+        )
+
+        (opened,) = contexts["bob"].websocket.messages
+        assert opened["type"] == "question_opened"
+        assert opened["question_id"] == "q1"
+        assert "Paris" not in str(opened)
+
+    @pytest.mark.asyncio
+    async def test_only_facilitators_open_questions(self):
+        """Test that participants cannot set the answer key"""
+        manager, dispatcher, contexts, _ = await self._answering()
+
+        await dispatcher.dispatch(
+            contexts["alice"],
+            {"type": "open_question", "data": {"question_id": "q1", "answers": ["a"]}},
+        )
+
+        assert contexts["alice"].websocket.messages[0]["error"] == "forbidden"
+        assert contexts["bob"].websocket.sent == []
+
+    @pytest.mark.asyncio
+    async def test_answer_is_scored_for_the_sender_and_queued(self):
+        """Test that only the sender hears the result and a row is queued"""
+        manager, dispatcher, contexts, results = await self._answering()
+        await dispatcher.dispatch(
+            contexts["host"],
+            {
+                "type": "open_question",
+                "data": {"question_id": "q1", "answers": ["Paris"], "points": 50},
+            },
+        )
+        for ctx in contexts.values():
+            ctx.websocket.sent.clear()
+
+        await dispatcher.dispatch(
+            contexts["alice"],
+            {"type": "answer", "data": {"question_id": "q1", "answer": "paris"}},
+        )
+
+        (result,) = contexts["alice"].websocket.messages
+        assert result["type"] == "answer_result"
+        assert result["correct"] is True
+        assert result["points"] == result["score"] == 50
+        assert result["response_time_ms"] >= 0
+        assert contexts["bob"].websocket.sent == []
+        assert contexts["host"].websocket.sent == []
+
+        (row,) = results._pending
+        assert row["user_id"] == "alice"
+        assert row["organization_id"] == "org"
+        assert row["session_id"] == "s1"
+        assert row["answer_given"] == "paris"
+        assert row["is_correct"] is True
+
+    @pytest.mark.asyncio
+    async def test_rejected_answer_is_not_queued(self):
+        """Test that answers to a question that is not open get an error"""
+        manager, dispatcher, contexts, results = await self._answering()
+
+        await dispatcher.dispatch(
+            contexts["alice"],
+            {"type": "answer", "data": {"question_id": "q1", "answer": "a"}},
+        )
+
+        assert contexts["alice"].websocket.messages == [
+            {"type": "error", "error": "question_not_open", "message_type": "answer"}
+        ]
+        assert results.pending == 0
+
+    @pytest.mark.asyncio
+    async def test_close_question_pushes_standings_once(self):
+        """Test that closing a question updates the leaderboard and announces"""
+        manager, dispatcher, contexts, _ = await self._answering()
+        await dispatcher.dispatch(
+            contexts["host"],
+            {"type": "open_question", "data": {"question_id": "q1", "answers": ["a"]}},
+        )
+        for name in ("alice", "bob"):
+            await dispatcher.dispatch(
+                contexts[name],
+                {"type": "answer", "data": {"question_id": "q1", "answer": name[0]}},
+            )
+        for ctx in contexts.values():
+            ctx.websocket.sent.clear()
+
+        await dispatcher.dispatch(
+            contexts["host"], {"type": "close_question", "data": {"question_id": "q1"}}
+        )
+
+        types = [m["type"] for m in contexts["bob"].websocket.messages]
+        assert types == ["leaderboard_snapshot", "question_closed"]
+        assert manager.leaderboards.get("s1").scores == {"alice": 100, "bob": 0}
+
+    @pytest.mark.asyncio
+    async def test_question_closes_when_its_time_limit_runs_out(self):
+        """Test that the server closes a timed question without the facilitator"""
+        manager, dispatcher, contexts, _ = await self._answering()
+        await dispatcher.dispatch(
+            contexts["host"],
+            {
+                "type": "open_question",
+                "data": {"question_id": "q1", "answers": ["a"], "time_limit_ms": 500},
+            },
+        )
+        assert manager.scheduler.get("close_question", "s1", "q1") is not None
+
+        await manager.scheduler.run_due(time.monotonic() + 1.0)
+
+        types = [m["type"] for m in contexts["bob"].websocket.messages]
+        assert types[-1] == "question_closed"
+        assert manager.scheduler.get("close_question", "s1", "q1") is None
+
+    @pytest.mark.asyncio
+    async def test_closing_by_hand_cancels_the_time_limit(self):
+        """Test that a question closed early is not closed again on time"""
+        manager, dispatcher, contexts, _ = await self._answering()
+        await dispatcher.dispatch(
+            contexts["host"],
+            {
+                "type": "open_question",
+                "data": {"question_id": "q1", "answers": ["a"], "time_limit_ms": 500},
+            },
+        )
+
+        await dispatcher.dispatch(
+            contexts["host"], {"type": "close_question", "data": {"question_id": "q1"}}
+        )
+
+        assert len(manager.scheduler) == 0
+
+    @pytest.mark.asyncio
+    async def test_closing_a_closed_question_only_answers_the_sender(self):
+        """Test that a stale close is rejected to the facilitator alone"""
+        manager, dispatcher, contexts, _ = await self._answering()
+
+        await dispatcher.dispatch(
+            contexts["host"], {"type": "close_question", "data": {"question_id": "q1"}}
+        )
+
+        assert contexts["host"].websocket.messages == [
+            {
+                "type": "error",
+                "error": "question_not_open",
+                "message_type": "close_question",
+            }
+        ]
+        assert contexts["bob"].websocket.sent == []
+
+
+class TestRevealRoutes:
+    """Test suite for staging and revealing questions over the socket"""
+
+    async def _staged(self, **data):
+        manager, _, contexts = await _session()
+        answers = AnswerBook()
+        dispatcher = create_dispatcher(
+            manager, answers, ResultWriter(sink=lambda rows: None)
+        )
+        await dispatcher.dispatch(
+            contexts["host"],
+            {
+                "type": "stage_question",
+                "data": {
+                    "question_id": "q1",
+                    "question": {"text": "Capital of France?"},
+                    "answers": ["Paris"],
+                    **data,
+                },
+            },
+        )
+        return manager, dispatcher, contexts, answers
+
+    @pytest.mark.asyncio
+    async def test_staging_withholds_question_and_key(self):
+        """Test that participants get ciphertext and answers stay closed"""
+        manager, dispatcher, contexts, answers = await self._staged()
+
+        staged = contexts["bob"].websocket.messages[-1]
+        assert staged["type"] == "question_staged"
+        assert "Paris" not in str(staged)
+        assert "France" not in str(staged)
+        assert "s1" not in answers
+
+    @pytest.mark.asyncio
+    async def test_reveal_opens_the_question(self):
+        """Test that revealing broadcasts the key and starts accepting answers"""
+        manager, dispatcher, contexts, answers = await self._staged(points=30)
+
+        await dispatcher.dispatch(
+            contexts["host"], {"type": "reveal_question", "data": {"question_id": "q1"}}
+        )
+        await dispatcher.dispatch(
+            contexts["alice"],
+            {"type": "answer", "data": {"question_id": "q1", "answer": "paris"}},
+        )
+
+        revealed = contexts["bob"].websocket.messages[-1]
+        assert revealed["type"] == "question_revealed"
+        assert revealed["points"] == 30
+        assert contexts["alice"].websocket.messages[-1]["points"] == 30
+
+    @pytest.mark.asyncio
+    async def test_only_facilitators_stage_and_reveal(self):
+        """Test that participants can neither stage nor reveal"""
+        manager, dispatcher, contexts, _ = await self._staged()
+
+        await dispatcher.dispatch(
+            contexts["alice"],
+            {"type": "reveal_question", "data": {"question_id": "q1"}},
+        )
+
+        assert contexts["alice"].websocket.messages[-1]["error"] == "forbidden"
+        assert manager.reveals.get("s1").revealed is None
+
+    @pytest.mark.asyncio
+    async def test_revealing_an_unstaged_question_only_answers_the_sender(self):
+        """Test that a stale reveal is rejected to the facilitator alone"""
+        manager, dispatcher, contexts, _ = await self._staged()
+        contexts["bob"].websocket.sent.clear()
+
+        await dispatcher.dispatch(
+            contexts["host"], {"type": "reveal_question", "data": {"question_id": "q9"}}
+        )
+
+        assert contexts["host"].websocket.messages[-1] == {
+            "type": "error",
+            "error": "question_not_staged",
+            "message_type": "reveal_question",
+        }
+        assert contexts["bob"].websocket.sent == []
+
+    @pytest.mark.asyncio
+    async def test_closing_the_question_discards_the_staged_payload(self):
+        """Test that late joiners are not sent a question that has closed"""
+        manager, dispatcher, contexts, _ = await self._staged()
+        await dispatcher.dispatch(
+            contexts["host"], {"type": "reveal_question", "data": {"question_id": "q1"}}
+        )
+
+        await dispatcher.dispatch(
+            contexts["host"], {"type": "close_question", "data": {"question_id": "q1"}}
+        )
+
+        assert "s1" not in manager.reveals
+
+
+class TestTallyRoutes:
+    """Test suite for live answer and reaction tallies over the socket"""
+
+    async def _answering(self):
+        manager, _, contexts = await _session()
+        dispatcher = create_dispatcher(
+            manager, AnswerBook(), ResultWriter(sink=lambda rows: None)
+        )
+        await dispatcher.dispatch(
+            contexts["host"],
+            {"type": "open_question", "data": {"question_id": "q1", "answers": ["a"]}},
+        )
+        for ctx in contexts.values():
+            ctx.websocket.sent.clear()
+        return manager, dispatcher, contexts
+
+    @pytest.mark.asyncio
+    async def test_answers_and_reactions_reach_facilitators_once_per_interval(self):
+        """Test that events are only counted until the flush timer fires"""
+        manager, dispatcher, contexts = await self._answering()
+        for name, answer in (("alice", " A "), ("bob", "b")):
+            await dispatcher.dispatch(
+                contexts[name],
+                {"type": "answer", "data": {"question_id": "q1", "answer": answer}},
+            )
+            await dispatcher.dispatch(
+                contexts[name], {"type": "reaction", "data": {"reaction": "wow"}}
+            )
+        assert contexts["host"].websocket.sent == []
+
+        await manager.scheduler.run_due(time.monotonic() + 1.0)
+
+        (tally,) = contexts["host"].websocket.messages
+        assert tally == {
+            "type": "live_tally",
+            "session_id": "s1",
+            "questions": {"q1": {"answered": 2, "counts": {"a": 1, "b": 1}}},
+            "reactions": {"wow": 2},
+        }
+        assert [m["type"] for m in contexts["bob"].websocket.messages] == [
+            "answer_result"
+        ]
+
+    @pytest.mark.asyncio
+    async def test_unknown_reaction_only_answers_the_sender(self):
+        """Test that reactions outside the configured set are rejected"""
+        manager, dispatcher, contexts = await self._answering()
+
+        await dispatcher.dispatch(
+            contexts["alice"], {"type": "reaction", "data": {"reaction": "spam"}}
+        )
+
+        assert contexts["alice"].websocket.messages == [
+            {"type": "error", "error": "invalid_reaction", "message_type": "reaction"}
+        ]
+        assert "s1" not in manager.tallies
+
+    @pytest.mark.asyncio
+    async def test_closing_sends_the_final_distribution_first(self):
+        """Test that facilitators get pending counts before question_closed"""
+        manager, dispatcher, contexts = await self._answering()
+        await dispatcher.dispatch(
+            contexts["alice"],
+            {"type": "answer", "data": {"question_id": "q1", "answer": "a"}},
+        )
+
+        await dispatcher.dispatch(
+            contexts["host"], {"type": "close_question", "data": {"question_id": "q1"}}
+        )
+
+        types = [m["type"] for m in contexts["host"].websocket.messages]
+        assert types == ["live_tally", "leaderboard_snapshot", "question_closed"]
+        assert manager.scheduler.get("flush_tally", "s1") is None
+
+
+class TestChatHistoryRoutes:
+    """Test suite for chat history over the socket"""
+
+    @pytest.mark.asyncio
+    async def test_chat_is_buffered_and_paged_back_to_the_sender(self):
+        """Test that relayed chat can be read back as history, oldest first"""
+        manager, _, contexts = await _session()
+        history = ChatHistory(
+            writer=ResultWriter(sink=lambda rows: None), loader=lambda *args: []
+        )
+        dispatcher = create_dispatcher(manager, history=history)
+        for text in ("one", "two", "three"):
+            await dispatcher.dispatch(
+                contexts["alice"], {"type": "chat", "data": {"text": text}}
+            )
+        last = contexts["bob"].websocket.messages[-1]
+        for ctx in contexts.values():
+            ctx.websocket.sent.clear()
+
+        await dispatcher.dispatch(
+            contexts["bob"],
+            {"type": "chat_history", "data": {"before": last["sent_at"], "limit": 1}},
+        )
+
+        (page,) = contexts["bob"].websocket.messages
+        assert page["type"] == "chat_history"
+        assert [m["text"] for m in page["messages"]] == ["two"]
+        assert page["messages"][0]["user_id"] == "alice"
+        assert page["has_more"] is True
+        assert contexts["alice"].websocket.sent == []
@@ -0,0 +1,204 @@
+"""
+Unit tests for draining WebSocket connections on shutdown
+"""
+
+import asyncio
+import signal
+import threading
+
+import pytest
+
+from backend.tests.websocket.fakes import FakeWebSocket
+from backend.websocket.manager import ConnectionManager
+from backend.websocket.metrics import render_metrics
+from backend.websocket.shutdown import drain_before_signals
+
+
+async def _connected(manager: ConnectionManager, count: int, session_id="s1"):
+    sockets = [FakeWebSocket() for _ in range(count)]
+    for ws in sockets:
+        await manager.connect(ws, session_id)
+    return sockets
+
+
+class TestDrain:
+    """Test suite for ConnectionManager.drain"""
+
+    @pytest.mark.asyncio
+    async def test_hints_then_closes_with_service_restart(self):
+        """Test that every client gets a reconnect hint and then a 1012 close"""
+        manager = ConnectionManager(outbound_queue_size=0)
+        sockets = await _connected(manager, 3)
+
+        await manager.drain(batch_size=10, reconnect_window=2.0)
+
+        for ws in sockets:
+            assert ws.messages[-1]["type"] == "reconnect"
+            assert ws.messages[-1]["reason"] == "server_restart"
+            assert 0 <= ws.messages[-1]["reconnect_after_ms"] <= 2000
+            assert ws.closed
+            assert ws.close_code == 1012
+        assert manager.get_connection_count() == 0
+        assert manager.drained == 3
+
+    @pytest.mark.asyncio
+    async def test_reconnect_delays_are_jittered(self):
+        """Test that clients are not all told to come back at the same time"""
+        manager = ConnectionManager(outbound_queue_size=0)
+        sockets = await _connected(manager, 20)
+
+        await manager.drain(reconnect_window=10.0)
+
+        delays = {ws.messages[-1]["reconnect_after_ms"] for ws in sockets}
+        assert len(delays) > 1
+
+    @pytest.mark.asyncio
+    async def test_closes_in_paced_batches(self):
+        """Test that connections are closed batch by batch, not all at once"""
+        manager = ConnectionManager(outbound_queue_size=0)
+        sockets = await _connected(manager, 5)
+
+        drain = asyncio.ensure_future(
+            manager.drain(batch_size=2, batch_interval=0.05, timeout=10.0)
+        )
+        await asyncio.sleep(0.02)
+        assert [ws.closed for ws in sockets] == [True, True, False, False, False]
+
+        await drain
+        assert all(ws.closed for ws in sockets)
+
+    @pytest.mark.asyncio
+    async def test_timeout_shortens_the_interval(self):
+        """Test that the last batch closes within the drain timeout"""
+        manager = ConnectionManager(outbound_queue_size=0)
+        await _connected(manager, 4)
+
+        started = asyncio.get_running_loop().time()
+        await manager.drain(batch_size=1, batch_interval=10.0, timeout=0.06)
+
+        assert asyncio.get_running_loop().time() - started < 1.0
+        assert manager.drained == 4
+
+    @pytest.mark.asyncio
+    async def test_queued_hint_is_flushed_before_close(self):
+        """Test that the hint goes out through the outbound queue first"""
+        manager = ConnectionManager(outbound_queue_size=8)
+        (ws,) = await _connected(manager, 1)
+
+        await manager.drain()
+
+        assert ws.messages[-1]["type"] == "reconnect"
+        assert ws.close_code == 1012
+
+    @pytest.mark.asyncio
+    async def test_drained_sockets_leave_every_session(self):
+        """Test that a socket in several sessions is removed from all"""
+        manager = ConnectionManager(outbound_queue_size=0)
+        ws = FakeWebSocket()
+        await manager.connect(ws, "s1")
+        await manager.connect(ws, "s2")
+
+        await manager.drain()
+
+        assert not manager.is_connected(ws, "s1")
+        assert not manager.is_connected(ws, "s2")
+        assert [m["type"] for m in ws.messages] == ["reconnect"]
+        assert manager.drained == 1
+
+    @pytest.mark.asyncio
+    async def test_drain_is_idempotent_and_reset_by_start(self):
+        """Test that a second drain waits for the first and start() clears it"""
+        manager = ConnectionManager(outbound_queue_size=0)
+        (ws,) = await _connected(manager, 1)
+
+        await asyncio.gather(manager.drain(), manager.drain())
+
+        assert manager.draining
+        assert [m["type"] for m in ws.messages] == ["reconnect"]
+        assert manager.drained == 1
+
+        await manager.start()
+        try:
+            assert not manager.draining
+        finally:
+            await manager.stop()
+
+    @pytest.mark.asyncio
+    async def test_metrics_report_draining(self):
+        """Test that the drain state and count are exported"""
+        manager = ConnectionManager(outbound_queue_size=0)
+        await _connected(manager, 2)
+
+        assert "trivia_ws_draining 0" in render_metrics(manager)
+        await manager.drain()
+
+        text = render_metrics(manager)
+        assert "trivia_ws_draining 1" in text
+        assert "trivia_ws_drained_total 2" in text
+
+
+class TestDrainBeforeSignals:
+    """Test suite for drain_before_signals"""
+
+    @pytest.mark.asyncio
+    async def test_drains_then_forwards_the_signal(self):
+        """Test that the original handler runs only after the drain"""
+        events = []
+        forwarded = asyncio.Event()
+
+        def original(signum, frame):
+            events.append("forwarded")
+            forwarded.set()
+
+        async def drain():
+            await asyncio.sleep(0.01)
+            events.append("drained")
+
+        previous = signal.signal(signal.SIGUSR1, original)
+        try:
+            drain_before_signals(drain, signals=(signal.SIGUSR1,))
+            signal.raise_signal(signal.SIGUSR1)
+            await asyncio.wait_for(forwarded.wait(), timeout=1.0)
+
+            assert events == ["drained", "forwarded"]
+            # The wrapper removed itself once triggered
+            assert signal.getsignal(signal.SIGUSR1) is original
+        finally:
+            signal.signal(signal.SIGUSR1, previous)
+
+    @pytest.mark.asyncio
+    async def test_restore_reinstalls_the_original_handler(self):
+        """Test that restore() undoes the wrapping when no signal came"""
+
+        def original(signum, frame):
+            pass
+
+        previous = signal.signal(signal.SIGUSR1, original)
+        try:
+            restore = drain_before_signals(
+                lambda: asyncio.sleep(0), signals=(signal.SIGUSR1,)
+            )
+            assert signal.getsignal(signal.SIGUSR1) is not original
+
+            restore()
+
+            assert signal.getsignal(signal.SIGUSR1) is original
+        finally:
+            signal.signal(signal.SIGUSR1, previous)
+
+    def test_does_nothing_outside_the_main_thread(self):
+        """Test that no handler is installed from another thread"""
+        before = signal.getsignal(signal.SIGUSR1)
+        result = {}
+
+        def run():
+            result["restore"] = drain_before_signals(
+                lambda: asyncio.sleep(0), signals=(signal.SIGUSR1,)
+            )
+
+        thread = threading.Thread(target=run)
+        thread.start()
+        thread.join()
+
+        result["restore"]()
+        assert signal.getsignal(signal.SIGUSR1) is before
@@ -0,0 +1,193 @@
+"""
+Unit tests for session event numbering and resumable connections
+"""
+
+import asyncio
+
+import pytest
+
+from backend.tests.websocket.fakes import FakeWebSocket
+from backend.websocket.eventlog import SessionEventLog
+from backend.websocket.manager import ConnectionManager
+
+
+class TestSessionEventLog:
+    """Test suite for SessionEventLog"""
+
+    def test_record_numbers_events_per_session(self):
+        """Test that every session has its own consecutive sequence"""
+        log = SessionEventLog(capacity=8)
+
+        first = log.record("s1", {"type": "chat"})
+        second = log.record("s1", {"type": "chat"})
+        other = log.record("s2", {"type": "chat"})
+
+        assert first.data == '{"type":"chat","seq":1}'
+        assert second.data == '{"type":"chat","seq":2}'
+        assert other.data == '{"type":"chat","seq":1}'
+        assert log.position("s1")[1] == 2
+
+    def test_record_does_not_modify_message(self):
+        """Test that the caller's message is left unnumbered"""
+        log = SessionEventLog(capacity=8)
+        message = {"type": "chat"}
+
+        log.record("s1", message)
+
+        assert message == {"type": "chat"}
+
+    def test_replay_returns_missed_frames(self):
+        """Test that a replay yields exactly the frames after last_seq"""
+        log = SessionEventLog(capacity=8)
+        frames = [log.record("s1", {"type": "chat", "n": n}) for n in range(5)]
+        epoch, _ = log.position("s1")
+
+        missed = log.replay("s1", 2, epoch)
+
+        assert missed == frames[2:]
+        assert log.replay("s1", 5, epoch) == []
+        assert log.replayed == 3
+
+    def test_replay_beyond_capacity_needs_snapshot(self):
+        """Test that a gap older than the ring buffer cannot be replayed"""
+        log = SessionEventLog(capacity=3)
+        for n in range(6):
+            log.record("s1", {"type": "chat", "n": n})
+        epoch, _ = log.position("s1")
+
+        assert log.replay("s1", 2, epoch) is None
+        assert len(log.replay("s1", 3, epoch)) == 3
+
+    def test_replay_rejects_other_epoch_and_future_seq(self):
+        """Test that foreign or impossible positions need a snapshot"""
+        log = SessionEventLog(capacity=8)
+        log.record("s1", {"type": "chat"})
+        epoch, _ = log.position("s1")
+
+        assert log.replay("s1", 0, "other-epoch") is None
+        assert log.replay("s1", 0, None) is None
+        assert log.replay("s1", 7, epoch) is None
+        assert log.replay("unknown", 0, epoch) is None
+
+    def test_snapshot_keeps_latest_state(self):
+        """Test that snapshots carry the latest data of each state type"""
+        log = SessionEventLog(capacity=1, state_types=["session_update"])
+        log.record("s1", {"type": "session_update", "data": {"round": 1}})
+        log.record("s1", {"type": "session_update", "data": {"round": 2}})
+        log.record("s1", {"type": "chat", "data": {"text": "hi"}})
+
+        snapshot = log.snapshot("s1")
+
+        assert snapshot["seq"] == 3
+        assert snapshot["epoch"] == log.position("s1")[0]
+        assert snapshot["state"] == {"session_update": {"round": 2}}
+        assert log.snapshots == 1
+
+    def test_recreated_log_has_new_epoch(self):
+        """Test that sequence numbers do not carry over a discarded log"""
+        log = SessionEventLog(capacity=8)
+        log.record("s1", {"type": "chat"})
+        epoch, _ = log.position("s1")
+
+        log.discard("s1")
+
+        assert "s1" not in log
+        new_epoch, seq = log.position("s1")
+        assert seq == 0
+        assert new_epoch != epoch
+
+    @pytest.mark.asyncio
+    async def test_expire_after_retention_unless_reused(self):
+        """Test that an idle log is dropped and a reused one is kept"""
+        log = SessionEventLog(capacity=8, retention=0.01)
+        log.record("s1", {"type": "chat"})
+        log.record("s2", {"type": "chat"})
+
+        log.expire("s1")
+        log.expire("s2")
+        log.record("s2", {"type": "chat"})
+        await asyncio.sleep(0.03)
+
+        assert "s1" not in log
+        assert "s2" in log
+
+    def test_rejects_empty_capacity(self):
+        """Test that a log must retain at least one frame"""
+        with pytest.raises(ValueError):
+            SessionEventLog(capacity=0)
+
+
+class TestManagerResume:
+    """Test suite for resuming connections through the manager"""
+
+    @pytest.mark.asyncio
+    async def test_resume_replays_the_broadcast_frames(self):
+        """Test that a resumed client gets the very frames it missed"""
+        manager = ConnectionManager(outbound_queue_size=0)
+        stayed = FakeWebSocket()
+        await manager.connect(stayed, "s1")
+        await manager.broadcast_to_session("s1", {"type": "chat", "n": 1})
+        epoch, last_seq = manager.event_log.position("s1")
+        await manager.broadcast_to_session("s1", {"type": "chat", "n": 2})
+        await manager.broadcast_to_session("s1", {"type": "chat", "n": 3})
+
+        returning = FakeWebSocket()
+        await manager.connect(returning, "s1")
+        replayed = await manager.resume(returning, "s1", last_seq, epoch)
+
+        assert replayed is True
+        assert returning.sent == stayed.sent[1:]
+        assert returning.messages == [
+            {"type": "chat", "n": 2, "seq": 2},
+            {"type": "chat", "n": 3, "seq": 3},
+        ]
+
+    @pytest.mark.asyncio
+    async def test_resume_sends_snapshot_when_gap_is_too_old(self):
+        """Test that an unreplayable gap gets a session snapshot instead"""
+        manager = ConnectionManager(outbound_queue_size=0, event_log_size=2)
+        await manager.connect(FakeWebSocket(), "s1")
+        for n in range(5):
+            await manager.broadcast_to_session("s1", {"type": "chat", "n": n})
+        epoch, _ = manager.event_log.position("s1")
+
+        returning = FakeWebSocket()
+        await manager.connect(returning, "s1")
+        replayed = await manager.resume(returning, "s1", 1, epoch)
+
+        assert replayed is False
+        assert returning.messages == [
+            {
+                "type": "session_snapshot",
+                "session_id": "s1",
+                "epoch": epoch,
+                "seq": 5,
+                "state": {},
+                "participant_count": 2,
+            }
+        ]
+
+    @pytest.mark.asyncio
+    async def test_personal_messages_are_not_numbered(self):
+        """Test that only session broadcasts consume sequence numbers"""
+        manager = ConnectionManager(outbound_queue_size=0)
+        ws = FakeWebSocket()
+        await manager.connect(ws, "s1")
+
+        await manager.send_personal_message({"type": "connection"}, ws)
+
+        assert ws.messages == [{"type": "connection"}]
+        assert manager.event_log.position("s1")[1] == 0
+
+    @pytest.mark.asyncio
+    async def test_empty_session_log_expires(self):
+        """Test that the last disconnect schedules the log for removal"""
+        manager = ConnectionManager(outbound_queue_size=0)
+        manager.event_log.retention = 0
+        ws = FakeWebSocket()
+        await manager.connect(ws, "s1")
+        await manager.broadcast_to_session("s1", {"type": "chat"})
+
+        manager.disconnect(ws, "s1")
+
+        assert "s1" not in manager.event_log
@@ -0,0 +1,211 @@
+"""
+Unit tests for heartbeats and idle connection reaping
+"""
+
+import asyncio
+
+import msgpack
+import pytest
+
+from backend.tests.websocket.fakes import FakeWebSocket
+from backend.websocket.heartbeat import HeartbeatMonitor
+from backend.websocket.manager import ConnectionManager
+
+
+class _Clock:
+    """Manually advanced monotonic clock"""
+
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+def _monitor(clock, interval=10.0, max_missed=3):
+    pinged, dead = [], []
+    monitor = HeartbeatMonitor(
+        interval, max_missed, pinged.append, dead.append, clock=clock
+    )
+    return monitor, pinged, dead
+
+
+class TestHeartbeatMonitor:
+    """Test suite for HeartbeatMonitor"""
+
+    def test_idle_connection_is_pinged_each_interval(self):
+        """Test that a silent connection gets one ping per interval"""
+        clock = _Clock()
+        monitor, pinged, _ = _monitor(clock)
+        monitor.track("ws")
+
+        clock.now += 10
+        monitor.sweep()
+        clock.now += 5
+        monitor.sweep()
+        clock.now += 5
+        monitor.sweep()
+
+        assert pinged == ["ws", "ws"]
+        assert monitor.pings_sent == 2
+
+    def test_active_connection_is_not_pinged(self):
+        """Test that recent inbound traffic postpones the heartbeat"""
+        clock = _Clock()
+        monitor, pinged, _ = _monitor(clock)
+        monitor.track("ws")
+
+        clock.now += 8
+        monitor.touch("ws")
+        clock.now += 2
+        monitor.sweep()
+
+        assert pinged == []
+        assert monitor.next_due() == clock.now + 8
+
+    def test_connection_missing_heartbeats_is_reaped(self):
+        """Test that max_missed silent intervals mark a connection dead"""
+        clock = _Clock()
+        monitor, pinged, dead = _monitor(clock)
+        monitor.track("ws")
+
+        for _ in range(3):
+            clock.now += 10
+            monitor.sweep()
+
+        assert pinged == ["ws", "ws"]
+        assert dead == ["ws"]
+        assert monitor.reaped == 1
+        assert len(monitor) == 0
+
+    def test_pong_keeps_connection_alive(self):
+        """Test that answering pings prevents reaping"""
+        clock = _Clock()
+        monitor, pinged, dead = _monitor(clock)
+        monitor.track("ws")
+
+        for _ in range(10):
+            clock.now += 10
+            monitor.sweep()
+            monitor.touch("ws")
+
+        assert dead == []
+        assert len(pinged) == 10
+
+    def test_sweep_only_visits_due_connections(self):
+        """Test that connections not yet due stay untouched in the heap"""
+        clock = _Clock()
+        monitor, pinged, _ = _monitor(clock)
+        for i in range(100):
+            monitor.track(f"early-{i}")
+        clock.now += 5
+        for i in range(1000):
+            monitor.track(f"late-{i}")
+
+        clock.now += 5
+        monitor.sweep()
+
+        assert len(pinged) == 100
+        assert monitor.next_due() == clock.now + 5
+
+    def test_forgotten_connection_is_skipped(self):
+        """Test that stale heap entries are dropped lazily"""
+        clock = _Clock()
+        monitor, pinged, dead = _monitor(clock)
+        monitor.track("ws")
+        monitor.forget("ws")
+        monitor.track("ws")
+
+        clock.now += 10
+        monitor.sweep()
+
+        assert pinged == ["ws"]
+        assert dead == []
+
+    def test_disabled_monitor_tracks_nothing(self):
+        """Test that an interval of 0 disables heartbeats"""
+        monitor, _, _ = _monitor(_Clock(), interval=0)
+        monitor.track("ws")
+        monitor.start()
+
+        assert not monitor.enabled
+        assert len(monitor) == 0
+        assert monitor._task is None
+
+    def test_max_missed_must_be_positive(self):
+        """Test that a monitor needs at least one allowed miss"""
+        with pytest.raises(ValueError):
+            _monitor(_Clock(), max_missed=0)
+
+
+class TestManagerHeartbeats:
+    """Test suite for heartbeats wired into ConnectionManager"""
+
+    @pytest.mark.asyncio
+    async def test_sweeper_pings_and_reaps(self):
+        """Test that a silent socket is pinged, reaped and announced"""
+        manager = ConnectionManager(
+            outbound_queue_size=0,
+            coalesce_ticks_ms={},
+            heartbeat_interval=0.02,
+            heartbeat_max_missed=2,
+        )
+        silent = FakeWebSocket()
+        alive = FakeWebSocket()
+        await manager.connect(silent, "s1", user_id="u-silent")
+        await manager.connect(alive, "s1", user_id="u-alive")
+        await manager.start()
+        try:
+            await asyncio.sleep(0.03)
+            manager.heartbeat.touch(alive)
+            await asyncio.sleep(0.03)
+        finally:
+            await manager.stop()
+        await asyncio.sleep(0.01)
+
+        assert {"type": "ping"} in silent.messages
+        assert not manager.is_connected(silent, "s1")
+        assert silent.close_code == 1001
+        assert {
+            "type": "user_left",
+            "user_id": "u-silent",
+            "session_id": "s1",
+            "participant_count": 1,
+            "seq": 1,
+        } in alive.messages
+        assert manager.heartbeat.reaped == 1
+
+    @pytest.mark.asyncio
+    async def test_inbound_message_counts_as_alive(self):
+        """Test that receive_message refreshes the heartbeat"""
+        manager = ConnectionManager(heartbeat_interval=10.0)
+        ws = FakeWebSocket(received=['{"type": "pong"}'])
+        await manager.connect(ws, "s1")
+        manager.heartbeat._last_seen[ws] = 0.0
+
+        await manager.receive_message(ws)
+
+        assert manager.heartbeat._last_seen[ws] > 0.0
+
+    @pytest.mark.asyncio
+    async def test_ping_uses_connection_codec(self):
+        """Test that pings are encoded with the negotiated codec"""
+        manager = ConnectionManager(outbound_queue_size=4, heartbeat_interval=10.0)
+        ws = FakeWebSocket(subprotocols=["msgpack"])
+        await manager.connect(ws, "s1")
+
+        manager._send_ping(ws)
+        await asyncio.sleep(0.01)
+
+        assert msgpack.unpackb(ws.sent[0]) == {"type": "ping"}
+
+    @pytest.mark.asyncio
+    async def test_disconnect_stops_monitoring(self):
+        """Test that a socket leaving its last session is forgotten"""
+        manager = ConnectionManager(heartbeat_interval=10.0)
+        ws = FakeWebSocket()
+        await manager.connect(ws, "s1")
+
+        manager.disconnect(ws, "s1")
+
+        assert len(manager.heartbeat) == 0
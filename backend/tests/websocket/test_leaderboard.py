@@ -0,0 +1,229 @@
+"""
+Unit tests for the versioned leaderboard delta protocol
+"""
+
+import pytest
+
+from backend.tests.websocket.fakes import FakeWebSocket
+from backend.websocket.leaderboard import Leaderboard
+from backend.websocket.manager import ConnectionManager
+
+
+def _ranks(board):
+    return dict(board.ranks)
+
+
+class TestLeaderboard:
+    """Test suite for Leaderboard"""
+
+    def test_apply_assigns_competition_ranks(self):
+        """Test that tied scores share a rank and the next rank is skipped"""
+        board = Leaderboard(history=4)
+
+        board.apply({"a": 10, "b": 30, "c": 30, "d": 5})
+
+        assert _ranks(board) == {"b": 1, "c": 1, "a": 3, "d": 4}
+        assert board.version == 1
+
+    def test_apply_reports_rank_changes_of_untouched_rows(self):
+        """Test that rows overtaken by another row count as changed"""
+        board = Leaderboard(history=4)
+        board.apply({"a": 30, "b": 20, "c": 10})
+
+        changed = board.apply({"c": 40})
+
+        assert changed == {"a", "b", "c"}
+        assert _ranks(board) == {"c": 1, "a": 2, "b": 3}
+
+    def test_apply_without_change_keeps_version(self):
+        """Test that a no-op update does not create a version"""
+        board = Leaderboard(history=4)
+        board.apply({"a": 1})
+
+        assert board.apply({"a": 1}) == frozenset()
+        assert board.version == 1
+
+    def test_delta_contains_only_changed_rows(self):
+        """Test that a delta carries the rows changed since the base version"""
+        board = Leaderboard(history=4)
+        board.apply({"a": 30, "b": 20, "c": 10, "d": 0})
+
+        board.apply({"d": 5})
+        delta = board.delta("s1", 1)
+
+        assert delta["type"] == "leaderboard_delta"
+        assert (delta["base_version"], delta["version"]) == (1, 2)
+        assert delta["rows"] == [{"id": "d", "score": 5, "rank": 4}]
+        assert delta["removed"] == []
+
+    def test_delta_is_cumulative_over_versions(self):
+        """Test that a delta from an older version merges every change"""
+        board = Leaderboard(history=4)
+        board.apply({"a": 30, "b": 20, "c": 10, "d": 0, "e": -5})
+        board.apply({"d": 5})
+        board.apply({"c": 15}, removed=["e"])
+
+        delta = board.delta("s1", 1)
+
+        assert [row["id"] for row in delta["rows"]] == ["c", "d"]
+        assert delta["removed"] == ["e"]
+
+    def test_delta_beyond_history_needs_snapshot(self):
+        """Test that clients older than the retained history get no delta"""
+        board = Leaderboard(history=2)
+        board.apply({f"p{i}": i for i in range(10)})
+        for score in (100, 101, 102):
+            board.apply({"p0": score})
+
+        assert board.delta("s1", 1) is None
+        assert board.delta("s1", 2) is not None
+
+    def test_unknown_base_version_needs_snapshot(self):
+        """Test that never-acked and future versions get no delta"""
+        board = Leaderboard(history=4)
+        board.apply({"a": 1, "b": 2})
+
+        assert board.delta("s1", -1) is None
+        assert board.delta("s1", 7) is None
+
+    def test_snapshot_is_ordered_by_rank(self):
+        """Test that a snapshot lists every row in rank order"""
+        board = Leaderboard(history=4)
+        board.apply({"a": 10, "b": 30, "c": 20})
+
+        snapshot = board.snapshot("s1")
+
+        assert snapshot["type"] == "leaderboard_snapshot"
+        assert snapshot["version"] == 1
+        assert [row["id"] for row in snapshot["rows"]] == ["b", "c", "a"]
+
+    def test_history_must_be_positive(self):
+        """Test that a leaderboard needs at least one retained version"""
+        with pytest.raises(ValueError):
+            Leaderboard(history=0)
+
+
+class TestLeaderboardBroadcaster:
+    """Test suite for per-client delta delivery"""
+
+    @staticmethod
+    async def _session(count):
+        manager = ConnectionManager(outbound_queue_size=0, coalesce_ticks_ms={})
+        sockets = [FakeWebSocket() for _ in range(count)]
+        for ws in sockets:
+            await manager.connect(ws, "s1")
+        return manager, sockets
+
+    @pytest.mark.asyncio
+    async def test_unacknowledged_clients_get_snapshot(self):
+        """Test that a client without an ack receives the full state"""
+        manager, (ws,) = await self._session(1)
+
+        await manager.leaderboards.update("s1", {"a": 1, "b": 2})
+
+        assert ws.messages[-1]["type"] == "leaderboard_snapshot"
+        assert manager.leaderboards.snapshots_sent == 1
+
+    @pytest.mark.asyncio
+    async def test_acknowledged_clients_get_delta(self):
+        """Test that acked clients only receive the changed rows"""
+        manager, sockets = await self._session(2)
+        leaderboards = manager.leaderboards
+        await leaderboards.update("s1", {"a": 30, "b": 20, "c": 10})
+        for ws in sockets:
+            leaderboards.acknowledge(ws, "s1", 1)
+
+        await leaderboards.update("s1", {"c": 15})
+
+        for ws in sockets:
+            delta = ws.messages[-1]
+            assert delta["type"] == "leaderboard_delta"
+            assert delta["rows"] == [{"id": "c", "score": 15, "rank": 3}]
+        # One frame encoded for the whole group
+        assert sockets[0].sent[-1] is sockets[1].sent[-1]
+        assert leaderboards.deltas_sent == 2
+
+    @pytest.mark.asyncio
+    async def test_clients_are_grouped_by_acknowledged_version(self):
+        """Test that lagging clients get a delta from their own version"""
+        manager, (current, lagging, fresh) = await self._session(3)
+        leaderboards = manager.leaderboards
+        await leaderboards.update("s1", {"a": 30, "b": 20, "c": 10, "d": 0})
+        await leaderboards.update("s1", {"d": 5})
+        leaderboards.acknowledge(current, "s1", 2)
+        leaderboards.acknowledge(lagging, "s1", 1)
+
+        await leaderboards.update("s1", {"c": 12})
+
+        assert current.messages[-1]["base_version"] == 2
+        assert [r["id"] for r in current.messages[-1]["rows"]] == ["c"]
+        assert lagging.messages[-1]["base_version"] == 1
+        assert [r["id"] for r in lagging.messages[-1]["rows"]] == ["c", "d"]
+        assert fresh.messages[-1]["type"] == "leaderboard_snapshot"
+
+    @pytest.mark.asyncio
+    async def test_invalid_acknowledgements_are_ignored(self):
+        """Test that unknown, future and regressing acks do not move the base"""
+        manager, (ws,) = await self._session(1)
+        leaderboards = manager.leaderboards
+        leaderboards.acknowledge(ws, "s1", 0)
+        await leaderboards.update("s1", {"a": 1, "b": 2, "c": 3})
+        await leaderboards.update("s1", {"a": 0})
+
+        leaderboards.acknowledge(ws, "s1", 2)
+        leaderboards.acknowledge(ws, "s1", 1)
+        leaderboards.acknowledge(ws, "s1", 99)
+        leaderboards.acknowledge(ws, "s1", "2")
+        await leaderboards.update("s1", {"a": -1})
+
+        assert ws.messages[-1]["base_version"] == 2
+
+    @pytest.mark.asyncio
+    async def test_send_snapshot_to_joining_client(self):
+        """Test that a new connection can be brought up to date"""
+        manager, (ws,) = await self._session(1)
+        await manager.leaderboards.send_snapshot(ws, "s1")
+        assert ws.sent == []
+
+        await manager.leaderboards.update("s1", {"a": 1})
+        await manager.leaderboards.send_snapshot(ws, "s1")
+
+        assert ws.messages[-1]["rows"] == [{"id": "a", "score": 1, "rank": 1}]
+
+    @pytest.mark.asyncio
+    async def test_acks_of_departed_sockets_are_pruned(self):
+        """Test that disconnected sockets do not keep ack state alive"""
+        manager, (stays, leaves) = await self._session(2)
+        leaderboards = manager.leaderboards
+        await leaderboards.update("s1", {"a": 1, "b": 2})
+        leaderboards.acknowledge(stays, "s1", 1)
+        leaderboards.acknowledge(leaves, "s1", 1)
+        manager.disconnect(leaves, "s1")
+
+        assert list(leaderboards._acks["s1"]) == [stays]
+
+        await leaderboards.update("s1", {"a": 3})
+
+        assert list(leaderboards._acks["s1"]) == [stays]
+
+    @pytest.mark.asyncio
+    async def test_empty_session_releases_its_leaderboard(self):
+        """Test that the last disconnect drops the board and its acks"""
+        manager, (ws,) = await self._session(1)
+        await manager.leaderboards.update("s1", {"a": 1})
+        manager.leaderboards.acknowledge(ws, "s1", 1)
+
+        manager.disconnect(ws, "s1")
+
+        assert "s1" not in manager.leaderboards._boards
+        assert "s1" not in manager.leaderboards._acks
+
+    @pytest.mark.asyncio
+    async def test_clear_forgets_session(self):
+        """Test that clearing a session drops its leaderboard"""
+        manager, (ws,) = await self._session(1)
+        await manager.leaderboards.update("s1", {"a": 1})
+
+        manager.leaderboards.clear("s1")
+
+        assert manager.leaderboards.get("s1").version == 0
@@ -0,0 +1,522 @@
+"""
+Unit tests for the WebSocket ConnectionManager
+Covers connection bookkeeping, encode-once frames, deadline-bounded
+broadcast fan-out and queued delivery
+"""
+
+import asyncio
+import time
+
+import pytest
+
+from backend.tests.websocket.fakes import FakeWebSocket
+from backend.websocket.frames import Frame
+from backend.websocket.manager import ConnectionManager
+from backend.websocket.outbound import OverflowPolicy
+
+
+class TestConnectionBookkeeping:
+    """Test suite for connect/disconnect bookkeeping"""
+
+    @pytest.mark.asyncio
+    async def test_connect_accepts_and_registers(self):
+        """Test that connect accepts the socket and adds it to the session"""
+        manager = ConnectionManager()
+        ws = FakeWebSocket()
+
+        await manager.connect(ws, "s1")
+
+        assert ws.accepted
+        assert manager.get_session_connection_count("s1") == 1
+
+    @pytest.mark.asyncio
+    async def test_disconnect_removes_empty_session(self):
+        """Test that the last disconnect removes the session entirely"""
+        manager = ConnectionManager()
+        ws = FakeWebSocket()
+        await manager.connect(ws, "s1")
+
+        manager.disconnect(ws, "s1")
+        manager.disconnect(ws, "s1")  # Idempotent
+
+        assert "s1" not in manager.active_connections
+        assert manager.get_session_connection_count("s1") == 0
+
+
+class TestRegistryIndexes:
+    """Test suite for the socket and user reverse indexes"""
+
+    @pytest.mark.asyncio
+    async def test_user_index_tracks_all_user_sockets(self):
+        """Test that a user's sockets are looked up in connection order"""
+        manager = ConnectionManager(outbound_queue_size=0)
+        laptop, phone, other = FakeWebSocket(), FakeWebSocket(), FakeWebSocket()
+        await manager.connect(laptop, "s1", user_id="u1")
+        await manager.connect(phone, "s1", user_id="u1")
+        await manager.connect(other, "s1", user_id="u2")
+
+        assert manager.get_user_connections("u1") == [laptop, phone]
+        assert manager.get_connection_sessions(phone) == {"s1"}
+        assert manager.is_connected(phone, "s1")
+
+    @pytest.mark.asyncio
+    async def test_disconnect_cleans_every_index(self):
+        """Test that disconnecting removes the socket from all indexes"""
+        manager = ConnectionManager(outbound_queue_size=0)
+        ws = FakeWebSocket()
+        await manager.connect(ws, "s1", user_id="u1")
+
+        manager.disconnect(ws, "s1")
+
+        assert manager.get_user_connections("u1") == []
+        assert manager.get_connection_sessions(ws) == set()
+        assert not manager.is_connected(ws, "s1")
+        assert manager._user_sockets == {}
+        assert manager._connections == {}
+
+    @pytest.mark.asyncio
+    async def test_disconnect_from_wrong_session_is_noop(self):
+        """Test that disconnecting from a session the socket is not in is safe"""
+        manager = ConnectionManager(outbound_queue_size=0)
+        ws = FakeWebSocket()
+        await manager.connect(ws, "s1", user_id="u1")
+        await manager.connect(FakeWebSocket(), "s2")
+
+        manager.disconnect(ws, "s2")
+
+        assert manager.is_connected(ws, "s1")
+        assert manager.get_session_connection_count("s2") == 1
+
+
+class TestConnectionRecord:
+    """Test suite for the per-connection record the manager keeps"""
+
+    @pytest.mark.asyncio
+    async def test_record_holds_identity_and_subscriptions(self):
+        """Test that one record follows the socket across sessions"""
+        manager = ConnectionManager(outbound_queue_size=0)
+        ws = FakeWebSocket()
+        await manager.connect(ws, "s1", user_id="u1", org_id="o1")
+        await manager.connect(ws, "s2", user_id="u1", org_id="o1")
+        manager.set_team(ws, "s2", "red")
+
+        record = manager.get_connection(ws)
+        assert (record.websocket, record.user_id, record.org_id) == (ws, "u1", "o1")
+        assert record.sessions == ("s1", "s2")
+        assert manager.get_team(ws, "s2") == "red"
+
+        manager.disconnect(ws, "s2")
+
+        assert manager.get_connection(ws) is record
+        assert record.sessions == ("s1",)
+        assert manager.get_channels(ws, "s2") == set()
+        assert manager.get_team(ws, "s2") is None
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("queue_size", [0, 8])
+    async def test_cursor_and_counters_follow_deliveries(self, queue_size):
+        """Test that broadcasts advance the cursor and count sent frames"""
+        manager = ConnectionManager(outbound_queue_size=queue_size)
+        ws = FakeWebSocket(received=['{"type": "ping"}'])
+        await manager.connect(ws, "s1")
+        for n in range(3):
+            await manager.broadcast_to_session("s1", {"type": "chat", "n": n})
+        await manager.receive_message(ws)
+        await asyncio.sleep(0)
+
+        record = manager.get_connection(ws)
+        assert record.last_seq == 3
+        assert record.frames_sent == 3
+        assert record.bytes_sent == sum(len(frame) for frame in ws.sent)
+        assert record.messages_received == 1
+
+    @pytest.mark.asyncio
+    async def test_resume_moves_the_cursor_to_the_session_position(self):
+        """Test that a caught-up connection's cursor is current"""
+        manager = ConnectionManager(outbound_queue_size=0)
+        await manager.connect(FakeWebSocket(), "s1")
+        for n in range(4):
+            await manager.broadcast_to_session("s1", {"type": "chat", "n": n})
+        epoch, _ = manager.event_log.position("s1")
+
+        returning = FakeWebSocket()
+        await manager.connect(returning, "s1")
+        await manager.resume(returning, "s1", 2, epoch)
+
+        assert manager.get_connection(returning).last_seq == 4
+
+    @pytest.mark.asyncio
+    async def test_unknown_socket_has_no_record(self):
+        """Test that sockets gone from every session are forgotten"""
+        manager = ConnectionManager(outbound_queue_size=0)
+        ws = FakeWebSocket()
+        await manager.connect(ws, "s1")
+
+        manager.disconnect(ws, "s1")
+
+        assert manager.get_connection(ws) is None
+
+
+@pytest.mark.parametrize("concurrent", [True, False])
+class TestBroadcastFanOut:
+    """Test suite for broadcast fan-out in both modes"""
+
+    @pytest.mark.asyncio
+    async def test_broadcast_reaches_all_connections(self, concurrent):
+        """Test that every healthy connection receives the broadcast"""
+        manager = ConnectionManager(
+            concurrent_broadcast=concurrent, outbound_queue_size=0
+        )
+        sockets = [FakeWebSocket() for _ in range(5)]
+        for ws in sockets:
+            await manager.connect(ws, "s1")
+
+        await manager.broadcast_to_session("s1", {"type": "session_update"})
+
+        assert all(
+            ws.messages == [{"type": "session_update", "seq": 1}] for ws in sockets
+        )
+
+    @pytest.mark.asyncio
+    async def test_stalled_connection_is_evicted(self, concurrent):
+        """Test that a socket missing the deadline is counted, evicted and closed"""
+        manager = ConnectionManager(
+            send_timeout=0.05,
+            concurrent_broadcast=concurrent,
+            outbound_queue_size=0,
+            coalesce_ticks_ms={},
+        )
+        healthy = FakeWebSocket()
+        stalled = FakeWebSocket(stalled=True)
+        await manager.connect(healthy, "s1")
+        await manager.connect(stalled, "s1")
+
+        await manager.broadcast_to_session("s1", {"type": "session_update"})
+        await asyncio.sleep(0.01)  # Let the background close run
+
+        assert healthy.messages == [
+            {"type": "session_update", "seq": 1},
+            {
+                "type": "user_left",
+                "user_id": None,
+                "session_id": "s1",
+                "participant_count": 1,
+                "seq": 2,
+            },
+        ]
+        assert manager.send_timeouts == 1
+        assert manager.evictions == 1
+        assert manager.get_session_connection_count("s1") == 1
+        assert stalled.closed
+        assert stalled.close_code == 1013
+
+    @pytest.mark.asyncio
+    async def test_broken_connection_is_removed(self, concurrent):
+        """Test that a socket raising on send is dropped without eviction"""
+        manager = ConnectionManager(
+            concurrent_broadcast=concurrent, outbound_queue_size=0
+        )
+        healthy = FakeWebSocket()
+        broken = FakeWebSocket(broken=True)
+        await manager.connect(healthy, "s1")
+        await manager.connect(broken, "s1")
+
+        await manager.broadcast_to_session("s1", {"type": "session_update"})
+
+        assert manager.send_failures == 1
+        assert manager.evictions == 0
+        assert manager.get_session_connection_count("s1") == 1
+
+
+class TestConcurrentDeadline:
+    """Test suite for the concurrent fan-out deadline"""
+
+    @pytest.mark.asyncio
+    async def test_stalled_sockets_cost_one_deadline_in_total(self):
+        """Test that several stalled sockets do not add up their timeouts"""
+        manager = ConnectionManager(
+            send_timeout=0.05, concurrent_broadcast=True, outbound_queue_size=0
+        )
+        for _ in range(10):
+            await manager.connect(FakeWebSocket(stalled=True), "s1")
+
+        start = time.perf_counter()
+        await manager.broadcast_to_session("s1", {"type": "session_update"})
+        elapsed = time.perf_counter() - start
+
+        assert elapsed < 0.4
+        assert manager.evictions == 10
+        assert "s1" not in manager.active_connections
+
+    @pytest.mark.asyncio
+    async def test_broadcast_to_unknown_session_is_noop(self):
+        """Test that broadcasting to a session without connections is harmless"""
+        manager = ConnectionManager()
+
+        await manager.broadcast_to_session("missing", {"type": "session_update"})
+
+        assert manager.send_failures == 0
+
+
+class TestEncodeOnce:
+    """Test suite for pre-encoded broadcast frames"""
+
+    @pytest.mark.asyncio
+    async def test_broadcast_writes_same_encoded_frame(self):
+        """Test that every socket receives the identical pre-encoded text"""
+        manager = ConnectionManager(outbound_queue_size=0)
+        sockets = [FakeWebSocket() for _ in range(3)]
+        for ws in sockets:
+            await manager.connect(ws, "s1")
+
+        await manager.broadcast_to_session("s1", {"type": "session_update", "score": 1})
+
+        payloads = [ws.sent[0] for ws in sockets]
+        assert payloads[0] == '{"type":"session_update","score":1,"seq":1}'
+        assert all(p is payloads[0] for p in payloads)
+
+    @pytest.mark.asyncio
+    async def test_binary_frame_is_sent_as_bytes(self):
+        """Test that a bytes frame goes out through send_bytes"""
+        manager = ConnectionManager(outbound_queue_size=0)
+        ws = FakeWebSocket()
+        await manager.connect(ws, "s1")
+
+        await manager.broadcast_to_session("s1", Frame(b"\x01\x02", "blob"))
+
+        assert ws.sent == [b"\x01\x02"]
+
+    @pytest.mark.asyncio
+    async def test_personal_message_accepts_pre_encoded_frames(self):
+        """Test that send_personal_message handles dicts, text and frames"""
+        manager = ConnectionManager()
+        ws = FakeWebSocket()
+        frame = Frame.from_message({"type": "connection"})
+
+        await manager.send_personal_message({"type": "a"}, ws)
+        await manager.send_personal_message('{"type":"b"}', ws)
+        await manager.send_personal_message(frame, ws)
+
+        assert ws.messages == [{"type": "a"}, {"type": "b"}, {"type": "connection"}]
+        assert frame.message_type == "connection"
+
+    @pytest.mark.asyncio
+    async def test_stalled_personal_message_is_bounded_and_evicts(self):
+        """Test that a direct personal send obeys the deadline like a broadcast"""
+        manager = ConnectionManager(
+            send_timeout=0.05, outbound_queue_size=0, coalesce_ticks_ms={}
+        )
+        healthy, stalled = FakeWebSocket(), FakeWebSocket(stalled=True)
+        await manager.connect(healthy, "s1", user_id="u1")
+        await manager.connect(stalled, "s1", user_id="u2")
+
+        start = time.perf_counter()
+        await manager.send_personal_message({"type": "a"}, stalled)
+        await asyncio.sleep(0.01)  # Let the background close run
+
+        assert time.perf_counter() - start < 0.4
+        assert manager.send_timeouts == 1
+        assert manager.evictions == 1
+        assert not manager.is_connected(stalled, "s1")
+        assert stalled.close_code == 1013
+        assert healthy.messages[-1]["type"] == "user_left"
+
+    @pytest.mark.asyncio
+    async def test_personal_message_swallows_send_errors(self):
+        """Test that a broken socket does not raise from send_personal_message"""
+        manager = ConnectionManager()
+
+        await manager.send_personal_message({"type": "a"}, FakeWebSocket(broken=True))
+
+
+class TestOrganizationBroadcast:
+    """Test suite for organization-wide announcements"""
+
+    @pytest.mark.asyncio
+    async def test_reaches_only_the_tenant_in_every_session(self):
+        """Test that every socket of the organization gets one identical frame"""
+        manager = ConnectionManager(outbound_queue_size=0)
+        first, second, other = FakeWebSocket(), FakeWebSocket(), FakeWebSocket()
+        await manager.connect(first, "s1", org_id="o1")
+        await manager.connect(second, "s2", org_id="o1")
+        await manager.connect(other, "s1", org_id="o2")
+
+        await manager.broadcast_to_organization("o1", {"type": "announcement"})
+
+        assert first.sent == ['{"type":"announcement"}']
+        assert second.sent[0] is first.sent[0]
+        assert other.sent == []
+
+    @pytest.mark.asyncio
+    async def test_socket_in_several_sessions_gets_one_copy(self):
+        """Test that joining more sessions does not duplicate the announcement"""
+        manager = ConnectionManager(outbound_queue_size=0)
+        ws = FakeWebSocket()
+        await manager.connect(ws, "s1", org_id="o1")
+        await manager.connect(ws, "s2", org_id="o1")
+
+        await manager.broadcast_to_organization("o1", {"type": "announcement"})
+
+        assert ws.messages == [{"type": "announcement"}]
+
+    @pytest.mark.asyncio
+    async def test_broken_socket_is_removed(self):
+        """Test that a socket failing the send leaves the session it joined"""
+        manager = ConnectionManager(outbound_queue_size=0)
+        healthy, broken = FakeWebSocket(), FakeWebSocket(broken=True)
+        await manager.connect(healthy, "s1", org_id="o1")
+        await manager.connect(broken, "s2", org_id="o1")
+
+        await manager.broadcast_to_organization("o1", {"type": "announcement"})
+
+        assert manager.send_failures == 1
+        assert "s2" not in manager.active_connections
+        assert list(manager._org_sockets["o1"]) == [healthy]
+
+    @pytest.mark.asyncio
+    async def test_unknown_organization_is_noop(self):
+        """Test that announcing to a tenant without sockets is harmless"""
+        manager = ConnectionManager(outbound_queue_size=0)
+        ws = FakeWebSocket()
+        await manager.connect(ws, "s1", org_id="o1")
+
+        await manager.broadcast_to_organization("missing", {"type": "announcement"})
+
+        assert ws.sent == []
+
+
+class TestOutboundQueues:
+    """Test suite for queued delivery through per-connection writer tasks"""
+
+    @pytest.mark.asyncio
+    async def test_writer_delivers_in_order(self):
+        """Test that personal and broadcast frames keep their relative order"""
+        manager = ConnectionManager(outbound_queue_size=8, coalesce_ticks_ms={})
+        ws = FakeWebSocket()
+        await manager.connect(ws, "s1")
+
+        await manager.send_personal_message({"type": "connection"}, ws)
+        await manager.broadcast_to_session("s1", {"type": "user_joined"})
+        await asyncio.sleep(0.01)
+
+        assert ws.messages == [
+            {"type": "connection"},
+            {"type": "user_joined", "seq": 1},
+        ]
+
+    @pytest.mark.asyncio
+    async def test_broadcast_does_not_wait_for_stalled_socket(self):
+        """Test that broadcasting only enqueues and returns immediately"""
+        manager = ConnectionManager(send_timeout=5.0, outbound_queue_size=8)
+        healthy = FakeWebSocket()
+        await manager.connect(healthy, "s1")
+        await manager.connect(FakeWebSocket(stalled=True), "s1")
+
+        start = time.perf_counter()
+        await manager.broadcast_to_session("s1", {"type": "session_update"})
+        elapsed = time.perf_counter() - start
+        await asyncio.sleep(0.01)
+
+        assert elapsed < 0.1
+        assert healthy.messages == [{"type": "session_update", "seq": 1}]
+
+    @pytest.mark.asyncio
+    async def test_stalled_writer_is_evicted(self):
+        """Test that a writer missing the send deadline evicts its socket"""
+        manager = ConnectionManager(send_timeout=0.02, outbound_queue_size=8)
+        stalled = FakeWebSocket(stalled=True)
+        await manager.connect(stalled, "s1")
+
+        await manager.broadcast_to_session("s1", {"type": "session_update"})
+        await asyncio.sleep(0.1)
+
+        assert manager.send_timeouts == 1
+        assert manager.evictions == 1
+        assert stalled.closed
+        assert manager.get_queue_stats()["connections"] == 0
+
+    @pytest.mark.asyncio
+    async def test_disconnect_policy_evicts_slow_consumer(self):
+        """Test that overflowing a queue under the disconnect policy evicts"""
+        manager = ConnectionManager(
+            send_timeout=5.0,
+            outbound_queue_size=2,
+            overflow_policy=OverflowPolicy.DISCONNECT,
+            coalesce_ticks_ms={},
+        )
+        await manager.connect(FakeWebSocket(stalled=True), "s1")
+        healthy = FakeWebSocket()
+        await manager.connect(healthy, "s1")
+        await asyncio.sleep(0)
+
+        for i in range(4):
+            await manager.broadcast_to_session("s1", {"type": "tick", "n": i})
+            await asyncio.sleep(0)  # Let writers pick up frames
+        await asyncio.sleep(0.01)
+
+        assert manager.overflow_disconnects == 1
+        assert manager.get_session_connection_count("s1") == 1
+        assert [m["type"] for m in healthy.messages] == ["tick"] * 4 + ["user_left"]
+
+    @pytest.mark.asyncio
+    async def test_queue_stats_report_depth_and_drops(self):
+        """Test that queue stats expose depth and policy counters"""
+        manager = ConnectionManager(send_timeout=5.0, outbound_queue_size=2)
+        await manager.connect(FakeWebSocket(stalled=True), "s1")
+        await asyncio.sleep(0)
+
+        # First frame is taken by the stalled writer, the rest queue up
+        for i in range(4):
+            await manager.broadcast_to_session("s1", {"type": "tick", "n": i})
+            await asyncio.sleep(0)  # Let writers pick up frames
+
+        stats = manager.get_queue_stats()
+        assert stats["connections"] == 1
+        assert stats["max_depth"] == 2
+        assert stats["dropped"] == 1
+
+    @pytest.mark.asyncio
+    async def test_disconnect_cancels_writer(self):
+        """Test that removing a connection stops its writer task"""
+        manager = ConnectionManager(outbound_queue_size=8)
+        ws = FakeWebSocket()
+        await manager.connect(ws, "s1")
+        writer = manager.get_connection(ws).writer
+
+        manager.disconnect(ws, "s1")
+        await asyncio.sleep(0)
+
+        assert writer.cancelled()
+        assert manager.get_queue_stats()["connections"] == 0
+
+
+class TestPresenceCoalescing:
+    """Test suite for the default batching of join/leave announcements"""
+
+    @pytest.mark.asyncio
+    async def test_join_storm_is_announced_once_per_tick(self):
+        """Test that many joins reach each socket as one batch"""
+        manager = ConnectionManager(outbound_queue_size=0)
+        watcher = FakeWebSocket()
+        await manager.connect(watcher, "s1", user_id="host")
+        for n in range(20):
+            ws = FakeWebSocket()
+            await manager.connect(ws, "s1", user_id=f"u{n}")
+            await manager.broadcast_to_session(
+                "s1",
+                {
+                    "type": "user_joined",
+                    "user_id": f"u{n}",
+                    "session_id": "s1",
+                    "participant_count": n + 2,
+                },
+            )
+
+        await manager.coalescer.flush("s1")
+
+        (batch,) = watcher.messages
+        assert batch["type"] == "batch"
+        assert [event["user_id"] for event in batch["events"]] == [
+            f"u{n}" for n in range(20)
+        ]
+        assert batch["state"] == {"participant_count": 21}
@@ -0,0 +1,175 @@
+"""
+Unit tests for the realtime layer's Prometheus metrics
+"""
+
+import asyncio
+
+import pytest
+
+from backend.tests.websocket.fakes import FakeWebSocket
+from backend.websocket.dispatcher import ClientContext
+from backend.websocket.handlers import create_dispatcher
+from backend.websocket.manager import ConnectionManager
+from backend.websocket.metrics import Histogram, label_hash, render_metrics
+
+
+def _samples(text: str) -> dict:
+    """Parse exposition text into {series: value}, skipping comments"""
+    samples = {}
+    for line in text.splitlines():
+        if line and not line.startswith("#"):
+            series, value = line.rsplit(" ", 1)
+            samples[series] = float(value)
+    return samples
+
+
+class TestHistogram:
+    """Test suite for Histogram"""
+
+    def test_buckets_are_cumulative(self):
+        """Test that each bucket counts every observation up to its bound"""
+        histogram = Histogram(buckets=(0.1, 1.0))
+        for value in (0.05, 0.1, 0.5, 3.0):
+            histogram.observe(value)
+
+        assert histogram.cumulative() == [("0.1", 2), ("1.0", 3), ("+Inf", 4)]
+        assert histogram.count == 4
+        assert histogram.sum == pytest.approx(3.65)
+
+
+class TestConnectionGauges:
+    """Test suite for session, connection and organization gauges"""
+
+    @pytest.mark.asyncio
+    async def test_counts_per_session_and_organization(self):
+        """Test that gauges reflect the registry at scrape time"""
+        manager = ConnectionManager(outbound_queue_size=0)
+        for session_id, org_id in (("s1", "o1"), ("s1", "o1"), ("s2", "o2")):
+            await manager.connect(FakeWebSocket(), session_id, org_id=org_id)
+        shared = FakeWebSocket()
+        await manager.connect(shared, "s1", org_id="o2")
+        await manager.connect(shared, "s2", org_id="o2")
+
+        samples = _samples(render_metrics(manager))
+
+        assert samples["trivia_ws_sessions"] == 2
+        assert samples["trivia_ws_connections"] == 4
+        s1, s2, o1, o2 = (label_hash(value) for value in ("s1", "s2", "o1", "o2"))
+        assert samples[f'trivia_ws_session_connections{{session="{s1}"}}'] == 3
+        assert samples[f'trivia_ws_session_connections{{session="{s2}"}}'] == 2
+        assert (
+            samples[f'trivia_ws_organization_connections{{organization="{o1}"}}'] == 2
+        )
+        assert (
+            samples[f'trivia_ws_organization_connections{{organization="{o2}"}}'] == 2
+        )
+        assert samples[f'trivia_ws_organization_sessions{{organization="{o1}"}}'] == 1
+        assert samples[f'trivia_ws_organization_sessions{{organization="{o2}"}}'] == 2
+
+    @pytest.mark.asyncio
+    async def test_only_largest_sessions_get_their_own_series(self):
+        """Test that per-session series are bounded by top_sessions"""
+        manager = ConnectionManager(outbound_queue_size=0)
+        await manager.connect(FakeWebSocket(), "small")
+        for _ in range(3):
+            await manager.connect(FakeWebSocket(), "hot")
+
+        text = render_metrics(manager, top_sessions=1)
+
+        assert f'session="{label_hash("hot")}"' in text
+        assert f'session="{label_hash("small")}"' not in text
+
+    @pytest.mark.asyncio
+    async def test_labels_do_not_reveal_ids(self):
+        """Test that session and organization IDs never appear in a scrape"""
+        manager = ConnectionManager(outbound_queue_size=0)
+        await manager.connect(FakeWebSocket(), "secret-room", org_id="tenant-a")
+
+        text = render_metrics(manager)
+
+        assert "secret-room" not in text
+        assert "tenant-a" not in text
+        assert label_hash("secret-room") != label_hash("secret-roon")
+
+    @pytest.mark.asyncio
+    async def test_organization_index_is_cleaned_up(self):
+        """Test that a socket leaving its last session leaves its org"""
+        manager = ConnectionManager(outbound_queue_size=0)
+        ws = FakeWebSocket()
+        await manager.connect(ws, "s1", org_id="o1")
+
+        manager.disconnect(ws, "s1")
+
+        assert manager.get_organization_stats() == ({}, {})
+        assert manager.get_connection_count() == 0
+
+
+class TestDeliveryMetrics:
+    """Test suite for broadcast, byte and inbound counters"""
+
+    @pytest.mark.asyncio
+    async def test_broadcast_records_latency_and_bytes(self):
+        """Test that a broadcast is timed and its bytes counted per socket"""
+        manager = ConnectionManager(outbound_queue_size=0)
+        for _ in range(3):
+            await manager.connect(FakeWebSocket(), "s1")
+
+        await manager.broadcast_to_session("s1", {"type": "chat", "text": "é"})
+
+        size = len('{"type":"chat","text":"é","seq":1}'.encode("utf-8"))
+        samples = _samples(render_metrics(manager))
+        assert samples["trivia_ws_broadcast_duration_seconds_count"] == 1
+        assert samples['trivia_ws_broadcast_duration_seconds_bucket{le="+Inf"}'] == 1
+        assert samples["trivia_ws_outbound_bytes_total"] == 3 * size
+
+    @pytest.mark.asyncio
+    async def test_queued_writes_count_bytes(self):
+        """Test that bytes written by outbound queue writers are counted"""
+        manager = ConnectionManager(outbound_queue_size=8)
+        ws = FakeWebSocket()
+        await manager.connect(ws, "s1")
+
+        await manager.send_personal_message("abc", ws)
+        # Let the writer task drain the queue
+        await asyncio.sleep(0)
+
+        assert manager.outbound_bytes == 3
+
+    @pytest.mark.asyncio
+    async def test_failures_and_evictions_are_exported(self):
+        """Test that failed and evicted sends show up as counters"""
+        manager = ConnectionManager(outbound_queue_size=0, send_timeout=0.01)
+        await manager.connect(FakeWebSocket(broken=True), "s1")
+        await manager.connect(FakeWebSocket(stalled=True), "s1")
+        await manager.connect(FakeWebSocket(), "s1")
+
+        await manager.broadcast_to_session("s1", {"type": "session_update"})
+
+        samples = _samples(render_metrics(manager))
+        assert samples["trivia_ws_send_failures_total"] == 1
+        assert samples["trivia_ws_send_timeouts_total"] == 1
+        assert samples["trivia_ws_evictions_total"] == 1
+
+    @pytest.mark.asyncio
+    async def test_inbound_messages_by_type(self):
+        """Test that inbound messages are counted per routed type"""
+        manager = ConnectionManager(outbound_queue_size=0)
+        dispatcher = create_dispatcher(manager)
+        ws = FakeWebSocket()
+        await manager.connect(ws, "s1")
+        context = ClientContext(ws, "s1", "u1")
+
+        for raw in (
+            {"type": "chat", "data": {"text": "hi"}},
+            {"type": "chat", "data": {"text": "again"}},
+            {"type": "pong"},
+            {"type": "made_up"},
+            {"type": "chat"},
+        ):
+            await dispatcher.dispatch(context, raw)
+
+        samples = _samples(render_metrics(manager, dispatcher))
+        assert samples['trivia_ws_inbound_messages_total{type="chat"}'] == 3
+        assert samples['trivia_ws_inbound_messages_total{type="pong"}'] == 1
+        assert samples['trivia_ws_inbound_messages_total{type="unknown"}'] == 1
+        assert samples['trivia_ws_inbound_rejected_total{reason="invalid"}'] == 1
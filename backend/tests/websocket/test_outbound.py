@@ -0,0 +1,96 @@
+"""
+Unit tests for bounded per-connection outbound queues
+Covers FIFO delivery and each overflow policy
+"""
+
+import asyncio
+
+import pytest
+
+from backend.websocket.frames import Frame
+from backend.websocket.outbound import OutboundQueue, OverflowPolicy
+
+
+def _frames(queue: OutboundQueue):
+    """Drain the queue synchronously for inspection"""
+    return [queue._items[i].data for i in range(len(queue))]
+
+
+class TestOutboundQueue:
+    """Test suite for OutboundQueue"""
+
+    def test_rejects_non_positive_size(self):
+        """Test that a queue must hold at least one frame"""
+        with pytest.raises(ValueError):
+            OutboundQueue(0, OverflowPolicy.DROP_OLDEST)
+
+    @pytest.mark.asyncio
+    async def test_get_returns_frames_in_order(self):
+        """Test FIFO ordering"""
+        queue = OutboundQueue(4, OverflowPolicy.DROP_OLDEST)
+        queue.put(Frame("a"))
+        queue.put(Frame("b"))
+
+        assert (await queue.get()).data == "a"
+        assert (await queue.get()).data == "b"
+
+    @pytest.mark.asyncio
+    async def test_get_waits_for_put(self):
+        """Test that a waiting writer wakes up when a frame arrives"""
+        queue = OutboundQueue(4, OverflowPolicy.DROP_OLDEST)
+        getter = asyncio.ensure_future(queue.get())
+        await asyncio.sleep(0)
+        assert not getter.done()
+
+        queue.put(Frame("a"))
+
+        assert (await asyncio.wait_for(getter, 1)).data == "a"
+
+    def test_drop_oldest_policy(self):
+        """Test that overflow discards the oldest frame"""
+        queue = OutboundQueue(2, OverflowPolicy.DROP_OLDEST)
+        for data in ("a", "b", "c"):
+            assert queue.put(Frame(data))
+
+        assert _frames(queue) == ["b", "c"]
+        assert queue.dropped == 1
+        assert queue.high_water == 2
+
+    def test_coalesce_policy_replaces_same_type(self):
+        """Test that overflow drops the queued frame of the same type"""
+        queue = OutboundQueue(2, OverflowPolicy.COALESCE)
+        queue.put(Frame("score-1", "score_update"))
+        queue.put(Frame("chat-1", "chat"))
+
+        assert queue.put(Frame("score-2", "score_update"))
+
+        assert _frames(queue) == ["chat-1", "score-2"]
+        assert queue.coalesced == 1
+        assert queue.dropped == 0
+
+    def test_coalesce_policy_keeps_numbered_frames_in_order(self):
+        """Test that a coalesced event never goes out before an older one"""
+        queue = OutboundQueue(2, OverflowPolicy.COALESCE)
+        for seq, kind in ((1, "x"), (2, "y"), (3, "x")):
+            queue.put(Frame(f"{kind}#{seq}", kind, {"type": kind, "seq": seq}))
+
+        assert _frames(queue) == ["y#2", "x#3"]
+
+    def test_coalesce_policy_falls_back_to_drop_oldest(self):
+        """Test that a frame with no queued peer drops the oldest frame"""
+        queue = OutboundQueue(2, OverflowPolicy.COALESCE)
+        queue.put(Frame("a", "chat"))
+        queue.put(Frame("b", "chat"))
+
+        assert queue.put(Frame("c", "score_update"))
+
+        assert _frames(queue) == ["b", "c"]
+        assert queue.dropped == 1
+
+    def test_disconnect_policy_refuses_frame(self):
+        """Test that overflow asks the caller to disconnect the consumer"""
+        queue = OutboundQueue(1, OverflowPolicy.DISCONNECT)
+        assert queue.put(Frame("a"))
+
+        assert not queue.put(Frame("b"))
+        assert _frames(queue) == ["a"]
@@ -0,0 +1,148 @@
+"""
+Unit tests for user-level presence and primary sockets
+"""
+
+import asyncio
+
+import pytest
+
+from backend.tests.websocket.fakes import FakeWebSocket
+from backend.websocket.manager import ConnectionManager
+from backend.websocket.metrics import render_metrics
+from backend.websocket.presence import SessionPresence
+
+
+class TestSessionPresence:
+    """Test suite for SessionPresence"""
+
+    def test_first_and_last_socket_of_a_user(self):
+        """Test that only the first join and last leave change presence"""
+        presence = SessionPresence()
+        laptop, phone = FakeWebSocket(), FakeWebSocket()
+
+        assert presence.add("s1", "u1", laptop) is True
+        assert presence.add("s1", "u1", phone) is False
+        assert presence.count("s1") == 1
+
+        assert presence.remove("s1", "u1", laptop) is False
+        assert presence.remove("s1", "u1", phone) is True
+        assert presence.count("s1") == 0
+        assert presence.remove("s1", "u1", phone) is False
+
+    def test_oldest_socket_is_primary(self):
+        """Test that the next oldest socket takes over as primary"""
+        presence = SessionPresence()
+        first, second, third = FakeWebSocket(), FakeWebSocket(), FakeWebSocket()
+        for ws in (first, second, third):
+            presence.add("s1", "u1", ws)
+
+        assert presence.primary("s1", "u1") is first
+        presence.remove("s1", "u1", first)
+        assert presence.primary("s1", "u1") is second
+        assert presence.primary("s1", "nobody") is None
+
+    def test_sessions_are_counted_separately(self):
+        """Test that a user present in two sessions counts in each"""
+        presence = SessionPresence()
+        ws = FakeWebSocket()
+        presence.add("s1", "u1", ws)
+        presence.add("s2", "u1", ws)
+        presence.add("s2", "u2", FakeWebSocket())
+
+        assert presence.count("s1") == 1
+        assert presence.count("s2") == 2
+        assert presence.total() == 3
+
+
+class TestManagerPresence:
+    """Test suite for presence through the connection manager"""
+
+    @pytest.mark.asyncio
+    async def test_connect_and_disconnect_report_user_changes(self):
+        """Test that a second tab neither joins nor leaves the user"""
+        manager = ConnectionManager(outbound_queue_size=0)
+        laptop, phone = FakeWebSocket(), FakeWebSocket()
+
+        assert await manager.connect(laptop, "s1", user_id="u1") is True
+        assert await manager.connect(phone, "s1", user_id="u1") is False
+        assert manager.get_participant_count("s1") == 1
+        assert manager.get_session_connection_count("s1") == 2
+
+        assert manager.disconnect(laptop, "s1") is False
+        assert manager.disconnect(laptop, "s1") is False
+        assert manager.disconnect(phone, "s1") is True
+        assert manager.get_participant_count("s1") == 0
+
+    @pytest.mark.asyncio
+    async def test_anonymous_connections_count_individually(self):
+        """Test that sockets without a user are separate participants"""
+        manager = ConnectionManager(outbound_queue_size=0)
+
+        assert await manager.connect(FakeWebSocket(), "s1") is True
+        assert await manager.connect(FakeWebSocket(), "s1") is True
+        assert manager.get_participant_count("s1") == 2
+
+    @pytest.mark.asyncio
+    async def test_primaries_get_one_copy_per_user(self):
+        """Test that a primary-only broadcast skips a user's other tabs"""
+        manager = ConnectionManager(outbound_queue_size=0)
+        laptop, phone, other = FakeWebSocket(), FakeWebSocket(), FakeWebSocket()
+        await manager.connect(laptop, "s1", user_id="u1")
+        await manager.connect(phone, "s1", user_id="u1")
+        await manager.connect(other, "s1", user_id="u2")
+
+        await manager.broadcast_to_primaries("s1", {"type": "session_snapshot"})
+
+        assert laptop.messages == [{"type": "session_snapshot"}]
+        assert phone.sent == []
+        assert other.messages == [{"type": "session_snapshot"}]
+
+    @pytest.mark.asyncio
+    async def test_next_socket_becomes_primary(self):
+        """Test that closing the primary tab promotes the next one"""
+        manager = ConnectionManager(outbound_queue_size=0)
+        laptop, phone = FakeWebSocket(), FakeWebSocket()
+        await manager.connect(laptop, "s1", user_id="u1")
+        await manager.connect(phone, "s1", user_id="u1")
+
+        manager.disconnect(laptop, "s1")
+        await manager.broadcast_to_primaries("s1", {"type": "session_snapshot"})
+
+        assert phone.messages == [{"type": "session_snapshot"}]
+
+    @pytest.mark.asyncio
+    async def test_evicting_one_tab_does_not_announce_a_leave(self):
+        """Test that a server-dropped socket announces user_left only if last"""
+        manager = ConnectionManager(outbound_queue_size=0, coalesce_ticks_ms={})
+        laptop, phone, other = FakeWebSocket(), FakeWebSocket(), FakeWebSocket()
+        await manager.connect(laptop, "s1", user_id="u1")
+        await manager.connect(phone, "s1", user_id="u1")
+        await manager.connect(other, "s1", user_id="u2")
+
+        manager._evict(laptop, "s1", "test")
+        await asyncio.sleep(0.01)
+        assert other.sent == []
+
+        manager._evict(phone, "s1", "test")
+        await asyncio.sleep(0.01)
+        assert other.messages == [
+            {
+                "type": "user_left",
+                "user_id": "u1",
+                "session_id": "s1",
+                "participant_count": 1,
+                "seq": 1,
+            }
+        ]
+
+    @pytest.mark.asyncio
+    async def test_metrics_report_participants(self):
+        """Test that distinct participants are exported next to connections"""
+        manager = ConnectionManager(outbound_queue_size=0)
+        await manager.connect(FakeWebSocket(), "s1", user_id="u1")
+        await manager.connect(FakeWebSocket(), "s1", user_id="u1")
+
+        text = render_metrics(manager)
+
+        assert "trivia_ws_participants 1" in text
+        assert "trivia_ws_connections 2" in text
@@ -0,0 +1,179 @@
+"""
+Unit tests for staged question reveal
+"""
+
+import asyncio
+import base64
+import json
+
+import pytest
+from cryptography.exceptions import InvalidTag
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+
+from backend.tests.websocket.fakes import FakeWebSocket
+from backend.websocket.manager import ConnectionManager
+from backend.websocket.metrics import render_metrics
+from backend.websocket.reveal import associated_data
+
+QUESTION = {"text": "Capital of France?", "options": ["Lyon", "Paris", "Nice"]}
+
+
+def _decrypt(staged: dict, revealed: dict, session_id: str = "s1") -> dict:
+    """Decrypt a staged payload with the key from its reveal, like a client"""
+    plaintext = AESGCM(base64.b64decode(revealed["key"])).decrypt(
+        base64.b64decode(staged["nonce"]),
+        base64.b64decode(staged["ciphertext"]),
+        associated_data(session_id, staged["question_id"]),
+    )
+    return json.loads(plaintext)
+
+
+async def _session(size: int = 2):
+    manager = ConnectionManager(outbound_queue_size=0, coalesce_ticks_ms={})
+    sockets = [FakeWebSocket() for _ in range(size)]
+    for ws in sockets:
+        await manager.connect(ws, "s1")
+    return manager, sockets
+
+
+class TestQuestionReveals:
+    """Test suite for QuestionReveals"""
+
+    @pytest.mark.asyncio
+    async def test_staged_payload_is_unreadable_until_revealed(self):
+        """Test that staging sends ciphertext and the reveal sends the key"""
+        manager, sockets = await _session()
+
+        await manager.reveals.stage("s1", "q1", QUESTION, points=50)
+        (staged,) = sockets[0].messages
+        assert staged["type"] == "question_staged"
+        assert staged["seq"] == 1
+        assert "Paris" not in json.dumps(staged)
+
+        assert await manager.reveals.reveal("s1", "q1")
+        (revealed,) = sockets[1].messages[1:]
+        assert revealed["type"] == "question_revealed"
+        assert revealed["points"] == 50
+        assert _decrypt(staged, revealed) == QUESTION
+
+    @pytest.mark.asyncio
+    async def test_reveal_frame_is_small_whatever_the_question(self):
+        """Test that the reveal burst does not grow with the payload"""
+        manager, sockets = await _session(1)
+        large = dict(QUESTION, explanation="x" * 5000)
+
+        await manager.reveals.stage("s1", "q1", large)
+        await manager.reveals.reveal("s1", "q1")
+
+        staged, revealed = sockets[0].sent
+        assert len(staged) > 5000
+        assert len(revealed) < 200
+
+    @pytest.mark.asyncio
+    async def test_ciphertext_is_bound_to_its_question(self):
+        """Test that a payload cannot be decrypted as another question"""
+        manager, sockets = await _session(1)
+        await manager.reveals.stage("s1", "q1", QUESTION)
+        await manager.reveals.reveal("s1", "q1")
+        staged, revealed = sockets[0].messages
+
+        with pytest.raises(InvalidTag):
+            _decrypt(dict(staged, question_id="q2"), revealed)
+
+    @pytest.mark.asyncio
+    async def test_on_reveal_runs_before_the_key_is_sent(self):
+        """Test that answers can open before anyone sees the question"""
+        manager, sockets = await _session(1)
+        seen = []
+        await manager.reveals.stage(
+            "s1", "q1", QUESTION, on_reveal=lambda: seen.append(len(sockets[0].sent))
+        )
+
+        await manager.reveals.reveal("s1", "q1")
+
+        assert seen == [1]
+
+    @pytest.mark.asyncio
+    async def test_reveal_is_refused_unless_staged_and_pending(self):
+        """Test that unknown, replaced and already revealed questions fail"""
+        manager, _ = await _session(1)
+
+        assert not await manager.reveals.reveal("s1", "q1")
+        await manager.reveals.stage("s1", "q1", QUESTION)
+        await manager.reveals.stage("s1", "q2", QUESTION)
+        assert not await manager.reveals.reveal("s1", "q1")
+        assert await manager.reveals.reveal("s1", "q2")
+        assert not await manager.reveals.reveal("s1", "q2")
+
+    @pytest.mark.asyncio
+    async def test_scheduled_reveal_fires_once(self):
+        """Test that reveal_in_ms reveals automatically"""
+        manager, sockets = await _session(1)
+        opened = []
+
+        await manager.reveals.stage(
+            "s1", "q1", QUESTION, reveal_in_ms=10, on_reveal=lambda: opened.append(1)
+        )
+        await asyncio.sleep(0.05)
+
+        assert [m["type"] for m in sockets[0].messages] == [
+            "question_staged",
+            "question_revealed",
+        ]
+        assert opened == [1]
+        assert manager.scheduler.get("reveal_question", "s1") is None
+
+    @pytest.mark.asyncio
+    async def test_restaging_cancels_the_scheduled_reveal(self):
+        """Test that a replaced question is never revealed"""
+        manager, sockets = await _session(1)
+
+        await manager.reveals.stage("s1", "q1", QUESTION, reveal_in_ms=10)
+        await manager.reveals.stage("s1", "q2", QUESTION)
+        await asyncio.sleep(0.05)
+
+        types = [m["type"] for m in sockets[0].messages]
+        assert types == ["question_staged", "question_staged"]
+
+    @pytest.mark.asyncio
+    async def test_late_joiner_gets_the_staged_question_and_key(self):
+        """Test that send_current catches up a new connection, unnumbered"""
+        manager, _ = await _session(1)
+        await manager.reveals.stage("s1", "q1", QUESTION)
+        await manager.reveals.reveal("s1", "q1")
+        late = FakeWebSocket()
+        await manager.connect(late, "s1")
+
+        await manager.reveals.send_current(late, "s1")
+
+        staged, revealed = late.messages
+        assert "seq" not in staged
+        assert _decrypt(staged, revealed) == QUESTION
+
+    @pytest.mark.asyncio
+    async def test_empty_session_releases_its_staged_question(self):
+        """Test that the last disconnect drops state unless a reveal is due"""
+        manager, (ws,) = await _session(1)
+        await manager.reveals.stage("s1", "q1", QUESTION, reveal_in_ms=60_000)
+        manager.disconnect(ws, "s1")
+        assert "s1" in manager.reveals
+
+        manager.reveals.discard("s1")
+        await manager.reveals.stage("s2", "q1", QUESTION)
+        await manager.connect(ws, "s2")
+        manager.disconnect(ws, "s2")
+
+        assert "s1" not in manager.reveals
+        assert "s2" not in manager.reveals
+
+    @pytest.mark.asyncio
+    async def test_metrics_count_stages_and_reveals(self):
+        """Test that staged and revealed questions are exposed"""
+        manager, _ = await _session(1)
+        await manager.reveals.stage("s1", "q1", QUESTION)
+        await manager.reveals.reveal("s1", "q1")
+
+        text = render_metrics(manager)
+
+        assert "trivia_ws_questions_staged_total 1" in text
+        assert "trivia_ws_questions_revealed_total 1" in text
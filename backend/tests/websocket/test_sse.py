@@ -0,0 +1,305 @@
+"""
+Unit tests for read-only Server-Sent Events spectators
+"""
+
+import asyncio
+import json
+
+import pytest
+
+from backend.tests.websocket.fakes import FakeWebSocket
+from backend.websocket.backplane import InMemoryBackplane, InMemoryBroker
+from backend.websocket.frames import Frame
+from backend.websocket.manager import ConnectionManager
+from backend.websocket.metrics import render_metrics
+from backend.websocket.sse import (
+    KEEPALIVE,
+    SpectatorHub,
+    SpectatorStream,
+    encode_event,
+    encode_retry,
+    parse_event_id,
+)
+
+
+def _events(chunk: bytes):
+    """Parse SSE output into (id, message) pairs, skipping other fields"""
+    events = []
+    for block in chunk.decode("utf-8").split("\n\n"):
+        fields = dict(
+            line.split(": ", 1) for line in block.splitlines() if ": " in line
+        )
+        if "data" in fields:
+            events.append((fields.get("id"), json.loads(fields["data"])))
+    return events
+
+
+class TestEncoding:
+    """Test suite for the SSE wire format"""
+
+    def test_numbered_frame_gets_an_id(self):
+        """Test that a numbered frame carries epoch:seq as its event id"""
+        frame = Frame.from_message({"type": "session_update", "seq": 7})
+
+        assert encode_event(frame, "abc") == (
+            b'id: abc:7\ndata: {"type":"session_update","seq":7}\n\n'
+        )
+
+    def test_unnumbered_frame_has_no_id(self):
+        """Test that frames without a seq are sent without an id"""
+        assert encode_event(Frame.from_message({"type": "x"}), "abc") == (
+            b'data: {"type":"x"}\n\n'
+        )
+
+    def test_binary_frame_is_skipped(self):
+        """Test that binary frames cannot be sent as events"""
+        assert encode_event(Frame(b"\x00\x01"), "abc") is None
+
+    def test_retry(self):
+        """Test that the reconnect delay is sent in whole milliseconds"""
+        assert encode_retry(1500.7) == b"retry: 1500\n\n"
+
+    @pytest.mark.parametrize(
+        "value, expected",
+        [
+            ("abc:7", ("abc", 7)),
+            ("a:b:3", ("a:b", 3)),
+            (":3", (None, 3)),
+            ("abc:x", (None, None)),
+            ("", (None, None)),
+            (None, (None, None)),
+        ],
+    )
+    def test_parse_event_id(self, value, expected):
+        """Test that Last-Event-ID values are split or rejected"""
+        assert parse_event_id(value) == expected
+
+
+class TestSpectatorStream:
+    """Test suite for one spectator's pending output"""
+
+    @pytest.mark.asyncio
+    async def test_read_joins_pending_chunks(self):
+        """Test that everything queued is returned in one read"""
+        stream = SpectatorStream(capacity=4)
+        stream.push(b"a")
+        stream.push(b"b")
+
+        assert await stream.read(timeout=1.0) == b"ab"
+
+    @pytest.mark.asyncio
+    async def test_idle_read_returns_keepalive(self):
+        """Test that an idle stream yields a comment line"""
+        stream = SpectatorStream(capacity=4)
+
+        assert await stream.read(timeout=0.01) == KEEPALIVE
+
+    @pytest.mark.asyncio
+    async def test_read_wakes_on_push(self):
+        """Test that a waiting reader gets a chunk pushed later"""
+        stream = SpectatorStream(capacity=4)
+        reader = asyncio.ensure_future(stream.read(timeout=1.0))
+        await asyncio.sleep(0)
+
+        stream.push(b"a")
+
+        assert await reader == b"a"
+
+    @pytest.mark.asyncio
+    async def test_overflow_closes_the_stream(self):
+        """Test that a spectator that falls behind is closed, not buffered"""
+        stream = SpectatorStream(capacity=2)
+
+        assert stream.push(b"a")
+        assert stream.push(b"b")
+        assert not stream.push(b"c")
+
+        assert stream.closed
+        assert await stream.read(timeout=1.0) == b"ab"
+        assert await stream.read(timeout=1.0) is None
+
+    @pytest.mark.asyncio
+    async def test_close_sends_final_chunk(self):
+        """Test that close() queues its last chunk after pending output"""
+        stream = SpectatorStream(capacity=4)
+        stream.push(b"a")
+
+        stream.close(b"z")
+
+        assert not stream.push(b"b")
+        assert await stream.read(timeout=1.0) == b"az"
+        assert await stream.read(timeout=1.0) is None
+
+
+class TestSpectatorHub:
+    """Test suite for spectator streams per session"""
+
+    def test_publish_encodes_once_for_all_spectators(self):
+        """Test that every spectator gets the same encoded bytes"""
+        hub = SpectatorHub(queue_size=4)
+        first, second = hub.open("s1"), hub.open("s1")
+        other = hub.open("s2")
+
+        hub.publish("s1", Frame.from_message({"type": "x", "seq": 1}), "e")
+
+        assert first._chunks[0] is second._chunks[0]
+        assert not other._chunks
+
+    def test_publish_counts_dropped_spectators(self):
+        """Test that overflowing spectators are closed and counted once"""
+        hub = SpectatorHub(queue_size=1)
+        stream = hub.open("s1")
+
+        for seq in range(3):
+            hub.publish("s1", Frame.from_message({"type": "x", "seq": seq}), "e")
+
+        assert stream.closed
+        assert hub.dropped == 1
+
+    def test_remove_reports_the_last_spectator(self):
+        """Test that removal says when a session has no spectators left"""
+        hub = SpectatorHub(queue_size=4)
+        first, second = hub.open("s1"), hub.open("s1")
+
+        assert not hub.remove("s1", first)
+        assert not hub.remove("s1", first)
+        assert hub.remove("s1", second)
+        assert "s1" not in hub
+        assert first.closed and second.closed
+        assert hub.count() == 0
+
+
+class TestManagerSpectators:
+    """Test suite for spectators of a ConnectionManager"""
+
+    @pytest.mark.asyncio
+    async def test_spectator_gets_numbered_broadcasts(self):
+        """Test that spectators see the same seq as the session's sockets"""
+        manager = ConnectionManager(outbound_queue_size=0)
+        ws = FakeWebSocket()
+        await manager.connect(ws, "s1")
+        stream = manager.add_spectator("s1", welcome={"type": "connection"})
+
+        await manager.broadcast_to_session("s1", {"type": "session_update"})
+
+        epoch, _ = manager.event_log.position("s1")
+        events = _events(await stream.read(timeout=1.0))
+        assert events == [
+            (None, {"type": "connection", "epoch": epoch, "seq": 0}),
+            (f"{epoch}:1", {"type": "session_update", "seq": 1}),
+        ]
+        assert ws.messages == [{"type": "session_update", "seq": 1}]
+
+    @pytest.mark.asyncio
+    async def test_spectator_is_not_a_participant(self):
+        """Test that spectators are neither connections nor participants"""
+        manager = ConnectionManager(outbound_queue_size=0)
+        manager.add_spectator("s1")
+
+        assert manager.get_connection_count() == 0
+        assert manager.get_participant_count("s1") == 0
+        assert manager.spectators.count("s1") == 1
+
+    @pytest.mark.asyncio
+    async def test_spectator_alone_keeps_the_session_numbered(self):
+        """Test that broadcasts to a spectator-only session are numbered"""
+        manager = ConnectionManager(outbound_queue_size=0)
+        stream = manager.add_spectator("s1")
+
+        await manager.broadcast_to_session("s1", {"type": "x"})
+
+        ((event_id, message),) = _events(await stream.read(timeout=1.0))
+        assert message["seq"] == 1
+        assert event_id.endswith(":1")
+
+    @pytest.mark.asyncio
+    async def test_reconnect_replays_missed_events(self):
+        """Test that Last-Event-ID replays only what the spectator missed"""
+        manager = ConnectionManager(outbound_queue_size=0)
+        await manager.connect(FakeWebSocket(), "s1")
+        for _ in range(3):
+            await manager.broadcast_to_session("s1", {"type": "x"})
+        epoch, _ = manager.event_log.position("s1")
+
+        stream = manager.add_spectator("s1", last_event_id=f"{epoch}:1")
+
+        events = _events(await stream.read(timeout=1.0))
+        assert [message["seq"] for _, message in events] == [2, 3]
+        assert [event_id for event_id, _ in events] == [f"{epoch}:2", f"{epoch}:3"]
+
+    @pytest.mark.asyncio
+    async def test_reconnect_with_unknown_epoch_gets_snapshot(self):
+        """Test that an unusable Last-Event-ID is answered with a snapshot"""
+        manager = ConnectionManager(outbound_queue_size=0)
+        await manager.connect(FakeWebSocket(), "s1")
+        await manager.broadcast_to_session("s1", {"type": "session_update"})
+
+        stream = manager.add_spectator("s1", last_event_id="other:1")
+
+        ((_, message),) = _events(await stream.read(timeout=1.0))
+        assert message["type"] == "session_snapshot"
+        assert message["seq"] == 1
+        assert message["participant_count"] == 1
+
+    @pytest.mark.asyncio
+    async def test_last_spectator_leaving_expires_the_log(self):
+        """Test that a session with no one left releases its event log"""
+        manager = ConnectionManager(outbound_queue_size=0)
+        manager.event_log.retention = 0
+        stream = manager.add_spectator("s1")
+        await manager.broadcast_to_session("s1", {"type": "x"})
+
+        manager.remove_spectator("s1", stream)
+        manager.remove_spectator("s1", stream)
+
+        assert "s1" not in manager.event_log
+        assert stream.closed
+
+    @pytest.mark.asyncio
+    async def test_drain_closes_spectators_with_a_retry_hint(self):
+        """Test that draining ends spectator streams with a jittered retry"""
+        manager = ConnectionManager(outbound_queue_size=0)
+        stream = manager.add_spectator("s1")
+
+        await manager.drain(reconnect_window=2.0)
+
+        chunk = await stream.read(timeout=1.0)
+        assert chunk.startswith(b"retry: ")
+        assert 0 <= int(chunk.split()[1]) <= 2000
+        assert await stream.read(timeout=1.0) is None
+
+    @pytest.mark.asyncio
+    async def test_remote_broadcast_reaches_spectator_only_node(self):
+        """Test that a node with only spectators subscribes to the backplane"""
+        broker = InMemoryBroker()
+        node_a = ConnectionManager(
+            outbound_queue_size=0, backplane=InMemoryBackplane(broker)
+        )
+        node_b = ConnectionManager(
+            outbound_queue_size=0, backplane=InMemoryBackplane(broker)
+        )
+        await node_a.start()
+        await node_b.start()
+        try:
+            stream = node_b.add_spectator("s1")
+            await asyncio.sleep(0.01)
+
+            await node_a.broadcast_to_session("s1", {"type": "session_update"})
+
+            ((_, message),) = _events(await stream.read(timeout=1.0))
+            assert message == {"type": "session_update", "seq": 1}
+        finally:
+            await node_a.stop()
+            await node_b.stop()
+
+    @pytest.mark.asyncio
+    async def test_metrics_report_spectators(self):
+        """Test that spectator counts are exported"""
+        manager = ConnectionManager(outbound_queue_size=0)
+        manager.add_spectator("s1")
+        manager.add_spectator("s2")
+
+        text = render_metrics(manager)
+
+        assert "trivia_ws_spectators 2" in text
+        assert "trivia_ws_spectators_dropped_total 0" in text
@@ -0,0 +1,157 @@
+"""
+Unit tests for live answer and reaction tallies
+"""
+
+import time
+
+import pytest
+
+from backend.tests.websocket.fakes import FakeWebSocket
+from backend.websocket.manager import ConnectionManager
+from backend.websocket.metrics import render_metrics
+from backend.websocket.tallies import LiveTallies
+
+
+async def _session():
+    """Manager with a facilitator and a participant in session s1"""
+    manager = ConnectionManager(outbound_queue_size=0, coalesce_ticks_ms={})
+    host, alice = FakeWebSocket(), FakeWebSocket()
+    await manager.connect(host, "s1", user_id="host", facilitator=True)
+    await manager.connect(alice, "s1", user_id="alice")
+    host.sent.clear()
+    alice.sent.clear()
+    return manager, host, alice
+
+
+async def _flush(manager: ConnectionManager):
+    """Fire every flush timer without waiting for the interval"""
+    await manager.scheduler.run_due(time.monotonic() + 10.0)
+
+
+class TestLiveTallies:
+    """Test suite for LiveTallies"""
+
+    @pytest.mark.asyncio
+    async def test_events_send_nothing_until_the_interval_ends(self):
+        """Test that many events become one frame, for facilitators only"""
+        manager, host, alice = await _session()
+        tallies = manager.tallies
+        for answer in ("a", "b", "a", "a"):
+            tallies.count_answer("s1", "q1", answer)
+        tallies.count_reaction("s1", "laugh")
+        assert host.sent == []
+        assert len(manager.scheduler) == 1
+
+        await _flush(manager)
+
+        (tally,) = host.messages
+        assert tally["questions"] == {"q1": {"answered": 4, "counts": {"a": 3, "b": 1}}}
+        assert tally["reactions"] == {"laugh": 1}
+        assert alice.sent == []
+        assert tallies.events == 5
+        assert tallies.frames == 1
+
+    @pytest.mark.asyncio
+    async def test_frames_carry_changed_questions_and_new_reactions(self):
+        """Test that counts are cumulative but reactions and questions are deltas"""
+        manager, host, _ = await _session()
+        tallies = manager.tallies
+        tallies.count_answer("s1", "q1", "a")
+        tallies.count_answer("s1", "q2", "a")
+        tallies.count_reaction("s1", "wow")
+        await _flush(manager)
+
+        tallies.count_answer("s1", "q2", "b")
+        await _flush(manager)
+
+        second = host.messages[-1]
+        assert second["questions"] == {
+            "q2": {"answered": 2, "counts": {"a": 1, "b": 1}}
+        }
+        assert second["reactions"] == {}
+
+    @pytest.mark.asyncio
+    async def test_idle_session_sends_no_frames(self):
+        """Test that nothing is scheduled or sent without new events"""
+        manager, host, _ = await _session()
+        manager.tallies.count_answer("s1", "q1", "a")
+        await _flush(manager)
+        host.sent.clear()
+
+        await _flush(manager)
+
+        assert host.sent == []
+        assert len(manager.scheduler) == 0
+
+    @pytest.mark.asyncio
+    async def test_distinct_answers_are_capped(self):
+        """Test that free-text answers beyond the limit share one bucket"""
+        manager, _, _ = await _session()
+        tallies = LiveTallies(manager, max_options=2, reactions=())
+        for answer in ("a", "b", "c", "d", "a"):
+            tallies.count_answer("s1", "q1", answer)
+
+        counts = tallies._sessions["s1"].questions["q1"].counts
+
+        assert counts == {"a": 2, "b": 1, "_other": 2}
+
+    @pytest.mark.asyncio
+    async def test_unknown_reactions_are_not_counted(self):
+        """Test that only configured reactions are accepted"""
+        manager, _, _ = await _session()
+
+        assert not manager.tallies.count_reaction("s1", "<script>")
+        assert "s1" not in manager.tallies
+        assert len(manager.scheduler) == 0
+
+    @pytest.mark.asyncio
+    async def test_finish_flushes_and_forgets_the_question(self):
+        """Test that a closed question's final counts go out immediately"""
+        manager, host, _ = await _session()
+        manager.tallies.count_answer("s1", "q1", "a")
+
+        await manager.tallies.finish("s1", "q1")
+
+        (tally,) = host.messages
+        assert tally["questions"]["q1"]["answered"] == 1
+        assert manager.tallies._sessions["s1"].questions == {}
+        assert len(manager.scheduler) == 0
+
+    @pytest.mark.asyncio
+    async def test_joining_facilitator_gets_a_snapshot(self):
+        """Test that send_snapshot carries every open question's counts"""
+        manager, _, _ = await _session()
+        manager.tallies.count_answer("s1", "q1", "a")
+        manager.tallies.count_reaction("s1", "wow")
+        late = FakeWebSocket()
+        await manager.connect(late, "s1", user_id="screen", facilitator=True)
+
+        await manager.tallies.send_snapshot(late, "s1")
+
+        (snapshot,) = late.messages
+        assert snapshot["questions"] == {"q1": {"answered": 1, "counts": {"a": 1}}}
+        assert snapshot["reactions"] == {}
+
+    @pytest.mark.asyncio
+    async def test_empty_session_drops_its_tallies(self):
+        """Test that the last disconnect forgets counts and the flush timer"""
+        manager, host, alice = await _session()
+        manager.tallies.count_answer("s1", "q1", "a")
+
+        manager.disconnect(host, "s1")
+        manager.disconnect(alice, "s1")
+
+        assert "s1" not in manager.tallies
+        assert len(manager.scheduler) == 0
+
+    @pytest.mark.asyncio
+    async def test_metrics_count_events_and_frames(self):
+        """Test that tally traffic is exposed"""
+        manager, _, _ = await _session()
+        manager.tallies.count_answer("s1", "q1", "a")
+        await _flush(manager)
+
+        text = render_metrics(manager)
+
+        assert "trivia_ws_tally_events_total 1" in text
+        assert "trivia_ws_tally_frames_total 1" in text
@@ -2,6 +2,7 @@
 WebSocket handlers module
 """
 
+from backend.websocket.frames import Frame
 from backend.websocket.manager import ConnectionManager, manager
 
-__all__ = ["ConnectionManager", "manager"]
+__all__ = ["ConnectionManager", "Frame", "manager"]
@@ -0,0 +1,160 @@
+"""
+Connection admission control
+Caps open sockets per worker, per organization (by plan) and per user
+"""
+
+import random
+from typing import Dict, Mapping, Optional
+
+from backend.core.config import settings
+
+# Refusal reasons, sent to the client and used as metric labels
+WORKER_FULL = "worker_full"
+ORGANIZATION_LIMIT = "organization_limit"
+USER_LIMIT = "user_limit"
+REASONS = (WORKER_FULL, ORGANIZATION_LIMIT, USER_LIMIT)
+
+# Plan assumed for organizations whose plan is unknown (the smallest quota)
+DEFAULT_PLAN = "free"
+
+# Sent to a refused client just before the socket is closed with 1013
+REJECTED_MESSAGE_TYPE = "connection_rejected"
+
+
+class AdmissionRefused(Exception):
+    """
+    A connection refused by admission control
+
+    Args:
+        reason: One of ``REASONS``
+        retry_after_ms: How long the client should wait before retrying
+    """
+
+    def __init__(self, reason: str, retry_after_ms: int):
+        super().__init__(reason)
+        self.reason = reason
+        self.retry_after_ms = retry_after_ms
+
+    def to_message(self) -> dict:
+        """The message telling the client why and when to retry"""
+        return {
+            "type": REJECTED_MESSAGE_TYPE,
+            "reason": self.reason,
+            "retry_after_ms": self.retry_after_ms,
+        }
+
+
+class AdmissionController:
+    """
+    Decides whether one more socket may be opened on this worker
+
+    Three limits apply, checked in order: the worker's total, the
+    organization's (which depends on its plan) and the user's. A limit of 0
+    means unlimited. The caller passes the current counts, which the
+    connection manager keeps in O(1)-sized indexes, so a check is a few
+    comparisons and never touches the database.
+
+    Limits are per worker: with N workers behind a load balancer an
+    organization can hold up to N times its quota in total. That is what
+    protects each process's file descriptors and memory; a cluster-wide
+    quota would need shared counters.
+
+    Refused clients are told to retry after a random delay between half
+    and all of ``retry_after``, so a refused reconnect storm does not come
+    back all at once.
+
+    Args:
+        max_connections: Sockets per worker (0: unlimited)
+        max_per_plan: Sockets per organization for each plan value
+            (missing plans or 0: unlimited)
+        max_per_user: Sockets per user, across tabs and devices (0: unlimited)
+        retry_after: Upper bound of the retry hint in seconds
+    """
+
+    def __init__(
+        self,
+        max_connections: Optional[int] = None,
+        max_per_plan: Optional[Mapping[str, int]] = None,
+        max_per_user: Optional[int] = None,
+        retry_after: Optional[float] = None,
+    ):
+        self.max_connections = (
+            settings.WS_MAX_CONNECTIONS if max_connections is None else max_connections
+        )
+        self.max_per_plan: Dict[str, int] = dict(
+            settings.WS_MAX_CONNECTIONS_PER_PLAN
+            if max_per_plan is None
+            else max_per_plan
+        )
+        self.max_per_user = (
+            settings.WS_MAX_CONNECTIONS_PER_USER
+            if max_per_user is None
+            else max_per_user
+        )
+        self.retry_after = (
+            settings.WS_ADMISSION_RETRY_AFTER_SECONDS
+            if retry_after is None
+            else retry_after
+        )
+
+        # Counters for observability
+        self.rejected: Dict[str, int] = dict.fromkeys(REASONS, 0)
+
+    def organization_limit(self, plan: Optional[str]) -> int:
+        """
+        Sockets an organization may hold on this worker
+
+        Args:
+            plan: The organization's plan (a ``PlanType`` or its value)
+
+        Returns:
+            The limit (0: unlimited)
+        """
+        if plan not in self.max_per_plan:
+            plan = DEFAULT_PLAN
+        return self.max_per_plan.get(plan, 0)
+
+    def check(
+        self,
+        connections: int,
+        org_connections: int,
+        user_connections: int,
+        plan: Optional[str] = None,
+    ):
+        """
+        Admit one more socket or refuse it
+
+        Args:
+            connections: Sockets open on this worker
+            org_connections: Sockets of the organization on this worker
+            user_connections: Sockets of the user on this worker
+            plan: The organization's plan
+
+        Raises:
+            AdmissionRefused: If a limit is reached
+        """
+        if 0 < self.max_connections <= connections:
+            reason = WORKER_FULL
+        elif 0 < self.organization_limit(plan) <= org_connections:
+            reason = ORGANIZATION_LIMIT
+        elif 0 < self.max_per_user <= user_connections:
+            reason = USER_LIMIT
+        else:
+            return
+        self.rejected[reason] += 1
+        retry_after_ms = int(random.uniform(0.5, 1.0) * self.retry_after * 1000)
+        raise AdmissionRefused(reason, retry_after_ms)
+
+    def utilization(self, connections: int) -> float:
+        """
+        Fraction of the worker's capacity in use
+
+        Args:
+            connections: Sockets open on this worker
+
+        Returns:
+            ``connections / max_connections`` (0.0 when unlimited)
+        """
+        if self.max_connections <= 0:
+            return 0.0
+        return connections / self.max_connections
@@ -0,0 +1,287 @@
+"""
+Cross-process broadcast backplane for the WebSocket manager
+Lets participants of one session connected to different workers or pods
+see each other's messages
+"""
+
+import asyncio
+import logging
+import uuid
+from abc import ABC, abstractmethod
+from typing import Awaitable, Callable, Dict, Optional, Set, Tuple
+
+import redis.asyncio as redis
+
+from backend.core.config import settings
+from backend.websocket.frames import Frame
+
+logger = logging.getLogger(__name__)
+
+# Called with (session_id, frame) for every frame published by another node
+RemoteFrameHandler = Callable[[str, Frame], Awaitable[None]]
+
+
+def pack_frame(origin: str, frame: Frame) -> bytes:
+    """
+    Serialize a frame for the wire, tagged with the publishing node
+
+    The frame payload is passed through untouched, so receiving nodes can
+    fan it out without decoding or re-encoding it.
+
+    Args:
+        origin: ID of the publishing node
+        frame: Frame to publish
+
+    Returns:
+        ``origin\\ntype\\nkind\\npayload`` where kind is ``t`` (text) or ``b``
+    """
+    if isinstance(frame.data, bytes):
+        kind, payload = b"b", frame.data
+    else:
+        kind, payload = b"t", frame.data.encode("utf-8")
+    header = f"{origin}\n{frame.message_type or ''}\n".encode("utf-8")
+    return header + kind + b"\n" + payload
+
+
+def unpack_frame(raw: bytes) -> Tuple[str, Frame]:
+    """
+    Reverse ``pack_frame``
+
+    Args:
+        raw: Bytes received from the backplane
+
+    Returns:
+        Tuple of (origin node ID, frame)
+    """
+    origin, message_type, kind, payload = raw.split(b"\n", 3)
+    data = payload if kind == b"b" else payload.decode("utf-8")
+    return origin.decode("utf-8"), Frame(data, message_type.decode("utf-8") or None)
+
+
+class Backplane(ABC):
+    """
+    Publish/subscribe transport shared by all nodes serving WebSockets
+
+    Each node publishes a broadcast once and fans it out to its own sockets
+    directly; the backplane only carries it to the other nodes. A node
+    subscribes to a session, or to a sub-channel such as a team (see
+    channels.py), only while it has local connections in it. Session IDs
+    below may therefore also be sub-channel names.
+    """
+
+    def __init__(self, node_id: Optional[str] = None):
+        self.node_id = node_id or uuid.uuid4().hex
+        self._handler: Optional[RemoteFrameHandler] = None
+
+    async def start(self, handler: RemoteFrameHandler):
+        """
+        Start receiving remote frames
+
+        Args:
+            handler: Coroutine called for each frame published by another node
+        """
+        self._handler = handler
+
+    async def stop(self):
+        """Stop receiving and release any resources"""
+        self._handler = None
+
+    async def _dispatch(self, session_id: str, raw: bytes):
+        """Decode a received message and hand it to the manager"""
+        origin, frame = unpack_frame(raw)
+        if origin == self.node_id or self._handler is None:
+            # Our own publish: already fanned out locally
+            return
+        try:
+            await self._handler(session_id, frame)
+        except Exception as e:
+            logger.error(
+                f"Error delivering backplane frame for session {session_id}: {e}"
+            )
+
+    @abstractmethod
+    async def subscribe(self, session_id: str):
+        """Start receiving frames published to a session (idempotent)"""
+
+    @abstractmethod
+    async def unsubscribe(self, session_id: str):
+        """Stop receiving frames published to a session (idempotent)"""
+
+    @abstractmethod
+    async def publish(self, session_id: str, frame: Frame):
+        """Send a frame to every other node subscribed to the session"""
+
+
+class InMemoryBroker:
+    """
+    Process-local stand-in for a pub/sub server
+
+    Several ``InMemoryBackplane`` instances sharing one broker behave like
+    separate nodes connected to the same Redis, which is what tests need.
+    """
+
+    def __init__(self):
+        self.channels: Dict[str, Set["InMemoryBackplane"]] = {}
+        self.published = 0
+
+
+class InMemoryBackplane(Backplane):
+    """
+    Backplane driver that delivers through an in-process broker
+
+    Args:
+        broker: Shared broker; each instance gets a private one if omitted
+        node_id: Identifier of this node
+    """
+
+    def __init__(
+        self, broker: Optional[InMemoryBroker] = None, node_id: Optional[str] = None
+    ):
+        super().__init__(node_id)
+        self.broker = broker or InMemoryBroker()
+
+    async def stop(self):
+        for subscribers in self.broker.channels.values():
+            subscribers.discard(self)
+        await super().stop()
+
+    async def subscribe(self, session_id: str):
+        self.broker.channels.setdefault(session_id, set()).add(self)
+
+    async def unsubscribe(self, session_id: str):
+        subscribers = self.broker.channels.get(session_id)
+        if subscribers is not None:
+            subscribers.discard(self)
+            if not subscribers:
+                del self.broker.channels[session_id]
+
+    async def publish(self, session_id: str, frame: Frame):
+        self.broker.published += 1
+        raw = pack_frame(self.node_id, frame)
+        for subscriber in list(self.broker.channels.get(session_id, ())):
+            await subscriber._dispatch(session_id, raw)
+
+
+class RedisBackplane(Backplane):
+    """
+    Backplane driver using Redis pub/sub with one channel per session
+
+    Sub-channels get their own Redis channel too (``...:session:s1/team/t1``)
+
+    Args:
+        url: Redis URL (defaults to ``settings.REDIS_URL``)
+        client: Pre-built ``redis.asyncio`` compatible client, e.g. a fake
+            Redis in tests; takes precedence over ``url``
+        channel_prefix: Prefix for per-session channel names
+        node_id: Identifier of this node
+    """
+
+    def __init__(
+        self,
+        url: Optional[str] = None,
+        client=None,
+        channel_prefix: Optional[str] = None,
+        node_id: Optional[str] = None,
+    ):
+        super().__init__(node_id)
+        self.client = client or redis.from_url(url or settings.REDIS_URL)
+        self.channel_prefix = (
+            settings.WS_BACKPLANE_CHANNEL_PREFIX
+            if channel_prefix is None
+            else channel_prefix
+        )
+        self._pubsub = None
+        self._listener: Optional[asyncio.Task] = None
+        self._subscribed: Set[str] = set()
+        # Subscription changes share one pubsub connection; overlapping ones
+        # (e.g. a session and its sub-channels at once) must not interleave
+        self._subscription_lock = asyncio.Lock()
+
+    def channel_for(self, session_id: str) -> str:
+        """Redis channel name for a session or sub-channel"""
+        return f"{self.channel_prefix}:session:{session_id}"
+
+    async def start(self, handler: RemoteFrameHandler):
+        await super().start(handler)
+        self._pubsub = self.client.pubsub()
+
+    async def stop(self):
+        if self._listener is not None:
+            self._listener.cancel()
+            try:
+                await self._listener
+            except asyncio.CancelledError:
+                pass
+            self._listener = None
+        if self._pubsub is not None:
+            await self._pubsub.aclose()
+            self._pubsub = None
+        self._subscribed.clear()
+        await super().stop()
+
+    async def subscribe(self, session_id: str):
+        async with self._subscription_lock:
+            if session_id in self._subscribed or self._pubsub is None:
+                return
+            self._subscribed.add(session_id)
+            await self._pubsub.subscribe(self.channel_for(session_id))
+            # The pubsub connection only exists after the first subscribe
+            if self._listener is None:
+                self._listener = asyncio.ensure_future(self._listen())
+
+    async def unsubscribe(self, session_id: str):
+        async with self._subscription_lock:
+            if session_id not in self._subscribed or self._pubsub is None:
+                return
+            self._subscribed.discard(session_id)
+            await self._pubsub.unsubscribe(self.channel_for(session_id))
+
+    async def publish(self, session_id: str, frame: Frame):
+        await self.client.publish(
+            self.channel_for(session_id), pack_frame(self.node_id, frame)
+        )
+
+    async def _listen(self):
+        """Read messages from subscribed channels until stopped"""
+        prefix_length = len(self.channel_for(""))
+        while True:
+            try:
+                message = await self._pubsub.get_message(
+                    ignore_subscribe_messages=True, timeout=1.0
+                )
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Redis backplane receive error: {e}")
+                await asyncio.sleep(1.0)
+                continue
+            if message is None or message.get("type") != "message":
+                continue
+            channel = message["channel"]
+            if isinstance(channel, bytes):
+                channel = channel.decode("utf-8")
+            await self._dispatch(channel[prefix_length:], message["data"])
+
+
+def create_backplane(name: Optional[str] = None) -> Optional[Backplane]:
+    """
+    Build the backplane selected in settings
+
+    Args:
+        name: ``none``, ``memory`` or ``redis`` (defaults to
+            ``settings.WS_BACKPLANE``)
+
+    Returns:
+        A backplane instance, or None for single-process deployments
+
+    Raises:
+        ValueError: If the name is not a known driver
+    """
+    name = (name or settings.WS_BACKPLANE).lower()
+    if name == "none":
+        return None
+    if name == "memory":
+        return InMemoryBackplane()
+    if name == "redis":
+        return RedisBackplane()
+    raise ValueError(f"Unknown WebSocket backplane: {name}")
@@ -0,0 +1,90 @@
+"""
+Hierarchical channel names within a session
+A session is the root channel; teams and facilitators are sub-channels of it
+"""
+
+from typing import Optional
+
+# Session IDs come from a single URL path segment, so they never contain it
+SEPARATOR = "/"
+
+# Organization channels start with the separator, so no session owns them
+ORGANIZATION_PREFIX = f"{SEPARATOR}org{SEPARATOR}"
+
+
+def team_channel(session_id: str, team_id: str) -> str:
+    """
+    Channel of one team within a session
+
+    Args:
+        session_id: Session the team belongs to
+        team_id: The team
+
+    Returns:
+        ``{session_id}/team/{team_id}``
+    """
+    return f"{session_id}{SEPARATOR}team{SEPARATOR}{team_id}"
+
+
+def facilitator_channel(session_id: str) -> str:
+    """
+    Channel of a session's facilitators
+
+    Args:
+        session_id: The session
+
+    Returns:
+        ``{session_id}/facilitators``
+    """
+    return f"{session_id}{SEPARATOR}facilitators"
+
+
+def primary_channel(session_id: str) -> str:
+    """
+    Channel holding one socket per user of a session (see presence.py)
+
+    Args:
+        session_id: The session
+
+    Returns:
+        ``{session_id}/primary``
+    """
+    return f"{session_id}{SEPARATOR}primary"
+
+
+def organization_channel(org_id: str) -> str:
+    """
+    Backplane channel of every socket of an organization, across sessions
+
+    Args:
+        org_id: The organization
+
+    Returns:
+        ``/org/{org_id}``
+    """
+    return f"{ORGANIZATION_PREFIX}{org_id}"
+
+
+def organization_of(channel: str) -> Optional[str]:
+    """Organization of an organization channel (None for session channels)"""
+    if channel.startswith(ORGANIZATION_PREFIX):
+        return channel[len(ORGANIZATION_PREFIX) :]
+    return None
+
+
+def session_of(channel: str) -> str:
+    """
+    Session a channel belongs to (a session channel is its own session)
+
+    Args:
+        channel: Session or sub-channel name
+
+    Returns:
+        The session ID
+    """
+    return channel.split(SEPARATOR, 1)[0]
+
+
+def is_session_channel(channel: str) -> bool:
+    """Whether a channel is a whole session rather than a sub-channel"""
+    return SEPARATOR not in channel
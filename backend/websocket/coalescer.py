@@ -0,0 +1,179 @@
+"""
+Time-windowed coalescing of high-frequency session events
+Batches a session's events within a short tick into one envelope frame
+"""
+
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Called with (session_id, message) when a batch is ready to broadcast
+FlushCallback = Callable[[str, dict], Awaitable[None]]
+
+BATCH_MESSAGE_TYPE = "batch"
+
+
+def _lookup(message: dict, path: str) -> Any:
+    """Resolve a dotted path such as ``data.team`` inside a message"""
+    value: Any = message
+    for part in path.split("."):
+        if not isinstance(value, dict):
+            return None
+        value = value.get(part)
+    return value
+
+
+class _PendingBatch:
+    """Events buffered for one session until its flush deadline"""
+
+    __slots__ = ("events", "keyed", "state", "deadline", "timer")
+
+    def __init__(self):
+        self.events: List[Optional[dict]] = []
+        # (type, key value) -> index in events of the latest keyed event
+        self.keyed: Dict[Tuple[str, Any], int] = {}
+        self.state: Dict[str, Any] = {}
+        self.deadline = 0.0
+        self.timer: Optional[asyncio.TimerHandle] = None
+
+
+class MessageCoalescer:
+    """
+    Buffers session events and flushes them as one ``batch`` envelope per tick
+
+    Only message types with a configured tick are coalesced. For keyed types
+    (e.g. ``score_update`` keyed by ``data.team``) only the latest event per
+    key is kept. State fields (e.g. ``participant_count``) are lifted out of
+    the events into the envelope's ``state`` and only the latest value is
+    kept. A batch holding a single event is sent unwrapped.
+
+    Envelope::
+
+        {"type": "batch", "session_id": "...", "events": [...],
+         "state": {"participant_count": 12}}
+
+    Args:
+        flush: Coroutine that broadcasts a ready message to a session
+        ticks_ms: Coalescing window per message type, in milliseconds
+        keys: Dotted path of the key field per keyed message type
+        state_fields: Top-level fields whose latest value replaces older ones
+    """
+
+    def __init__(
+        self,
+        flush: FlushCallback,
+        ticks_ms: Dict[str, int],
+        keys: Optional[Dict[str, str]] = None,
+        state_fields: Tuple[str, ...] = (),
+    ):
+        self._flush = flush
+        self.ticks = {
+            message_type: tick / 1000.0
+            for message_type, tick in ticks_ms.items()
+            if tick > 0
+        }
+        self.keys = dict(keys or {})
+        self.state_fields = tuple(state_fields)
+        self._pending: Dict[str, _PendingBatch] = {}
+        self._tasks: Set[asyncio.Task] = set()
+
+        # Counters for observability
+        self.events_in = 0
+        self.batches_out = 0
+
+    def accepts(self, message: dict) -> bool:
+        """Whether this message type is coalesced"""
+        return message.get("type") in self.ticks
+
+    def has_pending(self, session_id: str) -> bool:
+        """Whether a batch is waiting to be flushed for a session"""
+        return session_id in self._pending
+
+    def add(self, session_id: str, message: dict):
+        """
+        Buffer an event; the session's batch is flushed when its tick expires
+
+        Args:
+            session_id: Session the event belongs to
+            message: Event with a coalesced ``type``
+        """
+        message_type = message["type"]
+        loop = asyncio.get_running_loop()
+        pending = self._pending.get(session_id)
+        if pending is None:
+            pending = self._pending[session_id] = _PendingBatch()
+
+        self.events_in += 1
+        event = message
+        if self.state_fields:
+            lifted = [field for field in self.state_fields if field in message]
+            if lifted:
+                event = dict(message)
+                for field in lifted:
+                    pending.state[field] = event.pop(field)
+
+        key_path = self.keys.get(message_type)
+        key_value = _lookup(event, key_path) if key_path else None
+        if key_value is not None:
+            slot = (message_type, key_value)
+            previous = pending.keyed.get(slot)
+            if previous is not None:
+                # Keep only the latest value, at its latest position
+                pending.events[previous] = None
+            pending.keyed[slot] = len(pending.events)
+        pending.events.append(event)
+
+        # The earliest deadline of any buffered event wins
+        deadline = loop.time() + self.ticks[message_type]
+        if pending.timer is None or deadline < pending.deadline:
+            if pending.timer is not None:
+                pending.timer.cancel()
+            pending.deadline = deadline
+            pending.timer = loop.call_at(deadline, self._on_timer, session_id)
+
+    def _on_timer(self, session_id: str):
+        """Timer callback: flush the session's batch in a task"""
+        task = asyncio.ensure_future(self.flush(session_id))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def flush(self, session_id: str):
+        """
+        Broadcast a session's buffered events now
+
+        Args:
+            session_id: Session whose batch to flush
+        """
+        pending = self._pending.pop(session_id, None)
+        if pending is None:
+            return
+        if pending.timer is not None:
+            pending.timer.cancel()
+
+        events = [event for event in pending.events if event is not None]
+        if len(events) == 1:
+            # Nothing to batch: send the event as-is with its state restored
+            message = {**events[0], **pending.state}
+        else:
+            message = {
+                "type": BATCH_MESSAGE_TYPE,
+                "session_id": session_id,
+                "events": events,
+            }
+            if pending.state:
+                message["state"] = pending.state
+
+        self.batches_out += 1
+        try:
+            await self._flush(session_id, message)
+        except Exception as e:
+            logger.error(
+                f"Error flushing coalesced events for session {session_id}: {e}"
+            )
+
+    async def flush_all(self):
+        """Flush every pending batch (e.g. on shutdown)"""
+        for session_id in list(self._pending):
+            await self.flush(session_id)
@@ -0,0 +1,120 @@
+"""
+Wire codecs for WebSocket subprotocol negotiation
+JSON text frames are the default; binary codecs are opt-in per connection
+"""
+
+import json
+from abc import ABC, abstractmethod
+from typing import Any, Dict, Iterable, Optional
+
+import cbor2
+import msgpack
+
+from backend.websocket.frames import FramePayload, encode_json
+
+
+class Codec(ABC):
+    """
+    Serializes messages for connections that negotiated a subprotocol
+
+    Args:
+        name: Subprotocol name offered by clients in ``Sec-WebSocket-Protocol``
+        binary: Whether frames are sent as binary WebSocket frames
+    """
+
+    __slots__ = ("name", "binary")
+
+    def __init__(self, name: str, binary: bool):
+        self.name = name
+        self.binary = binary
+
+    @abstractmethod
+    def encode(self, message: Any) -> FramePayload:
+        """Serialize a message into a frame payload"""
+
+    @abstractmethod
+    def decode(self, data: FramePayload) -> Any:
+        """Deserialize a received frame payload"""
+
+    def __repr__(self):
+        return f"<Codec(name={self.name!r})>"
+
+
+class JsonCodec(Codec):
+    """Compact JSON text frames, identical to ``send_json``/``receive_json``"""
+
+    __slots__ = ()
+
+    def __init__(self):
+        super().__init__("json", binary=False)
+
+    def encode(self, message: Any) -> str:
+        return encode_json(message)
+
+    def decode(self, data: FramePayload) -> Any:
+        return json.loads(data)
+
+
+class MsgPackCodec(Codec):
+    """MessagePack binary frames"""
+
+    __slots__ = ()
+
+    def __init__(self):
+        super().__init__("msgpack", binary=True)
+
+    def encode(self, message: Any) -> bytes:
+        return msgpack.packb(message, use_bin_type=True)
+
+    def decode(self, data: FramePayload) -> Any:
+        return msgpack.unpackb(data, raw=False)
+
+
+class CborCodec(Codec):
+    """CBOR (RFC 8949) binary frames"""
+
+    __slots__ = ()
+
+    def __init__(self):
+        super().__init__("cbor", binary=True)
+
+    def encode(self, message: Any) -> bytes:
+        return cbor2.dumps(message)
+
+    def decode(self, data: FramePayload) -> Any:
+        return cbor2.loads(data)
+
+
+JSON_CODEC = JsonCodec()
+
+CODECS: Dict[str, Codec] = {
+    codec.name: codec for codec in (JSON_CODEC, MsgPackCodec(), CborCodec())
+}
+
+
+def negotiate(offered: Iterable[str], enabled: Iterable[str]) -> Optional[Codec]:
+    """
+    Pick the codec for a connection from the subprotocols the client offered
+
+    The client's order of preference wins among the codecs the server has
+    enabled.
+
+    Args:
+        offered: Subprotocols from the client's ``Sec-WebSocket-Protocol``
+        enabled: Codec names the server accepts
+
+    Returns:
+        The selected codec, or None if the client offered none we speak (the
+        connection then uses JSON without confirming a subprotocol)
+
+    Raises:
+        ValueError: If ``enabled`` names an unknown codec
+    """
+    enabled = set(enabled)
+    unknown = enabled - CODECS.keys()
+    if unknown:
+        raise ValueError(f"Unknown WebSocket codec(s): {', '.join(sorted(unknown))}")
+    for name in offered:
+        if name in enabled:
+            return CODECS[name]
+    return None
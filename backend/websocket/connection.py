@@ -0,0 +1,95 @@
+"""
+Per-connection state record owned by the connection manager
+One slotted object per socket instead of parallel dicts keyed by socket
+"""
+
+import asyncio
+import time
+from typing import Dict, Optional, Tuple
+
+from fastapi import WebSocket
+
+from backend.websocket.codecs import Codec
+from backend.websocket.frames import Frame
+from backend.websocket.outbound import OutboundQueue
+
+
+class Connection:
+    """
+    Everything the manager knows about one open socket
+
+    Keeping a connection's state in a single ``__slots__`` object costs one
+    dict entry per socket in the registry instead of one per socket in each
+    of several per-attribute dicts, and lets the send path reach the codec,
+    queue and counters with a single lookup. Optional state (a binary codec,
+    teams, an outbound queue) stays ``None`` until used, so an idle
+    connection is as small as possible.
+
+    Args:
+        websocket: The socket
+        session_id: Session the socket connected to (its writer reports
+            failures against it)
+        user_id: Authenticated user owning the socket, if known
+        org_id: Organization of the user, if known
+        codec: Negotiated binary codec, or None for JSON
+    """
+
+    __slots__ = (
+        "websocket",
+        "session_id",
+        "user_id",
+        "org_id",
+        "codec",
+        "sessions",
+        "channels",
+        "teams",
+        "queue",
+        "writer",
+        "last_seq",
+        "connected_at",
+        "frames_sent",
+        "bytes_sent",
+        "messages_received",
+    )
+
+    def __init__(
+        self,
+        websocket: WebSocket,
+        session_id: str,
+        user_id: Optional[str] = None,
+        org_id: Optional[str] = None,
+        codec: Optional[Codec] = None,
+    ):
+        # Identity
+        self.websocket = websocket
+        self.session_id = session_id
+        self.user_id = user_id
+        self.org_id = org_id
+        self.codec = codec
+
+        # Subscriptions: sessions joined, sub-channels (across sessions, see
+        # channels.py) and the team joined per session. Tuples rather than
+        # sets: a socket is in one or two of each, they only change on
+        # (un)subscribe, and a set costs over 200 bytes even when empty
+        self.sessions: Tuple[str, ...] = (session_id,)
+        self.channels: Tuple[str, ...] = ()
+        self.teams: Optional[Dict[str, str]] = None
+
+        # Outbound queue and its writer task (None when queues are disabled)
+        self.queue: Optional[OutboundQueue] = None
+        self.writer: Optional[asyncio.Task] = None
+
+        # Sequence cursor: ``seq`` of the last event of ``session_id``
+        # handed to this connection (0 before the first one)
+        self.last_seq = 0
+
+        # Counters for observability
+        self.connected_at = time.monotonic()
+        self.frames_sent = 0
+        self.bytes_sent = 0
+        self.messages_received = 0
+
+    def sent(self, frame: Frame):
+        """Count a frame written to the socket"""
+        self.frames_sent += 1
+        self.bytes_sent += frame.size
@@ -0,0 +1,234 @@
+"""
+Typed dispatcher for inbound WebSocket messages
+Validates each message once and routes it to a handler and a target audience
+"""
+
+import enum
+import logging
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Awaitable,
+    Callable,
+    Dict,
+    FrozenSet,
+    Iterable,
+    Optional,
+)
+
+from fastapi import WebSocket
+from pydantic import BaseModel, TypeAdapter, ValidationError
+
+if TYPE_CHECKING:
+    from backend.websocket.manager import ConnectionManager
+
+logger = logging.getLogger(__name__)
+
+ERROR_MESSAGE_TYPE = "error"
+
+# Token roles allowed to send facilitator-only messages
+FACILITATOR_ROLES: FrozenSet[str] = frozenset({"facilitator", "admin"})
+
+
+class Audience(str, enum.Enum):
+    """Who receives the message a handler returns"""
+
+    # Only the sending connection
+    SELF = "self"
+    # The sender's team within the session
+    TEAM = "team"
+    # The session's facilitators
+    FACILITATOR = "facilitator"
+    # Everyone in the session
+    SESSION = "session"
+
+
+class ClientContext:
+    """
+    Identity of the connection a message came from
+
+    Args:
+        websocket: The sending connection
+        session_id: Session the connection joined
+        user_id: Authenticated user ID
+        org_id: Organization of the user
+        roles: Roles from the access token
+    """
+
+    __slots__ = ("websocket", "session_id", "user_id", "org_id", "roles")
+
+    def __init__(
+        self,
+        websocket: WebSocket,
+        session_id: str,
+        user_id: str,
+        org_id: Optional[str] = None,
+        roles: Iterable[str] = (),
+    ):
+        self.websocket = websocket
+        self.session_id = session_id
+        self.user_id = user_id
+        self.org_id = org_id
+        self.roles = frozenset(roles)
+
+    @property
+    def is_facilitator(self) -> bool:
+        """Whether the user may run the session"""
+        return not self.roles.isdisjoint(FACILITATOR_ROLES)
+
+
+# Handles a validated message; returns the message to deliver, or None
+Handler = Callable[[ClientContext, Any], Awaitable[Optional[dict]]]
+
+
+class Route:
+    """How one message type is handled and who hears about it"""
+
+    __slots__ = ("handler", "audience", "rebroadcast", "facilitator_only")
+
+    def __init__(
+        self,
+        handler: Handler,
+        audience: Audience,
+        rebroadcast: bool,
+        facilitator_only: bool,
+    ):
+        self.handler = handler
+        self.audience = audience
+        self.rebroadcast = rebroadcast
+        self.facilitator_only = facilitator_only
+
+
+class MessageDispatcher:
+    """
+    Routes inbound messages to per-type handlers
+
+    The message type is looked up in the route registry before anything
+    else, so unknown types are dropped with a single dict lookup. Known
+    types are validated by a TypeAdapter over a discriminated union, built
+    once, which selects the model from ``type`` instead of trying each one.
+
+    A handler's return value is delivered to the route's audience. Only
+    routes registered with ``rebroadcast=True`` may reach more than the
+    sender; all others answer the sender at most.
+
+    Args:
+        manager: Connection manager used for delivery
+        adapter: TypeAdapter over the discriminated union of inbound models
+    """
+
+    def __init__(self, manager: "ConnectionManager", adapter: TypeAdapter):
+        self.manager = manager
+        self.adapter = adapter
+        self._routes: Dict[str, Route] = {}
+
+        # Counters for observability; received is keyed by routed type only,
+        # so untrusted input cannot grow it
+        self.received: Dict[str, int] = {}
+        self.dispatched = 0
+        self.dropped_unknown = 0
+        self.invalid = 0
+        self.forbidden = 0
+
+    @property
+    def message_types(self) -> FrozenSet[str]:
+        """Message types with a registered handler"""
+        return frozenset(self._routes)
+
+    def route(
+        self,
+        message_type: str,
+        audience: Audience = Audience.SELF,
+        rebroadcast: bool = False,
+        facilitator_only: bool = False,
+    ) -> Callable[[Handler], Handler]:
+        """
+        Decorator registering the handler for a message type
+
+        Args:
+            message_type: Value of the message's ``type`` field
+            audience: Who receives the handler's return value
+            rebroadcast: Opt into fan-out; required for any audience but SELF
+            facilitator_only: Reject the message from non-facilitators
+
+        Returns:
+            Decorator that registers and returns the handler
+
+        Raises:
+            ValueError: If the type is already routed, or a fan-out audience
+                is used without opting into rebroadcast
+        """
+        audience = Audience(audience)
+        if message_type in self._routes:
+            raise ValueError(f"Handler already registered for {message_type!r}")
+        if audience is not Audience.SELF and not rebroadcast:
+            raise ValueError(
+                f"Route {message_type!r} targets {audience.value!r} and must "
+                f"opt into rebroadcast"
+            )
+
+        def register(handler: Handler) -> Handler:
+            self._routes[message_type] = Route(
+                handler, audience, rebroadcast, facilitator_only
+            )
+            self.received[message_type] = 0
+            return handler
+
+        return register
+
+    async def dispatch(self, context: ClientContext, raw: Any):
+        """
+        Validate one inbound message, run its handler and deliver the result
+
+        Args:
+            context: The sending connection
+            raw: The decoded message as received
+        """
+        message_type = raw.get("type") if isinstance(raw, dict) else None
+        route = self._routes.get(message_type)
+        if route is None:
+            self.dropped_unknown += 1
+            return
+        self.received[message_type] += 1
+
+        if route.facilitator_only and not context.is_facilitator:
+            self.forbidden += 1
+            await self._reply_error(context, message_type, "forbidden")
+            return
+
+        try:
+            message: BaseModel = self.adapter.validate_python(raw)
+        except ValidationError:
+            self.invalid += 1
+            await self._reply_error(context, message_type, "invalid_message")
+            return
+
+        self.dispatched += 1
+        reply = await route.handler(context, message)
+        if reply is not None:
+            await self._deliver(route.audience, context, reply)
+
+    async def _deliver(self, audience: Audience, context: ClientContext, reply: dict):
+        """Send a handler's result to the route's audience"""
+        manager = self.manager
+        if audience is Audience.SESSION:
+            await manager.broadcast_to_session(context.session_id, reply)
+        elif audience is Audience.TEAM:
+            team_id = manager.get_team(context.websocket, context.session_id)
+            if team_id is None:
+                await self._reply_error(context, reply.get("type"), "not_in_team")
+                return
+            await manager.broadcast_to_team(context.session_id, team_id, reply)
+        elif audience is Audience.FACILITATOR:
+            await manager.broadcast_to_facilitators(context.session_id, reply)
+        else:
+            await manager.send_personal_message(reply, context.websocket)
+
+    async def _reply_error(
+        self, context: ClientContext, message_type: Optional[str], error: str
+    ):
+        """Tell the sender its message was rejected"""
+        await self.manager.send_personal_message(
+            {"type": ERROR_MESSAGE_TYPE, "error": error, "message_type": message_type},
+            context.websocket,
+        )
@@ -0,0 +1,190 @@
+"""
+Per-session event sequence log for resumable connections
+Numbers every session broadcast and keeps the most recent frames for replay
+"""
+
+import asyncio
+import itertools
+import uuid
+from collections import deque
+from typing import Deque, Dict, Iterable, List, Optional, Tuple
+
+from backend.websocket.frames import Frame
+
+
+class _SessionLog:
+    """Sequence counter, recent frames and latest state of one session"""
+
+    __slots__ = ("epoch", "seq", "frames", "state", "expiry")
+
+    def __init__(self, epoch: str, capacity: int):
+        self.epoch = epoch
+        self.seq = 0
+        # (seq, frame) in ascending seq order, consecutive
+        self.frames: Deque[Tuple[int, Frame]] = deque(maxlen=capacity)
+        # message type -> data of the latest event of that type
+        self.state: Dict[str, object] = {}
+        self.expiry: Optional[asyncio.TimerHandle] = None
+
+
+class SessionEventLog:
+    """
+    Numbers session events and replays the ones a reconnecting client missed
+
+    Each session has its own monotonically increasing ``seq`` and a ring
+    buffer of the last ``capacity`` encoded frames, so a replay writes the
+    very same frames that were broadcast (no re-encoding). Sequence numbers
+    belong to an ``epoch``: a log recreated after expiry, or kept by another
+    node, has a different epoch and its numbers are not comparable.
+
+    The latest ``data`` of each configured state type (e.g.
+    ``session_update``) is kept beyond the ring, so clients that fell too far
+    behind can be given a compact snapshot instead.
+
+    Args:
+        capacity: Frames retained per session
+        state_types: Message types whose latest data goes into snapshots
+        retention: Seconds a log survives once its session has no
+            connections left
+    """
+
+    def __init__(
+        self, capacity: int, state_types: Iterable[str] = (), retention: float = 0.0
+    ):
+        if capacity < 1:
+            raise ValueError("Event log capacity must be at least 1 frame")
+        self.capacity = capacity
+        self.state_types = frozenset(state_types)
+        self.retention = retention
+        self._logs: Dict[str, _SessionLog] = {}
+        # Epochs are unique per process and per log instance
+        self._epoch_prefix = uuid.uuid4().hex[:8]
+        self._epochs = itertools.count(1)
+
+        # Counters for observability
+        self.replayed = 0
+        self.snapshots = 0
+
+    def __contains__(self, session_id: str) -> bool:
+        return session_id in self._logs
+
+    def _log(self, session_id: str) -> _SessionLog:
+        log = self._logs.get(session_id)
+        if log is None:
+            epoch = f"{self._epoch_prefix}-{next(self._epochs)}"
+            log = self._logs[session_id] = _SessionLog(epoch, self.capacity)
+        elif log.expiry is not None:
+            # Session is active again
+            log.expiry.cancel()
+            log.expiry = None
+        return log
+
+    def record(self, session_id: str, message: dict) -> Frame:
+        """
+        Number a session event and keep its encoded frame
+
+        Args:
+            session_id: Session the event is broadcast to
+            message: The event (not modified; a numbered copy is encoded)
+
+        Returns:
+            The frame to broadcast, carrying ``seq``
+        """
+        log = self._log(session_id)
+        log.seq += 1
+        frame = Frame.from_message({**message, "seq": log.seq})
+        log.frames.append((log.seq, frame))
+        message_type = message.get("type")
+        if message_type in self.state_types:
+            log.state[message_type] = message.get("data")
+        return frame
+
+    def position(self, session_id: str) -> Tuple[str, int]:
+        """
+        Current epoch and last sequence number of a session
+
+        Args:
+            session_id: Session to look up
+
+        Returns:
+            Tuple of (epoch, seq); seq is 0 before the first event
+        """
+        log = self._log(session_id)
+        return log.epoch, log.seq
+
+    def replay(
+        self, session_id: str, last_seq: int, epoch: Optional[str]
+    ) -> Optional[List[Frame]]:
+        """
+        Frames a client missed since ``last_seq``
+
+        Args:
+            session_id: Session the client reconnected to
+            last_seq: Last sequence number the client processed
+            epoch: Epoch the client's sequence numbers belong to
+
+        Returns:
+            The missed frames in order (possibly empty), or None if they are
+            not all available and the client needs a snapshot
+        """
+        log = self._logs.get(session_id)
+        if log is None or epoch != log.epoch or not 0 <= last_seq <= log.seq:
+            return None
+        if last_seq == log.seq:
+            return []
+        frames = log.frames
+        oldest = frames[0][0] if frames else log.seq + 1
+        if last_seq + 1 < oldest:
+            return None
+        missed = [
+            frame for _, frame in itertools.islice(frames, last_seq + 1 - oldest, None)
+        ]
+        self.replayed += len(missed)
+        return missed
+
+    def snapshot(self, session_id: str) -> dict:
+        """
+        Compact state for a client whose gap can no longer be replayed
+
+        Args:
+            session_id: Session to describe
+
+        Returns:
+            ``session_snapshot`` message with the epoch, current seq and the
+            latest data of each state type
+        """
+        log = self._log(session_id)
+        self.snapshots += 1
+        return {
+            "type": "session_snapshot",
+            "session_id": session_id,
+            "epoch": log.epoch,
+            "seq": log.seq,
+            "state": dict(log.state),
+        }
+
+    def expire(self, session_id: str):
+        """
+        Schedule a session's log for removal after the retention period
+
+        Recording to the session again cancels the removal.
+
+        Args:
+            session_id: Session that has no connections left
+        """
+        log = self._logs.get(session_id)
+        if log is None:
+            return
+        if self.retention <= 0:
+            self.discard(session_id)
+            return
+        if log.expiry is None:
+            log.expiry = asyncio.get_running_loop().call_later(
+                self.retention, self.discard, session_id
+            )
+
+    def discard(self, session_id: str):
+        """Drop a session's log immediately"""
+        log = self._logs.pop(session_id, None)
+        if log is not None and log.expiry is not None:
+            log.expiry.cancel()
@@ -0,0 +1,152 @@
+"""
+Pre-encoded WebSocket frames
+A message is serialized once and the same frame is written to every socket
+"""
+
+import json
+from typing import TYPE_CHECKING, Any, Awaitable, Dict, Optional, Union
+
+from fastapi import WebSocket
+
+if TYPE_CHECKING:
+    from backend.websocket.codecs import Codec
+
+FramePayload = Union[str, bytes]
+
+
+def encode_json(message: dict) -> str:
+    """
+    Serialize a message exactly like ``WebSocket.send_json`` does
+
+    Args:
+        message: JSON-serializable message
+
+    Returns:
+        Compact JSON text
+    """
+    return json.dumps(message, separators=(",", ":"), ensure_ascii=False)
+
+
+class Frame:
+    """
+    An outbound message that has already been encoded
+
+    Text payloads are sent as WebSocket text frames, bytes payloads as
+    binary frames. ``message_type`` is kept alongside the payload so the
+    frame can be routed or inspected without decoding it again.
+
+    Frames are JSON text by default. Connections that negotiated a binary
+    codec get a variant re-encoded from the same message; variants are
+    cached, so a broadcast is encoded at most once per codec.
+    """
+
+    __slots__ = ("data", "message_type", "message", "_variants", "_size")
+
+    def __init__(
+        self,
+        data: FramePayload,
+        message_type: Optional[str] = None,
+        message: Any = None,
+    ):
+        self.data = data
+        self.message_type = message_type
+        # Source message, kept to re-encode for other codecs without parsing
+        self.message = message
+        self._variants: Optional[Dict[str, "Frame"]] = None
+        self._size: Optional[int] = None
+
+    @classmethod
+    def from_message(cls, message: dict) -> "Frame":
+        """
+        Encode a message dict into a text frame
+
+        Args:
+            message: JSON-serializable message
+
+        Returns:
+            Encoded frame
+        """
+        return cls(encode_json(message), message.get("type"), message)
+
+    @property
+    def is_binary(self) -> bool:
+        """Whether the frame is sent as a binary WebSocket frame"""
+        return isinstance(self.data, bytes)
+
+    @property
+    def size(self) -> int:
+        """Payload size in bytes on the wire (computed once)"""
+        size = self._size
+        if size is None:
+            data = self.data
+            if isinstance(data, bytes) or data.isascii():
+                size = len(data)
+            else:
+                size = len(data.encode("utf-8"))
+            self._size = size
+        return size
+
+    def for_codec(self, codec: Optional["Codec"]) -> "Frame":
+        """
+        Get this frame encoded for a connection's codec
+
+        Args:
+            codec: The connection's negotiated codec (None or a text codec
+                means the JSON frame itself)
+
+        Returns:
+            This frame, or a cached variant in the codec's encoding. Opaque
+            pre-encoded bytes are returned as-is.
+        """
+        if codec is None or not codec.binary or isinstance(self.data, bytes):
+            return self
+        variants = self._variants
+        if variants is None:
+            variants = self._variants = {}
+        variant = variants.get(codec.name)
+        if variant is None:
+            message = self.message
+            if message is None:
+                # Pre-encoded or remote JSON text: parse it once per codec
+                message = json.loads(self.data)
+            variant = variants[codec.name] = Frame(
+                codec.encode(message), self.message_type, message
+            )
+        return variant
+
+    def write(self, websocket: WebSocket) -> Awaitable[None]:
+        """
+        Write the frame to a socket
+
+        Args:
+            websocket: Target connection
+
+        Returns:
+            Awaitable that completes once the frame is sent
+        """
+        if isinstance(self.data, bytes):
+            return websocket.send_bytes(self.data)
+        return websocket.send_text(self.data)
+
+    def __repr__(self):
+        return f"<Frame(type={self.message_type!r}, size={len(self.data)})>"
+
+
+OutboundMessage = Union[dict, Frame, str, bytes]
+
+
+def as_frame(message: OutboundMessage) -> Frame:
+    """
+    Normalize any accepted outbound message into a frame
+
+    Args:
+        message: A message dict, an existing frame, or pre-encoded text/bytes
+
+    Returns:
+        The frame to send (the same object if already a frame)
+    """
+    if isinstance(message, Frame):
+        return message
+    if isinstance(message, (str, bytes)):
+        return Frame(message)
+    return Frame.from_message(message)
@@ -0,0 +1,399 @@
+"""
+Handlers for inbound WebSocket message types
+Each handler declares who hears about the message it receives
+"""
+
+from datetime import datetime
+from typing import List, Optional
+
+from backend.core.config import settings
+from backend.schemas.websocket import (
+    AnswerIn,
+    ChatHistoryIn,
+    ChatIn,
+    CloseQuestionIn,
+    HelpRequestIn,
+    JoinTeamIn,
+    LeaderboardAckIn,
+    OpenQuestionIn,
+    PongIn,
+    ReactionIn,
+    RevealQuestionIn,
+    SessionUpdateIn,
+    StageQuestionIn,
+    TeamChatIn,
+    UnwatchTeamIn,
+    WatchTeamIn,
+    inbound_message_adapter,
+)
+from backend.services.answers import (
+    NOT_OPEN,
+    AnswerBook,
+    AnswerRejected,
+    answer_book,
+    normalize_answer,
+)
+from backend.services.chat_history import ChatHistory, chat_history
+from backend.services.result_writer import ResultWriter, result_writer
+from backend.services.scheduler import Timer
+from backend.websocket.channels import team_channel
+from backend.websocket.dispatcher import (
+    ERROR_MESSAGE_TYPE,
+    Audience,
+    ClientContext,
+    MessageDispatcher,
+)
+from backend.websocket.manager import ConnectionManager, manager
+from backend.websocket.reveal import NOT_STAGED
+from backend.websocket.tallies import INVALID_REACTION
+
+
+def _relay(context: ClientContext, message_type: str, data: dict) -> dict:
+    """Outbound shape of a message relayed on behalf of a user"""
+    return {
+        "type": message_type,
+        "user_id": context.user_id,
+        "data": data,
+        "session_id": context.session_id,
+    }
+
+
+# Scheduler timer kind closing a question when its time limit runs out
+CLOSE_TIMER = "close_question"
+
+HISTORY_MESSAGE_TYPE = "chat_history"
+
+# A participant's team is fixed once joined, so switching cannot be used to
+# read other teams' channels
+TEAM_LOCKED = "team_locked"
+
+
+def history_message(session_id: str, messages: List[dict], has_more: bool) -> dict:
+    """Outbound shape of a page of chat history (oldest message first)"""
+    return {
+        "type": HISTORY_MESSAGE_TYPE,
+        "messages": messages,
+        "has_more": has_more,
+        "session_id": session_id,
+    }
+
+
+def _error(message_type: str, error: str) -> dict:
+    """Rejection sent back to the sender of a message"""
+    return {"type": ERROR_MESSAGE_TYPE, "error": error, "message_type": message_type}
+
+
+def _add_scoring_routes(
+    dispatcher: MessageDispatcher,
+    connection_manager: ConnectionManager,
+    answers: AnswerBook,
+    results: ResultWriter,
+):
+    """Register the question and answer handlers (see ``create_dispatcher``)"""
+    scheduler = connection_manager.scheduler
+
+    def open_timed(
+        session_id: str,
+        question_id: str,
+        accepted: List[str],
+        points: int,
+        time_limit_ms: Optional[int],
+    ):
+        # The server, not the facilitator's client, closes it on time
+        answers.open_question(
+            session_id,
+            question_id,
+            accepted,
+            points=points,
+            time_limit_ms=time_limit_ms,
+        )
+        if time_limit_ms is not None:
+            scheduler.schedule(CLOSE_TIMER, session_id, time_limit_ms, question_id)
+
+    async def close(session_id: str, question_id: str) -> Optional[dict]:
+        if not answers.close_question(session_id, question_id):
+            return None
+        scheduler.cancel(CLOSE_TIMER, session_id, question_id)
+        connection_manager.reveals.discard(session_id, question_id)
+        # Facilitators get the final distribution before the close
+        await connection_manager.tallies.finish(session_id, question_id)
+        # Standings change once per question, not once per answer
+        await connection_manager.leaderboards.update(
+            session_id, answers.scores(session_id)
+        )
+        return {
+            "type": "question_closed",
+            "question_id": question_id,
+            "session_id": session_id,
+        }
+
+    async def close_due(timers: List[Timer]):
+        # Every question whose time ran out on this tick, in one batch
+        for timer in timers:
+            closed = await close(timer.session_id, timer.name)
+            if closed is not None:
+                await connection_manager.broadcast_to_session(timer.session_id, closed)
+
+    scheduler.register(CLOSE_TIMER, close_due)
+
+    @dispatcher.route(
+        "open_question", Audience.SESSION, rebroadcast=True, facilitator_only=True
+    )
+    async def open_question(context: ClientContext, message: OpenQuestionIn) -> dict:
+        # The answer key stays on the server; only the opening is announced
+        data = message.data
+        open_timed(
+            context.session_id,
+            data.question_id,
+            data.answers,
+            data.points,
+            data.time_limit_ms,
+        )
+        return {
+            "type": "question_opened",
+            "question_id": data.question_id,
+            "points": data.points,
+            "time_limit_ms": data.time_limit_ms,
+            "session_id": context.session_id,
+        }
+
+    @dispatcher.route("stage_question", facilitator_only=True)
+    async def stage_question(
+        context: ClientContext, message: StageQuestionIn
+    ) -> Optional[dict]:
+        # The payload goes out encrypted now; answers open only at reveal
+        data = message.data
+        session_id = context.session_id
+
+        def open_on_reveal():
+            open_timed(
+                session_id,
+                data.question_id,
+                data.answers,
+                data.points,
+                data.time_limit_ms,
+            )
+
+        await connection_manager.reveals.stage(
+            session_id,
+            data.question_id,
+            data.question,
+            points=data.points,
+            time_limit_ms=data.time_limit_ms,
+            reveal_in_ms=data.reveal_in_ms,
+            on_reveal=open_on_reveal,
+        )
+        return None
+
+    @dispatcher.route("reveal_question", facilitator_only=True)
+    async def reveal_question(
+        context: ClientContext, message: RevealQuestionIn
+    ) -> Optional[dict]:
+        if not await connection_manager.reveals.reveal(
+            context.session_id, message.data.question_id
+        ):
+            return _error(message.type, NOT_STAGED)
+        return None
+
+    @dispatcher.route("answer")
+    async def answer(context: ClientContext, message: AnswerIn) -> dict:
+        # Checked and scored in memory; the database write happens later, in
+        # a batch, off the answer path
+        data = message.data
+        try:
+            scored = answers.submit(
+                context.session_id, context.user_id, data.question_id, data.answer
+            )
+        except AnswerRejected as e:
+            return _error(message.type, e.reason)
+        results.add(
+            {
+                "organization_id": context.org_id,
+                "session_id": context.session_id,
+                "user_id": context.user_id,
+                "question_id": data.question_id,
+                "answer_given": data.answer,
+                "is_correct": scored.correct,
+                "response_time_ms": scored.response_time_ms,
+                "points": scored.points,
+                "answered_at": datetime.utcnow(),
+            }
+        )
+        # Counted for the facilitators' live histogram; no frame per answer
+        connection_manager.tallies.count_answer(
+            context.session_id, data.question_id, normalize_answer(data.answer)
+        )
+        return {
+            "type": "answer_result",
+            "question_id": data.question_id,
+            "correct": scored.correct,
+            "points": scored.points,
+            "score": scored.score,
+            "response_time_ms": scored.response_time_ms,
+            "session_id": context.session_id,
+        }
+
+    @dispatcher.route(
+        "close_question", Audience.SESSION, rebroadcast=True, facilitator_only=True
+    )
+    async def close_question(
+        context: ClientContext, message: CloseQuestionIn
+    ) -> Optional[dict]:
+        closed = await close(context.session_id, message.data.question_id)
+        if closed is None:
+            await connection_manager.send_personal_message(
+                _error(message.type, NOT_OPEN), context.websocket
+            )
+        return closed
+
+
+def create_dispatcher(
+    connection_manager: ConnectionManager,
+    answers: Optional[AnswerBook] = None,
+    results: Optional[ResultWriter] = None,
+    history: Optional[ChatHistory] = None,
+    scoring: Optional[bool] = None,
+) -> MessageDispatcher:
+    """
+    Build a dispatcher with the handlers for every inbound message type
+
+    Open questions, scores and leaderboards live in this process's memory,
+    so answer scoring cannot run behind a broadcast backplane: an answer
+    reaching another node would find no open question, and that node's
+    sockets would never see the standings.
+
+    Args:
+        connection_manager: Manager used to deliver handler results
+        answers: Answer keys and scores (a new, empty book by default)
+        results: Write-behind queue for scored answers (a new, unstarted
+            writer by default)
+        history: Session chat buffers (new ones, with an unstarted writer,
+            by default)
+        scoring: Whether to handle questions and answers (defaults to
+            ``settings.WS_ANSWER_SCORING``)
+
+    Returns:
+        The configured dispatcher
+
+    Raises:
+        ValueError: If scoring is enabled and the manager has a backplane
+    """
+    scoring = settings.WS_ANSWER_SCORING if scoring is None else scoring
+    if scoring and connection_manager.backplane is not None:
+        raise ValueError(
+            "WebSocket answer scoring keeps questions and leaderboards in one "
+            "process and cannot be combined with a broadcast backplane; set "
+            "WS_ANSWER_SCORING=false or WS_BACKPLANE=none"
+        )
+    dispatcher = MessageDispatcher(connection_manager, inbound_message_adapter)
+    answers = AnswerBook() if answers is None else answers
+    results = ResultWriter() if results is None else results
+    history = ChatHistory() if history is None else history
+    if scoring:
+        _add_scoring_routes(dispatcher, connection_manager, answers, results)
+
+    @dispatcher.route("chat", Audience.SESSION, rebroadcast=True)
+    async def chat(context: ClientContext, message: ChatIn) -> dict:
+        # Buffered for late joiners and written behind; the ID and time let
+        # clients page back from what they saw live
+        entry = history.add(
+            context.session_id, context.org_id, context.user_id, message.data.text
+        )
+        relayed = _relay(context, message.type, message.data.model_dump())
+        relayed["id"] = entry.id
+        relayed["sent_at"] = entry.sent_at.isoformat()
+        return relayed
+
+    @dispatcher.route("chat_history")
+    async def chat_history_page(context: ClientContext, message: ChatHistoryIn) -> dict:
+        data = message.data
+        messages, has_more = await history.page(
+            context.session_id, context.org_id, data.before, data.limit
+        )
+        return history_message(context.session_id, messages, has_more)
+
+    @dispatcher.route("team_chat", Audience.TEAM, rebroadcast=True)
+    async def team_chat(context: ClientContext, message: TeamChatIn) -> dict:
+        return _relay(context, message.type, message.data.model_dump())
+
+    @dispatcher.route("help_request", Audience.FACILITATOR, rebroadcast=True)
+    async def help_request(context: ClientContext, message: HelpRequestIn) -> dict:
+        return _relay(context, message.type, message.data.model_dump())
+
+    @dispatcher.route(
+        "session_update", Audience.SESSION, rebroadcast=True, facilitator_only=True
+    )
+    async def session_update(context: ClientContext, message: SessionUpdateIn) -> dict:
+        return _relay(context, message.type, message.data)
+
+    @dispatcher.route("join_team")
+    async def join_team(context: ClientContext, message: JoinTeamIn) -> dict:
+        team_id = message.data.team_id
+        current = connection_manager.get_team(context.websocket, context.session_id)
+        if current is not None and current != team_id and not context.is_facilitator:
+            return _error(message.type, TEAM_LOCKED)
+        connection_manager.set_team(context.websocket, context.session_id, team_id)
+        return {
+            "type": "team_joined",
+            "team_id": team_id,
+            "session_id": context.session_id,
+        }
+
+    @dispatcher.route("watch_team", facilitator_only=True)
+    async def watch_team(context: ClientContext, message: WatchTeamIn) -> dict:
+        # Facilitators follow a team's channel without joining the team
+        team_id = message.data.team_id
+        connection_manager.subscribe(
+            context.websocket, team_channel(context.session_id, team_id)
+        )
+        return {
+            "type": "team_watched",
+            "team_id": team_id,
+            "session_id": context.session_id,
+        }
+
+    @dispatcher.route("unwatch_team", facilitator_only=True)
+    async def unwatch_team(context: ClientContext, message: UnwatchTeamIn) -> dict:
+        team_id = message.data.team_id
+        if (
+            connection_manager.get_team(context.websocket, context.session_id)
+            != team_id
+        ):
+            connection_manager.unsubscribe(
+                context.websocket, team_channel(context.session_id, team_id)
+            )
+        return {
+            "type": "team_unwatched",
+            "team_id": team_id,
+            "session_id": context.session_id,
+        }
+
+    @dispatcher.route("leaderboard_ack")
+    async def leaderboard_ack(
+        context: ClientContext, message: LeaderboardAckIn
+    ) -> Optional[dict]:
+        # Only moves this client's delta base; nothing is sent
+        connection_manager.leaderboards.acknowledge(
+            context.websocket, context.session_id, message.data.version
+        )
+        return None
+
+    @dispatcher.route("reaction")
+    async def reaction(context: ClientContext, message: ReactionIn) -> Optional[dict]:
+        # Aggregated into the next tally frame instead of relayed one by one
+        if not connection_manager.tallies.count_reaction(
+            context.session_id, message.data.reaction
+        ):
+            return _error(message.type, INVALID_REACTION)
+        return None
+
+    @dispatcher.route("pong")
+    async def pong(context: ClientContext, message: PongIn) -> Optional[dict]:
+        # Receiving it already refreshed the heartbeat
+        return None
+
+    return dispatcher
+
+
+# Global dispatcher for the WebSocket endpoint
+dispatcher = create_dispatcher(manager, answer_book, result_writer, chat_history)
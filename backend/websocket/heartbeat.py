@@ -0,0 +1,182 @@
+"""
+Server-driven heartbeats and idle connection reaping
+A deadline heap lets the sweeper visit only connections that are due
+"""
+
+import asyncio
+import heapq
+import logging
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+from fastapi import WebSocket
+
+logger = logging.getLogger(__name__)
+
+PING_MESSAGE_TYPE = "ping"
+PONG_MESSAGE_TYPE = "pong"
+
+
+class HeartbeatMonitor:
+    """
+    Pings idle connections and reports the ones that stopped answering
+
+    Every tracked connection has exactly one live entry in a min-heap keyed
+    by the time it next needs attention. Inbound traffic only updates the
+    connection's ``last_seen`` (O(1), no heap work); when an entry comes due
+    the sweeper decides what to do:
+
+    - seen within the last interval: reschedule one interval after last_seen
+    - idle for at least one interval: send a ping, check again an interval later
+    - idle for ``max_missed`` intervals: report the connection as dead
+
+    A sweep therefore costs O(k log n) for the k connections that are due,
+    not O(n). Entries of forgotten connections are skipped lazily when popped.
+
+    Args:
+        interval: Seconds between heartbeats
+        max_missed: Heartbeats a connection may miss before it is dead
+        on_ping: Called with a connection that should be pinged
+        on_dead: Called with a connection that missed too many heartbeats
+        clock: Monotonic time source (overridable in tests)
+    """
+
+    def __init__(
+        self,
+        interval: float,
+        max_missed: int,
+        on_ping: Callable[[WebSocket], None],
+        on_dead: Callable[[WebSocket], None],
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        if max_missed < 1:
+            raise ValueError("Heartbeat max_missed must be at least 1")
+        self.interval = interval
+        self.max_missed = max_missed
+        self._on_ping = on_ping
+        self._on_dead = on_dead
+        self._clock = clock
+
+        self._last_seen: Dict[WebSocket, float] = {}
+        # connection -> sequence number of its live heap entry
+        self._entries: Dict[WebSocket, int] = {}
+        self._heap: List[Tuple[float, int, WebSocket]] = []
+        self._sequence = 0
+        self._task: Optional[asyncio.Task] = None
+
+        # Counters for observability
+        self.pings_sent = 0
+        self.reaped = 0
+
+    @property
+    def enabled(self) -> bool:
+        """Whether heartbeats are configured (interval > 0)"""
+        return self.interval > 0
+
+    def __len__(self) -> int:
+        return len(self._last_seen)
+
+    def _schedule(self, websocket: WebSocket, due: float):
+        self._sequence += 1
+        self._entries[websocket] = self._sequence
+        heapq.heappush(self._heap, (due, self._sequence, websocket))
+
+    def track(self, websocket: WebSocket):
+        """
+        Start monitoring a connection (idempotent)
+
+        Args:
+            websocket: The newly accepted connection
+        """
+        if not self.enabled or websocket in self._last_seen:
+            return
+        now = self._clock()
+        self._last_seen[websocket] = now
+        self._schedule(websocket, now + self.interval)
+
+    def touch(self, websocket: WebSocket):
+        """
+        Record inbound traffic (any message, including pongs)
+
+        Args:
+            websocket: The connection that was heard from
+        """
+        if websocket in self._last_seen:
+            self._last_seen[websocket] = self._clock()
+
+    def forget(self, websocket: WebSocket):
+        """
+        Stop monitoring a connection; its heap entry is dropped lazily
+
+        Args:
+            websocket: The connection that went away
+        """
+        self._last_seen.pop(websocket, None)
+        self._entries.pop(websocket, None)
+
+    def sweep(self, now: Optional[float] = None) -> List[WebSocket]:
+        """
+        Handle every connection whose entry is due
+
+        Args:
+            now: Current monotonic time (defaults to the clock)
+
+        Returns:
+            Connections reported dead by this sweep
+        """
+        if now is None:
+            now = self._clock()
+        heap = self._heap
+        dead = []
+        while heap and heap[0][0] <= now:
+            _, sequence, websocket = heapq.heappop(heap)
+            if self._entries.get(websocket) != sequence:
+                continue  # Forgotten or superseded entry
+
+            idle = now - self._last_seen[websocket]
+            if idle >= self.interval * self.max_missed:
+                self.forget(websocket)
+                self.reaped += 1
+                dead.append(websocket)
+                self._on_dead(websocket)
+            elif idle >= self.interval:
+                self.pings_sent += 1
+                self._on_ping(websocket)
+                self._schedule(websocket, now + self.interval)
+            else:
+                # Heard from recently: no ping needed yet
+                self._schedule(websocket, self._last_seen[websocket] + self.interval)
+        return dead
+
+    def next_due(self) -> Optional[float]:
+        """Time the earliest heap entry comes due, or None if empty"""
+        return self._heap[0][0] if self._heap else None
+
+    def start(self):
+        """Start the background sweeper (no-op when disabled)"""
+        if self.enabled and self._task is None:
+            self._task = asyncio.ensure_future(self._run())
+
+    async def stop(self):
+        """Stop the background sweeper"""
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def _run(self):
+        """Sleep until the earliest deadline, then sweep, until cancelled"""
+        while True:
+            due = self.next_due()
+            # New connections are always due after existing entries, so
+            # sleeping until the current head never misses a deadline
+            delay = self.interval if due is None else due - self._clock()
+            await asyncio.sleep(max(delay, 0.0))
+            try:
+                self.sweep()
+            except Exception as e:
+                logger.error(f"Heartbeat sweep failed: {e}")
@@ -0,0 +1,333 @@
+"""
+Versioned leaderboard state with per-client delta delivery
+Clients receive only the rows that changed since the version they acknowledged
+"""
+
+from collections import deque
+from typing import (
+    TYPE_CHECKING,
+    Deque,
+    Dict,
+    FrozenSet,
+    Iterable,
+    List,
+    Optional,
+    Tuple,
+)
+
+from fastapi import WebSocket
+
+from backend.core.config import settings
+from backend.websocket.frames import Frame
+
+if TYPE_CHECKING:
+    from backend.websocket.manager import ConnectionManager
+
+SNAPSHOT_MESSAGE_TYPE = "leaderboard_snapshot"
+DELTA_MESSAGE_TYPE = "leaderboard_delta"
+ACK_MESSAGE_TYPE = "leaderboard_ack"
+
+
+class Leaderboard:
+    """
+    Standings of one session, versioned so changes can be sent as deltas
+
+    Every ``apply`` that changes a score or a rank bumps ``version`` and
+    records the IDs of the rows it touched. The last ``history`` versions are
+    kept, so a delta can be built for any client that acknowledged one of
+    them; older clients need a full snapshot.
+
+    Ranks use standard competition ranking (1, 2, 2, 4), ties ordered by ID.
+
+    Args:
+        history: Number of versions retained for building deltas
+    """
+
+    def __init__(self, history: int):
+        if history < 1:
+            raise ValueError("Leaderboard history must be at least 1 version")
+        self.version = 0
+        self.scores: Dict[str, float] = {}
+        self.ranks: Dict[str, int] = {}
+        # (version, IDs changed by that version), oldest first
+        self._history: Deque[Tuple[int, FrozenSet[str]]] = deque(maxlen=history)
+
+    def __len__(self) -> int:
+        return len(self.scores)
+
+    def apply(
+        self, scores: Dict[str, float], removed: Iterable[str] = ()
+    ) -> FrozenSet[str]:
+        """
+        Update scores and recompute ranks
+
+        Args:
+            scores: New score per row ID (rows not listed keep their score)
+            removed: Row IDs to drop from the leaderboard
+
+        Returns:
+            IDs whose score, rank or presence changed (empty if nothing did,
+            in which case the version is not bumped)
+        """
+        changed = set()
+        for entry_id in removed:
+            if self.scores.pop(entry_id, None) is not None:
+                self.ranks.pop(entry_id, None)
+                changed.add(entry_id)
+        for entry_id, score in scores.items():
+            if self.scores.get(entry_id) != score:
+                self.scores[entry_id] = score
+                changed.add(entry_id)
+        if not changed:
+            return frozenset()
+
+        # A score change can shift the rank of every row between its old and
+        # new position, so ranks are recomputed and diffed
+        ordered = sorted(self.scores.items(), key=lambda item: (-item[1], item[0]))
+        previous_score = None
+        rank = 0
+        for position, (entry_id, score) in enumerate(ordered, start=1):
+            if score != previous_score:
+                rank = position
+                previous_score = score
+            if self.ranks.get(entry_id) != rank:
+                self.ranks[entry_id] = rank
+                changed.add(entry_id)
+
+        self.version += 1
+        changes = frozenset(changed)
+        self._history.append((self.version, changes))
+        return changes
+
+    def _row(self, entry_id: str) -> dict:
+        return {
+            "id": entry_id,
+            "score": self.scores[entry_id],
+            "rank": self.ranks[entry_id],
+        }
+
+    def snapshot(self, session_id: str) -> dict:
+        """
+        Build a full-state message
+
+        Args:
+            session_id: Session the leaderboard belongs to
+
+        Returns:
+            ``leaderboard_snapshot`` message with every row, ordered by rank
+        """
+        ordered = sorted(
+            self.ranks, key=lambda entry_id: (self.ranks[entry_id], entry_id)
+        )
+        return {
+            "type": SNAPSHOT_MESSAGE_TYPE,
+            "session_id": session_id,
+            "version": self.version,
+            "rows": [self._row(entry_id) for entry_id in ordered],
+        }
+
+    def changed_since(self, base_version: int) -> Optional[FrozenSet[str]]:
+        """
+        IDs changed after a version
+
+        Args:
+            base_version: Version the client already has
+
+        Returns:
+            The changed IDs, or None if the history no longer reaches back
+            to ``base_version`` (or it is not a known version)
+        """
+        if base_version < 0 or base_version > self.version:
+            return None
+        if base_version == self.version:
+            return frozenset()
+        if not self._history or self._history[0][0] > base_version + 1:
+            return None
+        changed = set()
+        for version, ids in reversed(self._history):
+            if version <= base_version:
+                break
+            changed.update(ids)
+        return frozenset(changed)
+
+    def delta(self, session_id: str, base_version: int) -> Optional[dict]:
+        """
+        Build a message bringing a client from ``base_version`` to current
+
+        Args:
+            session_id: Session the leaderboard belongs to
+            base_version: Version the client acknowledged
+
+        Returns:
+            ``leaderboard_delta`` message, or None if the client must get a
+            snapshot instead (history too short, or the delta would not be
+            smaller than a snapshot)
+        """
+        changed = self.changed_since(base_version)
+        if changed is None or len(changed) >= len(self.scores):
+            return None
+        rows = []
+        removed = []
+        for entry_id in sorted(changed):
+            if entry_id in self.scores:
+                rows.append(self._row(entry_id))
+            else:
+                removed.append(entry_id)
+        return {
+            "type": DELTA_MESSAGE_TYPE,
+            "session_id": session_id,
+            "base_version": base_version,
+            "version": self.version,
+            "rows": rows,
+            "removed": removed,
+        }
+
+
+class LeaderboardBroadcaster:
+    """
+    Keeps one leaderboard per session and pushes each client only what changed
+
+    Clients acknowledge the version they applied with a ``leaderboard_ack``
+    message. On every update, connections are grouped by acknowledged
+    version and each group gets one delta, encoded once and shared by the
+    whole group. In the common case every client acked the previous version
+    and a single small frame goes to the session. Clients that never acked,
+    or whose version is older than the retained history, get a snapshot.
+
+    Deltas are cumulative, so a client that has not acked yet simply gets
+    the rows again on the next update; applying a row twice is harmless.
+
+    Args:
+        manager: Connection manager used to reach the session's sockets
+        history: Versions retained per leaderboard (defaults to
+            ``settings.WS_LEADERBOARD_HISTORY``)
+    """
+
+    def __init__(self, manager: "ConnectionManager", history: Optional[int] = None):
+        self.manager = manager
+        self.history = settings.WS_LEADERBOARD_HISTORY if history is None else history
+        self._boards: Dict[str, Leaderboard] = {}
+        # session_id -> socket -> acknowledged version
+        self._acks: Dict[str, Dict[WebSocket, int]] = {}
+
+        # Counters for observability
+        self.deltas_sent = 0
+        self.snapshots_sent = 0
+
+    def get(self, session_id: str) -> Leaderboard:
+        """
+        Get a session's leaderboard, creating an empty one if needed
+
+        Args:
+            session_id: Session to look up
+
+        Returns:
+            The session's leaderboard
+        """
+        board = self._boards.get(session_id)
+        if board is None:
+            board = self._boards[session_id] = Leaderboard(self.history)
+        return board
+
+    def clear(self, session_id: str):
+        """Forget a session's leaderboard and acknowledgements (e.g. game over)"""
+        self._boards.pop(session_id, None)
+        self._acks.pop(session_id, None)
+
+    def forget(self, websocket: WebSocket, session_id: str):
+        """Drop a connection's acknowledgement when it leaves a session"""
+        acks = self._acks.get(session_id)
+        if acks is not None:
+            acks.pop(websocket, None)
+
+    def acknowledge(self, websocket: WebSocket, session_id: str, version: int):
+        """
+        Record the version a client has applied
+
+        Acks for unknown sessions, for versions the server never produced,
+        or older than the client's previous ack are ignored.
+
+        Args:
+            websocket: The acknowledging connection
+            session_id: Session whose leaderboard was acknowledged
+            version: Version the client now holds
+        """
+        board = self._boards.get(session_id)
+        if (
+            board is None
+            or not isinstance(version, int)
+            or not 0 <= version <= board.version
+        ):
+            return
+        acks = self._acks.setdefault(session_id, {})
+        if version > acks.get(websocket, -1):
+            acks[websocket] = version
+
+    async def send_snapshot(self, websocket: WebSocket, session_id: str):
+        """
+        Send the full leaderboard to one connection (e.g. right after joining)
+
+        Args:
+            websocket: Target connection
+            session_id: Session whose leaderboard to send
+        """
+        board = self._boards.get(session_id)
+        if board is None:
+            return
+        self.snapshots_sent += 1
+        await self.manager.send_personal_message(
+            Frame.from_message(board.snapshot(session_id)), websocket
+        )
+
+    async def update(
+        self,
+        session_id: str,
+        scores: Dict[str, float],
+        removed: Iterable[str] = (),
+    ) -> int:
+        """
+        Apply score changes and push deltas to the session's connections
+
+        Args:
+            session_id: Session whose standings changed
+            scores: New score per team or participant ID
+            removed: IDs to drop from the leaderboard
+
+        Returns:
+            The leaderboard version after the update
+        """
+        board = self.get(session_id)
+        if not board.apply(scores, removed):
+            return board.version
+
+        connections = self.manager.active_connections.get(session_id)
+        if not connections:
+            return board.version
+
+        # Group connections by acknowledged version, pruning acks of sockets
+        # that have left the session
+        previous_acks = self._acks.get(session_id, {})
+        acks: Dict[WebSocket, int] = {}
+        groups: Dict[int, List[WebSocket]] = {}
+        for websocket in connections:
+            version = previous_acks.get(websocket, -1)
+            if version >= 0:
+                acks[websocket] = version
+            groups.setdefault(version, []).append(websocket)
+        self._acks[session_id] = acks
+
+        snapshot: Optional[Frame] = None
+        for base_version, sockets in groups.items():
+            message = board.delta(session_id, base_version)
+            if message is not None:
+                frame = Frame.from_message(message)
+                self.deltas_sent += len(sockets)
+            else:
+                if snapshot is None:
+                    snapshot = Frame.from_message(board.snapshot(session_id))
+                frame = snapshot
+                self.snapshots_sent += len(sockets)
+            for websocket in sockets:
+                await self.manager.send_personal_message(frame, websocket)
+
+        return board.version
@@ -3,12 +3,57 @@ WebSocket connection manager for handling real-time connections
 Manages multiple sessions with multiple connections per session
 """
 
-from typing import Dict, List
-from fastapi import WebSocket
+import asyncio
+import json
+import math
+import random
+import time
+from typing import Any, Dict, List, Optional, Sequence, Set, Tuple
+from fastapi import WebSocket, status
 import logging
 
+from backend.core.config import settings
+from backend.services.scheduler import SessionScheduler
+from backend.websocket.admission import AdmissionController, AdmissionRefused
+from backend.websocket.backplane import Backplane, create_backplane
+from backend.websocket.channels import (
+    facilitator_channel,
+    is_session_channel,
+    organization_channel,
+    organization_of,
+    primary_channel,
+    session_of,
+    team_channel,
+)
+from backend.websocket.codecs import JSON_CODEC, Codec, negotiate
+from backend.websocket.coalescer import MessageCoalescer
+from backend.websocket.connection import Connection
+from backend.websocket.eventlog import SessionEventLog
+from backend.websocket.frames import Frame, OutboundMessage, as_frame
+from backend.websocket.heartbeat import PING_MESSAGE_TYPE, HeartbeatMonitor
+from backend.websocket.leaderboard import LeaderboardBroadcaster
+from backend.websocket.metrics import Histogram
+from backend.websocket.outbound import OutboundQueue, OverflowPolicy
+from backend.websocket.presence import SessionPresence
+from backend.websocket.reveal import QuestionReveals
+from backend.websocket.sse import (
+    SpectatorHub,
+    SpectatorStream,
+    encode_event,
+    encode_message,
+    encode_retry,
+    parse_event_id,
+)
+from backend.websocket.tallies import LiveTallies
+
 logger = logging.getLogger(__name__)
 
+# Encoded once and shared by every heartbeat
+PING_FRAME = Frame.from_message({"type": PING_MESSAGE_TYPE})
+
+# Sent to every client before a draining node closes its connection
+RECONNECT_MESSAGE_TYPE = "reconnect"
+
 
 class ConnectionManager:
     """
@@ -18,91 +63,1618 @@ class ConnectionManager:
     - Multiple sessions (e.g., different trivia games)
     - Multiple connections per session (multiple participants)
     - Broadcasting messages to all connections in a session
+    - Concurrent, deadline-bounded fan-out so one slow socket cannot
+      stall delivery to the rest of the session
+    - Encode-once broadcasts: a message is serialized a single time and the
+      resulting frame is written to every connection
+    - Per-connection bounded outbound queues drained by dedicated writer
+      tasks, so broadcasting never waits on the network (disabled when
+      ``outbound_queue_size`` is 0, which writes to sockets directly)
+    - Time-windowed coalescing of high-frequency event types into one
+      ``batch`` frame per session per tick
+    - Subprotocol negotiation: clients offering a binary codec (msgpack,
+      cbor) get binary frames both ways; JSON text stays the default
+    - Hierarchical channels within a session (``session/team/{id}``,
+      ``session/facilitators``): a connection can subscribe to several, and
+      a channel broadcast reaches only its members, on every node
+    - User-level presence: participants are counted once however many tabs
+      they have open, and heavy payloads can go to one primary socket each
+    - Read-only spectators over Server-Sent Events, fed the same numbered
+      frames as the session's sockets (``spectators``)
+    - Per-session event numbering (``seq``) with a bounded replay log, so
+      reconnecting clients get only the events they missed
+    - Server-driven heartbeats: idle connections are pinged and those that
+      miss ``heartbeat_max_missed`` heartbeats are reaped
+    - Versioned leaderboards sent as per-client deltas (``leaderboards``)
+    - Staged question reveal: payloads go out encrypted ahead of time and
+      only a small key frame is broadcast at reveal (``reveals``)
+    - Session timers (scheduled reveals, question time limits) on one shared
+      timing wheel instead of a sleeping task per timer (``scheduler``)
+    - Live answer histograms and reactions for facilitators, counted in
+      memory and sent once per interval (``tallies``)
+    - Organization-wide announcements encoded once and sent only to the
+      tenant's sockets, via the organization -> sockets index
+      (``broadcast_to_organization``)
+    - Graceful drain: reconnect hints with jittered delays, then paced
+      batch closes, so restarts do not cause a reconnect stampede
+    - Admission control: sockets are capped per worker, per organization
+      (by plan) and per user; refused clients are closed with 1013 and a
+      retry hint (``admission``)
+    - An optional cross-process backplane: broadcasts are fanned out to local
+      sockets and published once for other nodes, and a node only subscribes
+      to sessions that have local connections
     """
 
-    def __init__(self):
-        # Maps session_id -> list of active WebSocket connections
-        self.active_connections: Dict[str, List[WebSocket]] = {}
+    def __init__(
+        self,
+        send_timeout: Optional[float] = None,
+        concurrent_broadcast: Optional[bool] = None,
+        outbound_queue_size: Optional[int] = None,
+        overflow_policy: Optional[OverflowPolicy] = None,
+        backplane: Optional[Backplane] = None,
+        coalesce_ticks_ms: Optional[Dict[str, int]] = None,
+        subprotocols: Optional[Sequence[str]] = None,
+        heartbeat_interval: Optional[float] = None,
+        heartbeat_max_missed: Optional[int] = None,
+        event_log_size: Optional[int] = None,
+        admission: Optional[AdmissionController] = None,
+        scheduler: Optional[SessionScheduler] = None,
+    ):
+        # Maps session_id -> active WebSocket connections. Dicts keep insertion
+        # order and give O(1) membership tests and removal (values unused).
+        self.active_connections: Dict[str, Dict[WebSocket, None]] = {}
+
+        # One record per open socket: identity, subscriptions, outbound
+        # queue, sequence cursor and counters (see connection.py)
+        self._connections: Dict[WebSocket, Connection] = {}
+
+        # Reverse indexes: user -> sockets, org -> sockets
+        self._user_sockets: Dict[str, Dict[WebSocket, None]] = {}
+        self._org_sockets: Dict[str, Dict[WebSocket, None]] = {}
+
+        # Admission slots held by handshakes still awaiting accept: total,
+        # per organization and per user
+        self._pending_connections = 0
+        self._pending_orgs: Dict[str, int] = {}
+        self._pending_users: Dict[str, int] = {}
+
+        # Sub-channels within sessions (see channels.py): channel -> sockets
+        self._channels: Dict[str, Dict[WebSocket, None]] = {}
+
+        # Distinct users per session and each user's primary socket
+        self.presence = SessionPresence()
+
+        # Read-only Server-Sent Events spectators per session
+        self.spectators = SpectatorHub(settings.WS_SSE_QUEUE_SIZE)
+
+        # Codecs the server accepts (sockets without one speak JSON)
+        self.subprotocols = list(
+            settings.WS_SUBPROTOCOLS if subprotocols is None else subprotocols
+        )
+
+        # Per-send deadline in seconds; sockets that miss it are evicted
+        self.send_timeout = (
+            settings.WS_SEND_TIMEOUT_SECONDS if send_timeout is None else send_timeout
+        )
+        self.concurrent_broadcast = (
+            settings.WS_CONCURRENT_BROADCAST
+            if concurrent_broadcast is None
+            else concurrent_broadcast
+        )
+
+        # Outbound queue per connection; 0 disables queues and writer tasks
+        self.outbound_queue_size = (
+            settings.WS_OUTBOUND_QUEUE_SIZE
+            if outbound_queue_size is None
+            else outbound_queue_size
+        )
+        self.overflow_policy = OverflowPolicy(
+            settings.WS_OVERFLOW_POLICY if overflow_policy is None else overflow_policy
+        )
+
+        # Delivery counters (plain ints, only touched from the event loop)
+        self.send_failures = 0
+        self.send_timeouts = 0
+        self.evictions = 0
+        self.overflow_disconnects = 0
+        self.outbound_bytes = 0
+        self.broadcast_latency = Histogram()
+
+        # Cross-process transport (None for single-process deployments)
+        self.backplane = backplane
+
+        # Batches high-frequency event types into one frame per tick
+        self.coalescer = MessageCoalescer(
+            self._broadcast_now,
+            (
+                settings.WS_COALESCE_TICKS_MS
+                if coalesce_ticks_ms is None
+                else coalesce_ticks_ms
+            ),
+            keys=settings.WS_COALESCE_KEYS,
+            state_fields=tuple(settings.WS_COALESCE_STATE_FIELDS),
+        )
+
+        # Numbers session broadcasts and keeps recent frames for resumption
+        self.event_log = SessionEventLog(
+            settings.WS_EVENT_LOG_SIZE if event_log_size is None else event_log_size,
+            state_types=settings.WS_EVENT_LOG_STATE_TYPES,
+            retention=settings.WS_EVENT_LOG_RETENTION_SECONDS,
+        )
+
+        # Per-session standings pushed as deltas since each client's ack
+        self.leaderboards = LeaderboardBroadcaster(self)
+
+        # Deadlines of every session (reveals, question closes) on one wheel
+        self.scheduler = SessionScheduler() if scheduler is None else scheduler
+
+        # Questions distributed ahead of time, revealed by a key frame
+        self.reveals = QuestionReveals(self)
+
+        # Answer distributions and reactions, sent to facilitators per interval
+        self.tallies = LiveTallies(self)
 
-    async def connect(self, websocket: WebSocket, session_id: str):
+        # Pings idle sockets and reaps dead ones (interval 0 disables)
+        self.heartbeat = HeartbeatMonitor(
+            (
+                settings.WS_HEARTBEAT_INTERVAL_SECONDS
+                if heartbeat_interval is None
+                else heartbeat_interval
+            ),
+            (
+                settings.WS_HEARTBEAT_MAX_MISSED
+                if heartbeat_max_missed is None
+                else heartbeat_max_missed
+            ),
+            on_ping=self._send_ping,
+            on_dead=self._reap,
+        )
+
+        # Connection limits checked before a new socket is registered
+        self.admission = AdmissionController() if admission is None else admission
+
+        # Strong references to fire-and-forget tasks
+        self._background_tasks: Set[asyncio.Task] = set()
+
+        # Set once a drain starts; new connections are refused from then on
+        self._drain_task: Optional[asyncio.Task] = None
+        self.drained = 0
+
+    async def start(self):
+        """Start the heartbeat sweeper and receiving broadcasts from other nodes"""
+        self._drain_task = None
+        self.heartbeat.start()
+        if self.backplane is not None:
+            await self.backplane.start(self._deliver_remote)
+
+    async def stop(self):
+        """Stop heartbeats, timers and the backplane; flush pending batches"""
+        await self.heartbeat.stop()
+        await self.scheduler.stop()
+        await self.coalescer.flush_all()
+        if self.backplane is not None:
+            await self.backplane.stop()
+
+    @property
+    def draining(self) -> bool:
+        """Whether the node is draining (and refusing new connections)"""
+        return self._drain_task is not None
+
+    async def drain(
+        self,
+        batch_size: Optional[int] = None,
+        batch_interval: Optional[float] = None,
+        reconnect_window: Optional[float] = None,
+        timeout: Optional[float] = None,
+    ):
+        """
+        Move every client off this node without a reconnect stampede
+
+        From the first call on, ``draining`` is True and the endpoint
+        refuses new connections. Each client is sent a ``reconnect`` hint
+        with its own random delay within ``reconnect_window``, then
+        connections are closed with 1012 (Service Restart) in batches of
+        ``batch_size`` every ``batch_interval`` seconds. The interval shrinks
+        if needed so the last batch closes within ``timeout``. Drained
+        connections are not announced with ``user_left``: their clients are
+        about to rejoin elsewhere.
+
+        Calling it again (e.g. from a signal and then from the lifespan)
+        waits for the drain already in progress.
+
+        Args:
+            batch_size: Connections closed per batch
+            batch_interval: Seconds between batches
+            reconnect_window: Upper bound of the randomized reconnect delay
+            timeout: Seconds within which the last batch must be closed
+        """
+        if self._drain_task is None:
+            if batch_size is None:
+                batch_size = settings.WS_DRAIN_BATCH_SIZE
+            if batch_interval is None:
+                batch_interval = settings.WS_DRAIN_BATCH_INTERVAL_SECONDS
+            if reconnect_window is None:
+                reconnect_window = settings.WS_DRAIN_RECONNECT_WINDOW_SECONDS
+            if timeout is None:
+                timeout = settings.WS_DRAIN_TIMEOUT_SECONDS
+            self._drain_task = asyncio.ensure_future(
+                self._drain(
+                    max(batch_size, 1), batch_interval, reconnect_window, timeout
+                )
+            )
+        await asyncio.shield(self._drain_task)
+
+    async def _drain(
+        self,
+        batch_size: int,
+        batch_interval: float,
+        reconnect_window: float,
+        timeout: float,
+    ):
+        """Send reconnect hints, then close connections in paced batches"""
+        # Spectators reconnect by themselves; the retry field spreads them out
+        for stream in self.spectators.streams():
+            stream.close(encode_retry(random.uniform(0, reconnect_window) * 1000))
+
+        sockets = list(self._connections)
+        if not sockets:
+            return
+        logger.info(f"Draining {len(sockets)} connections")
+
+        # Jitter per client so reconnects spread over the whole window
+        await asyncio.gather(
+            *(
+                self._send_bounded(
+                    websocket,
+                    Frame.from_message(
+                        {
+                            "type": RECONNECT_MESSAGE_TYPE,
+                            "reason": "server_restart",
+                            "reconnect_after_ms": int(
+                                random.uniform(0, reconnect_window) * 1000
+                            ),
+                        }
+                    ),
+                )
+                for websocket in sockets
+            )
+        )
+        await self._wait_for_outbound(sockets, self.send_timeout)
+
+        batches = math.ceil(len(sockets) / batch_size)
+        if batches > 1:
+            batch_interval = min(batch_interval, timeout / (batches - 1))
+        for start in range(0, len(sockets), batch_size):
+            if start:
+                await asyncio.sleep(batch_interval)
+            batch = sockets[start : start + batch_size]
+            for websocket in batch:
+                for session_id in self.get_connection_sessions(websocket):
+                    self.disconnect(websocket, session_id)
+            await asyncio.gather(
+                *(
+                    self._close_quietly(websocket, status.WS_1012_SERVICE_RESTART)
+                    for websocket in batch
+                )
+            )
+            self.drained += len(batch)
+        logger.info(f"Drained {len(sockets)} connections")
+
+    async def _send_bounded(self, websocket: WebSocket, frame: Frame):
+        """Queue a frame, or write it directly within the send deadline"""
+        connection = self._connections.get(websocket)
+        if connection is not None and connection.queue is not None:
+            self._enqueue(websocket, frame)
+        else:
+            await self._write_with_deadline(websocket, frame)
+
+    async def _wait_for_outbound(self, sockets: List[WebSocket], timeout: float):
+        """Wait (bounded) until the sockets' outbound queues are empty"""
+        deadline = time.monotonic() + timeout
+        connections = self._connections
+        while time.monotonic() < deadline:
+            if not any(
+                len(connections[websocket].queue)
+                for websocket in sockets
+                if websocket in connections and connections[websocket].queue is not None
+            ):
+                return
+            await asyncio.sleep(0.01)
+
+    def _spawn(self, coro):
+        """Run a coroutine in the background, keeping a reference until done"""
+        task = asyncio.ensure_future(coro)
+        self._background_tasks.add(task)
+        task.add_done_callback(self._background_tasks.discard)
+        return task
+
+    async def connect(
+        self,
+        websocket: WebSocket,
+        session_id: str,
+        user_id: Optional[str] = None,
+        facilitator: bool = False,
+        org_id: Optional[str] = None,
+        plan: Optional[str] = None,
+    ) -> bool:
         """
         Accept a new WebSocket connection and add it to a session
 
+        The codec is negotiated from the subprotocols the client offered;
+        the chosen one is confirmed in the handshake response. A new socket
+        must first pass admission control: a refused one is still accepted,
+        so it can be sent a ``connection_rejected`` message with a retry
+        hint, and is then closed with 1013 (Try Again Later).
+
         Args:
             websocket: The WebSocket connection to accept
             session_id: The session/room ID to join
+            user_id: Authenticated user owning the connection, if known
+            facilitator: Whether the user runs the session (receives
+                facilitator-only messages)
+            org_id: Organization of the user, if known
+            plan: Plan of the organization, selecting its connection quota
+
+        Returns:
+            True if this is the user's first connection in the session (the
+            user joined), False for another tab of a user already present
+
+        Raises:
+            AdmissionRefused: If a connection limit is reached (the socket
+                has been closed)
         """
-        await websocket.accept()
+        codec = negotiate(websocket.scope.get("subprotocols", ()), self.subprotocols)
+        refusal = None
+        reserved = False
+        if websocket not in self._connections:
+            # Checked and reserved before the first await, so concurrent
+            # handshakes cannot all pass against the same count
+            try:
+                self.admission.check(
+                    len(self._connections) + self._pending_connections,
+                    len(self._org_sockets.get(org_id, ()))
+                    + self._pending_orgs.get(org_id, 0),
+                    len(self._user_sockets.get(user_id, ()))
+                    + self._pending_users.get(user_id, 0),
+                    plan,
+                )
+                self._reserve(org_id, user_id)
+                reserved = True
+            except AdmissionRefused as e:
+                refusal = e
+        try:
+            await websocket.accept(
+                subprotocol=codec.name if codec is not None else None
+            )
+        finally:
+            # The socket is registered below without awaiting, so the slot
+            # passes from the reservation to the indexes atomically
+            if reserved:
+                self._release(org_id, user_id)
+        if refusal is not None:
+            await self._refuse(websocket, codec, refusal)
+            raise refusal
+
+        connections = self.active_connections.get(session_id)
+        is_new_session = connections is None
+        if is_new_session:
+            connections = self.active_connections[session_id] = {}
+
+        connections[websocket] = None
+        connection = self._connections.get(websocket)
+        is_new_socket = connection is None
+        if is_new_socket:
+            connection = self._connections[websocket] = Connection(
+                websocket,
+                session_id,
+                user_id,
+                org_id,
+                codec if codec is not JSON_CODEC else None,
+            )
+            if user_id is not None:
+                self._user_sockets.setdefault(user_id, {})[websocket] = None
+            if org_id is not None:
+                org_sockets = self._org_sockets.get(org_id)
+                if org_sockets is None:
+                    org_sockets = self._org_sockets[org_id] = {}
+                    if self.backplane is not None:
+                        self._spawn(
+                            self._subscribe_backplane(organization_channel(org_id))
+                        )
+                org_sockets[websocket] = None
+        elif session_id not in connection.sessions:
+            connection.sessions += (session_id,)
+        if facilitator:
+            self.subscribe(websocket, facilitator_channel(session_id))
+        first_connection = self.presence.add(
+            session_id, websocket if user_id is None else user_id, websocket
+        )
+        if first_connection:
+            self.subscribe(websocket, primary_channel(session_id))
+
+        if is_new_socket and self.outbound_queue_size > 0:
+            connection.queue = OutboundQueue(
+                self.outbound_queue_size, self.overflow_policy
+            )
+            connection.writer = asyncio.ensure_future(self._writer(connection))
+        self.heartbeat.track(websocket)
+
+        logger.info(
+            f"Client connected to session {session_id}. Total connections: {len(connections)}"
+        )
+
+        if is_new_session and self.backplane is not None:
+            try:
+                await self.backplane.subscribe(session_id)
+            except Exception as e:
+                # Local delivery still works without the backplane
+                logger.error(
+                    f"Backplane subscribe failed for session {session_id}: {e}"
+                )
+        return first_connection
 
-        if session_id not in self.active_connections:
-            self.active_connections[session_id] = []
+    def _reserve(self, org_id: Optional[str], user_id: Optional[str]):
+        """Hold an admission slot for a socket being accepted"""
+        self._pending_connections += 1
+        if org_id is not None:
+            self._pending_orgs[org_id] = self._pending_orgs.get(org_id, 0) + 1
+        if user_id is not None:
+            self._pending_users[user_id] = self._pending_users.get(user_id, 0) + 1
 
-        self.active_connections[session_id].append(websocket)
+    def _release(self, org_id: Optional[str], user_id: Optional[str]):
+        """Give back a slot held by ``_reserve``"""
+        self._pending_connections -= 1
+        for pending, key in (
+            (self._pending_orgs, org_id),
+            (self._pending_users, user_id),
+        ):
+            if key is None:
+                continue
+            if pending[key] <= 1:
+                del pending[key]
+            else:
+                pending[key] -= 1
+
+    async def _refuse(
+        self, websocket: WebSocket, codec: Optional[Codec], refusal: AdmissionRefused
+    ):
+        """Tell a refused client when to retry, then close it with 1013"""
         logger.info(
-            f"Client connected to session {session_id}. Total connections: {len(self.active_connections[session_id])}"
+            f"Connection refused ({refusal.reason}), "
+            f"retry hinted in {refusal.retry_after_ms}ms"
+        )
+        frame = Frame.from_message(refusal.to_message()).for_codec(codec)
+        try:
+            async with asyncio.timeout(self.send_timeout):
+                await frame.write(websocket)
+        except Exception as e:
+            logger.debug(f"Error sending refusal: {e}")
+        await self._close_quietly(
+            websocket, status.WS_1013_TRY_AGAIN_LATER, refusal.reason
         )
 
-    def disconnect(self, websocket: WebSocket, session_id: str):
+    def disconnect(self, websocket: WebSocket, session_id: str) -> bool:
         """
         Remove a WebSocket connection from a session
 
         Args:
             websocket: The WebSocket connection to remove
             session_id: The session ID to remove from
+
+        Returns:
+            True if it was the user's last connection in the session (the
+            user left); False otherwise, including if it was not connected
+        """
+        connections = self.active_connections.get(session_id)
+        if connections is None or websocket not in connections:
+            return False
+        del connections[websocket]
+        self.leaderboards.forget(websocket, session_id)
+        connection = self._connections.get(websocket)
+        if connection is not None:
+            if connection.teams is not None:
+                connection.teams.pop(session_id, None)
+            for channel in self.get_channels(websocket, session_id):
+                self.unsubscribe(websocket, channel)
+        user = websocket
+        if connection is not None and connection.user_id is not None:
+            user = connection.user_id
+        user_left = self.presence.remove(session_id, user, websocket)
+        if not user_left:
+            # The user's next oldest socket takes over primary-only payloads
+            self.subscribe(
+                self.presence.primary(session_id, user), primary_channel(session_id)
+            )
+
+        logger.info(
+            f"Client disconnected from session {session_id}. Remaining connections: {len(connections)}"
+        )
+
+        if connection is not None:
+            connection.sessions = tuple(
+                joined for joined in connection.sessions if joined != session_id
+            )
+            if not connection.sessions:
+                # Socket left its last session: drop it from every index
+                del self._connections[websocket]
+                self._forget_user(connection)
+                self._forget_org(connection)
+                self.heartbeat.forget(websocket)
+                self._stop_writer(connection)
+
+        # Clean up empty session
+        if not connections:
+            del self.active_connections[session_id]
+            logger.info(f"Session {session_id} removed (no active connections)")
+            self._release_session(session_id)
+        return user_left
+
+    def add_spectator(
+        self,
+        session_id: str,
+        last_event_id: Optional[str] = None,
+        welcome: Optional[dict] = None,
+    ) -> SpectatorStream:
+        """
+        Register a read-only Server-Sent Events spectator of a session
+
+        Spectators receive every session broadcast (as pre-encoded SSE
+        events) but are not participants: they are not announced and not
+        counted in ``participant_count``. The welcome and catch-up events
+        are queued before any live event can be, so they neither overlap
+        nor leave a gap. Registration is synchronous; the backplane
+        subscription of a session new to this node is made in the
+        background.
+
+        Args:
+            session_id: The session to watch
+            last_event_id: ``Last-Event-ID`` of a reconnecting spectator
+            welcome: First message to send, completed with the session's
+                current ``epoch`` and ``seq``
+
+        Returns:
+            The spectator's stream; pass it to ``remove_spectator`` when done
+        """
+        is_new_session = not self._has_local(session_id)
+        stream = self.spectators.open(session_id)
+        if welcome is not None:
+            epoch, seq = self.event_log.position(session_id)
+            stream.push(encode_message({**welcome, "epoch": epoch, "seq": seq}))
+        if last_event_id is not None:
+            epoch, last_seq = parse_event_id(last_event_id)
+            missed = self.catch_up_spectator(
+                session_id, 0 if last_seq is None else last_seq, epoch
+            )
+            if missed:
+                stream.push(missed)
+        if is_new_session and self.backplane is not None:
+            self._spawn(self._subscribe_backplane(session_id))
+        return stream
+
+    def remove_spectator(self, session_id: str, stream: SpectatorStream):
+        """
+        Unregister a spectator (no-op if already removed)
+
+        Args:
+            session_id: The session it watched
+            stream: Stream returned by ``add_spectator``
+        """
+        if self.spectators.remove(session_id, stream) and not self._has_local(
+            session_id
+        ):
+            self._release_session(session_id)
+
+    def catch_up_spectator(
+        self, session_id: str, last_seq: int, epoch: Optional[str]
+    ) -> bytes:
+        """
+        SSE events a reconnecting spectator missed
+
+        Like ``resume``: the retained frames after ``last_seq``, or a
+        ``session_snapshot`` event if they are gone or the epoch differs.
+
+        Args:
+            session_id: The session watched
+            last_seq: Sequence number from the spectator's Last-Event-ID
+            epoch: Epoch from the spectator's Last-Event-ID
+
+        Returns:
+            The encoded events (possibly empty)
         """
-        if session_id in self.active_connections:
-            if websocket in self.active_connections[session_id]:
-                self.active_connections[session_id].remove(websocket)
-                logger.info(
-                    f"Client disconnected from session {session_id}. Remaining connections: {len(self.active_connections[session_id])}"
+        current_epoch, _ = self.event_log.position(session_id)
+        missed = self.event_log.replay(session_id, last_seq, epoch)
+        if missed is None:
+            snapshot = self.event_log.snapshot(session_id)
+            snapshot["participant_count"] = self.get_participant_count(session_id)
+            return encode_event(Frame.from_message(snapshot), current_epoch)
+        return b"".join(
+            event
+            for event in (encode_event(frame, current_epoch) for frame in missed)
+            if event is not None
+        )
+
+    def _has_local(self, session_id: str) -> bool:
+        """Whether the session has connections or spectators on this node"""
+        return session_id in self.active_connections or session_id in self.spectators
+
+    def _release_session(self, session_id: str):
+        """Expire the log and backplane subscription of a session left empty"""
+        if self._has_local(session_id):
+            return
+        self.event_log.expire(session_id)
+        self.reveals.release(session_id)
+        self.tallies.discard(session_id)
+        self.leaderboards.clear(session_id)
+        if self.backplane is not None:
+            self._spawn(self._unsubscribe_if_empty(session_id))
+
+    def subscribe(self, websocket: WebSocket, channel: str) -> bool:
+        """
+        Add a connection to a sub-channel of one of its sessions
+
+        A connection can be in any number of sub-channels at once. The first
+        local subscriber makes this node subscribe to the channel on the
+        backplane (in the background), so other nodes' broadcasts to it
+        arrive here only while someone can receive them.
+
+        Args:
+            websocket: The connection subscribing
+            channel: Sub-channel name, e.g. ``team_channel(session_id, team)``
+
+        Returns:
+            True if subscribed; False for session channels (joined with
+            ``connect``) or if the connection is not in the channel's session
+        """
+        session_id = session_of(channel)
+        if is_session_channel(channel) or not self.is_connected(websocket, session_id):
+            return False
+        members = self._channels.get(channel)
+        if members is None:
+            members = self._channels[channel] = {}
+            if self.backplane is not None:
+                self._spawn(self._subscribe_backplane(channel))
+        members[websocket] = None
+        connection = self._connections[websocket]
+        if channel not in connection.channels:
+            connection.channels += (channel,)
+        return True
+
+    def unsubscribe(self, websocket: WebSocket, channel: str):
+        """
+        Remove a connection from a sub-channel (no-op if not subscribed)
+
+        Args:
+            websocket: The connection unsubscribing
+            channel: Sub-channel name
+        """
+        connection = self._connections.get(websocket)
+        if connection is None or channel not in connection.channels:
+            return
+        connection.channels = tuple(
+            subscribed for subscribed in connection.channels if subscribed != channel
+        )
+        members = self._channels[channel]
+        del members[websocket]
+        if not members:
+            del self._channels[channel]
+            if self.backplane is not None:
+                self._spawn(self._unsubscribe_if_empty(channel))
+
+    def get_channels(self, websocket: WebSocket, session_id: str) -> Set[str]:
+        """
+        Get the sub-channels a connection subscribed to in a session
+
+        Args:
+            websocket: The connection to look up
+            session_id: The session to check
+
+        Returns:
+            Copy of the sub-channel names (empty if none)
+        """
+        connection = self._connections.get(websocket)
+        if connection is None:
+            return set()
+        return {
+            channel
+            for channel in connection.channels
+            if session_of(channel) == session_id
+        }
+
+    def set_team(self, websocket: WebSocket, session_id: str, team_id: str):
+        """
+        Put a connection in a team within a session (leaving any previous one)
+
+        Joining a team subscribes the connection to the team's channel.
+
+        Args:
+            websocket: The connection joining the team
+            session_id: Session the team belongs to
+            team_id: Team to join
+        """
+        if not self.is_connected(websocket, session_id):
+            return
+        self.leave_team(websocket, session_id)
+        connection = self._connections[websocket]
+        if connection.teams is None:
+            connection.teams = {}
+        connection.teams[session_id] = team_id
+        self.subscribe(websocket, team_channel(session_id, team_id))
+
+    def leave_team(self, websocket: WebSocket, session_id: str):
+        """
+        Remove a connection from its team in a session, if any
+
+        Args:
+            websocket: The connection leaving its team
+            session_id: Session the team belongs to
+        """
+        connection = self._connections.get(websocket)
+        if connection is None or connection.teams is None:
+            return
+        team_id = connection.teams.pop(session_id, None)
+        if team_id is not None:
+            self.unsubscribe(websocket, team_channel(session_id, team_id))
+
+    def get_team(self, websocket: WebSocket, session_id: str) -> Optional[str]:
+        """
+        Get the team a connection joined in a session
+
+        Args:
+            websocket: The connection to look up
+            session_id: The session to check
+
+        Returns:
+            The team ID, or None if the connection has no team
+        """
+        connection = self._connections.get(websocket)
+        if connection is None or connection.teams is None:
+            return None
+        return connection.teams.get(session_id)
+
+    def _forget_user(self, connection: Connection):
+        """Remove a socket from the user -> sockets index"""
+        user_id = connection.user_id
+        if user_id is None:
+            return
+        sockets = self._user_sockets.get(user_id)
+        if sockets is not None:
+            sockets.pop(connection.websocket, None)
+            if not sockets:
+                del self._user_sockets[user_id]
+
+    def _forget_org(self, connection: Connection):
+        """Remove a socket from the organization -> sockets index"""
+        org_id = connection.org_id
+        if org_id is None:
+            return
+        sockets = self._org_sockets.get(org_id)
+        if sockets is not None:
+            sockets.pop(connection.websocket, None)
+            if not sockets:
+                del self._org_sockets[org_id]
+                if self.backplane is not None:
+                    self._spawn(
+                        self._unsubscribe_if_empty(organization_channel(org_id))
+                    )
+
+    def _is_local_channel(self, channel: str) -> bool:
+        """Whether this node has sockets a backplane channel delivers to"""
+        org_id = organization_of(channel)
+        if org_id is not None:
+            return org_id in self._org_sockets
+        return self._has_local(channel) or channel in self._channels
+
+    async def _subscribe_backplane(self, channel: str):
+        """Subscribe to a channel on the backplane unless it emptied"""
+        if not self._is_local_channel(channel):
+            return
+        try:
+            await self.backplane.subscribe(channel)
+        except Exception as e:
+            logger.error(f"Backplane subscribe failed for channel {channel}: {e}")
+
+    async def _unsubscribe_if_empty(self, channel: str):
+        """Drop the backplane subscription unless the channel came back"""
+        if self._is_local_channel(channel):
+            return
+        try:
+            await self.backplane.unsubscribe(channel)
+        except Exception as e:
+            logger.error(f"Backplane unsubscribe failed for channel {channel}: {e}")
+
+    def _stop_writer(self, connection: Connection):
+        """Cancel a departed connection's writer task"""
+        writer = connection.writer
+        if writer is not None and writer is not asyncio.current_task():
+            writer.cancel()
+
+    async def _writer(self, connection: Connection):
+        """
+        Drain one connection's outbound queue onto its socket
+
+        Each write is bounded by ``send_timeout``; a connection that misses
+        the deadline is evicted and one that errors is disconnected.
+
+        Args:
+            connection: The record of the connection this task writes to
+        """
+        websocket = connection.websocket
+        queue = connection.queue
+        session_id = connection.session_id
+        while True:
+            frame = await queue.get()
+            try:
+                # asyncio.timeout avoids the extra task wait_for creates per send
+                async with asyncio.timeout(self.send_timeout):
+                    await frame.write(websocket)
+                self.outbound_bytes += frame.size
+                connection.sent(frame)
+            except asyncio.TimeoutError:
+                self.send_timeouts += 1
+                self._evict(
+                    websocket, session_id, f"send exceeded {self.send_timeout}s"
+                )
+                return
+            except Exception as e:
+                self.send_failures += 1
+                logger.error(
+                    f"Error writing to connection in session {session_id}: {e}"
                 )
+                self.disconnect(websocket, session_id)
+                return
 
-                # Clean up empty session
-                if not self.active_connections[session_id]:
-                    del self.active_connections[session_id]
-                    logger.info(f"Session {session_id} removed (no active connections)")
+    def _enqueue(self, websocket: WebSocket, frame: Frame):
+        """
+        Queue a frame for a connection, applying the overflow policy
 
-    async def send_personal_message(self, message: dict, websocket: WebSocket):
+        Args:
+            websocket: Target connection
+            frame: Frame to deliver
+        """
+        connection = self._connections.get(websocket)
+        if connection is not None and connection.queue is not None:
+            self._put(connection, frame)
+
+    def _put(self, connection: Connection, frame: Frame):
+        """Queue a frame on a queued connection's record"""
+        if not connection.queue.put(frame.for_codec(connection.codec)):
+            self.overflow_disconnects += 1
+            self._evict(
+                connection.websocket,
+                connection.session_id,
+                f"outbound queue full ({connection.queue.maxsize} frames)",
+            )
+
+    async def send_personal_message(
+        self, message: OutboundMessage, websocket: WebSocket
+    ):
         """
         Send a message to a specific WebSocket connection
 
+        Without outbound queues the write is bounded by ``send_timeout`` like
+        a broadcast, and a connection missing it is evicted, so a stalled
+        client cannot hold up the caller (e.g. a leaderboard fan-out).
+
         Args:
-            message: The message to send (will be JSON serialized)
+            message: A message dict (will be JSON serialized), a pre-encoded
+                Frame, or pre-encoded text/bytes
             websocket: The target WebSocket connection
         """
+        frame = as_frame(message)
+        connection = self._connections.get(websocket)
+        if connection is not None and connection.queue is not None:
+            # Keep ordering with broadcasts already queued for this socket
+            self._enqueue(websocket, frame)
+            return
+        frame = frame.for_codec(connection.codec if connection is not None else None)
         try:
-            await websocket.send_json(message)
+            async with asyncio.timeout(self.send_timeout):
+                await frame.write(websocket)
+            self.outbound_bytes += frame.size
+            if connection is not None:
+                connection.sent(frame)
+        except asyncio.TimeoutError:
+            self.send_timeouts += 1
+            reason = f"send exceeded {self.send_timeout}s"
+            if connection is not None:
+                self._evict(websocket, connection.session_id, reason)
+            else:
+                logger.warning(f"Closing slow unregistered connection: {reason}")
+                self._spawn(self._close_quietly(websocket))
         except Exception as e:
             logger.error(f"Error sending personal message: {e}")
 
-    async def broadcast_to_session(self, session_id: str, message: dict):
+    async def receive_message(self, websocket: WebSocket) -> Any:
+        """
+        Receive and decode the next message using the connection's codec
+
+        Args:
+            websocket: The connection to read from
+
+        Returns:
+            The decoded message
+
+        Raises:
+            WebSocketDisconnect: If the client disconnected
+        """
+        connection = self._connections.get(websocket)
+        codec = connection.codec if connection is not None else None
+        if codec is None:
+            message = await websocket.receive_json()
+        else:
+            message = codec.decode(await websocket.receive_bytes())
+        # Any inbound message proves the connection is alive
+        self.heartbeat.touch(websocket)
+        if connection is not None:
+            connection.messages_received += 1
+        return message
+
+    def _send_ping(self, websocket: WebSocket):
+        """Heartbeat callback: queue (or write, bounded) a ping to a socket"""
+        connection = self._connections.get(websocket)
+        if connection is not None and connection.queue is not None:
+            self._enqueue(websocket, PING_FRAME)
+        else:
+            self._spawn(self._write_with_deadline(websocket, PING_FRAME))
+
+    async def _write_with_deadline(self, websocket: WebSocket, frame: Frame):
+        """Write a frame directly, ignoring failures the reaper will catch"""
+        connection = self._connections.get(websocket)
+        frame = frame.for_codec(connection.codec if connection is not None else None)
+        try:
+            async with asyncio.timeout(self.send_timeout):
+                await frame.write(websocket)
+            self.outbound_bytes += frame.size
+            if connection is not None:
+                connection.sent(frame)
+        except Exception as e:
+            logger.debug(f"Error writing frame: {e}")
+
+    def _reap(self, websocket: WebSocket):
+        """
+        Heartbeat callback: drop a connection that stopped answering
+
+        The socket is removed from every session, remaining participants are
+        told it left, and it is closed in the background.
+
+        Args:
+            websocket: The dead connection
+        """
+        user_id = self._user_of(websocket)
+        sessions = self.get_connection_sessions(websocket)
+        logger.warning(
+            f"Reaping unresponsive connection of user {user_id} "
+            f"(missed {self.heartbeat.max_missed} heartbeats)"
+        )
+        for session_id in sessions:
+            if self.disconnect(websocket, session_id):
+                self._announce_left(session_id, user_id)
+        self._spawn(self._close_quietly(websocket, status.WS_1001_GOING_AWAY))
+
+    def _announce_left(self, session_id: str, user_id: Optional[str]):
+        """
+        Tell a session in the background that a server-dropped socket left
+
+        The endpoint skips its own ``user_left`` for sockets that are no
+        longer registered, so each departure is announced once.
+
+        Args:
+            session_id: Session the socket was removed from
+            user_id: Owner of the socket, if known
+        """
+        self._spawn(
+            self.broadcast_to_session(
+                session_id,
+                {
+                    "type": "user_left",
+                    "user_id": user_id,
+                    "session_id": session_id,
+                    "participant_count": self.get_participant_count(session_id),
+                },
+            )
+        )
+
+    def get_codec(self, websocket: WebSocket) -> Codec:
+        """
+        Get the codec a connection negotiated
+
+        Args:
+            websocket: The connection to look up
+
+        Returns:
+            The connection's codec (JSON unless a binary one was negotiated)
+        """
+        connection = self._connections.get(websocket)
+        if connection is None or connection.codec is None:
+            return JSON_CODEC
+        return connection.codec
+
+    async def broadcast_to_session(
+        self, session_id: str, message: OutboundMessage, coalesce: bool = True
+    ):
         """
         Broadcast a message to all connections in a session
 
+        The message is encoded once and the same frame is handed to every
+        connection. With outbound queues enabled the frame is only enqueued
+        and this returns without touching the network; otherwise sends are
+        bounded by ``send_timeout``. Connections that fail, miss the deadline
+        or overflow their queue (under the disconnect policy) are counted and
+        evicted from the session. With a backplane configured the frame is
+        also published once so other nodes can deliver it to their own
+        connections.
+
+        Message dicts whose type has a coalescing tick are buffered and sent
+        as part of the session's next batch instead (unless ``coalesce`` is
+        False). Any other broadcast first flushes the session's pending batch
+        so clients still see events in order.
+
         Args:
             session_id: The session ID to broadcast to
-            message: The message to send (will be JSON serialized)
+            message: A message dict (will be JSON serialized), a pre-encoded
+                Frame, or pre-encoded text/bytes
+            coalesce: Allow buffering the message into a batch
         """
-        if session_id not in self.active_connections:
+        coalescer = self.coalescer
+        if isinstance(message, dict) and coalesce and coalescer.accepts(message):
+            coalescer.add(session_id, message)
+            return
+        if coalescer.has_pending(session_id):
+            await coalescer.flush(session_id)
+
+        await self._broadcast_now(session_id, message)
+
+    async def _broadcast_now(self, session_id: str, message: OutboundMessage):
+        """Number, encode, publish and fan out a message without coalescing"""
+        if self.backplane is None and not self._has_local(session_id):
             logger.warning(
                 f"Attempted to broadcast to non-existent session: {session_id}"
             )
             return
 
-        # Send to all connections, removing any that fail
-        disconnected = []
-        for connection in self.active_connections[session_id]:
+        started = time.perf_counter()
+        frame = self._number(session_id, message)
+
+        if self.backplane is not None:
+            try:
+                await self.backplane.publish(session_id, frame)
+            except Exception as e:
+                logger.error(f"Backplane publish failed for session {session_id}: {e}")
+
+        await self._broadcast_local(session_id, frame)
+        self.broadcast_latency.observe(time.perf_counter() - started)
+
+    def _number(self, session_id: str, message: OutboundMessage) -> Frame:
+        """
+        Encode a session event, numbering and logging it if it has local
+        connections
+
+        Opaque pre-encoded text/bytes cannot carry a ``seq`` and are sent
+        unnumbered.
+
+        Args:
+            session_id: Session the event is broadcast to
+            message: The event
+
+        Returns:
+            The frame to deliver
+        """
+        if isinstance(message, Frame):
+            source = message.message
+        elif isinstance(message, dict):
+            source = message
+        else:
+            source = None
+        if source is None or not self._has_local(session_id):
+            return as_frame(message)
+        return self.event_log.record(session_id, source)
+
+    async def _deliver_remote(self, session_id: str, frame: Frame):
+        """
+        Fan out a frame another node published to this node's sockets
+
+        Sequence numbers are per node, so the frame is renumbered in this
+        node's log (decoded once per broadcast, not per socket). Frames
+        published to a sub-channel or an organization are delivered to its
+        local sockets as they are; only session events are numbered.
+        """
+        org_id = organization_of(session_id)
+        if org_id is not None:
+            await self._deliver_organization(org_id, frame)
+            return
+        if not is_session_channel(session_id):
+            await self._deliver_channel(session_id, frame)
+            return
+        if not self._has_local(session_id):
+            return
+        if frame.message is None and not frame.is_binary:
+            try:
+                message = json.loads(frame.data)
+            except ValueError:
+                message = None
+            if isinstance(message, dict):
+                frame = Frame(frame.data, frame.message_type, message)
+        await self._broadcast_local(session_id, self._number(session_id, frame))
+
+    async def resume(
+        self,
+        websocket: WebSocket,
+        session_id: str,
+        last_seq: int,
+        epoch: Optional[str] = None,
+    ) -> bool:
+        """
+        Catch a reconnecting client up on the events it missed
+
+        The missed frames are replayed exactly as they were broadcast. If
+        they are no longer all retained (or ``epoch`` does not match this
+        node's log), a compact ``session_snapshot`` is sent instead. Clients
+        ignore events whose ``seq`` they have already processed, since live
+        broadcasts may interleave with the replay.
+
+        Args:
+            websocket: The reconnected connection
+            session_id: Session it rejoined
+            last_seq: Last sequence number the client processed
+            epoch: Epoch of the client's sequence numbers
+
+        Returns:
+            True if the gap was replayed, False if a snapshot was sent
+        """
+        missed = self.event_log.replay(session_id, last_seq, epoch)
+        if missed is None:
+            snapshot = self.event_log.snapshot(session_id)
+            snapshot["participant_count"] = self.get_participant_count(session_id)
+            await self.send_personal_message(snapshot, websocket)
+            self._advance_cursor(websocket, session_id)
+            return False
+        for frame in missed:
+            await self.send_personal_message(frame, websocket)
+        self._advance_cursor(websocket, session_id)
+        return True
+
+    def _advance_cursor(self, websocket: WebSocket, session_id: str):
+        """Move a caught-up connection's cursor to the session's position"""
+        connection = self._connections.get(websocket)
+        if connection is not None and connection.session_id == session_id:
+            connection.last_seq = max(
+                connection.last_seq, self.event_log.position(session_id)[1]
+            )
+
+    async def _broadcast_local(self, session_id: str, frame: Frame):
+        """
+        Deliver a frame to this node's connections and spectators in a session
+
+        Args:
+            session_id: The session ID to deliver to
+            frame: The encoded frame
+        """
+        if session_id in self.spectators:
+            self.spectators.publish(
+                session_id, frame, self.event_log.position(session_id)[0]
+            )
+
+        connections = self.active_connections.get(session_id)
+        if connections is None:
+            return
+
+        # Snapshot the recipients so concurrent connects/disconnects are safe
+        message = frame.message
+        seq = message.get("seq") if isinstance(message, dict) else None
+        await self._deliver(session_id, list(connections), frame, seq)
+
+    async def broadcast_to_channel(self, channel: str, message: OutboundMessage):
+        """
+        Send a message to the members of a session or sub-channel
+
+        A session channel is a regular ``broadcast_to_session``. A
+        sub-channel message is encoded once, published once on the
+        backplane, and delivered only to the channel's subscribers, so the
+        rest of the session never receives (and never filters) it.
+        Sub-channel messages are not numbered in the session event log.
+
+        Args:
+            channel: Session ID or sub-channel name
+            message: A message dict, a pre-encoded Frame, or text/bytes
+        """
+        if is_session_channel(channel):
+            await self.broadcast_to_session(channel, message)
+            return
+
+        frame = as_frame(message)
+        if self.backplane is not None:
+            try:
+                await self.backplane.publish(channel, frame)
+            except Exception as e:
+                logger.error(f"Backplane publish failed for channel {channel}: {e}")
+        await self._deliver_channel(channel, frame)
+
+    async def _deliver_channel(self, channel: str, frame: Frame):
+        """Deliver a frame to this node's subscribers of a sub-channel"""
+        members = self._channels.get(channel)
+        if members:
+            await self._deliver(session_of(channel), list(members), frame)
+
+    async def broadcast_to_team(
+        self, session_id: str, team_id: str, message: OutboundMessage
+    ):
+        """
+        Send a message to the connections of one team in a session
+
+        Args:
+            session_id: The session the team belongs to
+            team_id: The team to deliver to
+            message: A message dict, a pre-encoded Frame, or text/bytes
+        """
+        await self.broadcast_to_channel(team_channel(session_id, team_id), message)
+
+    async def broadcast_to_facilitators(
+        self, session_id: str, message: OutboundMessage
+    ):
+        """
+        Send a message to the facilitator connections of a session
+
+        Args:
+            session_id: The session whose facilitators to reach
+            message: A message dict, a pre-encoded Frame, or text/bytes
+        """
+        await self.broadcast_to_channel(facilitator_channel(session_id), message)
+
+    async def broadcast_to_primaries(self, session_id: str, message: OutboundMessage):
+        """
+        Send a message to one socket per user in a session
+
+        For heavy payloads that a user needs once, not once per open tab.
+        Each node picks the primary among its own sockets, so a user whose
+        tabs are connected to different nodes gets one copy per node.
+
+        Args:
+            session_id: The session to deliver to
+            message: A message dict, a pre-encoded Frame, or text/bytes
+        """
+        await self.broadcast_to_channel(primary_channel(session_id), message)
+
+    async def broadcast_to_organization(self, org_id: str, message: OutboundMessage):
+        """
+        Send a message to every connection of an organization, in any session
+
+        For tenant-wide announcements. Recipients come from the
+        organization -> sockets index, so the cost is proportional to the
+        tenant's sockets, not to every session on the node. The message is
+        encoded once, published once on the backplane and written once per
+        socket, even for a socket that joined several sessions. It is not
+        numbered in any session's event log, so it is not replayed.
+
+        Args:
+            org_id: The organization to deliver to
+            message: A message dict, a pre-encoded Frame, or text/bytes
+        """
+        frame = as_frame(message)
+        if self.backplane is not None:
+            try:
+                await self.backplane.publish(organization_channel(org_id), frame)
+            except Exception as e:
+                logger.error(f"Backplane publish failed for organization {org_id}: {e}")
+        await self._deliver_organization(org_id, frame)
+
+    async def _deliver_organization(self, org_id: str, frame: Frame):
+        """Deliver a frame to this node's connections of an organization"""
+        sockets = self._org_sockets.get(org_id)
+        if sockets:
+            await self._deliver(None, list(sockets), frame)
+
+    async def _deliver(
+        self,
+        session_id: Optional[str],
+        connections: List[WebSocket],
+        frame: Frame,
+        seq: Optional[int] = None,
+    ):
+        """
+        Deliver a frame to a list of this node's connections in a session
+
+        Args:
+            session_id: The session the connections belong to (None: any;
+                failed sockets are then dropped from the session they
+                connected to)
+            connections: Recipients (a snapshot, safe to mutate the registry)
+            frame: The encoded frame
+            seq: Sequence number of a session event, advancing the
+                recipients' cursors
+        """
+        records = self._connections
+        if self.outbound_queue_size > 0:
+            for websocket in connections:
+                connection = records.get(websocket)
+                if connection is None or connection.queue is None:
+                    continue
+                if seq is not None and connection.session_id == session_id:
+                    connection.last_seq = seq
+                self._put(connection, frame)
+            return
+
+        if seq is not None:
+            for websocket in connections:
+                connection = records.get(websocket)
+                if connection is not None and connection.session_id == session_id:
+                    connection.last_seq = seq
+
+        if self.concurrent_broadcast:
+            failed, timed_out = await self._fan_out_concurrent(
+                session_id, connections, frame
+            )
+        else:
+            failed, timed_out = await self._fan_out_sequential(
+                session_id, connections, frame
+            )
+
+        # Clean up failed connections
+        for connection in failed:
+            self.disconnect(connection, session_id or self._home_session(connection))
+
+        # Evict slow consumers so they cannot stall the next broadcast
+        for connection in timed_out:
+            self._evict(
+                connection,
+                session_id or self._home_session(connection),
+                f"send exceeded {self.send_timeout}s",
+            )
+
+    def _home_session(self, websocket: WebSocket) -> str:
+        """Session a socket connected to ("" if it is already gone)"""
+        connection = self._connections.get(websocket)
+        return connection.session_id if connection is not None else ""
+
+    async def _fan_out_sequential(
+        self, session_id: str, connections: List[WebSocket], frame: Frame
+    ):
+        """
+        Send to each connection in turn, each send bounded by the deadline
+
+        Returns:
+            Tuple of (failed connections, timed out connections)
+        """
+        failed = []
+        timed_out = []
+        records = self._connections
+        for connection in connections:
+            record = records.get(connection)
+            variant = frame.for_codec(record.codec if record is not None else None)
             try:
-                await connection.send_json(message)
+                # asyncio.timeout avoids the extra task wait_for creates per send
+                async with asyncio.timeout(self.send_timeout):
+                    await variant.write(connection)
+                self.outbound_bytes += variant.size
+                if record is not None:
+                    record.sent(variant)
+            except asyncio.TimeoutError:
+                self.send_timeouts += 1
+                timed_out.append(connection)
             except Exception as e:
+                self.send_failures += 1
                 logger.error(
                     f"Error broadcasting to connection in session {session_id}: {e}"
                 )
-                disconnected.append(connection)
+                failed.append(connection)
+        return failed, timed_out
 
-        # Clean up failed connections
-        for connection in disconnected:
-            self.disconnect(connection, session_id)
+    async def _fan_out_concurrent(
+        self, session_id: str, connections: List[WebSocket], frame: Frame
+    ):
+        """
+        Start every send at once and wait for all of them up to the deadline
+
+        A single shared deadline is used for the whole batch: all sends start
+        together, so this is equivalent to a per-send deadline while needing
+        only one timer instead of one per socket.
+
+        Returns:
+            Tuple of (failed connections, timed out connections)
+        """
+        if not connections:
+            return [], []
+
+        records = self._connections
+        variants = {}
+        tasks = {}
+        for connection in connections:
+            record = records.get(connection)
+            variant = variants[connection] = frame.for_codec(
+                record.codec if record is not None else None
+            )
+            tasks[asyncio.ensure_future(variant.write(connection))] = connection
+        _, pending = await asyncio.wait(tasks, timeout=self.send_timeout)
+
+        failed = []
+        timed_out = []
+        for task in pending:
+            task.cancel()
+            self.send_timeouts += 1
+            timed_out.append(tasks[task])
+
+        for task, connection in tasks.items():
+            if task in pending:
+                continue
+            error = task.exception()
+            if error is None:
+                variant = variants[connection]
+                self.outbound_bytes += variant.size
+                record = records.get(connection)
+                if record is not None:
+                    record.sent(variant)
+            else:
+                self.send_failures += 1
+                logger.error(
+                    f"Error broadcasting to connection in session {session_id}: {error}"
+                )
+                failed.append(connection)
+        return failed, timed_out
+
+    def _evict(self, websocket: WebSocket, session_id: str, reason: str):
+        """
+        Drop a slow consumer from the session and close it in the background
+
+        Args:
+            websocket: The connection that fell behind
+            session_id: The session it was evicted from
+            reason: Why the connection is being evicted (for logs)
+        """
+        self.evictions += 1
+        logger.warning(f"Evicting slow connection from session {session_id}: {reason}")
+        user_id = self._user_of(websocket)
+        if self.disconnect(websocket, session_id):
+            self._announce_left(session_id, user_id)
+        self._spawn(self._close_quietly(websocket))
+
+    async def _close_quietly(
+        self,
+        websocket: WebSocket,
+        code: int = status.WS_1013_TRY_AGAIN_LATER,
+        reason: Optional[str] = None,
+    ):
+        """Close a connection without letting a stalled peer block or raise"""
+        try:
+            await asyncio.wait_for(
+                websocket.close(code=code, reason=reason),
+                timeout=self.send_timeout,
+            )
+        except Exception as e:
+            # Connection may already be closed or stalled, log and continue
+            logger.debug(f"Error closing evicted WebSocket: {e}")
+
+    def get_queue_stats(self) -> Dict[str, int]:
+        """
+        Summarize outbound queue health for monitoring and alerting
+
+        Returns:
+            Dictionary with the number of queued connections, total and
+            maximum queue depth, the highest depth ever reached, frames
+            dropped or coalesced by the overflow policy, and overflow
+            disconnects
+        """
+        queues = [
+            connection.queue
+            for connection in self._connections.values()
+            if connection.queue is not None
+        ]
+        depths = [len(queue) for queue in queues]
+        return {
+            "connections": len(queues),
+            "total_depth": sum(depths),
+            "max_depth": max(depths, default=0),
+            "high_water": max((queue.high_water for queue in queues), default=0),
+            "dropped": sum(queue.dropped for queue in queues),
+            "coalesced": sum(queue.coalesced for queue in queues),
+            "overflow_disconnects": self.overflow_disconnects,
+        }
+
+    def get_connection(self, websocket: WebSocket) -> Optional[Connection]:
+        """
+        Get the record the manager keeps for a connection
+
+        Args:
+            websocket: The connection to look up
+
+        Returns:
+            Its identity, subscriptions, sequence cursor and counters, or
+            None if the socket is not connected (treat it as read-only)
+        """
+        return self._connections.get(websocket)
+
+    def _user_of(self, websocket: WebSocket) -> Optional[str]:
+        """The user owning a connection, if known"""
+        connection = self._connections.get(websocket)
+        return connection.user_id if connection is not None else None
+
+    def get_connection_count(self) -> int:
+        """
+        Get the number of open connections on this node
+
+        Returns:
+            Connections in at least one session
+        """
+        return len(self._connections)
+
+    def get_capacity(self) -> Dict[str, Any]:
+        """
+        Report how much room this worker has for new connections
+
+        Meant for load balancer health checks, so traffic can be steered
+        away from workers that are full or draining.
+
+        Returns:
+            Dictionary with the open connections, the worker's limit (0:
+            unlimited), the utilization (0.0 to 1.0) and whether new
+            connections are currently accepted
+        """
+        connections = len(self._connections)
+        limit = self.admission.max_connections
+        return {
+            "connections": connections,
+            "max_connections": limit,
+            "utilization": round(self.admission.utilization(connections), 4),
+            "accepting": not self.draining and (limit <= 0 or connections < limit),
+        }
+
+    def get_channel_count(self) -> int:
+        """
+        Get the number of sub-channels with subscribers on this node
+
+        Returns:
+            Sub-channels (teams, facilitators, primary sockets) with at least
+            one local member
+        """
+        return len(self._channels)
+
+    def get_channel_connection_count(self, channel: str) -> int:
+        """
+        Get the number of this node's connections in a session or sub-channel
+
+        Args:
+            channel: Session ID or sub-channel name
+
+        Returns:
+            Number of members (0 if the channel has none)
+        """
+        if is_session_channel(channel):
+            return self.get_session_connection_count(channel)
+        members = self._channels.get(channel)
+        return len(members) if members is not None else 0
+
+    def get_organization_stats(self) -> Tuple[Dict[str, int], Dict[str, int]]:
+        """
+        Count connections and sessions per organization
+
+        Walks every session's connections, so it is meant for scrapes and
+        reports, not the message path.
+
+        Returns:
+            Tuple of (org -> open connections, org -> sessions with at least
+            one connection from the org)
+        """
+        connections = {org: len(sockets) for org, sockets in self._org_sockets.items()}
+        sessions: Dict[str, int] = {}
+        records = self._connections
+        for members in self.active_connections.values():
+            orgs = {records[ws].org_id for ws in members if ws in records}
+            orgs.discard(None)
+            for org in orgs:
+                sessions[org] = sessions.get(org, 0) + 1
+        return connections, sessions
+
+    def get_participant_count(self, session_id: str) -> int:
+        """
+        Get the number of distinct participants in a session
+
+        A user connected from several tabs or devices counts once.
+
+        Args:
+            session_id: The session ID to check
+
+        Returns:
+            Number of users present (0 if session doesn't exist)
+        """
+        return self.presence.count(session_id)
 
     def get_session_connection_count(self, session_id: str) -> int:
         """
@@ -114,8 +1686,48 @@ class ConnectionManager:
         Returns:
             Number of active connections (0 if session doesn't exist)
         """
-        return len(self.active_connections.get(session_id, []))
+        connections = self.active_connections.get(session_id)
+        return len(connections) if connections is not None else 0
+
+    def is_connected(self, websocket: WebSocket, session_id: str) -> bool:
+        """
+        Check whether a connection is registered in a session
+
+        Args:
+            websocket: The WebSocket connection to look up
+            session_id: The session ID to check
+
+        Returns:
+            True if the connection is in the session
+        """
+        connections = self.active_connections.get(session_id)
+        return connections is not None and websocket in connections
+
+    def get_connection_sessions(self, websocket: WebSocket) -> Set[str]:
+        """
+        Get the sessions a connection belongs to
+
+        Args:
+            websocket: The WebSocket connection to look up
+
+        Returns:
+            Copy of the connection's session IDs (empty if unknown)
+        """
+        connection = self._connections.get(websocket)
+        return set(connection.sessions) if connection is not None else set()
+
+    def get_user_connections(self, user_id: str) -> List[WebSocket]:
+        """
+        Get every open connection of a user, in connection order
+
+        Args:
+            user_id: The user to look up
+
+        Returns:
+            The user's connections (empty if none)
+        """
+        return list(self._user_sockets.get(user_id, ()))
 
 
 # Global connection manager instance
-manager = ConnectionManager()
+manager = ConnectionManager(backplane=create_backplane())
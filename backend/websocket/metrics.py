@@ -0,0 +1,459 @@
+"""
+Prometheus text-format metrics for the realtime layer
+Counters live on the components as plain ints; gauges are computed per scrape
+"""
+
+import bisect
+import hashlib
+import hmac
+from typing import TYPE_CHECKING, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from backend.core.config import settings
+
+if TYPE_CHECKING:
+    from backend.services.chat_history import ChatHistory
+    from backend.services.result_writer import ResultWriter
+    from backend.websocket.dispatcher import MessageDispatcher
+    from backend.websocket.manager import ConnectionManager
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Seconds; covers sub-millisecond enqueues up to send-timeout-bound fan-outs
+LATENCY_BUCKETS: Tuple[float, ...] = (
+    0.0005,
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+)
+
+
+class Histogram:
+    """
+    Fixed-bucket histogram with Prometheus semantics
+
+    ``observe`` is a binary search and two additions on plain Python
+    numbers: the event loop is single-threaded, so no lock is needed and
+    the hot path stays allocation free. Buckets are stored non-cumulative
+    and summed when rendered.
+
+    Args:
+        buckets: Ascending upper bounds (``+Inf`` is implicit)
+    """
+
+    __slots__ = ("buckets", "counts", "sum", "count")
+
+    def __init__(self, buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.buckets = tuple(buckets)
+        # One slot per bucket plus the +Inf overflow slot
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        """
+        Record one observation
+
+        Args:
+            value: Observed value (e.g. seconds)
+        """
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self) -> List[Tuple[str, int]]:
+        """Cumulative counts as (upper bound label, count), ending with +Inf"""
+        total = 0
+        result = []
+        for bound, count in zip((*self.buckets, None), self.counts):
+            total += count
+            result.append(("+Inf" if bound is None else repr(bound), total))
+        return result
+
+
+def label_hash(value: str) -> str:
+    """
+    Opaque label value for a session or organization ID
+
+    Scrapes must not reveal joinable session IDs or list tenants, so IDs are
+    replaced by a keyed hash (HMAC with the app's secret key); an operator
+    who knows an ID can compute its label with this function.
+
+    Args:
+        value: The session or organization ID
+
+    Returns:
+        16 hex characters
+    """
+    digest = hmac.new(
+        settings.SECRET_KEY.encode("utf-8"), value.encode("utf-8"), hashlib.sha256
+    )
+    return digest.hexdigest()[:16]
+
+
+def _escape(value: str) -> str:
+    """Escape a label value for the text exposition format"""
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+class _Writer:
+    """Accumulates metric families in exposition format"""
+
+    def __init__(self, prefix: str):
+        self.prefix = prefix
+        self.lines: List[str] = []
+
+    def family(
+        self,
+        name: str,
+        kind: str,
+        help_text: str,
+        samples: Iterable[Tuple[Optional[Dict[str, str]], float]],
+    ):
+        full_name = f"{self.prefix}_{name}"
+        self.lines.append(f"# HELP {full_name} {help_text}")
+        self.lines.append(f"# TYPE {full_name} {kind}")
+        for labels, value in samples:
+            self.lines.append(f"{full_name}{self._labels(labels)} {value}")
+
+    def histogram(self, name: str, help_text: str, histogram: Histogram):
+        full_name = f"{self.prefix}_{name}"
+        self.lines.append(f"# HELP {full_name} {help_text}")
+        self.lines.append(f"# TYPE {full_name} histogram")
+        for bound, count in histogram.cumulative():
+            self.lines.append(f'{full_name}_bucket{{le="{bound}"}} {count}')
+        self.lines.append(f"{full_name}_sum {histogram.sum}")
+        self.lines.append(f"{full_name}_count {histogram.count}")
+
+    @staticmethod
+    def _labels(labels: Optional[Dict[str, str]]) -> str:
+        if not labels:
+            return ""
+        pairs = ",".join(f'{key}="{_escape(str(v))}"' for key, v in labels.items())
+        return f"{{{pairs}}}"
+
+    def render(self) -> str:
+        return "\n".join(self.lines) + "\n"
+
+
+def render_metrics(
+    manager: "ConnectionManager",
+    dispatcher: Optional["MessageDispatcher"] = None,
+    top_sessions: int = 50,
+    prefix: str = "trivia_ws",
+    results: Optional["ResultWriter"] = None,
+    chat: Optional["ChatHistory"] = None,
+) -> str:
+    """
+    Render the realtime layer's metrics in Prometheus text format
+
+    Everything here runs at scrape time: the broadcast path only bumps the
+    counters and the histogram it already owns. Per-session gauges are
+    limited to the ``top_sessions`` largest sessions so label cardinality
+    stays bounded while hot rooms remain visible.
+
+    Args:
+        manager: Connection manager to describe
+        dispatcher: Inbound dispatcher, for per-type message counters
+        top_sessions: Largest sessions exported individually (0 for none)
+        prefix: Metric name prefix
+        results: Answer write-behind queue, for persistence counters
+        chat: Session chat history, for buffer and persistence counters
+
+    Returns:
+        The exposition text
+    """
+    out = _Writer(prefix)
+    sessions = manager.active_connections
+
+    out.family(
+        "sessions",
+        "gauge",
+        "Sessions with at least one connection on this node",
+        [(None, len(sessions))],
+    )
+    out.family(
+        "connections",
+        "gauge",
+        "Open WebSocket connections on this node",
+        [(None, manager.get_connection_count())],
+    )
+
+    out.family(
+        "participants",
+        "gauge",
+        "Distinct users per session, summed over sessions on this node",
+        [(None, manager.presence.total())],
+    )
+    out.family(
+        "spectators",
+        "gauge",
+        "Server-Sent Events spectator streams on this node",
+        [(None, manager.spectators.count())],
+    )
+    out.family(
+        "spectators_dropped_total",
+        "counter",
+        "Spectator streams closed for falling behind",
+        [(None, manager.spectators.dropped)],
+    )
+    out.family(
+        "channels",
+        "gauge",
+        "Sub-channels (teams, facilitators, primary sockets) with members here",
+        [(None, manager.get_channel_count())],
+    )
+    out.family(
+        "scheduled_timers",
+        "gauge",
+        "Session timers pending on the timing wheel",
+        [(None, len(manager.scheduler))],
+    )
+    out.family(
+        "timers_fired_total",
+        "counter",
+        "Session timers that came due",
+        [(None, manager.scheduler.fired)],
+    )
+    out.family(
+        "timer_batches_total",
+        "counter",
+        "Batches of due timers handed to their handler (one per kind per wake-up)",
+        [(None, manager.scheduler.batches)],
+    )
+    out.family(
+        "questions_staged_total",
+        "counter",
+        "Question payloads distributed encrypted ahead of their reveal",
+        [(None, manager.reveals.staged)],
+    )
+    out.family(
+        "questions_revealed_total",
+        "counter",
+        "Staged questions revealed with a key frame",
+        [(None, manager.reveals.revealed)],
+    )
+    out.family(
+        "tally_events_total",
+        "counter",
+        "Answers and reactions counted into live tallies",
+        [(None, manager.tallies.events)],
+    )
+    out.family(
+        "tally_frames_total",
+        "counter",
+        "Live tally frames sent to session facilitators",
+        [(None, manager.tallies.frames)],
+    )
+
+    largest = sorted(sessions.items(), key=lambda item: len(item[1]), reverse=True)
+    out.family(
+        "session_connections",
+        "gauge",
+        f"Connections per session (largest {top_sessions} sessions)",
+        [
+            ({"session": label_hash(session_id)}, len(connections))
+            for session_id, connections in largest[: max(top_sessions, 0)]
+        ],
+    )
+
+    org_connections, org_sessions = manager.get_organization_stats()
+    out.family(
+        "organization_connections",
+        "gauge",
+        "Connections per organization",
+        [
+            ({"organization": label_hash(org)}, count)
+            for org, count in sorted(org_connections.items())
+        ],
+    )
+    out.family(
+        "organization_sessions",
+        "gauge",
+        "Sessions with connections from each organization",
+        [
+            ({"organization": label_hash(org)}, count)
+            for org, count in sorted(org_sessions.items())
+        ],
+    )
+
+    out.histogram(
+        "broadcast_duration_seconds",
+        "Time to number, encode, publish and hand a session broadcast to "
+        "every local connection",
+        manager.broadcast_latency,
+    )
+
+    out.family(
+        "draining",
+        "gauge",
+        "1 while this node is draining its connections for shutdown",
+        [(None, int(manager.draining))],
+    )
+    out.family(
+        "drained_total",
+        "counter",
+        "Connections closed by a graceful drain",
+        [(None, manager.drained)],
+    )
+
+    capacity = manager.get_capacity()
+    out.family(
+        "max_connections",
+        "gauge",
+        "Connection limit of this node (0: unlimited)",
+        [(None, capacity["max_connections"])],
+    )
+    out.family(
+        "connection_utilization",
+        "gauge",
+        "Open connections as a fraction of the node's limit",
+        [(None, capacity["utilization"])],
+    )
+    out.family(
+        "admission_rejections_total",
+        "counter",
+        "Connections refused by admission control, by limit reached",
+        [
+            ({"reason": reason}, count)
+            for reason, count in manager.admission.rejected.items()
+        ],
+    )
+
+    out.family(
+        "send_failures_total",
+        "counter",
+        "Sends that raised an error",
+        [(None, manager.send_failures)],
+    )
+    out.family(
+        "send_timeouts_total",
+        "counter",
+        "Sends that missed the send deadline",
+        [(None, manager.send_timeouts)],
+    )
+    out.family(
+        "evictions_total",
+        "counter",
+        "Slow consumers evicted from a session",
+        [(None, manager.evictions)],
+    )
+    out.family(
+        "reaped_total",
+        "counter",
+        "Connections reaped after missing heartbeats",
+        [(None, manager.heartbeat.reaped)],
+    )
+
+    queues = manager.get_queue_stats()
+    out.family(
+        "outbound_queue_dropped_total",
+        "counter",
+        "Frames dropped by the outbound queue overflow policy",
+        [(None, queues["dropped"])],
+    )
+    out.family(
+        "outbound_queue_depth",
+        "gauge",
+        "Frames waiting in outbound queues",
+        [(None, queues["total_depth"])],
+    )
+    out.family(
+        "outbound_bytes_total",
+        "counter",
+        "Payload bytes written to WebSocket connections",
+        [(None, manager.outbound_bytes)],
+    )
+
+    if dispatcher is not None:
+        out.family(
+            "inbound_messages_total",
+            "counter",
+            "Inbound messages by type (unknown types are counted as unknown)",
+            [
+                *(
+                    ({"type": message_type}, count)
+                    for message_type, count in sorted(dispatcher.received.items())
+                ),
+                ({"type": "unknown"}, dispatcher.dropped_unknown),
+            ],
+        )
+        out.family(
+            "inbound_rejected_total",
+            "counter",
+            "Inbound messages rejected by the dispatcher",
+            [
+                ({"reason": "invalid"}, dispatcher.invalid),
+                ({"reason": "forbidden"}, dispatcher.forbidden),
+            ],
+        )
+
+    if results is not None:
+        out.family(
+            "results_pending",
+            "gauge",
+            "Answer results queued and not yet written to the database",
+            [(None, results.pending)],
+        )
+        out.family(
+            "results_written_total",
+            "counter",
+            "Answer results written to the database",
+            [(None, results.written)],
+        )
+        out.family(
+            "results_flush_failures_total",
+            "counter",
+            "Failed result batch writes (the rows are retried)",
+            [(None, results.failures)],
+        )
+        out.family(
+            "results_dropped_total",
+            "counter",
+            "Answer results dropped because the queue was full",
+            [(None, results.dropped)],
+        )
+
+    if chat is not None:
+        out.family(
+            "chat_messages_total",
+            "counter",
+            "Chat messages buffered for session history",
+            [(None, chat.messages)],
+        )
+        out.family(
+            "chat_history_pages_total",
+            "counter",
+            "Chat history pages served, by where they were read from",
+            [
+                ({"source": "memory"}, chat.memory_pages),
+                ({"source": "database"}, chat.database_pages),
+            ],
+        )
+        out.family(
+            "chat_pending",
+            "gauge",
+            "Chat messages queued and not yet written to the database",
+            [(None, chat.writer.pending)],
+        )
+        out.family(
+            "chat_written_total",
+            "counter",
+            "Chat messages written to the database",
+            [(None, chat.writer.written)],
+        )
+        out.family(
+            "chat_dropped_total",
+            "counter",
+            "Chat messages not written because the queue was full",
+            [(None, chat.writer.dropped)],
+        )
+
+    return out.render()
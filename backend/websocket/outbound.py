@@ -0,0 +1,127 @@
+"""
+Bounded per-connection outbound queues
+Decouples broadcasters from socket writes and bounds memory for slow clients
+"""
+
+import asyncio
+import enum
+from collections import deque
+from typing import Deque, Optional
+
+from backend.websocket.frames import Frame
+
+
+class OverflowPolicy(str, enum.Enum):
+    """What to do when a connection's outbound queue is full"""
+
+    # Discard the oldest queued frame to make room for the new one
+    DROP_OLDEST = "drop_oldest"
+    # Drop a queued frame of the same message type and queue the newer one
+    # at the tail, falling back to dropping the oldest frame if there is none
+    COALESCE = "coalesce"
+    # Treat the client as a slow consumer and disconnect it
+    DISCONNECT = "disconnect"
+
+
+class OutboundQueue:
+    """
+    Bounded FIFO of frames waiting to be written to one connection
+
+    ``put`` never blocks, so broadcasters are never slowed down by a slow
+    client; the overflow policy decides what happens when the queue is full.
+    ``get`` is awaited by the connection's dedicated writer task.
+
+    Args:
+        maxsize: Maximum number of queued frames
+        policy: Overflow policy applied when the queue is full
+    """
+
+    __slots__ = (
+        "maxsize",
+        "policy",
+        "dropped",
+        "coalesced",
+        "high_water",
+        "_items",
+        "_waiter",
+    )
+
+    def __init__(self, maxsize: int, policy: OverflowPolicy):
+        if maxsize < 1:
+            raise ValueError("Outbound queue size must be at least 1")
+        self.maxsize = maxsize
+        self.policy = OverflowPolicy(policy)
+        self.dropped = 0
+        self.coalesced = 0
+        self.high_water = 0
+        self._items: Deque[Frame] = deque()
+        # Future the writer awaits while the queue is empty; a bare future
+        # rather than an asyncio.Event, which allocates a waiter deque per
+        # queue even when nothing waits
+        self._waiter: Optional[asyncio.Future] = None
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def put(self, frame: Frame) -> bool:
+        """
+        Enqueue a frame, applying the overflow policy if the queue is full
+
+        Args:
+            frame: Frame to deliver
+
+        Returns:
+            False if the policy says the consumer must be disconnected,
+            True otherwise (including when a frame was dropped or coalesced)
+        """
+        items = self._items
+        if len(items) >= self.maxsize:
+            if self.policy is OverflowPolicy.DISCONNECT:
+                return False
+            if self.policy is OverflowPolicy.COALESCE and self._coalesce(frame):
+                return True
+            items.popleft()
+            self.dropped += 1
+
+        items.append(frame)
+        if len(items) > self.high_water:
+            self.high_water = len(items)
+        waiter = self._waiter
+        if waiter is not None and not waiter.done():
+            waiter.set_result(None)
+        return True
+
+    def _coalesce(self, frame: Frame) -> bool:
+        """
+        Drop the newest queued frame of the same type and append this one
+
+        The newer frame goes to the tail rather than into the older one's
+        place, so numbered session events still leave in ``seq`` order (the
+        client sees a gap and resumes, instead of discarding an event as a
+        duplicate).
+        """
+        if frame.message_type is None:
+            return False
+        items = self._items
+        for index in range(len(items) - 1, -1, -1):
+            if items[index].message_type == frame.message_type:
+                del items[index]
+                items.append(frame)
+                self.coalesced += 1
+                return True
+        return False
+
+    async def get(self) -> Frame:
+        """
+        Wait for and remove the next frame
+
+        Returns:
+            The oldest queued frame
+        """
+        while not self._items:
+            self._waiter = asyncio.get_running_loop().create_future()
+            try:
+                await self._waiter
+            finally:
+                self._waiter = None
+        return self._items.popleft()
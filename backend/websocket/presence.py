@@ -0,0 +1,102 @@
+"""
+User-level presence within sessions
+Counts people rather than sockets and picks one primary socket per user
+"""
+
+from typing import Dict, Hashable, Optional
+
+from fastapi import WebSocket
+
+
+class SessionPresence:
+    """
+    Tracks which users are present in each session, and through which sockets
+
+    A user with several tabs or devices open has several sockets but is one
+    participant. Each user's sockets are kept in connection order; the oldest
+    is the user's primary socket, and the next oldest takes over when it
+    leaves. Connections without a known user count as their own participant
+    (keyed by the socket itself).
+
+    All operations are O(1).
+    """
+
+    def __init__(self):
+        # session -> user -> sockets (insertion ordered; the first is primary)
+        self._sessions: Dict[str, Dict[Hashable, Dict[WebSocket, None]]] = {}
+
+    def add(self, session_id: str, user: Hashable, websocket: WebSocket) -> bool:
+        """
+        Record a socket of a user joining a session
+
+        Args:
+            session_id: The session joined
+            user: The user ID (or the socket, for anonymous connections)
+            websocket: The joining socket
+
+        Returns:
+            True if this is the user's first socket in the session
+        """
+        users = self._sessions.setdefault(session_id, {})
+        sockets = users.get(user)
+        if sockets is None:
+            users[user] = {websocket: None}
+            return True
+        sockets[websocket] = None
+        return False
+
+    def remove(self, session_id: str, user: Hashable, websocket: WebSocket) -> bool:
+        """
+        Record a socket of a user leaving a session
+
+        Args:
+            session_id: The session left
+            user: The user ID (or the socket, for anonymous connections)
+            websocket: The leaving socket
+
+        Returns:
+            True if it was the user's last socket in the session
+        """
+        users = self._sessions.get(session_id)
+        if users is None:
+            return False
+        sockets = users.get(user)
+        if sockets is None or websocket not in sockets:
+            return False
+        del sockets[websocket]
+        if sockets:
+            return False
+        del users[user]
+        if not users:
+            del self._sessions[session_id]
+        return True
+
+    def primary(self, session_id: str, user: Hashable) -> Optional[WebSocket]:
+        """
+        Get the socket that receives a user's primary-only payloads
+
+        Args:
+            session_id: The session to look in
+            user: The user ID (or the socket, for anonymous connections)
+
+        Returns:
+            The user's oldest socket in the session, or None if absent
+        """
+        sockets = self._sessions.get(session_id, {}).get(user)
+        return next(iter(sockets)) if sockets else None
+
+    def count(self, session_id: str) -> int:
+        """
+        Get the number of distinct participants in a session
+
+        Args:
+            session_id: The session to count
+
+        Returns:
+            Users with at least one socket in the session
+        """
+        return len(self._sessions.get(session_id, ()))
+
+    def total(self) -> int:
+        """Participants summed over all sessions"""
+        return sum(len(users) for users in self._sessions.values())
@@ -0,0 +1,309 @@
+"""
+Staged question reveal
+Question payloads are sent encrypted ahead of time; the reveal is a tiny key frame
+"""
+
+import base64
+import json
+import logging
+import os
+from typing import TYPE_CHECKING, Callable, Dict, List, Optional
+
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+from fastapi import WebSocket
+
+from backend.services.scheduler import Timer
+from backend.websocket.frames import Frame
+
+if TYPE_CHECKING:
+    from backend.websocket.manager import ConnectionManager
+
+logger = logging.getLogger(__name__)
+
+STAGED_MESSAGE_TYPE = "question_staged"
+REVEALED_MESSAGE_TYPE = "question_revealed"
+
+# Rejection reason for revealing a question that is not staged (or already
+# revealed)
+NOT_STAGED = "question_not_staged"
+
+# Scheduler timer kind of automatic reveals
+REVEAL_TIMER = "reveal_question"
+
+# AES-128-GCM: a 16-byte key and the 12-byte nonce WebCrypto expects
+KEY_BITS = 128
+NONCE_BYTES = 12
+
+
+def _b64(data: bytes) -> str:
+    return base64.b64encode(data).decode("ascii")
+
+
+def associated_data(session_id: str, question_id: str) -> bytes:
+    """
+    Authenticated (unencrypted) data binding a ciphertext to its question
+
+    A staged payload cannot be replayed under another session or question
+    ID: decryption with the wrong IDs fails.
+
+    Args:
+        session_id: Session the question is staged in
+        question_id: The question
+
+    Returns:
+        The bytes passed to AES-GCM as associated data
+    """
+    return f"{session_id}/{question_id}".encode()
+
+
+class StagedQuestion:
+    """
+    A question whose payload has been distributed but not yet revealed
+
+    Args:
+        question_id: The question
+        key: AES-GCM key its payload was encrypted with
+        frame: The ``question_staged`` frame, unnumbered, for late joiners
+        points: Points for a correct answer, announced at reveal
+        time_limit_ms: Answer window, announced at reveal
+        on_reveal: Called just before the reveal is broadcast
+    """
+
+    __slots__ = (
+        "question_id",
+        "key",
+        "frame",
+        "points",
+        "time_limit_ms",
+        "on_reveal",
+        "revealed",
+    )
+
+    def __init__(
+        self,
+        question_id: str,
+        key: bytes,
+        frame: Frame,
+        points: int,
+        time_limit_ms: Optional[int],
+        on_reveal: Optional[Callable[[], None]],
+    ):
+        self.question_id = question_id
+        self.key = key
+        self.frame = frame
+        self.points = points
+        self.time_limit_ms = time_limit_ms
+        self.on_reveal = on_reveal
+        # The ``question_revealed`` frame once revealed, for late joiners
+        self.revealed: Optional[Frame] = None
+
+
+class QuestionReveals:
+    """
+    Pre-distributes question payloads and reveals them with a key frame
+
+    Sending every participant the full question (text, options, media
+    links) at the instant it opens is the largest burst a session produces.
+    Instead, a facilitator stages the next question during the idle gap
+    before it: its payload is encrypted with a fresh AES-128-GCM key and
+    broadcast as ``question_staged``, so clients download it at leisure
+    but cannot read it. At reveal time only ``question_revealed`` goes out,
+    carrying the 16-byte key and the scoring parameters; clients decrypt
+    locally (WebCrypto supports AES-GCM natively). The reveal frame is the
+    same small size whatever the question, so it reaches every socket at
+    nearly the same moment and nobody starts later because their download
+    was slower.
+
+    Answer timing starts at reveal: ``on_reveal`` (typically opening the
+    question in the answer book) runs before the key is broadcast, so no
+    client can see the question before answers are accepted.
+
+    Both frames are ordinary session broadcasts (numbered, logged for
+    replay and published on the backplane). The last staged question of
+    each session and its reveal are also kept here, unnumbered, for clients
+    joining without a ``last_seq``. State, including scheduled reveals, is
+    per process: the node that staged a question must be the one revealing
+    it.
+
+    Args:
+        manager: Connection manager used to reach the session's sockets
+    """
+
+    def __init__(self, manager: "ConnectionManager"):
+        self.manager = manager
+        # session_id -> latest staged question
+        self._staged: Dict[str, StagedQuestion] = {}
+        # Automatic reveals are timers on the manager's session scheduler
+        self.scheduler = manager.scheduler
+        self.scheduler.register(REVEAL_TIMER, self._reveal_due)
+
+        # Counters for observability
+        self.staged = 0
+        self.revealed = 0
+
+    def __contains__(self, session_id: str) -> bool:
+        return session_id in self._staged
+
+    def get(self, session_id: str) -> Optional[StagedQuestion]:
+        """Latest staged question of a session, if any"""
+        return self._staged.get(session_id)
+
+    async def stage(
+        self,
+        session_id: str,
+        question_id: str,
+        payload: dict,
+        points: int = 100,
+        time_limit_ms: Optional[int] = None,
+        reveal_in_ms: Optional[int] = None,
+        on_reveal: Optional[Callable[[], None]] = None,
+    ) -> StagedQuestion:
+        """
+        Encrypt a question's payload and send it to the session
+
+        Staging replaces the session's previous staged question, cancelling
+        its scheduled reveal if it has not happened yet.
+
+        Args:
+            session_id: Session to stage the question in
+            question_id: The question
+            payload: What participants see once revealed (text, options...)
+            points: Points for a correct answer
+            time_limit_ms: Answer window
+            reveal_in_ms: Reveal automatically after this delay (None: wait
+                for ``reveal``)
+            on_reveal: Called just before the reveal is broadcast
+
+        Returns:
+            The staged question
+        """
+        self.discard(session_id)
+
+        key = AESGCM.generate_key(bit_length=KEY_BITS)
+        nonce = os.urandom(NONCE_BYTES)
+        plaintext = json.dumps(payload, separators=(",", ":")).encode()
+        ciphertext = AESGCM(key).encrypt(
+            nonce, plaintext, associated_data(session_id, question_id)
+        )
+        message = {
+            "type": STAGED_MESSAGE_TYPE,
+            "question_id": question_id,
+            "nonce": _b64(nonce),
+            "ciphertext": _b64(ciphertext),
+            "reveal_in_ms": reveal_in_ms,
+            "session_id": session_id,
+        }
+        staged = StagedQuestion(
+            question_id,
+            key,
+            Frame.from_message(message),
+            points,
+            time_limit_ms,
+            on_reveal,
+        )
+        self._staged[session_id] = staged
+        self.staged += 1
+
+        await self.manager.broadcast_to_session(session_id, staged.frame)
+        if reveal_in_ms is not None:
+            self.scheduler.schedule(
+                REVEAL_TIMER, session_id, reveal_in_ms, data=question_id
+            )
+        return staged
+
+    async def _reveal_due(self, timers: List[Timer]):
+        """Reveal every staged question whose scheduled reveal came due"""
+        for timer in timers:
+            try:
+                await self.reveal(timer.session_id, timer.data)
+            except Exception as e:
+                logger.error(
+                    f"Scheduled reveal of question {timer.data} "
+                    f"in session {timer.session_id} failed: {e}"
+                )
+
+    async def reveal(self, session_id: str, question_id: str) -> bool:
+        """
+        Broadcast the key of a staged question
+
+        Args:
+            session_id: Session the question is staged in
+            question_id: The question
+
+        Returns:
+            False if the question is not the session's staged question or
+            was already revealed
+        """
+        staged = self._staged.get(session_id)
+        if (
+            staged is None
+            or staged.question_id != question_id
+            or staged.revealed is not None
+        ):
+            return False
+        self.scheduler.cancel(REVEAL_TIMER, session_id)
+        if staged.on_reveal is not None:
+            staged.on_reveal()
+
+        staged.revealed = Frame.from_message(
+            {
+                "type": REVEALED_MESSAGE_TYPE,
+                "question_id": question_id,
+                "key": _b64(staged.key),
+                "points": staged.points,
+                "time_limit_ms": staged.time_limit_ms,
+                "session_id": session_id,
+            }
+        )
+        self.revealed += 1
+        await self.manager.broadcast_to_session(session_id, staged.revealed)
+        return True
+
+    async def send_current(self, websocket: WebSocket, session_id: str):
+        """
+        Send a session's staged question (and its key, if revealed) to one
+        connection, e.g. right after joining
+
+        Args:
+            websocket: Target connection
+            session_id: Session whose staged question to send
+        """
+        staged = self._staged.get(session_id)
+        if staged is None:
+            return
+        await self.manager.send_personal_message(staged.frame, websocket)
+        if staged.revealed is not None:
+            await self.manager.send_personal_message(staged.revealed, websocket)
+
+    def discard(self, session_id: str, question_id: Optional[str] = None) -> bool:
+        """
+        Forget a session's staged question, cancelling a scheduled reveal
+
+        Args:
+            session_id: Session to clear
+            question_id: Only discard if this is the staged question
+
+        Returns:
+            True if a staged question was discarded
+        """
+        staged = self._staged.get(session_id)
+        if staged is None or (
+            question_id is not None and staged.question_id != question_id
+        ):
+            return False
+        del self._staged[session_id]
+        self.scheduler.cancel(REVEAL_TIMER, session_id)
+        return True
+
+    def release(self, session_id: str):
+        """
+        Drop what a session left empty on this node no longer needs
+
+        A reveal still scheduled is kept, so participants on other nodes
+        get it on time.
+
+        Args:
+            session_id: Session without local connections
+        """
+        if self.scheduler.get(REVEAL_TIMER, session_id) is None:
+            self._staged.pop(session_id, None)
@@ -0,0 +1,76 @@
+"""
+Drain WebSocket connections before the server acts on a termination signal
+Servers such as uvicorn close every socket before the lifespan shutdown runs
+"""
+
+import asyncio
+import logging
+import signal
+import threading
+from typing import Awaitable, Callable, Dict, Sequence
+
+logger = logging.getLogger(__name__)
+
+
+def drain_before_signals(
+    drain: Callable[[], Awaitable[None]],
+    signals: Sequence[int] = (signal.SIGTERM,),
+) -> Callable[[], None]:
+    """
+    Run ``drain`` when a termination signal arrives, then pass the signal on
+
+    uvicorn fails every open WebSocket with 1012 as soon as it handles
+    SIGTERM, before the lifespan shutdown runs, so a drain started from the
+    lifespan alone would find no connections left. This wraps the current
+    handler (the server's): the drain runs first, while the server keeps
+    serving, and the original handler is invoked once it finishes. A second
+    signal during the drain goes straight to the original handler.
+
+    Signal handlers can only be installed from the main thread; elsewhere
+    (e.g. under a test client) this does nothing.
+
+    Args:
+        drain: Coroutine function draining the connections
+        signals: Signals to intercept
+
+    Returns:
+        Function restoring the original handlers
+    """
+    if threading.current_thread() is not threading.main_thread():
+        return lambda: None
+
+    loop = asyncio.get_running_loop()
+    previous: Dict[int, object] = {}
+
+    def forward(signum: int):
+        handler = previous[signum]
+        if callable(handler):
+            handler(signum, None)
+        elif handler == signal.SIG_DFL:
+            signal.raise_signal(signum)
+
+    def on_done(task: asyncio.Task, signum: int):
+        if not task.cancelled() and task.exception() is not None:
+            logger.error(f"WebSocket drain failed: {task.exception()}")
+        forward(signum)
+
+    def start(signum: int):
+        logger.info(f"Received signal {signum}: draining WebSocket connections")
+        task = loop.create_task(drain())
+        task.add_done_callback(lambda done: on_done(done, signum))
+
+    def handle(signum: int, frame):
+        # Hand any further signal straight to the original handler
+        signal.signal(signum, previous[signum])
+        # Python handlers may interrupt the loop itself; schedule safely
+        loop.call_soon_threadsafe(start, signum)
+
+    for signum in signals:
+        previous[signum] = signal.signal(signum, handle)
+
+    def restore():
+        for signum, handler in previous.items():
+            if signal.getsignal(signum) is handle:
+                signal.signal(signum, handler)
+
+    return restore
@@ -0,0 +1,250 @@
+"""
+Server-Sent Events streams for read-only spectators
+Spectators get the session's broadcast frames without a WebSocket receive loop
+"""
+
+import asyncio
+import logging
+from collections import deque
+from typing import Deque, Dict, Iterator, Optional, Tuple
+
+from backend.websocket.frames import Frame, encode_json
+
+logger = logging.getLogger(__name__)
+
+MEDIA_TYPE = "text/event-stream"
+
+# Comment line: keeps proxies from timing out an idle stream
+KEEPALIVE = b": keepalive\n\n"
+
+
+def encode_event(frame: Frame, epoch: Optional[str] = None) -> Optional[bytes]:
+    """
+    Encode a broadcast frame as one SSE event
+
+    The frame's JSON text is used as-is for the ``data`` line (compact JSON
+    never contains a raw newline). Numbered frames get an ``id`` of
+    ``{epoch}:{seq}``, which the browser sends back as ``Last-Event-ID``
+    when it reconnects.
+
+    Args:
+        frame: Frame built for the session's WebSocket connections
+        epoch: Epoch of the session's sequence numbers
+
+    Returns:
+        The encoded event, or None for binary frames (not representable)
+    """
+    if frame.is_binary:
+        return None
+    message = frame.message
+    seq = message.get("seq") if isinstance(message, dict) else None
+    if seq is not None and epoch is not None:
+        return f"id: {epoch}:{seq}\ndata: {frame.data}\n\n".encode("utf-8")
+    return f"data: {frame.data}\n\n".encode("utf-8")
+
+
+def encode_message(message: dict) -> bytes:
+    """Encode a message that is not a session event (no ``id``)"""
+    return f"data: {encode_json(message)}\n\n".encode("utf-8")
+
+
+def encode_retry(retry_ms: int) -> bytes:
+    """Encode a ``retry`` field: the client's delay before reconnecting"""
+    return f"retry: {int(retry_ms)}\n\n".encode("ascii")
+
+
+def parse_event_id(event_id: Optional[str]) -> Tuple[Optional[str], Optional[int]]:
+    """
+    Split a ``Last-Event-ID`` into the epoch and sequence number
+
+    Args:
+        event_id: Header value, as produced by ``encode_event``
+
+    Returns:
+        Tuple of (epoch, seq); (None, None) if missing or malformed
+    """
+    if not event_id:
+        return None, None
+    epoch, _, seq = event_id.rpartition(":")
+    try:
+        return (epoch or None), int(seq)
+    except ValueError:
+        return None, None
+
+
+class SpectatorStream:
+    """
+    Pending SSE output of one spectator
+
+    Chunks are pushed by the broadcast path without awaiting and read by
+    the spectator's response generator. A spectator that falls more than
+    ``capacity`` chunks behind is closed rather than buffered without
+    bound; its browser reconnects and resumes from ``Last-Event-ID``.
+
+    Args:
+        capacity: Maximum number of pending chunks
+    """
+
+    __slots__ = ("capacity", "closed", "_chunks", "_ready")
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self.closed = False
+        self._chunks: Deque[bytes] = deque()
+        self._ready = asyncio.Event()
+
+    def push(self, chunk: bytes) -> bool:
+        """
+        Queue a chunk for the spectator
+
+        Args:
+            chunk: Encoded SSE data
+
+        Returns:
+            False if the stream is closed or just overflowed (and closed)
+        """
+        if self.closed:
+            return False
+        if len(self._chunks) >= self.capacity:
+            self.close()
+            return False
+        self._chunks.append(chunk)
+        self._ready.set()
+        return True
+
+    def close(self, final: Optional[bytes] = None):
+        """
+        End the stream after what is already queued
+
+        Args:
+            final: Last chunk to send, e.g. a ``retry`` hint
+        """
+        if self.closed:
+            return
+        if final is not None:
+            self._chunks.append(final)
+        self.closed = True
+        self._ready.set()
+
+    async def read(self, timeout: float) -> Optional[bytes]:
+        """
+        Wait for pending output
+
+        Args:
+            timeout: Seconds to wait before returning a keepalive
+
+        Returns:
+            Everything queued, joined; ``KEEPALIVE`` after an idle
+            ``timeout``; None once the stream is closed and empty
+        """
+        if not self._chunks and not self.closed:
+            try:
+                async with asyncio.timeout(timeout):
+                    await self._ready.wait()
+            except TimeoutError:
+                return KEEPALIVE
+        if not self._chunks:
+            return None
+        chunks = b"".join(self._chunks)
+        self._chunks.clear()
+        if not self.closed:
+            self._ready.clear()
+        return chunks
+
+
+class SpectatorHub:
+    """
+    Spectator streams per session
+
+    A broadcast frame is encoded as an SSE event once per session and the
+    same bytes are pushed to every spectator, mirroring the encode-once
+    WebSocket fan-out. Pushing never awaits, so spectators add no latency
+    to the broadcast path.
+
+    Args:
+        queue_size: Pending chunks allowed per spectator
+    """
+
+    def __init__(self, queue_size: int):
+        self.queue_size = queue_size
+        self._streams: Dict[str, Dict[SpectatorStream, None]] = {}
+        # Spectators closed for falling behind (plain int for observability)
+        self.dropped = 0
+
+    def __contains__(self, session_id: str) -> bool:
+        return session_id in self._streams
+
+    def open(self, session_id: str) -> SpectatorStream:
+        """
+        Register a new spectator of a session
+
+        Args:
+            session_id: The session to watch
+
+        Returns:
+            The spectator's stream
+        """
+        stream = SpectatorStream(self.queue_size)
+        self._streams.setdefault(session_id, {})[stream] = None
+        return stream
+
+    def remove(self, session_id: str, stream: SpectatorStream) -> bool:
+        """
+        Unregister a spectator
+
+        Args:
+            session_id: The session it watched
+            stream: Its stream
+
+        Returns:
+            True if it was the session's last spectator
+        """
+        streams = self._streams.get(session_id)
+        if streams is None or stream not in streams:
+            return False
+        del streams[stream]
+        stream.close()
+        if streams:
+            return False
+        del self._streams[session_id]
+        return True
+
+    def publish(self, session_id: str, frame: Frame, epoch: Optional[str] = None):
+        """
+        Push a broadcast frame to every spectator of a session
+
+        Args:
+            session_id: The session broadcast to
+            frame: The broadcast frame
+            epoch: Epoch of the session's sequence numbers
+        """
+        streams = self._streams.get(session_id)
+        if not streams:
+            return
+        chunk = encode_event(frame, epoch)
+        if chunk is None:
+            return
+        for stream in streams:
+            if not stream.closed and not stream.push(chunk):
+                self.dropped += 1
+                logger.warning(
+                    f"Dropping spectator of session {session_id}: fell behind"
+                )
+
+    def streams(self) -> Iterator[SpectatorStream]:
+        """Iterate over every spectator stream (a snapshot)"""
+        return iter([s for streams in self._streams.values() for s in streams])
+
+    def count(self, session_id: Optional[str] = None) -> int:
+        """
+        Count spectators
+
+        Args:
+            session_id: Session to count, or None for all sessions
+
+        Returns:
+            Number of open spectator streams
+        """
+        if session_id is not None:
+            return len(self._streams.get(session_id, ()))
+        return sum(len(streams) for streams in self._streams.values())
@@ -0,0 +1,236 @@
+"""
+Live answer distribution and reaction tallies for facilitators
+Events only bump in-memory counters; one histogram frame per interval is sent
+"""
+
+import logging
+from typing import TYPE_CHECKING, Dict, Iterable, List, Optional
+
+from fastapi import WebSocket
+
+from backend.core.config import settings
+from backend.services.scheduler import Timer
+
+if TYPE_CHECKING:
+    from backend.websocket.manager import ConnectionManager
+
+logger = logging.getLogger(__name__)
+
+TALLY_MESSAGE_TYPE = "live_tally"
+
+# Scheduler timer kind flushing a session's tallies
+FLUSH_TIMER = "flush_tally"
+
+# Bucket for answers beyond a question's option limit
+OTHER_ANSWER = "_other"
+
+# Rejection reason for a reaction outside the configured set
+INVALID_REACTION = "invalid_reaction"
+
+
+class _QuestionTally:
+    """Answer counts of one question"""
+
+    __slots__ = ("answered", "counts")
+
+    def __init__(self):
+        self.answered = 0
+        self.counts: Dict[str, int] = {}
+
+
+class _SessionTally:
+    """Tallies of one session and what changed since the last flush"""
+
+    __slots__ = ("questions", "changed", "reactions")
+
+    def __init__(self):
+        self.questions: Dict[str, _QuestionTally] = {}
+        # Questions counted since the last flush (values unused)
+        self.changed: Dict[str, None] = {}
+        # Reactions since the last flush
+        self.reactions: Dict[str, int] = {}
+
+
+class LiveTallies:
+    """
+    Aggregates answers and reactions into periodic histograms for facilitators
+
+    Facilitators want live "how many picked A/B/C/D" bars and the crowd's
+    reactions, but forwarding one frame per answer or emoji to every
+    facilitator and big-screen socket would multiply the session's busiest
+    traffic. Instead each event only increments an in-memory counter (O(1),
+    no frame, no I/O) and marks the session dirty. A dirty session gets a
+    flush timer on the manager's scheduler; when it fires, the session's
+    facilitator channel receives a single ``live_tally`` frame with the
+    cumulative counts of every question that changed and the reactions
+    since the previous frame. Sessions flushing on the same tick are
+    handled as one batch, and idle sessions cost nothing.
+
+    Answers are counted by their normalized text. Past ``max_options``
+    distinct answers to a question, further ones are counted under
+    ``_other``, so free-text answers cannot grow a histogram without bound.
+
+    Args:
+        manager: Connection manager used to reach the facilitators
+        interval_ms: Longest time between an event and the frame carrying it
+        max_options: Distinct answers tallied per question
+        reactions: Accepted reaction names
+    """
+
+    def __init__(
+        self,
+        manager: "ConnectionManager",
+        interval_ms: Optional[int] = None,
+        max_options: Optional[int] = None,
+        reactions: Optional[Iterable[str]] = None,
+    ):
+        self.manager = manager
+        self.interval_ms = (
+            settings.WS_TALLY_INTERVAL_MS if interval_ms is None else interval_ms
+        )
+        self.max_options = (
+            settings.WS_TALLY_MAX_OPTIONS if max_options is None else max_options
+        )
+        self.reactions = frozenset(
+            settings.WS_REACTIONS if reactions is None else reactions
+        )
+        self._sessions: Dict[str, _SessionTally] = {}
+        self.scheduler = manager.scheduler
+        self.scheduler.register(FLUSH_TIMER, self._flush_due)
+
+        # Counters for observability
+        self.events = 0
+        self.frames = 0
+
+    def __contains__(self, session_id: str) -> bool:
+        return session_id in self._sessions
+
+    def _dirty(self, session_id: str) -> _SessionTally:
+        """Get a session's tally, scheduling a flush if none is pending"""
+        tally = self._sessions.get(session_id)
+        if tally is None:
+            tally = self._sessions[session_id] = _SessionTally()
+        if not tally.changed and not tally.reactions:
+            self.scheduler.schedule(FLUSH_TIMER, session_id, self.interval_ms)
+        self.events += 1
+        return tally
+
+    def count_answer(self, session_id: str, question_id: str, answer: str):
+        """
+        Count one accepted answer
+
+        Args:
+            session_id: Session the answer was given in
+            question_id: The question
+            answer: Normalized answer text
+        """
+        tally = self._dirty(session_id)
+        question = tally.questions.get(question_id)
+        if question is None:
+            question = tally.questions[question_id] = _QuestionTally()
+        counts = question.counts
+        if answer not in counts and len(counts) >= self.max_options:
+            answer = OTHER_ANSWER
+        counts[answer] = counts.get(answer, 0) + 1
+        question.answered += 1
+        tally.changed[question_id] = None
+
+    def count_reaction(self, session_id: str, reaction: str) -> bool:
+        """
+        Count one reaction
+
+        Args:
+            session_id: Session the reaction was sent in
+            reaction: Reaction name
+
+        Returns:
+            False (and nothing counted) if the reaction is not accepted
+        """
+        if reaction not in self.reactions:
+            return False
+        reactions = self._dirty(session_id).reactions
+        reactions[reaction] = reactions.get(reaction, 0) + 1
+        return True
+
+    def _message(
+        self, session_id: str, tally: _SessionTally, question_ids: Iterable[str]
+    ) -> dict:
+        return {
+            "type": TALLY_MESSAGE_TYPE,
+            "session_id": session_id,
+            "questions": {
+                question_id: {
+                    "answered": tally.questions[question_id].answered,
+                    "counts": dict(tally.questions[question_id].counts),
+                }
+                for question_id in question_ids
+                if question_id in tally.questions
+            },
+            "reactions": tally.reactions,
+        }
+
+    async def flush(self, session_id: str) -> bool:
+        """
+        Send a session's changes to its facilitators now
+
+        Args:
+            session_id: Session to flush
+
+        Returns:
+            False if nothing had changed
+        """
+        self.scheduler.cancel(FLUSH_TIMER, session_id)
+        tally = self._sessions.get(session_id)
+        if tally is None or (not tally.changed and not tally.reactions):
+            return False
+        message = self._message(session_id, tally, tally.changed)
+        # The frame owns these now; later events start fresh ones
+        tally.changed = {}
+        tally.reactions = {}
+        self.frames += 1
+        await self.manager.broadcast_to_facilitators(session_id, message)
+        return True
+
+    async def _flush_due(self, timers: List[Timer]):
+        """Flush every session whose interval ended on this tick"""
+        for timer in timers:
+            try:
+                await self.flush(timer.session_id)
+            except Exception as e:
+                logger.error(f"Flushing tallies of session {timer.session_id}: {e}")
+
+    async def send_snapshot(self, websocket: WebSocket, session_id: str):
+        """
+        Send a session's current answer counts to one connection (e.g. a
+        facilitator joining mid-question)
+
+        Args:
+            websocket: Target connection
+            session_id: Session whose tallies to send
+        """
+        tally = self._sessions.get(session_id)
+        if tally is None or not tally.questions:
+            return
+        message = self._message(session_id, tally, tally.questions)
+        message["reactions"] = {}
+        await self.manager.send_personal_message(message, websocket)
+
+    async def finish(self, session_id: str, question_id: str):
+        """
+        Send a question's final counts and stop tallying it
+
+        Args:
+            session_id: Session the question belongs to
+            question_id: The closed question
+        """
+        tally = self._sessions.get(session_id)
+        if tally is None or question_id not in tally.questions:
+            return
+        if question_id in tally.changed:
+            await self.flush(session_id)
+        tally.questions.pop(question_id, None)
+
+    def discard(self, session_id: str):
+        """Forget a session's tallies, dropping anything not yet sent"""
+        if self._sessions.pop(session_id, None) is not None:
+            self.scheduler.cancel(FLUSH_TIMER, session_id)
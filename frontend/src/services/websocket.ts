@@ -10,7 +10,56 @@ export type MessageType =
   | 'message'
   | 'score_update'
   | 'session_update'
-  | 'chat';
+  | 'chat'
+  | 'chat_history'
+  | 'batch'
+  | 'leaderboard_snapshot'
+  | 'leaderboard_delta'
+  | 'leaderboard_ack'
+  | 'ping'
+  | 'pong'
+  | 'team_chat'
+  | 'help_request'
+  | 'join_team'
+  | 'team_joined'
+  | 'watch_team'
+  | 'unwatch_team'
+  | 'team_watched'
+  | 'team_unwatched'
+  | 'session_snapshot'
+  | 'reconnect'
+  | 'open_question'
+  | 'question_opened'
+  | 'close_question'
+  | 'question_closed'
+  | 'stage_question'
+  | 'question_staged'
+  | 'reveal_question'
+  | 'question_revealed'
+  | 'answer'
+  | 'answer_result'
+  | 'reaction'
+  | 'live_tally'
+  | 'connection_rejected'
+  | 'error';
+
+export interface LeaderboardRow {
+  id: string;
+  score: number;
+  rank: number;
+}
+
+export interface ChatHistoryEntry {
+  id: string;
+  user_id: string | null;
+  text: string;
+  sent_at: string;
+}
+
+export interface QuestionTally {
+  answered: number;
+  counts: Record<string, number>;
+}
 
 export interface WebSocketMessage {
   type: MessageType;
@@ -19,10 +68,82 @@ export interface WebSocketMessage {
   data?: unknown;
   message?: string;
   participant_count?: number;
+  /** Present on 'batch' envelopes: the coalesced events, in order */
+  events?: WebSocketMessage[];
+  /** Present on 'batch' envelopes: latest values lifted out of the events */
+  state?: Record<string, unknown>;
+  /** Leaderboard version this message brings the client to */
+  version?: number;
+  /** Present on 'leaderboard_delta': version the delta applies on top of */
+  base_version?: number;
+  /** Leaderboard rows: all of them in a snapshot, changed ones in a delta */
+  rows?: LeaderboardRow[];
+  /** Present on 'leaderboard_delta': IDs dropped from the leaderboard */
+  removed?: string[];
+  /** Session event sequence number (on 'connection': the current one) */
+  seq?: number;
+  /** Present on 'connection' and 'session_snapshot': epoch of the seq numbers */
+  epoch?: string;
+  /** Present on 'reconnect': how long to wait before reconnecting */
+  reconnect_after_ms?: number;
+  /** Present on question and answer messages: the question concerned */
+  question_id?: string;
+  /** Present on 'answer_result': whether the answer matched the key */
+  correct?: boolean;
+  /** Present on 'answer_result': points awarded (on 'question_opened': at stake) */
+  points?: number;
+  /** Present on 'answer_result': the sender's session score afterwards */
+  score?: number;
+  /** Present on 'answer_result': server-measured time since the question opened */
+  response_time_ms?: number;
+  /** Present on 'question_opened': answers later than this are refused */
+  time_limit_ms?: number | null;
+  /** Present on 'question_staged': AES-GCM nonce of the payload (base64) */
+  nonce?: string;
+  /** Present on 'question_staged': the encrypted question payload (base64) */
+  ciphertext?: string;
+  /** Present on 'question_staged': delay before an automatic reveal, if any */
+  reveal_in_ms?: number | null;
+  /** Present on 'question_revealed': AES-GCM key of the staged payload (base64) */
+  key?: string;
+  /** Present on 'question_revealed': the decrypted question payload */
+  question?: Record<string, unknown>;
+  /** Present on 'live_tally': cumulative answer counts of questions that changed */
+  questions?: Record<string, QuestionTally>;
+  /** Present on 'live_tally': reactions since the previous tally */
+  reactions?: Record<string, number>;
+  /** Present on 'chat': message ID (on 'chat_history': see messages) */
+  id?: string;
+  /** Present on 'chat': when the server relayed it; cursor for older pages */
+  sent_at?: string;
+  /** Present on 'chat_history': a page of messages, oldest first */
+  messages?: ChatHistoryEntry[];
+  /** Present on 'chat_history': whether older messages exist */
+  has_more?: boolean;
+  /** Present on 'connection_rejected': which connection limit was reached */
+  reason?: 'worker_full' | 'organization_limit' | 'user_limit';
+  /** Present on 'connection_rejected': how long to wait before retrying */
+  retry_after_ms?: number;
 }
 
+// Close code sent by a server that is restarting (draining its connections)
+const SERVICE_RESTART = 1012;
+// Spread for reconnects after a restart close that came without a hint
+const RESTART_RECONNECT_WINDOW_MS = 10000;
+// Close code sent when the server refuses a connection over a limit
+const TRY_AGAIN_LATER = 1013;
+// How long events after a missing seq wait for it (a replay may still be
+// catching up) before the client resumes to have the gap replayed
+const SEQ_GAP_TIMEOUT_MS = 2000;
+// Events held back behind a gap before resuming at once
+const MAX_PENDING_EVENTS = 256;
+
 export type MessageHandler = (message: WebSocketMessage) => void;
 
+function fromBase64(value: string): Uint8Array {
+  return Uint8Array.from(atob(value), (char) => char.charCodeAt(0));
+}
+
 export class WebSocketService {
   private ws: WebSocket | null = null;
   private url: string;
@@ -33,6 +154,18 @@ export class WebSocketService {
   private reconnectDelay: number = 1000; // Start with 1 second
   private messageHandlers: Map<MessageType | 'all', Set<MessageHandler>> = new Map();
   private isIntentionalClose: boolean = false;
+  // Position in the session's event stream, sent back to resume on reconnect
+  private lastSeq: number | null = null;
+  private epoch: string | null = null;
+  // Events that arrived ahead of a missing seq, by seq
+  private pendingEvents: Map<number, WebSocketMessage> = new Map();
+  private gapTimer: ReturnType<typeof setTimeout> | null = null;
+  // Delay the server asked for before it closes this connection to restart
+  private restartDelay: number | null = null;
+  // Delay the server asked for when it refused this connection
+  private retryDelay: number | null = null;
+  // Encrypted payload of the next question, waiting for its reveal
+  private stagedQuestion: WebSocketMessage | null = null;
 
   constructor(baseUrl?: string) {
     // Auto-detect protocol based on current page protocol
@@ -59,6 +192,11 @@ export class WebSocketService {
    * Mitigation: Use short-lived tokens, HTTPS/WSS in production, and don't log URLs server-side.
    */
   connect(sessionId: string, token: string): void {
+    if (sessionId !== this.sessionId) {
+      this.lastSeq = null;
+      this.epoch = null;
+      this.clearPending();
+    }
     this.sessionId = sessionId;
     this.token = token;
     this.isIntentionalClose = false;
@@ -78,7 +216,11 @@ export class WebSocketService {
       return;
     }
 
-    const wsUrl = `${this.url}/ws/${this.sessionId}?token=${this.token}`;
+    let wsUrl = `${this.url}/ws/${this.sessionId}?token=${this.token}`;
+    if (this.lastSeq !== null && this.epoch !== null) {
+      // Ask the server to replay what was missed while disconnected
+      wsUrl += `&last_seq=${this.lastSeq}&epoch=${encodeURIComponent(this.epoch)}`;
+    }
     this.ws = new WebSocket(wsUrl);
 
     this.ws.onopen = this.handleOpen.bind(this);
@@ -102,27 +244,216 @@ export class WebSocketService {
   private handleMessage(event: MessageEvent): void {
     try {
       const message: WebSocketMessage = JSON.parse(event.data);
-      
-      // Call type-specific handlers
-      const typeHandlers = this.messageHandlers.get(message.type);
-      if (typeHandlers) {
-        typeHandlers.forEach((handler) => {
-          handler(message);
-        });
+
+      // Server heartbeat: answer so the connection is not reaped as dead
+      if (message.type === 'ping') {
+        this.send('pong');
+        return;
+      }
+
+      // The server is about to close this connection to restart
+      if (message.type === 'reconnect') {
+        this.restartDelay = message.reconnect_after_ms ?? null;
+        this.dispatch(message);
+        return;
       }
 
-      // Call generic handlers
-      const allHandlers = this.messageHandlers.get('all');
-      if (allHandlers) {
-        allHandlers.forEach((handler) => {
-          handler(message);
-        });
+      // Admission control refused the connection; it closes with 1013
+      if (message.type === 'connection_rejected') {
+        this.retryDelay = message.retry_after_ms ?? null;
+        this.dispatch(message);
+        return;
+      }
+
+      if (!this.trackPosition(message)) {
+        return;
+      }
+      this.process(message);
+
+      // Events held back behind a gap the message filled
+      let next: WebSocketMessage | undefined;
+      while (this.lastSeq !== null && (next = this.pendingEvents.get(this.lastSeq + 1))) {
+        this.pendingEvents.delete(this.lastSeq + 1);
+        this.lastSeq += 1;
+        this.process(next);
+      }
+      if (this.pendingEvents.size === 0) {
+        this.clearPending();
       }
     } catch (error) {
       console.error('Error parsing WebSocket message:', error);
     }
   }
 
+  /**
+   * Handle a message in sequence: unpack batches, reveal staged questions,
+   * dispatch to handlers
+   */
+  private process(message: WebSocketMessage): void {
+    // Coalesced batches are unpacked so handlers see individual events
+    if (message.type === 'batch' && message.events) {
+      const state = message.state ?? {};
+      message.events.forEach((batched) => {
+        this.dispatch({ ...state, ...batched } as WebSocketMessage);
+      });
+      return;
+    }
+
+    if (message.type === 'question_staged') {
+      this.stagedQuestion = message;
+    } else if (message.type === 'question_revealed') {
+      void this.revealQuestion(message);
+      return;
+    }
+
+    this.dispatch(message);
+
+    // Handlers have applied the leaderboard; future deltas build on it
+    if (
+      (message.type === 'leaderboard_snapshot' || message.type === 'leaderboard_delta') &&
+      message.version !== undefined
+    ) {
+      this.send('leaderboard_ack', { version: message.version });
+    }
+  }
+
+  /**
+   * Follow the session's event sequence
+   * @returns false for an event already processed (replays may overlap live events)
+   */
+  private trackPosition(message: WebSocketMessage): boolean {
+    if (message.type === 'connection') {
+      // When resuming, keep the old position: the replay or a snapshot follows
+      if (this.lastSeq === null && message.seq !== undefined && message.epoch) {
+        this.lastSeq = message.seq;
+        this.epoch = message.epoch;
+      }
+      return true;
+    }
+    if (message.type === 'session_snapshot') {
+      this.lastSeq = message.seq ?? null;
+      this.epoch = message.epoch ?? null;
+      // Held-back events up to the snapshot are part of it
+      this.pendingEvents.forEach((_, seq) => {
+        if (this.lastSeq === null || seq <= this.lastSeq) {
+          this.pendingEvents.delete(seq);
+        }
+      });
+      return true;
+    }
+    if (message.seq === undefined) {
+      return true;
+    }
+    if (this.lastSeq !== null && message.seq <= this.lastSeq) {
+      return false;
+    }
+    if (this.lastSeq !== null && message.seq > this.lastSeq + 1) {
+      // Events were dropped (a full outbound queue) or are still being
+      // replayed: hold this one back until the gap fills, else resume
+      this.pendingEvents.set(message.seq, message);
+      if (this.pendingEvents.size > MAX_PENDING_EVENTS) {
+        this.resync();
+      } else if (this.gapTimer === null) {
+        this.gapTimer = setTimeout(() => this.resync(), SEQ_GAP_TIMEOUT_MS);
+      }
+      return false;
+    }
+    this.lastSeq = message.seq;
+    return true;
+  }
+
+  /**
+   * Forget held-back events and stop waiting for a gap to fill
+   */
+  private clearPending(): void {
+    this.pendingEvents.clear();
+    if (this.gapTimer !== null) {
+      clearTimeout(this.gapTimer);
+      this.gapTimer = null;
+    }
+  }
+
+  /**
+   * Reconnect at once with the last seq processed, so the server replays
+   * the missing events (or sends a snapshot)
+   */
+  private resync(): void {
+    console.warn(`Missed events after seq ${this.lastSeq}; resuming`);
+    this.clearPending();
+    const ws = this.ws;
+    if (ws) {
+      ws.onmessage = null;
+      ws.onclose = null;
+      ws.close(1000, 'Resuming after missed events');
+    }
+    this.ws = null;
+    this.createConnection();
+  }
+
+  /**
+   * Decrypt the staged question with the key from its reveal, then dispatch
+   * the reveal with the question attached
+   */
+  private async revealQuestion(message: WebSocketMessage): Promise<void> {
+    const staged = this.stagedQuestion;
+    if (
+      !staged ||
+      staged.question_id !== message.question_id ||
+      !staged.nonce ||
+      !staged.ciphertext ||
+      !message.key
+    ) {
+      this.dispatch(message);
+      return;
+    }
+    try {
+      const key = await crypto.subtle.importKey(
+        'raw',
+        fromBase64(message.key),
+        'AES-GCM',
+        false,
+        ['decrypt']
+      );
+      // The server binds each payload to its session and question
+      const plaintext = await crypto.subtle.decrypt(
+        {
+          name: 'AES-GCM',
+          iv: fromBase64(staged.nonce),
+          additionalData: new TextEncoder().encode(
+            `${message.session_id}/${message.question_id}`
+          ),
+        },
+        key,
+        fromBase64(staged.ciphertext)
+      );
+      this.dispatch({ ...message, question: JSON.parse(new TextDecoder().decode(plaintext)) });
+    } catch (error) {
+      console.error('Error decrypting staged question:', error);
+      this.dispatch(message);
+    }
+  }
+
+  /**
+   * Deliver a single message to its type-specific and generic handlers
+   */
+  private dispatch(message: WebSocketMessage): void {
+    // Call type-specific handlers
+    const typeHandlers = this.messageHandlers.get(message.type);
+    if (typeHandlers) {
+      typeHandlers.forEach((handler) => {
+        handler(message);
+      });
+    }
+
+    // Call generic handlers
+    const allHandlers = this.messageHandlers.get('all');
+    if (allHandlers) {
+      allHandlers.forEach((handler) => {
+        handler(message);
+      });
+    }
+  }
+
   /**
    * Handle WebSocket errors
    */
@@ -135,15 +466,31 @@ export class WebSocketService {
    */
   private handleClose(event: CloseEvent): void {
     console.log('WebSocket disconnected:', event.code, event.reason);
-    
-    // Attempt to reconnect if not an intentional close
+
+    // A planned restart is not a failure: reconnect (and resume) after the
+    // hinted delay, spread out so the fleet is not hit all at once
+    if (!this.isIntentionalClose && event.code === SERVICE_RESTART) {
+      const delay = this.restartDelay ?? Math.random() * RESTART_RECONNECT_WINDOW_MS;
+      this.restartDelay = null;
+      this.reconnectAttempts = 0;
+      this.reconnectDelay = 1000;
+      setTimeout(() => {
+        this.createConnection();
+      }, delay);
+      return;
+    }
+
+    // Attempt to reconnect if not an intentional close; a refused connection
+    // waits at least as long as the server asked
+    const retryDelay = event.code === TRY_AGAIN_LATER ? this.retryDelay : null;
+    this.retryDelay = null;
     if (!this.isIntentionalClose && this.reconnectAttempts < this.maxReconnectAttempts) {
       this.reconnectAttempts++;
       console.log(`Attempting to reconnect (${this.reconnectAttempts}/${this.maxReconnectAttempts})...`);
       
       setTimeout(() => {
         this.createConnection();
-      }, this.reconnectDelay);
+      }, Math.max(this.reconnectDelay, retryDelay ?? 0));
       
       // Exponential backoff
       this.reconnectDelay = Math.min(this.reconnectDelay * 2, 30000); // Max 30 seconds
@@ -213,6 +560,7 @@ export class WebSocketService {
    */
   disconnect(): void {
     this.isIntentionalClose = true;
+    this.clearPending();
     
     if (this.ws) {
       this.ws.close(1000, 'Client initiated disconnect');